@@ -11,6 +11,9 @@ class ExportOptionsDTO:
     id_lista: str  # Codigo da lista (ex: LST-2026-0001)
     template_latex: str
     tipo_exportacao: str = "direta"  # "direta" ou "manual"
+    motor_pdf: str = "latex"  # "latex" (pdflatex) ou "html" (rascunho rápido pelo Qt WebEngine)
+    forcar_reconstrucao: bool = False  # Ignora o artefato guardado de uma exportação idêntica (cache_artefatos)
+    previa_incremental: bool = False  # PDF costurado de trechos por questão (previa_incremental)
     output_dir: Optional[str] = None
     incluir_gabarito: bool = True
     incluir_resolucao: bool = False
@@ -25,8 +28,13 @@ class ExportOptionsDTO:
     ano: Optional[str] = None
     # Campos para exportação randomizada (múltiplas versões)
     gerar_versoes_randomizadas: bool = False
-    quantidade_versoes: int = 1  # 1-4 versões (TIPO A, B, C, D)
+    quantidade_versoes: int = 1  # 1-40 versões (TIPO A, B, C, ...)
     sufixo_versao: Optional[str] = None  # Ex: "TIPO A", "TIPO B"
+    # Restrições do gerador de versões (gerador_versoes)
+    semente_versoes: Optional[int] = None  # None = derivada do código da lista
+    max_sequencia_letra: int = 3  # Máximo de questões seguidas com a mesma letra no gabarito (0 = sem limite)
+    distancia_minima_versoes: float = 0.3  # Distância de Kendall mínima entre as ordens (0-1)
+    questoes_fixas: Optional[List[str]] = None  # Códigos das questões que não mudam de posição
     # Campos específicos para template CEAB (simuladoCeab)
     data_aplicacao: Optional[str] = None  # Ex: "02/12/2025"
     serie_simulado: Optional[str] = None  # Ex: "3º ANO VESPERTINO"
@@ -0,0 +1,363 @@
+"""
+Diagnóstico de falhas do pdflatex por bisseção das questões.
+
+Quando a compilação de uma lista grande falha, o log do pdflatex aponta uma
+linha do documento gerado, não a questão do banco. O diagnóstico monta
+documentos com subconjuntos das questões (mesmo template e preâmbulo) e os
+compila em paralelo, cada um em seu diretório de build, dividindo ao meio os
+grupos que falham até chegar à menor questão (ou ao menor grupo, quando a
+falha só aparece com questões juntas). A linha do log do build isolado é
+mapeada de volta ao código da questão e ao campo (enunciado, alternativa).
+
+O custo é limitado: uma rodada com o documento sem questões e o completo,
+depois uma rodada paralela por nível da bisseção, no máximo max_compilacoes
+compilações de uma passada. Pode ser desligado com EXPORT_DIAGNOSTICO=0.
+"""
+import logging
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Mapping, Optional, Sequence, Tuple
+
+from src.application.services.contexto_exportacao import (
+    ContextoExportacao, ExportacaoCancelada, ESTADO_COMPILANDO
+)
+from src.application.services.derivados_imagem import MetadadosImagem
+from src.application.services.export_service import CompilacaoLatexError, ExportService
+from src.application.services.exportacao_paralela import numero_workers_padrao
+from src.application.services.verificador_latex import LatexInvalidoError
+
+logger = logging.getLogger(__name__)
+
+MAX_COMPILACOES_PADRAO = 48
+
+# Primeira mensagem de erro do TeX e a linha do arquivo em que ela ocorreu
+_RE_ERRO_LOG = re.compile(r'^! (.+)$', re.MULTILINE)
+_RE_LINHA_LOG = re.compile(r'^l\.(\d+) ?(.*)$', re.MULTILINE)
+
+
+def diagnostico_habilitado() -> bool:
+    """False com EXPORT_DIAGNOSTICO=0"""
+    return os.getenv('EXPORT_DIAGNOSTICO', '1') != '0'
+
+
+def max_compilacoes_padrao() -> int:
+    """EXPORT_DIAGNOSTICO_MAX_COMPILACOES ou MAX_COMPILACOES_PADRAO"""
+    configurado = os.getenv('EXPORT_DIAGNOSTICO_MAX_COMPILACOES', '')
+    return int(configurado) if configurado.isdigit() and int(configurado) > 0 else MAX_COMPILACOES_PADRAO
+
+
+def analisar_log(log: str) -> Tuple[str, Optional[int], str]:
+    """
+    Extrai do .log do pdflatex o primeiro erro e a linha do documento.
+
+    Returns:
+        Tupla (mensagem do erro, linha 1-based ou None, trecho da linha no log)
+    """
+    erro = _RE_ERRO_LOG.search(log or '')
+    if erro is None:
+        return '', None, ''
+    linha = _RE_LINHA_LOG.search(log, erro.end())
+    if linha is None:
+        return erro.group(1).strip(), None, ''
+    return erro.group(1).strip(), int(linha.group(1)), linha.group(2).strip()
+
+
+@dataclass
+class _Compilacao:
+    """Resultado da compilação de um subconjunto das questões"""
+    indices: Tuple[int, ...]
+    sucesso: bool
+    erro: str = ''
+    linha: Optional[int] = None
+    trecho: str = ''
+
+
+@dataclass
+class _Grupo:
+    """Grupo que falha: os fixos entram em todos os builds, os candidatos são divididos"""
+    fixos: Tuple[int, ...]
+    candidatos: Tuple[int, ...]
+    resultado: _Compilacao
+    trocar: bool = False   # reduzir também os fixos depois dos candidatos
+
+
+@dataclass
+class FalhaIsolada:
+    """Menor conjunto de questões que reproduz a falha"""
+    indices: Tuple[int, ...]   # posições das questões no documento original
+    codigos: Tuple[str, ...]
+    erro: str                  # mensagem do TeX (ou da verificação estática)
+    linha: Optional[int] = None  # linha no documento do build isolado
+    trecho: str = ''           # contexto da linha, como aparece no log
+    campo: str = ''            # ex: 'enunciado', 'alternativa B'
+    questao: str = ''          # código da questão da linha
+    minima: bool = True        # False se o limite de compilações interrompeu a bisseção
+
+    def descrever(self) -> str:
+        """Ex: 'Q-2026-0001 (alternativa B), linha 120: Missing $ inserted. [l.120 x^2]'"""
+        if len(self.codigos) == 1:
+            local = self.codigos[0]
+        else:
+            alvo = 'grupo' if self.minima else 'grupo não reduzido'
+            local = f"{alvo} {', '.join(self.codigos)}"
+        detalhes = [parte for parte in (self.questao if len(self.codigos) > 1 else '', self.campo) if parte]
+        if detalhes:
+            local += f" ({', '.join(detalhes)})"
+        if self.linha is not None:
+            local += f", linha {self.linha}"
+        texto = f"{local}: {self.erro or 'erro de compilação'}"
+        if self.trecho:
+            texto += f" [l.{self.linha} {self.trecho}]"
+        return texto
+
+
+@dataclass
+class DiagnosticoCompilacao:
+    """Resultado do diagnóstico de uma compilação que falhou"""
+    falhas: List[FalhaIsolada] = field(default_factory=list)
+    compilacoes: int = 0
+    rodadas: int = 0
+    segundos: float = 0.0
+    falha_no_template: bool = False   # o documento sem questões já falha
+    reproduzida: bool = True          # o documento completo falhou de novo
+    erro_template: str = ''
+
+    def resumo(self) -> str:
+        """Texto legível para a mensagem de erro"""
+        custo = f"{self.compilacoes} compilações em {self.rodadas} rodadas, {self.segundos:.1f}s"
+        if self.falha_no_template:
+            return (f"Diagnóstico ({custo}): o documento falha mesmo sem questões; "
+                    f"verifique o template, o cabeçalho e a caixa de fórmulas. {self.erro_template}").strip()
+        if not self.reproduzida:
+            return f"Diagnóstico ({custo}): a falha não se repetiu compilando em uma passada."
+        if not self.falhas:
+            return f"Diagnóstico ({custo}): nenhuma questão isolada."
+        linhas = [f"Diagnóstico ({custo}) — questões que impedem a compilação:"]
+        linhas += [f"- {falha.descrever()}" for falha in self.falhas]
+        return "\n".join(linhas)
+
+
+class CompilacaoDiagnosticadaError(CompilacaoLatexError):
+    """Falha do pdflatex com as questões responsáveis já isoladas"""
+
+    def __init__(self, original: CompilacaoLatexError, diagnostico: DiagnosticoCompilacao):
+        self.diagnostico = diagnostico
+        super().__init__(f"{original}\n\n{diagnostico.resumo()}", original.log)
+
+
+class BissecaoCompilacao:
+    """
+    Isola as questões que fazem o pdflatex falhar.
+
+    Uso:
+        bissecao = BissecaoCompilacao(montar, codigos, campos, output_dir)
+        diagnostico = bissecao.diagnosticar()
+    """
+
+    def __init__(self, montar: Callable[[Sequence[int]], str], codigos: Sequence[str],
+                 campos: Callable[[int], List[Tuple[str, str]]], output_dir: Path,
+                 colunas: int = 1,
+                 metadados_imagens: Optional[Mapping[str, MetadadosImagem]] = None,
+                 max_workers: Optional[int] = None,
+                 max_compilacoes: Optional[int] = None,
+                 contexto: Optional[ContextoExportacao] = None):
+        """
+        Args:
+            montar: Função (posições das questões) -> documento LaTeX com apenas elas;
+                sem posições deve gerar um documento válido (ex: um \\item vazio)
+            codigos: Código de cada questão, na ordem do documento original
+            campos: Função (posição) -> pares (nome do campo, LaTeX gerado para ele)
+            output_dir: Diretório de saída (os builds ficam em um subdiretório removido no fim)
+            colunas: Colunas do layout, para os derivados de imagem
+            metadados_imagens: Hash/dimensões das imagens conhecidas pelo banco
+            max_workers: Compilações simultâneas (padrão: numero_workers_padrao)
+            max_compilacoes: Limite de compilações (padrão: max_compilacoes_padrao())
+            contexto: Progresso e cancelamento (opcional)
+        """
+        self._montar = montar
+        self.codigos = list(codigos)
+        self._campos = campos
+        self.output_dir = Path(output_dir)
+        self.colunas = colunas
+        self.metadados_imagens = metadados_imagens
+        self.max_workers = max_workers
+        self.max_compilacoes = max_compilacoes or max_compilacoes_padrao()
+        self.contexto = contexto
+        self._compilacoes = 0
+
+    def diagnosticar(self) -> DiagnosticoCompilacao:
+        """
+        Executa a bisseção.
+
+        Returns:
+            DiagnosticoCompilacao com as falhas isoladas e o custo
+        """
+        inicio = time.perf_counter()
+        diagnostico = DiagnosticoCompilacao()
+        raiz = self.output_dir / f".diagnostico_{os.getpid()}_{int(time.time() * 1000)}"
+        area = raiz / ".imagens_build"
+        self._compilacoes = 0
+        try:
+            todas = tuple(range(len(self.codigos)))
+            base, completo = self._rodada(raiz, area, [(), todas])
+            diagnostico.rodadas = 1
+            if not base.sucesso:
+                diagnostico.falha_no_template = True
+                diagnostico.erro_template = base.erro
+            elif completo.sucesso:
+                diagnostico.reproduzida = False
+            else:
+                diagnostico.rodadas += self._bissectar(raiz, area, completo, diagnostico.falhas)
+        finally:
+            shutil.rmtree(raiz, ignore_errors=True)
+        diagnostico.compilacoes = self._compilacoes
+        diagnostico.segundos = time.perf_counter() - inicio
+        logger.info(diagnostico.resumo())
+        return diagnostico
+
+    def _bissectar(self, raiz: Path, area: Path, completo: _Compilacao,
+                   falhas: List[FalhaIsolada]) -> int:
+        """
+        Divide os grupos que falham, uma rodada paralela por nível; retorna as rodadas.
+
+        Quando as duas metades de um grupo compilam sozinhas, a falha depende de
+        questões das duas: uma metade passa a ficar fixa em todos os builds
+        enquanto a outra é reduzida, e depois os papéis se invertem.
+        """
+        rodadas = 0
+        fronteira = [_Grupo((), completo.indices, completo)]
+        vistos = set()
+        while fronteira:
+            divisiveis = []
+            for grupo in fronteira:
+                if len(grupo.candidatos) > 1:
+                    divisiveis.append(grupo)
+                elif grupo.trocar and len(grupo.fixos) > 1:
+                    divisiveis.append(_Grupo(grupo.candidatos, grupo.fixos, grupo.resultado, trocar=False))
+                elif grupo.resultado.indices not in vistos:
+                    vistos.add(grupo.resultado.indices)
+                    falhas.append(self._isolada(grupo.resultado))
+            if not divisiveis:
+                break
+            if self._compilacoes + 2 * len(divisiveis) > self.max_compilacoes:
+                logger.warning(f"Diagnóstico interrompido no limite de {self.max_compilacoes} compilações")
+                falhas.extend(self._isolada(grupo.resultado, minima=False) for grupo in divisiveis)
+                break
+
+            metades = []
+            for grupo in divisiveis:
+                meio = len(grupo.candidatos) // 2
+                metades += [grupo.candidatos[:meio], grupo.candidatos[meio:]]
+            resultados = self._rodada(raiz, area, [
+                tuple(sorted(grupo.fixos + metade))
+                for grupo, metade in zip((g for g in divisiveis for _ in range(2)), metades)
+            ])
+            rodadas += 1
+
+            fronteira = []
+            for i, grupo in enumerate(divisiveis):
+                falharam = [
+                    _Grupo(grupo.fixos, metades[k], resultados[k], grupo.trocar)
+                    for k in (2 * i, 2 * i + 1) if not resultados[k].sucesso
+                ]
+                if falharam:
+                    fronteira.extend(falharam)
+                elif not grupo.fixos:
+                    # Cada metade compila sozinha: a falha depende das questões juntas
+                    fronteira.append(_Grupo(metades[2 * i], metades[2 * i + 1], grupo.resultado, trocar=True))
+                else:
+                    fronteira.append(_Grupo(grupo.fixos, (), grupo.resultado))
+        return rodadas
+
+    def _rodada(self, raiz: Path, area: Path, subconjuntos: List[Tuple[int, ...]]) -> List[_Compilacao]:
+        """Compila os subconjuntos em paralelo, cada um em seu diretório"""
+        trabalhos = []
+        for indices in subconjuntos:
+            self._compilacoes += 1
+            trabalhos.append((indices, raiz / f"build_{self._compilacoes}", f"diagnostico_{self._compilacoes}"))
+        workers = self.max_workers or numero_workers_padrao(len(trabalhos))
+        if self.contexto:
+            self.contexto.etapa(ESTADO_COMPILANDO, f"diagnóstico: {len(trabalhos)} builds")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda trabalho: self._compilar(area, *trabalho), trabalhos))
+
+    def _compilar(self, area: Path, indices: Tuple[int, ...], diretorio: Path,
+                  base_filename: str) -> _Compilacao:
+        """Uma passada do pdflatex (a falha aparece na primeira) com o documento do subconjunto"""
+        diretorio.mkdir(parents=True, exist_ok=True)
+        try:
+            ExportService(max_passadas=1).compilar_latex_para_pdf(
+                self._montar(indices), diretorio, base_filename, area, self.contexto,
+                colunas=self.colunas, metadados_imagens=self.metadados_imagens
+            )
+        except ExportacaoCancelada:
+            raise
+        except LatexInvalidoError as e:
+            problema = e.problemas[0]
+            return _Compilacao(indices, False, problema.mensagem, problema.linha)
+        except CompilacaoLatexError as e:
+            erro, linha, trecho = analisar_log(e.log)
+            return _Compilacao(indices, False, erro or str(e), linha, trecho)
+        except RuntimeError as e:
+            return _Compilacao(indices, False, str(e))
+        return _Compilacao(indices, True)
+
+    def _isolada(self, grupo: _Compilacao, minima: bool = True) -> FalhaIsolada:
+        """FalhaIsolada do grupo, com a linha do log localizada em uma questão e um campo"""
+        questao, campo = self._localizar(grupo.indices, grupo.linha)
+        return FalhaIsolada(
+            indices=grupo.indices,
+            codigos=tuple(self.codigos[i] for i in grupo.indices),
+            erro=grupo.erro,
+            linha=grupo.linha,
+            trecho=grupo.trecho,
+            campo=campo,
+            questao=questao,
+            minima=minima
+        )
+
+    def _localizar(self, indices: Tuple[int, ...], linha: Optional[int]) -> Tuple[str, str]:
+        """
+        Mapeia a linha do documento do subconjunto para (código da questão, campo).
+
+        Os campos são procurados no documento em ordem, cada um a partir do fim
+        do anterior. Uma linha entre campos (ex: fim de parágrafo, \\end{enumerate})
+        fica com a questão anterior e sem campo.
+        """
+        unica = self.codigos[indices[0]] if len(indices) == 1 else ''
+        if linha is None:
+            return unica, ''
+        documento = self._montar(indices)
+        inicios = [0] + [m.end() for m in re.finditer('\n', documento)]
+        if linha > len(inicios):
+            return unica, ''
+        inicio_linha = inicios[linha - 1]
+        fim_linha = inicios[linha] if linha < len(inicios) else len(documento)
+
+        cursor = 0
+        questao = ''
+        for indice in indices:
+            for nome, fragmento in self._campos(indice):
+                inicio = documento.find(fragmento, cursor) if fragmento else -1
+                if inicio < 0:
+                    continue
+                if fim_linha <= inicio:
+                    return questao or unica, ''
+                questao = self.codigos[indice]
+                fim = inicio + len(fragmento)
+                if inicio_linha < fim:
+                    return questao, nome
+                cursor = fim
+        return questao or unica, ''
+
+
+def diagnosticar_compilacao(montar: Callable[[Sequence[int]], str], codigos: Sequence[str],
+                            campos: Callable[[int], List[Tuple[str, str]]], output_dir: Path,
+                            **kwargs) -> DiagnosticoCompilacao:
+    """Atalho para BissecaoCompilacao(...).diagnosticar()"""
+    return BissecaoCompilacao(montar, codigos, campos, output_dir, **kwargs).diagnosticar()
@@ -0,0 +1,251 @@
+"""
+Cache dos artefatos finais das exportações (.pdf, .tex ou .html).
+
+Exportar de novo a mesma lista com as mesmas opções repetia todo o pipeline
+(snapshot, transformação, template, imagens e pdflatex) para produzir o
+mesmo arquivo. Aqui cada artefato é guardado em disco, endereçado pelo hash
+de tudo que influencia a saída:
+
+- o snapshot da lista (título, fórmulas, questões com alternativas e
+  respostas, variantes, o hash das imagens cadastradas e o hash do conteúdo
+  de cada imagem remota no cache de imagens remotas);
+- o conteúdo do arquivo do template;
+- todos os campos do ExportOptionsDTO, exceto o diretório de saída e
+  forcar_reconstrucao;
+- o índice e a semente da versão (exportações randomizadas);
+- as versões do compilador de marcação, dos fragmentos e dos derivados de
+  imagem, o DPI dos derivados e, no pdflatex, a instalação do TeX.
+
+Um acerto apenas copia o artefato para o diretório de saída. A remoção é LRU
+(mtime) limitada pelo tamanho total; forcar_reconstrucao ignora o artefato
+guardado e o substitui pelo novo. EXPORT_CACHE_ARTEFATOS=0 desliga o cache.
+
+As imagens remotas são obtidas (ou revalidadas, vencida a validade do cache
+de imagens remotas) ao calcular a chave, então uma imagem trocada no servidor
+sob a mesma URL gera outro artefato. Arquivos avulsos fora da tabela imagem
+entram apenas pelo caminho: trocar o conteúdo mantendo o nome exige
+forcar_reconstrucao.
+"""
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import Any, Optional
+
+from src.application.dtos.export_dto import ExportOptionsDTO
+from src.application.services.cache_fragmentos import VERSAO_FRAGMENTO
+from src.application.services.cache_imagens_remotas import get_cache_imagens_remotas
+from src.application.services.derivados_imagem import VERSAO_DERIVADO, derivados_habilitados, get_cache_derivados
+from src.application.services.documento_html import MOTOR_HTML
+from src.application.services.gerador_versoes import NUMPY_AVAILABLE
+from src.application.services.markup_compiler import VERSAO_COMPILADOR
+from src.application.services.metricas_exportacao import ETAPA_CACHE_ARTEFATO, span
+from src.application.services.template_latex import get_cache_templates
+from src.infrastructure.logging import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = 'database/cache_artefatos'
+LIMITE_PADRAO_BYTES = 1024 * 1024 * 1024
+# Incrementar quando a montagem dos documentos mudar de forma que a chave não capture
+VERSAO_ARTEFATO = 1
+# Campos das opções que não alteram o conteúdo do artefato
+_CAMPOS_IGNORADOS = ('output_dir', 'forcar_reconstrucao')
+
+
+def _json_padrao(valor: Any) -> Any:
+    """Serializa os mapeamentos imutáveis e dataclasses do snapshot"""
+    if dataclasses.is_dataclass(valor):
+        return dataclasses.asdict(valor)
+    if hasattr(valor, 'items'):
+        return dict(valor.items())
+    raise TypeError(f"Tipo não serializável na chave do artefato: {type(valor).__name__}")
+
+
+def _digest(partes: Any) -> str:
+    conteudo = json.dumps(partes, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=_json_padrao)
+    return hashlib.blake2b(conteudo.encode('utf-8'), digest_size=20).hexdigest()
+
+
+def _conteudo_imagens_remotas(imagens) -> dict:
+    """URL -> objeto no cache de imagens remotas (hash do conteúdo; None se indisponível)"""
+    urls = [imagem for imagem in imagens if imagem.startswith(('http://', 'https://'))]
+    if not urls:
+        return {}
+    # O pipeline baixaria as mesmas imagens logo depois; aqui elas já ficam no cache
+    locais = get_cache_imagens_remotas().obter_varias(urls)
+    return {url: local.name if local is not None else None for url, local in locais.items()}
+
+
+def chave_snapshot(snapshot) -> str:
+    """
+    Hash do conteúdo de um ExportSnapshot (calculado uma vez por job e
+    reaproveitado nas chaves de todas as versões).
+
+    Args:
+        snapshot: ExportSnapshot da lista
+
+    Returns:
+        Hash hexadecimal
+    """
+    return _digest([
+        snapshot.codigo, snapshot.titulo, snapshot.tipo, snapshot.formulas,
+        snapshot.questoes, snapshot.variantes, snapshot.imagens,
+        {nome: metadados.hash_md5 for nome, metadados in snapshot.metadados_imagens.items()},
+        _conteudo_imagens_remotas(snapshot.imagens),
+    ])
+
+
+def _hash_template(nome_template: str) -> str:
+    caminho = get_cache_templates().diretorio / nome_template
+    try:
+        return hashlib.blake2b(caminho.read_bytes(), digest_size=20).hexdigest()
+    except OSError:
+        # O pipeline vai falhar com a mensagem do template ausente
+        return ''
+
+
+def _identidade_motor(opcoes: ExportOptionsDTO) -> list:
+    """Versões do que transforma as entradas no artefato"""
+    identidade = [VERSAO_ARTEFATO, VERSAO_COMPILADOR, VERSAO_FRAGMENTO, opcoes.motor_pdf]
+    if opcoes.motor_pdf != MOTOR_HTML and opcoes.tipo_exportacao == 'direta':
+        # Import local: identificar a distribuição executa o pdflatex (uma vez por processo)
+        from src.application.services.formato_latex import identificar_distribuicao
+        derivados = derivados_habilitados()
+        identidade += [
+            identificar_distribuicao(), VERSAO_DERIVADO, derivados,
+            get_cache_derivados().dpi if derivados else None,
+        ]
+    return identidade
+
+
+def chave_artefato(snapshot_hash: str, opcoes: ExportOptionsDTO,
+                   indice_versao: Optional[int] = None, semente: Optional[int] = None) -> str:
+    """
+    Calcula a chave de um artefato de exportação.
+
+    Args:
+        snapshot_hash: Resultado de chave_snapshot
+        opcoes: Opções da exportação (com o sufixo da versão, se houver)
+        indice_versao: Índice da versão randomizada (None para a lista)
+        semente: Semente do plano de versões
+
+    Returns:
+        Hash hexadecimal
+    """
+    campos = {
+        nome: valor for nome, valor in dataclasses.asdict(opcoes).items()
+        if nome not in _CAMPOS_IGNORADOS
+    }
+    return _digest([
+        snapshot_hash, _hash_template(opcoes.template_latex), campos,
+        # Sem NumPy as versões vêm de outro sorteio
+        indice_versao, semente, NUMPY_AVAILABLE if indice_versao is not None else None,
+        _identidade_motor(opcoes),
+    ])
+
+
+class CacheArtefatos:
+    """
+    Artefatos de exportação em disco endereçados pela chave, com remoção LRU.
+    """
+
+    def __init__(self, diretorio: str = CAMINHO_PADRAO, limite_bytes: int = LIMITE_PADRAO_BYTES):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+        self._lock = Lock()
+        self._metrics = get_metrics_collector()
+
+    def _arquivo(self, chave: str, extensao: str) -> Path:
+        return self.diretorio / f"{chave}{extensao}"
+
+    def copiar_para(self, chave: str, destino: Path) -> Optional[Path]:
+        """
+        Copia o artefato guardado para o destino.
+
+        Args:
+            chave: Chave calculada com chave_artefato
+            destino: Arquivo de saída (a extensão escolhe o artefato)
+
+        Returns:
+            O destino, ou None se o artefato não estiver no cache
+        """
+        origem = self._arquivo(chave, destino.suffix)
+        with span(ETAPA_CACHE_ARTEFATO, destino.name) as medido:
+            try:
+                os.utime(origem)  # LRU
+                destino.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(origem, destino)
+            except FileNotFoundError:
+                if self._metrics:
+                    self._metrics.increment("cache_artefatos_falhas")
+                return None
+            medido.registrar(bytes=destino.stat().st_size)
+        if self._metrics:
+            self._metrics.increment("cache_artefatos_acertos")
+        logger.info(f"Artefato reaproveitado do cache: {destino.name}")
+        return destino
+
+    def gravar(self, chave: str, arquivo: Path) -> None:
+        """
+        Guarda o artefato gerado (substitui o anterior com a mesma chave).
+
+        Args:
+            chave: Chave calculada com chave_artefato
+            arquivo: Artefato recém-gerado no diretório de saída
+        """
+        destino = self._arquivo(chave, arquivo.suffix)
+        temporario = destino.with_name(f"{destino.name}.{os.getpid()}.{get_ident()}.tmp")
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(arquivo, temporario)
+            os.replace(temporario, destino)
+        except OSError as e:
+            temporario.unlink(missing_ok=True)
+            logger.warning(f"Não foi possível guardar {arquivo.name} no cache de artefatos: {e}")
+            return
+        self._podar()
+
+    def _podar(self) -> None:
+        """Remove os artefatos menos usados quando o total passa do limite"""
+        with self._lock:
+            arquivos = []
+            total = 0
+            for entrada in os.scandir(self.diretorio):
+                if entrada.is_file() and not entrada.name.endswith('.tmp'):
+                    estado = entrada.stat()
+                    arquivos.append((estado.st_mtime, estado.st_size, entrada.path))
+                    total += estado.st_size
+            for _, tamanho, caminho in sorted(arquivos):
+                if total <= self.limite_bytes:
+                    break
+                Path(caminho).unlink(missing_ok=True)
+                total -= tamanho
+
+    def limpar(self) -> None:
+        """Remove todos os artefatos"""
+        if not self.diretorio.exists():
+            return
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_file():
+                Path(entrada.path).unlink(missing_ok=True)
+
+
+def cache_artefatos_habilitado() -> bool:
+    """O cache é usado a menos que EXPORT_CACHE_ARTEFATOS seja '0'"""
+    return os.getenv('EXPORT_CACHE_ARTEFATOS', '1') != '0'
+
+
+_cache_artefatos: Optional[CacheArtefatos] = None
+
+
+def get_cache_artefatos() -> CacheArtefatos:
+    """Retorna o cache de artefatos global (diretório via CACHE_ARTEFATOS_PATH)"""
+    global _cache_artefatos
+    if _cache_artefatos is None:
+        _cache_artefatos = CacheArtefatos(os.getenv('CACHE_ARTEFATOS_PATH', CAMINHO_PADRAO))
+    return _cache_artefatos
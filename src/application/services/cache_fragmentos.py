@@ -0,0 +1,207 @@
+"""
+Cache persistente de fragmentos LaTeX por questão.
+
+Cada bloco \\item renderizado é gravado em um arquivo SQLite ao lado do banco
+principal, indexado pelo hash de tudo que influencia a saída: enunciado,
+alternativas (na ordem exibida), fonte/ano, configuração da questão
+(normal/5linhas/espaco_borda), modo de centralização de imagens e versão do
+compilador de marcação. Reexportar uma lista depois de corrigir uma questão
+só transforma a questão alterada.
+
+A remoção é LRU limitada pelo tamanho total dos fragmentos.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+from src.application.services.markup_compiler import VERSAO_COMPILADOR
+from src.infrastructure.logging import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Incrementar quando o formato do bloco \item mudar no ExportController
+VERSAO_FRAGMENTO = 1
+
+CAMINHO_PADRAO = 'database/cache_fragmentos.db'
+LIMITE_PADRAO_BYTES = 64 * 1024 * 1024
+
+
+def chave_fragmento(
+    enunciado: str,
+    alternativas: Iterable[str],
+    config_questao: str = 'normal',
+    centralizar_imagens: bool = True,
+    fonte: str = '',
+    ano: str = ''
+) -> str:
+    """
+    Calcula a chave de conteúdo de um bloco de questão.
+
+    Args:
+        enunciado: Texto bruto do enunciado
+        alternativas: Textos brutos das alternativas, na ordem exibida
+        config_questao: 'normal', '5linhas' ou 'espaco_borda'
+        centralizar_imagens: Modo de centralização das imagens do enunciado
+        fonte: Fonte exibida no cabeçalho
+        ano: Ano exibido no cabeçalho
+
+    Returns:
+        Hash hexadecimal
+    """
+    conteudo = json.dumps(
+        [VERSAO_COMPILADOR, VERSAO_FRAGMENTO, config_questao, bool(centralizar_imagens),
+         fonte or '', ano or '', enunciado or '', [a or '' for a in alternativas]],
+        ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.blake2b(conteudo.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class CacheFragmentos:
+    """
+    Cache em disco (SQLite) de blocos LaTeX de questões com remoção LRU.
+    """
+
+    def __init__(self, caminho: str = CAMINHO_PADRAO, limite_bytes: int = LIMITE_PADRAO_BYTES):
+        self.caminho = Path(caminho)
+        self.limite_bytes = limite_bytes
+        self._lock = Lock()
+        self._metrics = get_metrics_collector()
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._tamanho_total = 0
+
+    def _conectar(self) -> sqlite3.Connection:
+        if self._conexao is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            conexao = sqlite3.connect(str(self.caminho), check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS fragmento ('
+                ' chave TEXT PRIMARY KEY,'
+                ' conteudo TEXT NOT NULL,'
+                ' tamanho INTEGER NOT NULL,'
+                ' ultimo_acesso REAL NOT NULL)'
+            )
+            conexao.execute(
+                'CREATE INDEX IF NOT EXISTS idx_fragmento_acesso ON fragmento (ultimo_acesso)'
+            )
+            conexao.commit()
+            self._tamanho_total = conexao.execute(
+                'SELECT COALESCE(SUM(tamanho), 0) FROM fragmento'
+            ).fetchone()[0]
+            self._conexao = conexao
+        return self._conexao
+
+    def obter_varios(self, chaves: Iterable[str]) -> Dict[str, str]:
+        """
+        Busca vários fragmentos de uma vez e marca os encontrados como usados.
+
+        Args:
+            chaves: Chaves calculadas com chave_fragmento
+
+        Returns:
+            Dict chave -> fragmento, apenas com as chaves encontradas
+        """
+        chaves = list(dict.fromkeys(chaves))
+        if not chaves:
+            return {}
+        encontrados: Dict[str, str] = {}
+        try:
+            with self._lock:
+                conexao = self._conectar()
+                # Limite de parâmetros por consulta no SQLite
+                for inicio in range(0, len(chaves), 500):
+                    lote = chaves[inicio:inicio + 500]
+                    marcadores = ','.join('?' * len(lote))
+                    encontrados.update(conexao.execute(
+                        f'SELECT chave, conteudo FROM fragmento WHERE chave IN ({marcadores})', lote
+                    ).fetchall())
+                if encontrados:
+                    agora = time.time()
+                    conexao.executemany(
+                        'UPDATE fragmento SET ultimo_acesso = ? WHERE chave = ?',
+                        [(agora, chave) for chave in encontrados]
+                    )
+                    conexao.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache de fragmentos indisponível: {e}")
+            return {}
+
+        if self._metrics:
+            self._metrics.increment("cache_fragmentos_acertos", len(encontrados))
+            self._metrics.increment("cache_fragmentos_falhas", len(chaves) - len(encontrados))
+        return encontrados
+
+    def gravar_varios(self, fragmentos: Dict[str, str]) -> None:
+        """
+        Grava fragmentos e aplica o limite de tamanho.
+
+        Args:
+            fragmentos: Dict chave -> bloco LaTeX
+        """
+        if not fragmentos:
+            return
+        try:
+            with self._lock:
+                conexao = self._conectar()
+                agora = time.time()
+                for chave, conteudo in fragmentos.items():
+                    anterior = conexao.execute(
+                        'SELECT tamanho FROM fragmento WHERE chave = ?', (chave,)
+                    ).fetchone()
+                    tamanho = len(conteudo.encode('utf-8'))
+                    conexao.execute(
+                        'INSERT OR REPLACE INTO fragmento (chave, conteudo, tamanho, ultimo_acesso)'
+                        ' VALUES (?, ?, ?, ?)',
+                        (chave, conteudo, tamanho, agora)
+                    )
+                    self._tamanho_total += tamanho - (anterior[0] if anterior else 0)
+                self._remover_excedente(conexao)
+                conexao.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Não foi possível gravar no cache de fragmentos: {e}")
+
+    def _remover_excedente(self, conexao: sqlite3.Connection) -> None:
+        if self._tamanho_total <= self.limite_bytes:
+            return
+        removidas: List[str] = []
+        for chave, tamanho in conexao.execute(
+            'SELECT chave, tamanho FROM fragmento ORDER BY ultimo_acesso'
+        ):
+            if self._tamanho_total <= self.limite_bytes:
+                break
+            removidas.append(chave)
+            self._tamanho_total -= tamanho
+        conexao.executemany('DELETE FROM fragmento WHERE chave = ?', [(c,) for c in removidas])
+        logger.debug(f"Cache de fragmentos: {len(removidas)} entradas removidas (LRU)")
+
+    def limpar(self) -> None:
+        """Remove todos os fragmentos"""
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute('DELETE FROM fragmento')
+            conexao.commit()
+            self._tamanho_total = 0
+
+    def fechar(self) -> None:
+        """Fecha a conexão com o arquivo do cache"""
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+
+_cache_fragmentos: Optional[CacheFragmentos] = None
+
+
+def get_cache_fragmentos() -> CacheFragmentos:
+    """Retorna o cache de fragmentos global (caminho via CACHE_FRAGMENTOS_PATH)"""
+    global _cache_fragmentos
+    if _cache_fragmentos is None:
+        _cache_fragmentos = CacheFragmentos(os.getenv('CACHE_FRAGMENTOS_PATH', CAMINHO_PADRAO))
+    return _cache_fragmentos
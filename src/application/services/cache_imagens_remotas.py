@@ -0,0 +1,237 @@
+"""
+Cache persistente das imagens remotas (ImgBB etc.) usadas nas exportações.
+
+As imagens ficam em disco endereçadas pelo hash do conteúdo, com um índice
+SQLite que guarda, por URL, o objeto correspondente e os validadores HTTP
+(ETag/Last-Modified). Downloads são feitos em paralelo por um pool limitado de
+threads sobre uma sessão HTTP com conexões keep-alive; cópias já em cache são
+revalidadas com requisições condicionais e usadas quando não há rede.
+
+A remoção é LRU limitada pelo tamanho total dos objetos.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.infrastructure.logging import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = 'database/cache_imagens'
+LIMITE_PADRAO_BYTES = 512 * 1024 * 1024
+MAX_DOWNLOADS_SIMULTANEOS = 6
+# Intervalo em que uma cópia é usada sem revalidar com o servidor
+VALIDADE_SEGUNDOS = 24 * 60 * 60
+EXTENSOES_REMOTAS = ('.png', '.jpg', '.jpeg', '.gif', '.pdf')
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Sistema de Questões'
+
+
+class CacheImagensRemotas:
+    """
+    Cache em disco de imagens remotas com revalidação condicional e remoção LRU.
+    """
+
+    def __init__(self, diretorio: str = CAMINHO_PADRAO, limite_bytes: int = LIMITE_PADRAO_BYTES,
+                 max_downloads: int = MAX_DOWNLOADS_SIMULTANEOS, validade: int = VALIDADE_SEGUNDOS):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+        self.max_downloads = max_downloads
+        self.validade = validade
+        self._lock = Lock()
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._sessao: Optional[requests.Session] = None
+        self._metrics = get_metrics_collector()
+
+    def _conectar(self) -> sqlite3.Connection:
+        if self._conexao is None:
+            (self.diretorio / 'objetos').mkdir(parents=True, exist_ok=True)
+            # Vários processos de exportação podem usar o cache ao mesmo tempo
+            conexao = sqlite3.connect(str(self.diretorio / 'indice.db'), timeout=30, check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.executescript(
+                'CREATE TABLE IF NOT EXISTS imagem_remota ('
+                ' url TEXT PRIMARY KEY,'
+                ' objeto TEXT NOT NULL,'
+                ' tamanho INTEGER NOT NULL,'
+                ' etag TEXT,'
+                ' last_modified TEXT,'
+                ' verificado_em REAL NOT NULL,'
+                ' ultimo_acesso REAL NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS idx_imagem_remota_acesso ON imagem_remota (ultimo_acesso);'
+            )
+            self._conexao = conexao
+        return self._conexao
+
+    def _sessao_http(self) -> requests.Session:
+        with self._lock:
+            if self._sessao is None:
+                sessao = requests.Session()
+                adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_downloads, max_retries=1)
+                sessao.mount('https://', adaptador)
+                sessao.mount('http://', adaptador)
+                sessao.headers['User-Agent'] = USER_AGENT
+                self._sessao = sessao
+            return self._sessao
+
+    @staticmethod
+    def _extensao(url: str, content_type: str = '') -> str:
+        sufixo = Path(urlparse(url).path).suffix.lower()
+        if sufixo in EXTENSOES_REMOTAS:
+            return sufixo
+        if 'jpeg' in content_type:
+            return '.jpg'
+        if 'gif' in content_type:
+            return '.gif'
+        if 'pdf' in content_type:
+            return '.pdf'
+        return '.png'
+
+    def _registro(self, url: str) -> Optional[tuple]:
+        with self._lock:
+            return self._conectar().execute(
+                'SELECT objeto, etag, last_modified, verificado_em FROM imagem_remota WHERE url = ?', (url,)
+            ).fetchone()
+
+    def obter(self, url: str) -> Optional[Path]:
+        """
+        Retorna o arquivo local de uma imagem remota, baixando ou revalidando se preciso.
+
+        Args:
+            url: URL http(s) da imagem
+
+        Returns:
+            Caminho do objeto em cache ou None se indisponível (sem rede e sem cópia)
+        """
+        registro = self._registro(url)
+        objeto = self.diretorio / 'objetos' / registro[0] if registro else None
+        if objeto is not None and not objeto.exists():
+            registro = objeto = None
+
+        agora = time.time()
+        if registro and agora - registro[3] < self.validade:
+            self._tocar(url, verificado=False)
+            self._contar("cache_imagens_acertos")
+            return objeto
+
+        cabecalhos = {}
+        if registro:
+            if registro[1]:
+                cabecalhos['If-None-Match'] = registro[1]
+            if registro[2]:
+                cabecalhos['If-Modified-Since'] = registro[2]
+
+        try:
+            resposta = self._sessao_http().get(url, headers=cabecalhos, timeout=30)
+            if resposta.status_code == 304 and objeto is not None:
+                self._tocar(url, verificado=True)
+                self._contar("cache_imagens_revalidadas")
+                return objeto
+            resposta.raise_for_status()
+        except requests.RequestException as e:
+            if objeto is not None:
+                logger.warning(f"Sem acesso a {url} ({e}); usando cópia em cache")
+                self._tocar(url, verificado=False)
+                return objeto
+            logger.error(f"Erro ao baixar imagem {url}: {e}")
+            return None
+
+        self._contar("cache_imagens_downloads")
+        return self._armazenar(url, resposta)
+
+    def _armazenar(self, url: str, resposta: requests.Response) -> Path:
+        conteudo = resposta.content
+        nome = hashlib.sha256(conteudo).hexdigest() + self._extensao(url, resposta.headers.get('Content-Type', ''))
+        destino = self.diretorio / 'objetos' / nome
+        if not destino.exists():
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            temporario = destino.with_name(f".{nome}.{os.getpid()}.{id(resposta)}.tmp")
+            temporario.write_bytes(conteudo)
+            os.replace(temporario, destino)
+
+        agora = time.time()
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute(
+                'INSERT OR REPLACE INTO imagem_remota'
+                ' (url, objeto, tamanho, etag, last_modified, verificado_em, ultimo_acesso)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, nome, len(conteudo), resposta.headers.get('ETag'),
+                 resposta.headers.get('Last-Modified'), agora, agora)
+            )
+            self._remover_excedente(conexao)
+            conexao.commit()
+        logger.info(f"Imagem remota armazenada em cache: {url}")
+        return destino
+
+    def _tocar(self, url: str, verificado: bool) -> None:
+        agora = time.time()
+        with self._lock:
+            conexao = self._conectar()
+            if verificado:
+                conexao.execute(
+                    'UPDATE imagem_remota SET ultimo_acesso = ?, verificado_em = ? WHERE url = ?', (agora, agora, url)
+                )
+            else:
+                conexao.execute('UPDATE imagem_remota SET ultimo_acesso = ? WHERE url = ?', (agora, url))
+            conexao.commit()
+
+    def _remover_excedente(self, conexao: sqlite3.Connection) -> None:
+        # Objetos compartilhados por várias URLs contam uma vez
+        total = conexao.execute(
+            'SELECT COALESCE(SUM(tamanho), 0) FROM (SELECT objeto, MAX(tamanho) AS tamanho'
+            ' FROM imagem_remota GROUP BY objeto)'
+        ).fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        for url, objeto, tamanho in conexao.execute(
+            'SELECT url, objeto, tamanho FROM imagem_remota ORDER BY ultimo_acesso'
+        ).fetchall():
+            if total <= self.limite_bytes:
+                break
+            conexao.execute('DELETE FROM imagem_remota WHERE url = ?', (url,))
+            if conexao.execute('SELECT 1 FROM imagem_remota WHERE objeto = ?', (objeto,)).fetchone() is None:
+                (self.diretorio / 'objetos' / objeto).unlink(missing_ok=True)
+                total -= tamanho
+
+    def _contar(self, metrica: str) -> None:
+        if self._metrics:
+            self._metrics.increment(metrica)
+
+    def obter_varias(self, urls: Iterable[str]) -> Dict[str, Optional[Path]]:
+        """
+        Obtém várias imagens em paralelo (pool limitado a max_downloads).
+
+        Args:
+            urls: URLs http(s)
+
+        Returns:
+            Dict url -> caminho em cache (None para as indisponíveis)
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        if len(urls) == 1:
+            return {urls[0]: self.obter(urls[0])}
+        with ThreadPoolExecutor(max_workers=min(self.max_downloads, len(urls))) as executor:
+            return dict(zip(urls, executor.map(self.obter, urls)))
+
+
+_cache_imagens: Optional[CacheImagensRemotas] = None
+
+
+def get_cache_imagens_remotas() -> CacheImagensRemotas:
+    """Retorna o cache de imagens remotas global (diretório via CACHE_IMAGENS_PATH)"""
+    global _cache_imagens
+    if _cache_imagens is None:
+        _cache_imagens = CacheImagensRemotas(os.getenv('CACHE_IMAGENS_PATH', CAMINHO_PADRAO))
+    return _cache_imagens
@@ -0,0 +1,190 @@
+"""
+Contexto de execução de uma exportação: etapas, cancelamento e timeouts.
+
+O contexto é repassado do job de exportação para o controller, o
+ExportService e o orquestrador de versões; cada etapa informa o progresso e
+verifica se houve cancelamento. Processos externos (pdflatex) são executados
+em um grupo próprio para que cancelamento e timeout encerrem toda a árvore
+de processos do TeX.
+"""
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estados de um job de exportação
+ESTADO_NA_FILA = 'na_fila'
+ESTADO_BUSCANDO = 'buscando'
+ESTADO_TRANSFORMANDO = 'transformando'
+ESTADO_PREPARANDO_IMAGENS = 'preparando_imagens'
+ESTADO_COMPILANDO = 'compilando'
+ESTADO_CONCLUIDO = 'concluido'
+ESTADO_FALHOU = 'falhou'
+ESTADO_CANCELADO = 'cancelado'
+
+ROTULOS_ESTADO = {
+    ESTADO_NA_FILA: 'Na fila',
+    ESTADO_BUSCANDO: 'Buscando dados',
+    ESTADO_TRANSFORMANDO: 'Gerando LaTeX',
+    ESTADO_PREPARANDO_IMAGENS: 'Preparando imagens',
+    ESTADO_COMPILANDO: 'Compilando',
+    ESTADO_CONCLUIDO: 'Concluído',
+    ESTADO_FALHOU: 'Falhou',
+    ESTADO_CANCELADO: 'Cancelado',
+}
+ESTADOS_FINAIS = (ESTADO_CONCLUIDO, ESTADO_FALHOU, ESTADO_CANCELADO)
+
+# Timeout padrão de cada processo do TeX (segundos), configurável por PDFLATEX_TIMEOUT
+TIMEOUT_PADRAO = 300
+
+
+class ExportacaoCancelada(RuntimeError):
+    """A exportação foi cancelada pelo usuário"""
+
+
+class TempoEsgotadoError(RuntimeError):
+    """Um processo externo excedeu o tempo limite"""
+
+
+def timeout_padrao() -> float:
+    """Timeout por processo do TeX (PDFLATEX_TIMEOUT ou TIMEOUT_PADRAO)"""
+    configurado = os.getenv('PDFLATEX_TIMEOUT', '')
+    return float(configurado) if configurado.replace('.', '', 1).isdigit() else TIMEOUT_PADRAO
+
+
+class ContextoExportacao:
+    """
+    Progresso e cancelamento de uma exportação.
+
+    Args:
+        ao_atualizar: Callback (estado, detalhe) chamado a cada etapa
+        timeout_processo: Tempo máximo de cada processo do TeX (padrão: timeout_padrao())
+    """
+
+    def __init__(self, ao_atualizar: Optional[Callable[[str, str], None]] = None,
+                 timeout_processo: Optional[float] = None):
+        self._ao_atualizar = ao_atualizar
+        self.timeout_processo = timeout_processo or timeout_padrao()
+        self._cancelamento = threading.Event()
+        self._processos: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelamento.is_set()
+
+    def verificar(self) -> None:
+        """Levanta ExportacaoCancelada se o cancelamento foi solicitado"""
+        if self._cancelamento.is_set():
+            raise ExportacaoCancelada("Exportação cancelada")
+
+    def etapa(self, estado: str, detalhe: str = '') -> None:
+        """
+        Informa o início de uma etapa (verificando o cancelamento antes).
+
+        Args:
+            estado: Um dos ESTADO_*
+            detalhe: Texto complementar (ex: "TIPO B, passada 2")
+        """
+        self.verificar()
+        if self._ao_atualizar:
+            self._ao_atualizar(estado, detalhe)
+
+    def cancelar(self) -> None:
+        """Solicita o cancelamento e encerra os processos do TeX em execução"""
+        self._cancelamento.set()
+        with self._lock:
+            processos = list(self._processos)
+        for processo in processos:
+            encerrar_arvore(processo)
+
+    def _registrar(self, processo: subprocess.Popen) -> None:
+        with self._lock:
+            self._processos.append(processo)
+
+    def _remover(self, processo: subprocess.Popen) -> None:
+        with self._lock:
+            if processo in self._processos:
+                self._processos.remove(processo)
+
+
+def encerrar_arvore(processo: subprocess.Popen) -> None:
+    """Encerra um processo e todos os seus filhos"""
+    if processo.poll() is not None:
+        return
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(
+                ['taskkill', '/F', '/T', '/PID', str(processo.pid)],
+                capture_output=True, timeout=30
+            )
+        else:
+            os.killpg(processo.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"Falha ao encerrar árvore do processo {processo.pid}: {e}")
+        processo.kill()
+
+
+def executar_processo(command: List[str], contexto: Optional[ContextoExportacao] = None,
+                      timeout: Optional[float] = None, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Executa um processo externo com timeout e cancelamento (substitui subprocess.run).
+
+    Args:
+        command: Comando e argumentos
+        contexto: Contexto da exportação (cancelamento); opcional
+        timeout: Tempo máximo em segundos (padrão: do contexto ou timeout_padrao())
+        **kwargs: Repassados ao Popen (text, encoding, errors, cwd...)
+
+    Returns:
+        CompletedProcess com stdout/stderr capturados
+
+    Raises:
+        ExportacaoCancelada: Se o contexto for cancelado durante a execução
+        TempoEsgotadoError: Se o processo exceder o timeout
+    """
+    if timeout is None:
+        timeout = contexto.timeout_processo if contexto else timeout_padrao()
+    if contexto:
+        contexto.verificar()
+
+    # Grupo de processos próprio para encerrar a árvore inteira
+    if sys.platform == 'win32':
+        kwargs.setdefault('creationflags', subprocess.CREATE_NEW_PROCESS_GROUP)
+    else:
+        kwargs.setdefault('start_new_session', True)
+
+    processo = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+    if contexto:
+        contexto._registrar(processo)
+    limite = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                stdout, stderr = processo.communicate(timeout=0.25)
+                break
+            except subprocess.TimeoutExpired:
+                if contexto and contexto.cancelado:
+                    encerrar_arvore(processo)
+                    processo.communicate()
+                    raise ExportacaoCancelada("Exportação cancelada")
+                if time.monotonic() > limite:
+                    encerrar_arvore(processo)
+                    processo.communicate()
+                    raise TempoEsgotadoError(
+                        f"{os.path.basename(command[0])} excedeu o tempo limite de {timeout:g}s"
+                    )
+    finally:
+        if contexto:
+            contexto._remover(processo)
+
+    # Processo encerrado por contexto.cancelar() em outra thread
+    if contexto and contexto.cancelado:
+        raise ExportacaoCancelada("Exportação cancelada")
+    return subprocess.CompletedProcess(command, processo.returncode, stdout, stderr)
@@ -0,0 +1,306 @@
+"""
+Derivados de imagens em resolução de impressão para as exportações.
+
+Enunciados costumam trazer fotos de celular (4000px) ou capturas PNG de vários
+MB, reduzidas apenas por \\includegraphics[scale=...]. Isso deixa cada passada
+do pdflatex lenta e o PDF enorme. Aqui cada imagem raster é reduzida para o
+DPI alvo na largura em que será impressa (escala da imagem, limitada pela
+largura da coluna do layout de 1 ou 2 colunas) e recomprimida.
+
+O derivado grava a densidade (DPI) ajustada, então seu tamanho natural em
+polegadas é o mesmo do original e o \\includegraphics[scale=...] produz o
+mesmo layout.
+
+Os derivados ficam em cache por (hash do conteúdo, escala, colunas, DPI) e os
+que faltam são gerados em paralelo em um pool de processos. Sem o Pillow (ou
+com EXPORT_IMAGEM_DERIVADOS=0) as imagens originais são usadas.
+"""
+import hashlib
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.application.services.metricas_exportacao import ETAPA_DERIVADOS, span
+from src.infrastructure.logging import get_metrics_collector
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = 'database/cache_imagens/derivados'
+LIMITE_PADRAO_BYTES = 512 * 1024 * 1024
+DPI_PADRAO = 300
+# Largura do texto (cm) por número de colunas, nos templates com margens de ~2cm em A4
+LARGURA_TEXTO_CM = {1: 17.0, 2: 8.2}
+# Abaixo desta largura (px) o ganho não compensa abrir a imagem
+LARGURA_MINIMA_PX = 600
+# Só gera derivado se ele tiver no máximo esta fração da largura original
+FRACAO_MAXIMA = 0.8
+QUALIDADE_JPEG = 85
+# pdflatex assume 72 DPI para imagens sem densidade gravada
+DPI_SEM_DENSIDADE = 72.0
+EXTENSOES_RASTER = ('.png', '.jpg', '.jpeg')
+# Incrementar quando o algoritmo de redução mudar
+VERSAO_DERIVADO = 2
+
+
+@dataclass(frozen=True)
+class MetadadosImagem:
+    """Dados da tabela imagem (evitam reler/re-hashear o arquivo)"""
+    hash_md5: str
+    largura: int
+    altura: int
+
+
+@dataclass(frozen=True)
+class PedidoDerivado:
+    """Imagem referenciada no LaTeX com a escala em que é impressa"""
+    origem: Path
+    escala: float = 1.0
+    colunas: int = 1
+    metadados: Optional[MetadadosImagem] = None
+
+
+def pixels_alvo(largura_px: int, dpi_origem: float, escala: float, colunas: int, dpi: int) -> int:
+    """
+    Largura (px) para imprimir a imagem no DPI alvo.
+
+    Args:
+        largura_px: Largura original em pixels
+        dpi_origem: Densidade gravada no arquivo (72 se ausente)
+        escala: Escala do \\includegraphics
+        colunas: Colunas do layout (limita a largura impressa)
+        dpi: DPI alvo
+
+    Returns:
+        Largura em pixels
+    """
+    impressa_pol = (largura_px / dpi_origem) * escala
+    coluna_pol = LARGURA_TEXTO_CM.get(colunas, LARGURA_TEXTO_CM[1]) / 2.54
+    return max(1, math.ceil(min(impressa_pol, coluna_pol) * dpi))
+
+
+def _gerar_derivado(origem: str, destino: str, escala: float, colunas: int, dpi: int) -> bool:
+    """
+    Gera o derivado reduzido (executado no pool de processos).
+
+    Returns:
+        True se o derivado foi gravado; False se a original já está no tamanho adequado
+    """
+    with Image.open(origem) as imagem:
+        largura, altura = imagem.size
+        densidade = imagem.info.get('dpi') or (DPI_SEM_DENSIDADE, DPI_SEM_DENSIDADE)
+        dpi_origem = float(densidade[0]) or DPI_SEM_DENSIDADE
+
+        alvo = pixels_alvo(largura, dpi_origem, escala, colunas, dpi)
+        if alvo > largura * FRACAO_MAXIMA:
+            return False
+
+        # Densidade inteira (o JFIF só grava inteiros); a largura acompanha para
+        # manter o tamanho natural pixels/DPI igual ao da original
+        novo_dpi = max(1, math.ceil(alvo * dpi_origem / largura))
+        alvo = max(1, round(novo_dpi * largura / dpi_origem))
+        nova_altura = max(1, round(altura * alvo / largura))
+
+        jpeg = imagem.format == 'JPEG'
+        if jpeg:
+            # Decodifica o JPEG já reduzido por potência de 2 (bem mais rápido)
+            imagem.draft('RGB', (alvo, nova_altura))
+        if imagem.mode in ('P', 'PA'):
+            # Com paleta o Pillow reduz por vizinho mais próximo (texto e traços finos serrilhados)
+            imagem = imagem.convert('RGBA' if imagem.mode == 'PA' or 'transparency' in imagem.info else 'RGB')
+        elif imagem.mode == '1':
+            imagem = imagem.convert('L')
+        reduzida = imagem.resize((alvo, nova_altura), Image.LANCZOS)
+
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        if jpeg:
+            if reduzida.mode not in ('RGB', 'L', 'CMYK'):
+                reduzida = reduzida.convert('RGB')
+            reduzida.save(temporario, format='JPEG', quality=QUALIDADE_JPEG, optimize=True,
+                          dpi=(novo_dpi, novo_dpi))
+        else:
+            reduzida.save(temporario, format='PNG', optimize=True, dpi=(novo_dpi, novo_dpi))
+        os.replace(temporario, destino)
+    return True
+
+
+class CacheDerivados:
+    """
+    Derivados em disco endereçados por (conteúdo, escala, colunas, DPI), com remoção LRU.
+    """
+
+    def __init__(self, diretorio: str = CAMINHO_PADRAO, dpi: int = DPI_PADRAO,
+                 limite_bytes: int = LIMITE_PADRAO_BYTES, max_workers: Optional[int] = None):
+        self.diretorio = Path(diretorio)
+        self.dpi = dpi
+        self.limite_bytes = limite_bytes
+        self.max_workers = max_workers
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = Lock()
+        self._metrics = get_metrics_collector()
+
+    def _hash_arquivo(self, caminho: Path) -> str:
+        """MD5 do conteúdo (o mesmo de Imagem.hash_md5), memorizado por mtime/tamanho"""
+        estado = caminho.stat()
+        chave = (str(caminho.resolve()), estado.st_mtime_ns, estado.st_size)
+        with self._lock:
+            if chave in self._hashes:
+                return self._hashes[chave]
+        digest = hashlib.md5()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+                digest.update(bloco)
+        with self._lock:
+            self._hashes[chave] = digest.hexdigest()
+        return self._hashes[chave]
+
+    def _chave(self, pedido: PedidoDerivado) -> str:
+        conteudo = pedido.metadados.hash_md5 if pedido.metadados else self._hash_arquivo(pedido.origem)
+        identidade = f"{VERSAO_DERIVADO}:{conteudo}:{pedido.escala:g}:{pedido.colunas}:{self.dpi}"
+        return hashlib.blake2b(identidade.encode('utf-8'), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _avaliar(pedido: PedidoDerivado) -> bool:
+        """Pedidos que podem ter derivado (raster e não pequenos de acordo com o banco)"""
+        if pedido.origem.suffix.lower() not in EXTENSOES_RASTER:
+            return False
+        return not (pedido.metadados and 0 < pedido.metadados.largura < LARGURA_MINIMA_PX)
+
+    def obter_varios(self, pedidos: Iterable[PedidoDerivado]) -> Dict[PedidoDerivado, Path]:
+        """
+        Obtém os derivados das imagens, gerando os que faltam em paralelo.
+
+        Args:
+            pedidos: Imagens (já resolvidas em disco) com escala e colunas
+
+        Returns:
+            Dict pedido -> arquivo a usar (derivado ou a própria original)
+        """
+        resultado: Dict[PedidoDerivado, Path] = {}
+        faltando: Dict[PedidoDerivado, Tuple[Path, Path]] = {}
+
+        for pedido in dict.fromkeys(pedidos):
+            resultado[pedido] = pedido.origem
+            if not self._avaliar(pedido):
+                continue
+            try:
+                chave = self._chave(pedido)
+            except OSError as e:
+                logger.warning(f"Não foi possível ler {pedido.origem}: {e}")
+                continue
+            destino = self.diretorio / f"{chave}{pedido.origem.suffix.lower()}"
+            marcador = self.diretorio / f"{chave}.original"
+            if destino.exists():
+                os.utime(destino)  # LRU
+                resultado[pedido] = destino
+            elif not marcador.exists():
+                faltando[pedido] = (destino, marcador)
+
+        acertos = sum(1 for pedido, caminho in resultado.items() if caminho != pedido.origem)
+        if faltando:
+            inicio = time.perf_counter()
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            with span(ETAPA_DERIVADOS, f"{len(faltando)} avaliados") as medido:
+                gerados = self._gerar(faltando)
+                for pedido, (destino, marcador) in faltando.items():
+                    if gerados.get(pedido):
+                        resultado[pedido] = destino
+                        medido.registrar(bytes=destino.stat().st_size, imagens=1)
+                    elif pedido in gerados:
+                        marcador.touch()  # Original já adequada: não reavaliar
+                self._podar()
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            logger.info(
+                f"Derivados de imagem: {sum(1 for g in gerados.values() if g)} gerados, "
+                f"{acertos} do cache, {len(faltando)} avaliados em {duracao_ms:.0f}ms"
+            )
+            if self._metrics:
+                self._metrics.record_timing("gerar_derivados_imagem", duracao_ms)
+        if self._metrics and acertos:
+            self._metrics.increment("derivados_imagem_acertos", acertos)
+        return resultado
+
+    def _gerar(self, faltando: Dict[PedidoDerivado, Tuple[Path, Path]]) -> Dict[PedidoDerivado, bool]:
+        """Gera os derivados; pedidos que falharem ficam fora do resultado (usa-se a original)"""
+        argumentos = {
+            pedido: (str(pedido.origem), str(destino), pedido.escala, pedido.colunas, self.dpi)
+            for pedido, (destino, _) in faltando.items()
+        }
+        gerados: Dict[PedidoDerivado, bool] = {}
+        workers = self.max_workers or min(len(argumentos), os.cpu_count() or 1)
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futuros = {pedido: executor.submit(_gerar_derivado, *args) for pedido, args in argumentos.items()}
+                    for pedido, futuro in futuros.items():
+                        try:
+                            gerados[pedido] = futuro.result()
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            logger.warning(f"Erro ao gerar derivado de {pedido.origem}: {e}")
+                return gerados
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"Pool de processos indisponível ({e}); gerando derivados em sequência")
+
+        for pedido, args in argumentos.items():
+            if pedido in gerados:
+                continue
+            try:
+                gerados[pedido] = _gerar_derivado(*args)
+            except Exception as e:
+                logger.warning(f"Erro ao gerar derivado de {pedido.origem}: {e}")
+        return gerados
+
+    def _podar(self) -> None:
+        """Remove os derivados menos usados quando o total passa do limite"""
+        arquivos = []
+        total = 0
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_file() and not entrada.name.endswith(('.original', '.tmp')):
+                estado = entrada.stat()
+                arquivos.append((estado.st_mtime, estado.st_size, entrada.path))
+                total += estado.st_size
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.limite_bytes:
+                break
+            Path(caminho).unlink(missing_ok=True)
+            total -= tamanho
+
+    def limpar(self) -> None:
+        """Remove todos os derivados"""
+        if not self.diretorio.exists():
+            return
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_file():
+                Path(entrada.path).unlink(missing_ok=True)
+
+
+def derivados_habilitados() -> bool:
+    """Derivados são usados quando o Pillow está instalado e EXPORT_IMAGEM_DERIVADOS != '0'"""
+    return PIL_AVAILABLE and os.getenv('EXPORT_IMAGEM_DERIVADOS', '1') != '0'
+
+
+_cache_derivados: Optional[CacheDerivados] = None
+
+
+def get_cache_derivados() -> CacheDerivados:
+    """Retorna o cache de derivados global (DPI via EXPORT_IMAGEM_DPI)"""
+    global _cache_derivados
+    if _cache_derivados is None:
+        dpi = os.getenv('EXPORT_IMAGEM_DPI', '')
+        diretorio = Path(os.getenv('CACHE_IMAGENS_PATH', 'database/cache_imagens')) / 'derivados'
+        _cache_derivados = CacheDerivados(str(diretorio), int(dpi) if dpi.isdigit() else DPI_PADRAO)
+    return _cache_derivados
@@ -0,0 +1,160 @@
+"""
+Documento HTML de uma lista, para o motor de rascunho sem LaTeX.
+
+Usa o emissor HTML da marcação (markup_html), o mesmo da pré-visualização
+da questão, e uma folha de estilos de impressão que imita os templates:
+cabeçalho com título e campos, questões numeradas em uma ou duas colunas,
+alternativas A) a E), linhas ou caixa de resposta (wallon_av2) e gabarito
+em página própria. O PDF é gerado por impressao_html.
+"""
+import html
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.application.services.markup_html import compilar_html
+
+# Motores de PDF (ExportOptionsDTO.motor_pdf)
+MOTOR_LATEX = 'latex'
+MOTOR_HTML = 'html'
+
+LETRAS_ALTERNATIVAS = 'ABCDEFGHIJ'
+
+# Campos do cabeçalho, na ordem em que aparecem (slot do template -> rótulo)
+ROTULOS_CABECALHO = {
+    'DISCIPLINA': 'Disciplina',
+    'PROFESSOR': 'Professor(a)',
+    'TRIMESTRE': 'Trimestre',
+    'UNIDADE': 'Unidade',
+    'ANO': 'Ano',
+    'SERIE_SIMULADO': 'Série',
+    'TIPO_SIMULADO': 'Área',
+    'DATA_APLICACAO': 'Data',
+}
+
+ESTILO_IMPRESSAO = """
+body {
+    font-family: 'Latin Modern Roman', 'Times New Roman', serif;
+    font-size: 11pt;
+    color: #000;
+    margin: 0;
+}
+.cabecalho {
+    border: 1px solid #000;
+    padding: 6px 10px;
+    margin-bottom: 12px;
+}
+.cabecalho h1 {
+    font-size: 14pt;
+    text-align: center;
+    margin: 0 0 6px 0;
+}
+.campos { display: flex; flex-wrap: wrap; gap: 4px 18px; font-size: 10pt; }
+.aluno { margin-top: 6px; font-size: 10pt; }
+.formulas {
+    border: 0.5pt solid #000;
+    padding: 4px 8px;
+    margin-bottom: 12px;
+}
+.formulas .titulo { font-weight: bold; margin-bottom: 4px; }
+.questoes { counter-reset: questao; }
+.questoes.colunas-2 { column-count: 2; column-gap: 8mm; column-rule: 0.5pt solid #999; }
+.questao {
+    counter-increment: questao;
+    margin-bottom: 0.5cm;
+    break-inside: avoid;
+    line-height: 1.35;
+}
+.questao > .enunciado::before { content: counter(questao) ". "; font-weight: bold; }
+.alternativas { list-style: none; margin: 4px 0 0 0; padding-left: 1.2em; }
+.alternativas li { margin: 2px 0; }
+.alternativas .letra { font-weight: bold; margin-right: 4px; }
+.linha-resposta { border-bottom: 0.4pt solid #000; height: 0.7cm; }
+.caixa-resposta { border: 0.5pt solid #000; width: 16cm; max-width: 100%; height: 5cm; margin-top: 0.3cm; }
+table { border-collapse: collapse; margin: 6px auto; }
+td, th { border: 1px solid #333; padding: 2px 6px; text-align: center; font-size: 10pt; }
+th { background-color: #e0e0e0; }
+img { max-width: 100%; }
+.gabarito { break-before: page; }
+.gabarito h2 { font-size: 13pt; }
+.gabarito ol { column-count: 4; }
+"""
+
+
+@dataclass(frozen=True)
+class QuestaoHtml:
+    """Questão pronta para o documento (textos ainda com a marcação do editor)"""
+    enunciado: str
+    alternativas: List[str]
+    config_questao: str = 'normal'   # 'normal', '5linhas' ou 'espaco_borda'
+    fonte: str = ''
+    ano: str = ''
+
+
+def _questao_html(questao: QuestaoHtml) -> str:
+    """Bloco de uma questão, na ordem do \\item do LaTeX"""
+    origem = ' - '.join(html.escape(parte) for parte in (questao.fonte, questao.ano) if parte)
+    cabecalho = f"<b>({origem})</b> " if origem else ''
+    partes = [
+        '<div class="questao">',
+        f'<div class="enunciado">{cabecalho}{compilar_html(questao.enunciado, estilos_inline=False)}</div>'
+    ]
+    if questao.config_questao == '5linhas':
+        partes.append('<div class="linha-resposta"></div>' * 5)
+    elif questao.config_questao == 'espaco_borda':
+        partes.append('<div class="caixa-resposta"></div>')
+    elif questao.alternativas:
+        partes.append('<ol class="alternativas">')
+        for letra, texto in zip(LETRAS_ALTERNATIVAS, questao.alternativas):
+            partes.append(
+                f'<li><span class="letra">{letra})</span>{compilar_html(texto, estilos_inline=False)}</li>'
+            )
+        partes.append('</ol>')
+    partes.append('</div>')
+    return ''.join(partes)
+
+
+def montar_documento_html(titulo: str, questoes: List[QuestaoHtml],
+                          campos_cabecalho: Optional[Dict[str, Optional[str]]] = None,
+                          formulas: str = '', gabarito: Optional[List[str]] = None,
+                          colunas: int = 1) -> str:
+    """
+    Monta o documento HTML completo de uma lista.
+
+    Args:
+        titulo: Título exibido no cabeçalho
+        questoes: Questões na ordem da prova
+        campos_cabecalho: Valores dos slots do cabeçalho (ex: PROFESSOR); vazios são omitidos
+        formulas: Conteúdo da caixa de fórmulas (vazio para omitir)
+        gabarito: Respostas na ordem das questões (None para omitir o gabarito)
+        colunas: 1 ou 2 colunas de questões
+
+    Returns:
+        Documento HTML
+    """
+    campos = [
+        f"<span><b>{rotulo}:</b> {html.escape(valor)}</span>"
+        for slot, rotulo in ROTULOS_CABECALHO.items()
+        for valor in [(campos_cabecalho or {}).get(slot)]
+        if valor
+    ]
+    partes = [
+        '<!DOCTYPE html><html><head><meta charset="UTF-8">',
+        f'<title>{html.escape(titulo)}</title><style>{ESTILO_IMPRESSAO}</style></head><body>',
+        f'<div class="cabecalho"><h1>{html.escape(titulo)}</h1>',
+        f'<div class="campos">{"".join(campos)}</div>' if campos else '',
+        '<div class="aluno"><b>Aluno(a):</b> ______________________________________________</div></div>',
+    ]
+    if formulas:
+        partes.append(
+            f'<div class="formulas"><div class="titulo">Fórmulas</div>'
+            f'{compilar_html(formulas, estilos_inline=False)}</div>'
+        )
+    classe = 'questoes colunas-2' if colunas == 2 else 'questoes'
+    partes.append(f'<div class="{classe}">')
+    partes.extend(_questao_html(questao) for questao in questoes)
+    partes.append('</div>')
+    if gabarito is not None:
+        itens = ''.join(f"<li>{html.escape(resposta)}</li>" for resposta in gabarito)
+        partes.append(f'<div class="gabarito"><h2>Gabarito</h2><ol>{itens}</ol></div>')
+    partes.append('</body></html>')
+    return ''.join(partes)
@@ -2,17 +2,132 @@
 Service para exportação de dados, especialmente para LaTeX/PDF.
 """
 import logging
-import subprocess
 import locale
 import re
 import shutil
-import urllib.request
-import urllib.error
 import hashlib
+import os
+import time
 from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from src.application.services.cache_imagens_remotas import get_cache_imagens_remotas
+from src.application.services.contexto_exportacao import (
+    ContextoExportacao, ExportacaoCancelada, TempoEsgotadoError,
+    ESTADO_COMPILANDO, ESTADO_PREPARANDO_IMAGENS, executar_processo
+)
+from src.application.services.derivados_imagem import (
+    MetadadosImagem, PedidoDerivado, derivados_habilitados, get_cache_derivados
+)
+from src.application.services.formato_latex import get_formatos_latex
+from src.application.services.metricas_exportacao import (
+    ETAPA_FINALIZACAO, ETAPA_GRAVACAO, ETAPA_IMAGENS, ETAPA_IMAGENS_REMOTAS, ETAPA_PDFLATEX,
+    ETAPA_VERIFICACAO, span
+)
+from src.infrastructure.logging import get_metrics_collector
 
 logger = logging.getLogger(__name__)
 
+# Caracteres Unicode não suportados pelo pdflatex por padrão e seus equivalentes
+SUBSTITUICOES_UNICODE = [
+    ('✓', ''),      # Checkmark - remover (redundante com gabarito)
+    ('✗', ''),      # X mark - remover
+    ('★', '*'),     # Estrela cheia
+    ('☆', '*'),     # Estrela vazia
+    ('→', r'$\rightarrow$'),  # Seta direita
+    ('←', r'$\leftarrow$'),   # Seta esquerda
+    ('↔', r'$\leftrightarrow$'),  # Seta dupla
+    ('≤', r'$\leq$'),    # Menor ou igual
+    ('≥', r'$\geq$'),    # Maior ou igual
+    ('≠', r'$\neq$'),    # Diferente
+    ('±', r'$\pm$'),     # Mais ou menos
+    ('×', r'$\times$'),  # Multiplicação
+    ('÷', r'$\div$'),    # Divisão
+    ('°', r'$^\circ$'),  # Grau
+    ('º', r'\textordmasculine{}'),  # Ordinal masculino
+    ('²', r'$^2$'),      # Quadrado
+    ('³', r'$^3$'),      # Cubo
+    ('½', r'$\frac{1}{2}$'),  # Meio
+    ('¼', r'$\frac{1}{4}$'),  # Um quarto
+    ('¾', r'$\frac{3}{4}$'),  # Três quartos
+    ('∞', r'$\infty$'),  # Infinito
+    ('√', r'$\sqrt{}$'), # Raiz quadrada (símbolo isolado)
+    ('∑', r'$\sum$'),    # Somatório
+    ('∏', r'$\prod$'),   # Produtório
+    ('∫', r'$\int$'),    # Integral
+    ('∂', r'$\partial$'), # Derivada parcial
+    ('∈', r'$\in$'),     # Pertence
+    ('∉', r'$\notin$'),  # Não pertence
+    ('⊂', r'$\subset$'), # Subconjunto
+    ('⊃', r'$\supset$'), # Superconjunto
+    ('∪', r'$\cup$'),    # União
+    ('∩', r'$\cap$'),    # Interseção
+    ('∅', r'$\emptyset$'), # Conjunto vazio
+    ('∀', r'$\forall$'), # Para todo
+    ('∃', r'$\exists$'), # Existe
+    ('¬', r'$\neg$'),    # Negação
+    ('∧', r'$\land$'),   # E lógico
+    ('∨', r'$\lor$'),    # Ou lógico
+    ('⇒', r'$\Rightarrow$'),  # Implica
+    ('⇔', r'$\Leftrightarrow$'),  # Se e somente se
+    ('≈', r'$\approx$'), # Aproximadamente
+    ('∝', r'$\propto$'), # Proporcional
+    ('·', r'$\cdot$'),   # Ponto de multiplicação
+]
+
+# Diretórios de imagens do projeto (o primeiro arquivo encontrado com um nome prevalece)
+DIRETORIOS_IMAGENS = [
+    Path('imagens/logos'),
+    Path('imagens/questoes'),
+    Path('imagens/alternativas'),
+    Path('imagens')
+]
+EXTENSOES_IMAGEM = ['.png', '.jpg', '.jpeg', '.gif', '.pdf', '.eps']
+
+_RE_INCLUDEGRAPHICS = re.compile(r'\\includegraphics\s*(\[[^\]]*\])?\s*\{([^}]+)\}')
+_RE_ESCALA = re.compile(r'^\[\s*scale\s*=\s*([0-9.]+)\s*\]$')
+_RE_INCLUDEGRAPHICS_REMOTO = re.compile(r'\\includegraphics\s*(\[[^\]]*\])?\s*\{(https?://[^}]+)\}')
+
+
+def urls_remotas(latex_content: str) -> List[str]:
+    """URLs http(s) referenciadas por \\includegraphics, sem repetição"""
+    return list(dict.fromkeys(m.group(2) for m in _RE_INCLUDEGRAPHICS_REMOTO.finditer(latex_content)))
+
+
+class ImagensAusentesError(RuntimeError):
+    """Imagens referenciadas no LaTeX que não foram encontradas"""
+
+    def __init__(self, imagens: List[str]):
+        self.imagens = imagens
+        super().__init__(
+            "Imagens referenciadas não encontradas:\n" + "\n".join(f"- {imagem}" for imagem in imagens)
+        )
+
+    def __reduce__(self):
+        # Reconstrói a partir da lista (atravessa o ProcessPoolExecutor)
+        return type(self), (self.imagens,)
+
+
+class CompilacaoLatexError(RuntimeError):
+    """Falha do pdflatex, com o conteúdo do .log da passada que falhou"""
+
+    def __init__(self, mensagem: str, log: str = ''):
+        self.log = log
+        super().__init__(mensagem)
+
+
+# Passadas do pdflatex
+MAX_PASSADAS_PADRAO = 4
+EXTENSOES_AUXILIARES = ['.aux', '.toc', '.out']
+# Comandos que dependem de informação da passada anterior
+_RE_REFERENCIAS = re.compile(
+    r'\\(?:ref|pageref|eqref|autoref|cref|Cref|nameref|cite|tableofcontents|listoffigures|'
+    r'listoftables|zref)\b|\\usepackage(?:\[[^\]]*\])?\{[^}]*(?:lastpage|totpages)'
+)
+# Avisos de "Rerun" do LaTeX, do rerunfilecheck (hyperref) e do lastpage
+_RE_RERUN = re.compile(r'Rerun to (?:get|fix)|Label\(s\) may have changed|please rerun', re.IGNORECASE)
+
+
 def escape_latex(text: str) -> str:
     """
     Escapa caracteres especiais do LaTeX em uma string,
@@ -73,53 +188,8 @@ def escape_latex(text: str) -> str:
 
     # 6.2 Substituir caracteres Unicode problemáticos
     # Esses caracteres não são suportados pelo pdflatex por padrão
-    unicode_replacements = [
-        ('✓', ''),      # Checkmark - remover (redundante com gabarito)
-        ('✗', ''),      # X mark - remover
-        ('★', '*'),     # Estrela cheia
-        ('☆', '*'),     # Estrela vazia
-        ('→', r'$\rightarrow$'),  # Seta direita
-        ('←', r'$\leftarrow$'),   # Seta esquerda
-        ('↔', r'$\leftrightarrow$'),  # Seta dupla
-        ('≤', r'$\leq$'),    # Menor ou igual
-        ('≥', r'$\geq$'),    # Maior ou igual
-        ('≠', r'$\neq$'),    # Diferente
-        ('±', r'$\pm$'),     # Mais ou menos
-        ('×', r'$\times$'),  # Multiplicação
-        ('÷', r'$\div$'),    # Divisão
-        ('°', r'$^\circ$'),  # Grau
-        ('º', r'\textordmasculine{}'),  # Ordinal masculino
-        ('²', r'$^2$'),      # Quadrado
-        ('³', r'$^3$'),      # Cubo
-        ('½', r'$\frac{1}{2}$'),  # Meio
-        ('¼', r'$\frac{1}{4}$'),  # Um quarto
-        ('¾', r'$\frac{3}{4}$'),  # Três quartos
-        ('∞', r'$\infty$'),  # Infinito
-        ('√', r'$\sqrt{}$'), # Raiz quadrada (símbolo isolado)
-        ('∑', r'$\sum$'),    # Somatório
-        ('∏', r'$\prod$'),   # Produtório
-        ('∫', r'$\int$'),    # Integral
-        ('∂', r'$\partial$'), # Derivada parcial
-        ('∈', r'$\in$'),     # Pertence
-        ('∉', r'$\notin$'),  # Não pertence
-        ('⊂', r'$\subset$'), # Subconjunto
-        ('⊃', r'$\supset$'), # Superconjunto
-        ('∪', r'$\cup$'),    # União
-        ('∩', r'$\cap$'),    # Interseção
-        ('∅', r'$\emptyset$'), # Conjunto vazio
-        ('∀', r'$\forall$'), # Para todo
-        ('∃', r'$\exists$'), # Existe
-        ('¬', r'$\neg$'),    # Negação
-        ('∧', r'$\land$'),   # E lógico
-        ('∨', r'$\lor$'),    # Ou lógico
-        ('⇒', r'$\Rightarrow$'),  # Implica
-        ('⇔', r'$\Leftrightarrow$'),  # Se e somente se
-        ('≈', r'$\approx$'), # Aproximadamente
-        ('∝', r'$\propto$'), # Proporcional
-        ('·', r'$\cdot$'),   # Ponto de multiplicação
-    ]
 
-    for char, replacement in unicode_replacements:
+    for char, replacement in SUBSTITUICOES_UNICODE:
         text = text.replace(char, replacement)
 
     # 8. Restaurar todos os blocos preservados
@@ -130,118 +200,242 @@ def escape_latex(text: str) -> str:
 
 
 class ExportService:
-    def __init__(self):
-        pass
-
-    def _baixar_imagem_remota(self, url: str, destino: Path) -> bool:
+    def __init__(self, max_passadas: Optional[int] = None, usar_formatos: Optional[bool] = None):
         """
-        Baixa uma imagem de uma URL remota para o diretório de destino.
-
         Args:
-            url: URL da imagem (ex: https://i.ibb.co/xxx/imagem.png)
-            destino: Caminho completo de destino para a imagem
-
-        Returns:
-            True se o download foi bem-sucedido, False caso contrário
+            max_passadas: Limite de passadas do pdflatex (padrão: PDFLATEX_MAX_PASSADAS ou 4)
+            usar_formatos: Usar formatos .fmt pré-compilados (padrão: PDFLATEX_FORMATOS != '0')
         """
-        try:
-            logger.info(f"Baixando imagem remota: {url}")
-            # Configurar headers para evitar bloqueio
-            request = urllib.request.Request(
-                url,
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Sistema de Questões'}
-            )
-
-            with urllib.request.urlopen(request, timeout=30) as response:
-                with open(destino, 'wb') as f:
-                    f.write(response.read())
-
-            logger.info(f"Imagem baixada com sucesso: {destino.name}")
-            return True
-
-        except urllib.error.URLError as e:
-            logger.error(f"Erro de URL ao baixar {url}: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Erro ao baixar imagem {url}: {e}")
-            return False
+        if usar_formatos is None:
+            usar_formatos = os.getenv('PDFLATEX_FORMATOS', '1') != '0'
+        self.usar_formatos = usar_formatos
+        if max_passadas is None:
+            configurado = os.getenv('PDFLATEX_MAX_PASSADAS', '')
+            max_passadas = int(configurado) if configurado.isdigit() else MAX_PASSADAS_PADRAO
+        self.max_passadas = max(1, max_passadas)
 
     def _processar_imagens_remotas_no_latex(self, latex_content: str, temp_dir: Path) -> str:
         """
-        Processa o conteúdo LaTeX, identifica URLs de imagens remotas,
-        baixa para o diretório temporário e substitui as URLs pelos nomes locais.
+        Processa o conteúdo LaTeX, identifica URLs de imagens remotas, obtém-nas
+        pelo cache persistente (downloads em paralelo) e substitui as URLs pelos
+        arquivos em cache. URLs indisponíveis são mantidas e reportadas como
+        ausentes na preparação das imagens.
 
         Args:
             latex_content: Conteúdo LaTeX com possíveis URLs de imagens
-            temp_dir: Diretório temporário onde baixar as imagens
+            temp_dir: Diretório de build
 
         Returns:
-            Conteúdo LaTeX com URLs substituídas por nomes de arquivos locais
+            Conteúdo LaTeX com URLs substituídas por caminhos locais
         """
-        # Padrão para encontrar includegraphics com URLs remotas
-        # Formato: \includegraphics[options]{http://...} ou \includegraphics[options]{https://...}
-        pattern = r'\\includegraphics(\[[^\]]*\])?\{(https?://[^}]+)\}'
+        urls = urls_remotas(latex_content)
+        if not urls:
+            return latex_content
+        with span(ETAPA_IMAGENS_REMOTAS) as medido:
+            locais = get_cache_imagens_remotas().obter_varias(urls)
+            medido.registrar(
+                bytes=sum(local.stat().st_size for local in locais.values() if local is not None),
+                imagens=len(urls)
+            )
 
         def substituir_url(match):
-            opcoes = match.group(1) or ''
-            url = match.group(2)
+            local = locais.get(match.group(2))
+            if local is None:
+                logger.warning(f"Imagem remota indisponível: {match.group(2)}")
+                return match.group(0)
+            return f"\\includegraphics{match.group(1) or ''}{{{local.resolve().as_posix()}}}"
 
-            # Extrair nome do arquivo da URL ou gerar um baseado em hash
-            url_path = url.split('/')[-1].split('?')[0]  # Remove query params
-            if not url_path or len(url_path) < 3:
-                # Gerar nome baseado em hash da URL
-                url_hash = hashlib.md5(url.encode()).hexdigest()[:12]
-                url_path = f"img_{url_hash}.png"
+        return _RE_INCLUDEGRAPHICS_REMOTO.sub(substituir_url, latex_content)
 
-            # Garantir extensão válida
-            if not any(url_path.lower().endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.pdf']):
-                url_path += '.png'
+    def _resolver_imagem(self, alvo: str, temp_dir: Path) -> Optional[Path]:
+        """
+        Localiza o arquivo de uma referência de \\includegraphics.
 
-            destino = temp_dir / url_path
+        Procura, em ordem: arquivo já presente no diretório de build (imagens
+        remotas baixadas), caminho absoluto ou relativo ao projeto e o nome do
+        arquivo nos diretórios de imagens. Sem extensão, tenta as do graphicx.
+        """
+        candidatos = [alvo] if Path(alvo).suffix else [alvo + ext for ext in EXTENSOES_IMAGEM]
+        for candidato in candidatos:
+            caminho = Path(candidato)
+            if (temp_dir / caminho.name).is_file() and caminho.name == candidato:
+                return temp_dir / caminho.name
+            if caminho.is_file():
+                return caminho
+            for dir_img in DIRETORIOS_IMAGENS:
+                if (dir_img / caminho.name).is_file():
+                    return dir_img / caminho.name
+        return None
+
+    @staticmethod
+    def _vincular(origem: Path, destino: Path) -> None:
+        """Cria hardlink (ou symlink) de origem em destino; copia se nenhum for possível"""
+        try:
+            os.link(origem, destino)
+            return
+        except OSError:
+            pass
+        try:
+            os.symlink(origem.resolve(), destino)
+            return
+        except OSError:
+            pass
+        shutil.copy2(origem, destino)
+
+    @staticmethod
+    def _armazenar_na_area(origem: Path, area: Path) -> Path:
+        """Coloca a imagem na área compartilhada como <hash do conteúdo><extensão>"""
+        digest = hashlib.blake2b(origem.read_bytes(), digest_size=16).hexdigest()
+        destino = area / f"{digest}{origem.suffix.lower()}"
+        if not destino.exists():
+            area.mkdir(parents=True, exist_ok=True)
+            temporario = area / f".{digest}.{os.getpid()}.tmp"
+            shutil.copy2(origem, temporario)
+            os.replace(temporario, destino)
+        return destino
+
+    def _pedidos_derivados(self, referencias: List[Tuple[str, str]], origens: Dict[str, Path],
+                           temp_dir: Path, colunas: int,
+                           metadados_imagens: Optional[Mapping[str, MetadadosImagem]]
+                           ) -> Dict[Tuple[str, str], PedidoDerivado]:
+        """Pedidos de derivado para as referências com escala simples ([scale=x] ou nenhuma)"""
+        pedidos = {}
+        for opcoes, alvo in referencias:
+            origem = origens.get(alvo)
+            if origem is None or origem.parent == temp_dir:
+                continue
+            escala = _RE_ESCALA.match(opcoes) if opcoes else None
+            if opcoes and not escala:
+                continue  # width=, height=... dependem do layout: mantém a original
+            pedidos[(opcoes, alvo)] = PedidoDerivado(
+                origem, float(escala.group(1)) if escala else 1.0, colunas,
+                (metadados_imagens or {}).get(origem.name)
+            )
+        return pedidos
 
-            # Baixar a imagem se ainda não existe
-            if not destino.exists():
-                sucesso = self._baixar_imagem_remota(url, destino)
-                if not sucesso:
-                    logger.warning(f"Falha ao baixar {url}, mantendo URL original")
-                    return match.group(0)  # Manter original se falhar
+    def preparar_derivados(self, conteudos: List[str], diretorio: Path, colunas: int = 1,
+                           metadados_imagens: Optional[Mapping[str, MetadadosImagem]] = None) -> None:
+        """
+        Gera de uma vez os derivados de imagem de vários documentos (ex: todas as
+        versões), antes que os builds paralelos os procurem no cache.
 
-            # Retornar includegraphics com caminho local
-            return f'\\includegraphics{opcoes}{{{url_path}}}'
+        Args:
+            conteudos: Documentos LaTeX (imagens remotas já no cache)
+            diretorio: Diretório de saída (usado na resolução dos caminhos)
+            colunas: Colunas do layout
+            metadados_imagens: Nome do arquivo -> hash/dimensões da tabela imagem
+        """
+        if not derivados_habilitados():
+            return
+        pedidos = []
+        for latex_content in conteudos:
+            latex_content = self._processar_imagens_remotas_no_latex(latex_content, diretorio)
+            referencias = list(dict.fromkeys(
+                ((m.group(1) or ''), m.group(2).strip()) for m in _RE_INCLUDEGRAPHICS.finditer(latex_content)
+            ))
+            origens = {}
+            for _, alvo in referencias:
+                origem = None if re.match(r'https?://', alvo) else self._resolver_imagem(alvo, diretorio)
+                if origem is not None:
+                    origens[alvo] = origem
+            pedidos.extend(
+                self._pedidos_derivados(referencias, origens, diretorio, colunas, metadados_imagens).values()
+            )
+        if pedidos:
+            get_cache_derivados().obter_varios(pedidos)
 
-        # Substituir todas as URLs por nomes locais
-        novo_conteudo = re.sub(pattern, substituir_url, latex_content)
+    def _preparar_imagens(self, latex_content: str, temp_dir: Path,
+                          area_imagens: Optional[Path] = None, colunas: int = 1,
+                          metadados_imagens: Optional[Mapping[str, MetadadosImagem]] = None) -> str:
+        """
+        Coloca no diretório de build apenas as imagens referenciadas pelo LaTeX.
 
-        return novo_conteudo
+        Cada \\includegraphics é resolvido e vinculado (hardlink/symlink, ou
+        cópia) ao diretório de build com um nome seguro para o graphicx, e a
+        referência é reescrita para esse nome. Imagens raster grandes são
+        trocadas pelo derivado em resolução de impressão (ver derivados_imagem).
 
-    def _copiar_imagens_para_temp(self, temp_dir: Path):
-        """
-        Copia as imagens necessárias para o diretório temporário.
-        Isso garante que o pdflatex encontre as imagens durante a compilação.
+        Args:
+            latex_content: Conteúdo LaTeX (URLs remotas já processadas)
+            temp_dir: Diretório de build
+            area_imagens: Área compartilhada endereçada por conteúdo (builds paralelos)
+            colunas: Colunas do layout (largura máxima impressa dos derivados)
+            metadados_imagens: Nome do arquivo -> hash/dimensões da tabela imagem
+
+        Returns:
+            Conteúdo LaTeX com as referências apontando para o diretório de build
+
+        Raises:
+            ImagensAusentesError: Se alguma imagem referenciada não for encontrada
         """
-        import os
-
-        # Diretórios de imagens do projeto
-        diretorios_imagens = [
-            Path('imagens/logos'),
-            Path('imagens/questoes'),
-            Path('imagens/alternativas'),
-            Path('imagens')
-        ]
-
-        for dir_img in diretorios_imagens:
-            if dir_img.exists():
-                for img_file in dir_img.glob('*'):
-                    if img_file.is_file() and img_file.suffix.lower() in ['.png', '.jpg', '.jpeg', '.gif', '.pdf', '.eps']:
-                        destino = temp_dir / img_file.name
-                        if not destino.exists():
-                            try:
-                                shutil.copy2(img_file, destino)
-                                logger.debug(f"Imagem copiada: {img_file.name}")
-                            except Exception as e:
-                                logger.warning(f"Erro ao copiar imagem {img_file}: {e}")
-
-    def compilar_latex_para_pdf(self, latex_content: str, output_dir: Path, base_filename: str) -> Path:
+        referencias = list(dict.fromkeys(
+            ((m.group(1) or ''), m.group(2).strip()) for m in _RE_INCLUDEGRAPHICS.finditer(latex_content)
+        ))
+        origens: Dict[str, Path] = {}
+        ausentes = []
+
+        for alvo in dict.fromkeys(alvo for _, alvo in referencias):
+            if re.match(r'https?://', alvo):
+                ausentes.append(alvo)  # Download falhou em _processar_imagens_remotas_no_latex
+                continue
+            origem = self._resolver_imagem(alvo, temp_dir)
+            if origem is None:
+                ausentes.append(alvo)
+            else:
+                origens[alvo] = origem
+
+        if ausentes:
+            raise ImagensAusentesError(ausentes)
+
+        pedidos = self._pedidos_derivados(referencias, origens, temp_dir, colunas, metadados_imagens)
+        derivados = get_cache_derivados().obter_varios(pedidos.values()) if pedidos and derivados_habilitados() else {}
+
+        nomes: Dict[Tuple[str, str], str] = {}
+        vinculados: Dict[Path, str] = {}  # arquivo de origem -> nome no diretório de build
+        for referencia in referencias:
+            origem = origens[referencia[1]]
+            if origem.parent == temp_dir:
+                nomes[referencia] = origem.name
+                continue
+            pedido = pedidos.get(referencia)
+            fonte = derivados.get(pedido, origem) if pedido else origem
+            if fonte in vinculados:
+                nomes[referencia] = vinculados[fonte]
+                continue
+
+            # graphicx não aceita bem nomes com vários pontos ou espaços
+            nome = origem.name
+            if fonte != origem or nome.count('.') != 1 or ' ' in nome or (temp_dir / nome).exists():
+                nome = f"img_{hashlib.blake2b(str(fonte).encode('utf-8'), digest_size=6).hexdigest()}{fonte.suffix.lower()}"
+            try:
+                arquivo = self._armazenar_na_area(fonte, area_imagens) if area_imagens is not None else fonte
+                if not (temp_dir / nome).exists():
+                    self._vincular(arquivo, temp_dir / nome)
+                nomes[referencia] = vinculados[fonte] = nome
+            except OSError as e:
+                logger.warning(f"Erro ao preparar imagem {fonte}: {e}")
+                ausentes.append(referencia[1])
+
+        if ausentes:
+            raise ImagensAusentesError(list(dict.fromkeys(ausentes)))
+
+        logger.info(
+            f"{len(vinculados)} imagens referenciadas preparadas em {temp_dir} "
+            f"({sum(1 for p in pedidos.values() if derivados.get(p, p.origem) != p.origem)} derivados)"
+        )
+        return _RE_INCLUDEGRAPHICS.sub(
+            lambda m: f"\\includegraphics{m.group(1) or ''}"
+                      f"{{{nomes.get(((m.group(1) or ''), m.group(2).strip()), m.group(2))}}}",
+            latex_content
+        )
+
+    def compilar_latex_para_pdf(
+        self, latex_content: str, output_dir: Path, base_filename: str,
+        area_imagens: Optional[Path] = None,
+        contexto: Optional[ContextoExportacao] = None,
+        colunas: int = 1,
+        metadados_imagens: Optional[Mapping[str, MetadadosImagem]] = None
+    ) -> Path:
         """
         Compila um conteúdo LaTeX para PDF.
 
@@ -249,30 +443,59 @@ class ExportService:
             latex_content: String contendo o LaTeX.
             output_dir: Diretório de saída.
             base_filename: Nome do arquivo base (sem extensão).
+            area_imagens: Área de imagens compartilhada entre builds (opcional).
+            contexto: Progresso e cancelamento da exportação (opcional).
+            colunas: Colunas do layout, para os derivados de imagem.
+            metadados_imagens: Hash/dimensões das imagens conhecidas pelo banco (opcional).
 
         Returns:
             O caminho para o arquivo PDF gerado.
 
         Raises:
+            LatexInvalidoError: Se a verificação estática encontrar erros (antes do pdflatex).
             RuntimeError: Se a compilação do LaTeX falhar.
+            ExportacaoCancelada: Se a exportação for cancelada.
         """
+        # Import local: verificador_latex depende do markup_compiler, que importa este módulo
+        from src.application.services.verificador_latex import (
+            exigir_sem_erros, verificacao_habilitada, verificar_documento
+        )
+        if verificacao_habilitada():
+            with span(ETAPA_VERIFICACAO, base_filename):
+                problemas = verificar_documento(latex_content, f"{base_filename}.tex")
+            exigir_sem_erros(problemas, f"{base_filename}.tex")
+
         temp_dir = output_dir / f"temp_latex_{base_filename}"
         temp_dir.mkdir(parents=True, exist_ok=True)
 
         latex_file_path = temp_dir / f"{base_filename}.tex"
 
         try:
-            # Copiar imagens locais para o diretório temporário
-            logger.info("Copiando imagens locais para diretório temporário...")
-            self._copiar_imagens_para_temp(temp_dir)
+            if contexto:
+                contexto.etapa(ESTADO_PREPARANDO_IMAGENS)
 
             # Processar e baixar imagens remotas (ImgBB, etc)
             logger.info("Processando imagens remotas no LaTeX...")
             latex_content = self._processar_imagens_remotas_no_latex(latex_content, temp_dir)
 
+            # Apenas as imagens referenciadas; ausentes são reportadas antes do pdflatex
+            with span(ETAPA_IMAGENS, base_filename) as medido:
+                latex_content = self._preparar_imagens(
+                    latex_content, temp_dir, area_imagens, colunas, metadados_imagens
+                )
+                imagens = [arquivo for arquivo in temp_dir.iterdir() if arquivo.suffix.lower() in EXTENSOES_IMAGEM]
+                medido.registrar(bytes=sum(arquivo.stat().st_size for arquivo in imagens), imagens=len(imagens))
+
+            # Preâmbulo do template pré-compilado em formato .fmt (quando disponível)
+            formato = get_formatos_latex().preparar(latex_content) if self.usar_formatos else None
+            if formato:
+                latex_content = formato[1]
+
             logger.info(f"Escrevendo conteúdo LaTeX para: {latex_file_path}")
-            with open(latex_file_path, "w", encoding="utf-8") as f:
-                f.write(latex_content)
+            with span(ETAPA_GRAVACAO, latex_file_path.name) as medido:
+                with open(latex_file_path, "w", encoding="utf-8") as f:
+                    f.write(latex_content)
+                medido.registrar(bytes=len(latex_content.encode('utf-8')))
 
             # Usar a codificação preferida do sistema para o output do subprocesso
             # Isso corrige o UnicodeDecodeError em Windows
@@ -285,31 +508,35 @@ class ExportService:
                 f"-output-directory={temp_dir}",
                 str(latex_file_path)
             ]
-            
-            logger.info(f"Comando pdflatex: {' '.join(command)}")
-
-            for i in range(1, 3): # Compilar duas vezes para referências cruzadas
-                logger.info(f"Executando pdflatex ({i}/2) em {temp_dir}...")
-                result = subprocess.run(
-                    command,
-                    capture_output=True,
-                    text=True,
-                    encoding=system_encoding,
-                    errors='replace' # Evita erros de decodificação
-                )
-                
-                if result.returncode != 0:
-                    log_file = temp_dir / f"{base_filename}.log"
-                    log_content = log_file.read_text(encoding='utf-8', errors='ignore') if log_file.exists() else "Arquivo de log não encontrado."
-                    logger.error(f"Erro pdflatex ({i}/2): \nSTDOUT:\n{result.stdout}\nSTDERR:\n{result.stderr}\nLOG:\n{log_content}")
-                    raise RuntimeError(f"Erro na compilação LaTeX ({i}/2). Verifique o log. Erro: {result.stderr}")
+
+            if formato:
+                try:
+                    self._executar_passadas(
+                        command[:1] + [f"-fmt={formato[0]}"] + command[1:],
+                        temp_dir, base_filename, latex_content, system_encoding, contexto
+                    )
+                except (ExportacaoCancelada, TempoEsgotadoError):
+                    raise
+                except RuntimeError:
+                    logger.warning("Compilação com formato pré-compilado falhou; repetindo sem o formato")
+                    for extensao in EXTENSOES_AUXILIARES:
+                        (temp_dir / f"{base_filename}{extensao}").unlink(missing_ok=True)
+                    logger.info(f"Comando pdflatex: {' '.join(command)}")
+                    # Se também falhar sem o formato, o erro é do documento e o formato continua válido
+                    self._executar_passadas(command, temp_dir, base_filename, latex_content, system_encoding, contexto)
+                    get_formatos_latex().registrar_falha(formato[0])
+            else:
+                logger.info(f"Comando pdflatex: {' '.join(command)}")
+                self._executar_passadas(command, temp_dir, base_filename, latex_content, system_encoding, contexto)
 
             pdf_filename = f"{base_filename}.pdf"
             generated_pdf = temp_dir / pdf_filename
             final_pdf_path = output_dir / pdf_filename
 
             if generated_pdf.exists():
-                shutil.move(generated_pdf, final_pdf_path)
+                with span(ETAPA_FINALIZACAO, pdf_filename) as medido:
+                    shutil.move(generated_pdf, final_pdf_path)
+                    medido.registrar(bytes=final_pdf_path.stat().st_size)
                 logger.info(f"PDF gerado com sucesso: {final_pdf_path}")
                 return final_pdf_path
             else:
@@ -319,7 +546,113 @@ class ExportService:
             # Limpeza do diretório temporário
             if temp_dir.exists():
                 logger.info(f"Limpando diretório temporário: {temp_dir}")
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                with span(ETAPA_FINALIZACAO, "limpeza"):
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _executar_pdflatex(self, command: List[str], temp_dir: Path, base_filename: str,
+                           encoding: str, rotulo: str,
+                           contexto: Optional[ContextoExportacao] = None) -> None:
+        """Executa uma passada do pdflatex; levanta CompilacaoLatexError em caso de falha"""
+        logger.info(f"Executando pdflatex ({rotulo}) em {temp_dir}...")
+        if contexto:
+            contexto.etapa(ESTADO_COMPILANDO, f"passada {rotulo}")
+        # Com timeout e encerramento da árvore de processos (cancelamento)
+        with span(ETAPA_PDFLATEX, rotulo) as medido:
+            result = executar_processo(
+                command,
+                contexto,
+                text=True,
+                encoding=encoding,
+                errors='replace' # Evita erros de decodificação
+            )
+            pdf = temp_dir / f"{base_filename}.pdf"
+            if pdf.exists():
+                medido.registrar(bytes=pdf.stat().st_size)
+
+        if result.returncode != 0:
+            log_file = temp_dir / f"{base_filename}.log"
+            log_content = log_file.read_text(encoding='utf-8', errors='ignore') if log_file.exists() else "Arquivo de log não encontrado."
+            logger.error(f"Erro pdflatex ({rotulo}): \nSTDOUT:\n{result.stdout}\nSTDERR:\n{result.stderr}\nLOG:\n{log_content}")
+            raise CompilacaoLatexError(
+                f"Erro na compilação LaTeX ({rotulo}). Verifique o log. Erro: {result.stderr}",
+                log_content
+            )
+
+    @staticmethod
+    def _hash_auxiliares(temp_dir: Path, base_filename: str) -> Dict[str, str]:
+        """Hash dos arquivos auxiliares (.aux/.toc/.out) usados entre passadas"""
+        hashes = {}
+        for extensao in EXTENSOES_AUXILIARES:
+            arquivo = temp_dir / f"{base_filename}{extensao}"
+            if arquivo.exists():
+                hashes[extensao] = hashlib.blake2b(arquivo.read_bytes(), digest_size=16).hexdigest()
+        return hashes
+
+    @staticmethod
+    def _log_pede_nova_passada(temp_dir: Path, base_filename: str) -> bool:
+        """Verifica no .log os avisos de "Rerun" do LaTeX e dos pacotes"""
+        log_file = temp_dir / f"{base_filename}.log"
+        if not log_file.exists():
+            return False
+        return bool(_RE_RERUN.search(log_file.read_text(encoding='utf-8', errors='ignore')))
+
+    def _executar_passadas(self, command: List[str], temp_dir: Path, base_filename: str,
+                           latex_content: str, encoding: str,
+                           contexto: Optional[ContextoExportacao] = None) -> int:
+        """
+        Executa o pdflatex apenas quantas vezes o documento precisar.
+
+        Documentos sem referências cruzadas compilam em uma passada. Os demais
+        fazem uma primeira passada em -draftmode (sem incluir imagens nem gravar
+        o PDF) e repetem a passada final enquanto os arquivos auxiliares mudarem
+        ou o log pedir "Rerun", até max_passadas.
+
+        Returns:
+            Número de passadas executadas
+        """
+        metrics = get_metrics_collector()
+        inicio_total = time.perf_counter()
+        passadas = 0
+        hashes = {}
+
+        if _RE_REFERENCIAS.search(latex_content):
+            inicio = time.perf_counter()
+            self._executar_pdflatex(
+                command[:1] + ["-draftmode"] + command[1:], temp_dir, base_filename, encoding, "rascunho",
+                contexto
+            )
+            passadas += 1
+            if metrics:
+                metrics.record_timing("pdflatex_passada", (time.perf_counter() - inicio) * 1000)
+            hashes = self._hash_auxiliares(temp_dir, base_filename)
+
+        while True:
+            inicio = time.perf_counter()
+            passadas += 1
+            self._executar_pdflatex(
+                command, temp_dir, base_filename, encoding, f"{passadas}/{self.max_passadas}", contexto
+            )
+            if metrics:
+                metrics.record_timing("pdflatex_passada", (time.perf_counter() - inicio) * 1000)
+
+            novos_hashes = self._hash_auxiliares(temp_dir, base_filename)
+            pede_nova = self._log_pede_nova_passada(temp_dir, base_filename)
+            estavel = not pede_nova and (passadas == 1 or novos_hashes == hashes)
+            hashes = novos_hashes
+            if estavel:
+                break
+            if passadas >= self.max_passadas:
+                logger.warning(
+                    f"Referências ainda instáveis após {passadas} passadas do pdflatex "
+                    f"(máximo {self.max_passadas}); o PDF pode conter referências incorretas"
+                )
+                break
+
+        logger.info(f"pdflatex concluído em {passadas} passada(s)")
+        if metrics:
+            metrics.increment("pdflatex_passadas", passadas)
+            metrics.record_timing("pdflatex_compilacao", (time.perf_counter() - inicio_total) * 1000)
+        return passadas
 
     # Outros métodos de exportação podem ser adicionados aqui
     def gerar_conteudo_latex_lista(self, opcoes) -> str:
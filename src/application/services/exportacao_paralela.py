@@ -0,0 +1,239 @@
+"""
+Exportação paralela de múltiplas versões (TIPO A, B, ..., até MAX_VERSOES) de uma lista.
+
+O LaTeX de cada versão é gerado no processo principal (acessa o banco e o
+cache de fragmentos); a compilação com pdflatex, que domina o tempo, é
+distribuída em um pool de processos. Cada versão compila em seu próprio
+diretório de build e as imagens referenciadas vêm de uma área compartilhada
+endereçada por conteúdo, onde cada imagem é gravada uma única vez.
+"""
+import contextvars
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Iterable, List, Mapping, Optional
+
+from src.application.dtos.export_dto import ExportOptionsDTO
+from src.application.services.cache_imagens_remotas import get_cache_imagens_remotas
+from src.application.services.contexto_exportacao import (
+    ContextoExportacao, ExportacaoCancelada, ESTADO_COMPILANDO
+)
+from src.application.services.derivados_imagem import MetadadosImagem
+from src.application.services.export_service import CompilacaoLatexError, ExportService, urls_remotas
+from src.application.services.formato_latex import get_formatos_latex
+from src.application.services.gerador_versoes import MAX_VERSOES, rotulo_versao
+from src.application.services.metricas_exportacao import medicao_atual, medir_exportacao
+from src.infrastructure.logging import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResultadoVersao:
+    """Resultado da exportação de uma versão"""
+    indice: int
+    sufixo: str
+    caminho: Optional[Path] = None
+    erro: Optional[str] = None
+    tempo_geracao: float = 0.0     # segundos gerando o LaTeX
+    tempo_compilacao: float = 0.0  # segundos no pdflatex
+    falha_compilacao: bool = False  # o erro veio do pdflatex (candidata ao diagnóstico)
+
+    @property
+    def sucesso(self) -> bool:
+        return self.caminho is not None and self.erro is None
+
+
+def numero_workers_padrao(quantidade: int) -> int:
+    """Número de workers: EXPORT_WORKERS ou um por versão, limitado aos núcleos"""
+    configurado = os.getenv('EXPORT_WORKERS')
+    if configurado and configurado.isdigit() and int(configurado) > 0:
+        return min(int(configurado), quantidade)
+    return max(1, min(quantidade, os.cpu_count() or 1))
+
+
+def opcoes_da_versao(opcoes_base: ExportOptionsDTO, quantidade: int, indice: int) -> ExportOptionsDTO:
+    """Opções de uma versão (TIPO A, B, ...) a partir das opções comuns"""
+    return replace(
+        opcoes_base,
+        gerar_versoes_randomizadas=True,
+        quantidade_versoes=quantidade,
+        sufixo_versao=f"TIPO {rotulo_versao(indice)}"
+    )
+
+
+def _compilar_versao(latex: str, output_dir: str, base_filename: str, area_imagens: str,
+                     contexto: Optional[ContextoExportacao] = None, colunas: int = 1,
+                     metadados_imagens: Optional[Mapping[str, MetadadosImagem]] = None) -> tuple:
+    """
+    Compila uma versão (executado no worker).
+
+    Returns:
+        Tupla (caminho do PDF, segundos de compilação, spans medidos no processo do worker)
+    """
+    inicio = time.perf_counter()
+    # Em threads a medição do processo principal é herdada; em processos os spans voltam no resultado
+    proprio_processo = medicao_atual() is None
+    with medir_exportacao(base_filename, registrar=False) as medicao:
+        caminho = ExportService().compilar_latex_para_pdf(
+            latex, Path(output_dir), base_filename, Path(area_imagens), contexto,
+            colunas, metadados_imagens
+        )
+    spans = medicao.relatorio.spans if proprio_processo else []
+    return caminho, time.perf_counter() - inicio, spans
+
+
+class ExportacaoParalela:
+    """
+    Orquestra a exportação das versões randomizadas de uma lista.
+    """
+
+    def __init__(self, gerar_latex: Callable[[ExportOptionsDTO, int], str],
+                 nome_arquivo: Callable[[ExportOptionsDTO], str],
+                 max_workers: Optional[int] = None,
+                 contexto: Optional[ContextoExportacao] = None,
+                 metadados_imagens: Optional[Mapping[str, MetadadosImagem]] = None):
+        """
+        Args:
+            gerar_latex: Função (opcoes, indice_versao) -> conteúdo LaTeX
+            nome_arquivo: Função (opcoes) -> nome base do arquivo da versão
+            max_workers: Número máximo de processos (padrão: numero_workers_padrao)
+            contexto: Progresso e cancelamento; com ele a compilação usa threads,
+                que compartilham o contexto (o trabalho pesado é o subprocesso do TeX)
+            metadados_imagens: Hash/dimensões das imagens (derivados sem reler os arquivos)
+        """
+        self._gerar_latex = gerar_latex
+        self._nome_arquivo = nome_arquivo
+        self.max_workers = max_workers
+        self.contexto = contexto
+        self.metadados_imagens = metadados_imagens
+        self._colunas = 1
+        self._metrics = get_metrics_collector()
+
+    def exportar(self, opcoes_base: ExportOptionsDTO, quantidade: int,
+                 indices: Optional[Iterable[int]] = None) -> List[ResultadoVersao]:
+        """
+        Exporta as versões e agrega resultados e erros por versão.
+
+        Args:
+            opcoes_base: Opções comuns a todas as versões
+            quantidade: Número de versões (1 a MAX_VERSOES)
+            indices: Versões a exportar (padrão: todas); as demais vieram do cache de artefatos
+
+        Returns:
+            Um ResultadoVersao por versão exportada, na ordem A, B, C...
+        """
+        quantidade = max(1, min(quantidade, MAX_VERSOES))
+        self._colunas = opcoes_base.layout_colunas
+        output_dir = Path(opcoes_base.output_dir)
+        resultados: List[ResultadoVersao] = []
+        pendentes = []  # (resultado, latex, base_filename)
+
+        for i in (range(quantidade) if indices is None else sorted(indices)):
+            opcoes = opcoes_da_versao(opcoes_base, quantidade, i)
+            resultado = ResultadoVersao(indice=i, sufixo=opcoes.sufixo_versao)
+            resultados.append(resultado)
+
+            inicio = time.perf_counter()
+            try:
+                latex = self._gerar_latex(opcoes, i)
+                base_filename = self._nome_arquivo(opcoes)
+            except ExportacaoCancelada:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao gerar {resultado.sufixo}: {e}", exc_info=True)
+                resultado.erro = str(e)
+                continue
+            finally:
+                resultado.tempo_geracao = time.perf_counter() - inicio
+
+            if opcoes.tipo_exportacao == 'direta':
+                pendentes.append((resultado, latex, base_filename))
+            else:
+                tex_path = output_dir / f"{base_filename}.tex"
+                tex_path.write_text(latex, encoding='utf-8')
+                resultado.caminho = tex_path
+
+        if pendentes:
+            self._compilar(pendentes, output_dir)
+        if self.contexto:
+            self.contexto.verificar()
+
+        for resultado in resultados:
+            logger.info(
+                f"{resultado.sufixo}: {'ok' if resultado.sucesso else 'erro'} "
+                f"(geração {resultado.tempo_geracao:.2f}s, compilação {resultado.tempo_compilacao:.2f}s)"
+            )
+            if self._metrics:
+                self._metrics.record_timing(
+                    "exportacao_versao", (resultado.tempo_geracao + resultado.tempo_compilacao) * 1000
+                )
+        return resultados
+
+    def _compilar(self, pendentes: list, output_dir: Path) -> None:
+        area = output_dir / ".imagens_build"
+        # Baixa as imagens remotas de todas as versões de uma vez (mesmo cache em disco)
+        get_cache_imagens_remotas().obter_varias(
+            url for _, latex, _ in pendentes for url in urls_remotas(latex)
+        )
+        # Derivados de imagem de todas as versões em um único pool; os builds só os vinculam
+        ExportService().preparar_derivados(
+            [latex for _, latex, _ in pendentes], output_dir, self._colunas, self.metadados_imagens
+        )
+        # Constrói o formato do preâmbulo uma vez, antes que os workers o disputem
+        if ExportService().usar_formatos:
+            get_formatos_latex().preparar(pendentes[0][1])
+        workers = self.max_workers or numero_workers_padrao(len(pendentes))
+        logger.info(f"Compilando {len(pendentes)} versões com {workers} workers")
+
+        if self.contexto:
+            self.contexto.etapa(ESTADO_COMPILANDO, f"{len(pendentes)} versões")
+
+        try:
+            if self.contexto:
+                self._executar(ThreadPoolExecutor, workers, pendentes, output_dir, area, self.contexto)
+                return
+            try:
+                self._executar(ProcessPoolExecutor, workers, pendentes, output_dir, area)
+            except (BrokenProcessPool, OSError) as e:
+                # Ambientes sem suporte a processos filhos: pdflatex é um subprocesso,
+                # então threads ainda paralelizam a compilação
+                logger.warning(f"Pool de processos indisponível ({e}); usando threads")
+                restantes = [p for p in pendentes if not p[0].sucesso and p[0].erro is None]
+                self._executar(ThreadPoolExecutor, workers, restantes, output_dir, area)
+        finally:
+            shutil.rmtree(area, ignore_errors=True)
+
+    def _executar(self, executor_cls, workers: int, pendentes: list, output_dir: Path,
+                  area: Path, contexto: Optional[ContextoExportacao] = None) -> None:
+        # dict simples: o snapshot usa mapeamentos imutáveis, que não vão para outro processo
+        metadados = dict(self.metadados_imagens) if self.metadados_imagens else None
+        medicao = medicao_atual()
+        with executor_cls(max_workers=workers) as executor:
+            futuros = {}
+            for resultado, latex, base_filename in pendentes:
+                argumentos = (
+                    _compilar_versao, latex, str(output_dir), base_filename, str(area), contexto,
+                    self._colunas, metadados
+                )
+                if executor_cls is ThreadPoolExecutor:
+                    # Threads não herdam o contexto: a medição em andamento vai junto
+                    argumentos = (contextvars.copy_context().run,) + argumentos
+                futuros[executor.submit(*argumentos)] = resultado
+            for futuro in as_completed(futuros):
+                resultado = futuros[futuro]
+                try:
+                    resultado.caminho, resultado.tempo_compilacao, spans = futuro.result()
+                    if medicao:
+                        medicao.incorporar(spans)
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    logger.error(f"Erro ao compilar {resultado.sufixo}: {e}")
+                    resultado.erro = str(e)
+                    resultado.falha_compilacao = isinstance(e, CompilacaoLatexError)
@@ -0,0 +1,191 @@
+"""
+Formatos pré-compilados (.fmt) do preâmbulo dos templates LaTeX.
+
+Todos os templates carregam o mesmo preâmbulo pesado (tcolorbox, tikz,
+enumitem, multicol...) em cada passada de cada exportação. O preâmbulo é
+despejado uma vez em um formato com mylatexformat e as compilações seguintes
+usam -fmt, pulando o carregamento dos pacotes.
+
+A chave do formato é o hash do preâmbulo sem comentários (os placeholders dos
+templates ficam após \\begin{document} ou em comentários) mais a identificação
+da distribuição TeX, então editar um template ou atualizar o TeX gera um
+formato novo. Qualquer falha faz a exportação compilar da forma normal.
+"""
+import functools
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Tuple
+
+from src.infrastructure.logging import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = 'database/formatos_latex'
+MAX_FORMATOS = 8
+
+# Marcador do mylatexformat; vira \relax quando o documento é compilado sem o formato
+MARCADOR_FIM_DUMP = '\\csname endofdump\\endcsname\n'
+_INICIO_DOCUMENTO = '\\begin{document}'
+_RE_COMENTARIO = re.compile(r'(?<!\\)%.*')
+
+
+def _separar_preambulo(latex_content: str) -> Optional[Tuple[str, str]]:
+    """Divide o documento em (preâmbulo, resto a partir de \\begin{document})"""
+    posicao = latex_content.find(_INICIO_DOCUMENTO)
+    if posicao <= 0:
+        return None
+    return latex_content[:posicao], latex_content[posicao:]
+
+
+def _normalizar_preambulo(preambulo: str) -> str:
+    """Remove comentários e linhas vazias (não afetam o formato)"""
+    linhas = (_RE_COMENTARIO.sub('', linha).rstrip() for linha in preambulo.splitlines())
+    return '\n'.join(linha for linha in linhas if linha)
+
+
+@functools.lru_cache(maxsize=1)
+def identificar_distribuicao() -> Optional[str]:
+    """
+    Identifica a instalação do TeX (versão do pdflatex e formato base).
+
+    Returns:
+        String de identificação ou None se o pdflatex não estiver disponível
+    """
+    executavel = shutil.which('pdflatex')
+    if not executavel:
+        return None
+    partes = [os.path.realpath(executavel), str(os.path.getmtime(executavel))]
+    try:
+        versao = subprocess.run(
+            ['pdflatex', '--version'], capture_output=True, text=True, timeout=30, errors='replace'
+        )
+        partes.append(versao.stdout.splitlines()[0] if versao.stdout else '')
+        formato_base = subprocess.run(
+            ['kpsewhich', '-engine=pdftex', 'pdflatex.fmt'],
+            capture_output=True, text=True, timeout=30, errors='replace'
+        ).stdout.strip()
+        if formato_base and os.path.exists(formato_base):
+            partes.append(f"{formato_base}:{os.path.getmtime(formato_base)}")
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"Não foi possível identificar a distribuição TeX: {e}")
+    return '|'.join(partes)
+
+
+class FormatosLatex:
+    """
+    Cache em disco de formatos .fmt, um por preâmbulo distinto.
+    """
+
+    def __init__(self, diretorio: str = CAMINHO_PADRAO, max_formatos: int = MAX_FORMATOS):
+        self.diretorio = Path(diretorio)
+        self.max_formatos = max_formatos
+        self._lock = Lock()
+        self._metrics = get_metrics_collector()
+
+    def _chave(self, preambulo: str) -> Optional[str]:
+        distribuicao = identificar_distribuicao()
+        if distribuicao is None:
+            return None
+        conteudo = f"{distribuicao}\n{_normalizar_preambulo(preambulo)}"
+        return hashlib.blake2b(conteudo.encode('utf-8'), digest_size=12).hexdigest()
+
+    def preparar(self, latex_content: str) -> Optional[Tuple[Path, str]]:
+        """
+        Obtém (construindo se preciso) o formato do preâmbulo do documento.
+
+        Args:
+            latex_content: Documento LaTeX completo
+
+        Returns:
+            Tupla (caminho do .fmt, documento com o marcador de fim do dump)
+            ou None se o formato não puder ser usado
+        """
+        partes = _separar_preambulo(latex_content)
+        if partes is None:
+            return None
+        preambulo, resto = partes
+        chave = self._chave(preambulo)
+        if chave is None:
+            return None
+
+        formato = self.diretorio / f"preambulo-{chave}.fmt"
+        with self._lock:
+            if not formato.exists():
+                if (self.diretorio / f"preambulo-{chave}.falhou").exists():
+                    return None
+                if not self._construir(preambulo, formato):
+                    return None
+            else:
+                os.utime(formato)  # Recência para a remoção dos antigos
+        if self._metrics:
+            self._metrics.increment("formato_latex_usado")
+        return formato, preambulo + MARCADOR_FIM_DUMP + resto
+
+    def _construir(self, preambulo: str, formato: Path) -> bool:
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        nome = formato.stem
+        logger.info(f"Construindo formato LaTeX pré-compilado: {formato.name}")
+        with tempfile.TemporaryDirectory(dir=self.diretorio) as build_dir:
+            fonte = Path(build_dir) / f"{nome}.tex"
+            fonte.write_text(
+                preambulo + MARCADOR_FIM_DUMP + _INICIO_DOCUMENTO + '\n\\end{document}\n',
+                encoding='utf-8'
+            )
+            try:
+                resultado = subprocess.run(
+                    ['pdflatex', '-ini', '-interaction=nonstopmode', f'-jobname={nome}',
+                     '&pdflatex', 'mylatexformat.ltx', fonte.name],
+                    cwd=build_dir, capture_output=True, text=True, errors='replace', timeout=300
+                )
+                gerado = Path(build_dir) / f"{nome}.fmt"
+                if resultado.returncode != 0 or not gerado.exists():
+                    raise RuntimeError(resultado.stdout[-2000:])
+                os.replace(gerado, formato)
+            except (OSError, subprocess.SubprocessError, RuntimeError) as e:
+                logger.warning(f"Formato LaTeX não pôde ser construído; compilação normal será usada: {e}")
+                self.registrar_falha(formato)
+                return False
+
+        if self._metrics:
+            self._metrics.increment("formato_latex_construido")
+        self._remover_antigos()
+        return True
+
+    def registrar_falha(self, formato: Path) -> None:
+        """
+        Marca um formato como inutilizável (ex: a compilação falhou com ele e funcionou sem ele) até
+        que o template ou a distribuição mude.
+        """
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            formato.with_suffix('.falhou').touch()
+            if formato.exists():
+                formato.unlink()
+        except OSError as e:
+            logger.debug(f"Erro ao registrar falha do formato {formato}: {e}")
+
+    def _remover_antigos(self) -> None:
+        formatos = sorted(self.diretorio.glob('preambulo-*.fmt'), key=lambda p: p.stat().st_mtime, reverse=True)
+        for antigo in formatos[self.max_formatos:]:
+            try:
+                antigo.unlink()
+            except OSError:
+                pass
+
+
+_formatos_latex: Optional[FormatosLatex] = None
+
+
+def get_formatos_latex() -> FormatosLatex:
+    """Retorna o cache de formatos global (diretório via FORMATOS_LATEX_PATH)"""
+    global _formatos_latex
+    if _formatos_latex is None:
+        _formatos_latex = FormatosLatex(os.getenv('FORMATOS_LATEX_PATH', CAMINHO_PADRAO))
+    return _formatos_latex
@@ -0,0 +1,449 @@
+"""
+Gerador de versões de provas (TIPO A, B, ... até dezenas de versões por sala).
+
+Produz de uma vez, a partir de uma semente, a ordem das questões e a
+permutação das alternativas de N versões, respeitando restrições:
+
+- gabarito balanceado: em cada versão as letras corretas ficam distribuídas
+  por igual entre A-E (ou entre as letras que cada questão admite);
+- sequência máxima: no máximo R questões seguidas com a mesma letra;
+- distância mínima entre versões: a distância de Kendall normalizada entre as
+  ordens de quaisquer duas versões é pelo menos d (relaxada, com aviso,
+  quando não é atingível, ex: poucas questões);
+- questões fixas: mantêm a posição original em todas as versões;
+- alternativas fixas: questões que não podem ter as alternativas permutadas
+  ("nenhuma das anteriores" etc.) mantêm a ordem original.
+
+Com a mesma semente, quantidade e restrições o resultado é idêntico, então uma
+versão pode ser regerada isoladamente. Os gabaritos de todas as versões saem
+prontos no PlanoVersoes (gabarito consolidado).
+
+A geração de ordens, as distâncias de Kendall e as permutações de
+alternativas são vetorizadas com NumPy; a atribuição de letras é um laço
+curto por versão.
+"""
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LETRAS = 'ABCDEFGHIJ'
+MAX_VERSOES = 40
+# Lote de ordens candidatas por rodada e rodadas sem progresso antes de relaxar a distância
+TAMANHO_LOTE = 256
+RODADAS_ANTES_DE_RELAXAR = 8
+FATOR_RELAXAMENTO = 0.8
+MAX_REPAROS_SEQUENCIA = 200
+TOLERANCIA = 1e-6
+
+
+def rotulo_versao(indice: int) -> str:
+    """Rótulo da versão: A..Z, depois AA, AB... (como colunas de planilha)"""
+    rotulo = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        rotulo = chr(65 + resto) + rotulo
+    return rotulo
+
+
+def semente_da_lista(codigo_lista: str) -> int:
+    """Semente estável derivada do código da lista (mesmas versões a cada exportação)"""
+    return int.from_bytes(hashlib.blake2b(codigo_lista.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+@dataclass(frozen=True)
+class QuestaoPlano:
+    """
+    Entrada do gerador para uma questão (na ordem original da lista).
+
+    Cada conteúdo é a original (índice 0) ou uma variante; a versão v usa o
+    conteúdo v % len(alternativas), como no rodízio entre variantes.
+    """
+    alternativas: Tuple[int, ...]           # número de alternativas de cada conteúdo (0 = sem alternativas)
+    corretas: Tuple[Optional[int], ...]     # índice da alternativa correta de cada conteúdo (None = sem gabarito)
+    fixa: bool = False                      # mantém a posição original
+    permutar_alternativas: bool = True
+
+
+@dataclass(frozen=True)
+class RestricoesVersoes:
+    """Restrições da geração"""
+    max_sequencia: int = 3            # máximo de questões seguidas com a mesma letra (0 = sem limite)
+    distancia_minima: float = 0.3     # distância de Kendall normalizada mínima entre as ordens (0-1)
+    balancear: bool = True            # distribuir as letras corretas por igual
+
+
+@dataclass
+class PlanoVersoes:
+    """
+    Resultado: ordens, conteúdos, permutações de alternativas e gabaritos.
+
+    Arrays (V = versões, Q = questões, K = máximo de alternativas):
+        ordens[v, p]           questão original na posição p da versão v
+        conteudos[v, q]        conteúdo usado pela questão q na versão v (0 = original)
+        permutacoes[v, q, i]   alternativa original exibida na posição i (-1 = não existe)
+        gabaritos[v, p]        índice da letra correta na posição p (-1 = sem gabarito)
+    """
+    semente: int
+    ordens: 'np.ndarray'
+    conteudos: 'np.ndarray'
+    permutacoes: 'np.ndarray'
+    gabaritos: 'np.ndarray'
+    distancia_minima: float           # menor distância de Kendall obtida entre duas versões
+    maior_sequencia: int              # maior sequência de letras iguais obtida
+
+    @property
+    def quantidade(self) -> int:
+        return int(self.ordens.shape[0])
+
+    def ordem(self, versao: int) -> List[int]:
+        return self.ordens[versao].tolist()
+
+    def conteudo(self, versao: int, questao: int) -> int:
+        return int(self.conteudos[versao, questao])
+
+    def alternativas(self, versao: int, questao: int) -> List[int]:
+        """Índices das alternativas originais na ordem exibida"""
+        permutacao = self.permutacoes[versao, questao]
+        return permutacao[permutacao >= 0].tolist()
+
+    def gabarito(self, versao: int) -> List[Optional[str]]:
+        """Letras corretas por posição (None para questões sem gabarito objetivo)"""
+        return [LETRAS[i] if i >= 0 else None for i in self.gabaritos[versao].tolist()]
+
+    def contagem_letras(self, versao: int) -> dict:
+        letras = self.gabaritos[versao]
+        return {LETRAS[i]: int((letras == i).sum()) for i in range(int(letras.max(initial=-1)) + 1)}
+
+    def gabarito_consolidado(self) -> List[List[Tuple[int, Optional[str]]]]:
+        """
+        Gabarito por questão original: para cada questão, (posição 1-based, letra) em cada versão.
+        """
+        posicoes = np.argsort(self.ordens, axis=1)  # posicoes[v, q]
+        linhas = []
+        for questao in range(self.ordens.shape[1]):
+            linha = []
+            for versao in range(self.quantidade):
+                posicao = int(posicoes[versao, questao])
+                letra = int(self.gabaritos[versao, posicao])
+                linha.append((posicao + 1, LETRAS[letra] if letra >= 0 else None))
+            linhas.append(linha)
+        return linhas
+
+
+def _sinais_pares(ordens: 'np.ndarray') -> 'np.ndarray':
+    """
+    Matriz ±1 (ordens × pares i<j) com o sinal de posição[i] - posição[j]; o produto
+    escalar entre duas linhas dá concordantes - discordantes (distância de Kendall).
+    """
+    posicoes = np.argsort(ordens, axis=1)
+    i, j = np.triu_indices(ordens.shape[1], k=1)
+    return np.sign(posicoes[:, i] - posicoes[:, j]).astype(np.float32)
+
+
+def _distancias(sinais_a: 'np.ndarray', sinais_b: 'np.ndarray') -> 'np.ndarray':
+    """Distância de Kendall normalizada (0 = mesma ordem, 1 = ordem inversa) entre todas as linhas"""
+    pares = sinais_a.shape[1]
+    return (1.0 - (sinais_a @ sinais_b.T) / pares) / 2.0
+
+
+class GeradorVersoes:
+    """
+    Gera planos de versões a partir das questões e das restrições.
+    """
+
+    def __init__(self, restricoes: Optional[RestricoesVersoes] = None):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy é necessário para o gerador de versões.")
+        self.restricoes = restricoes or RestricoesVersoes()
+
+    def gerar(self, questoes: Sequence[QuestaoPlano], quantidade: int, semente: int) -> PlanoVersoes:
+        """
+        Gera o plano de N versões.
+
+        Args:
+            questoes: Questões na ordem original da lista
+            quantidade: Número de versões (1 a MAX_VERSOES)
+            semente: Semente (mesma semente, mesmo plano)
+
+        Returns:
+            PlanoVersoes
+        """
+        quantidade = max(1, min(quantidade, MAX_VERSOES))
+        rng = np.random.default_rng(semente)
+        total = len(questoes)
+
+        ordens, distancia = self._gerar_ordens(questoes, quantidade, rng)
+
+        # Conteúdo cíclico (original, variante 1, variante 2, original...)
+        n_conteudos = np.array([len(q.alternativas) for q in questoes], dtype=np.int64).reshape(1, -1)
+        conteudos = (np.arange(quantidade).reshape(-1, 1) % np.maximum(n_conteudos, 1)) if total else \
+            np.zeros((quantidade, 0), dtype=np.int64)
+        n_alternativas = np.array([
+            [questoes[q].alternativas[conteudos[v, q]] for q in range(total)] for v in range(quantidade)
+        ], dtype=np.int64).reshape(quantidade, total)
+        corretas = np.array([
+            [-1 if questoes[q].corretas[conteudos[v, q]] is None else questoes[q].corretas[conteudos[v, q]]
+             for q in range(total)] for v in range(quantidade)
+        ], dtype=np.int64).reshape(quantidade, total)
+        livres = np.array([q.permutar_alternativas for q in questoes], dtype=bool)
+
+        alvos = np.array([
+            self._letras_versao(ordens[v], n_alternativas[v], corretas[v], livres, rng)
+            for v in range(quantidade)
+        ], dtype=np.int64).reshape(quantidade, total)
+        permutacoes = self._permutar_alternativas(n_alternativas, corretas, alvos, livres, rng)
+
+        gabaritos = np.take_along_axis(alvos, ordens, axis=1)
+        plano = PlanoVersoes(
+            semente=semente, ordens=ordens, conteudos=conteudos, permutacoes=permutacoes,
+            gabaritos=gabaritos, distancia_minima=distancia,
+            maior_sequencia=max((self._maior_sequencia(linha) for linha in gabaritos), default=0)
+        )
+        logger.info(
+            f"Plano de {quantidade} versões ({total} questões, semente {semente}): "
+            f"distância mínima {plano.distancia_minima:.2f}, maior sequência {plano.maior_sequencia}"
+        )
+        return plano
+
+    # ------------------------------------------------------------------
+    # Ordens das questões
+    # ------------------------------------------------------------------
+
+    def _gerar_ordens(self, questoes: Sequence[QuestaoPlano], quantidade: int,
+                      rng: 'np.random.Generator') -> Tuple['np.ndarray', float]:
+        """Ordens com distância de Kendall mínima entre si (questões fixas não se movem)"""
+        total = len(questoes)
+        soltas = np.array([i for i, q in enumerate(questoes) if not q.fixa], dtype=np.int64)
+        ordens = np.tile(np.arange(total, dtype=np.int64), (quantidade, 1))
+        if len(soltas) < 2:
+            return ordens, 0.0
+
+        pares = len(soltas) * (len(soltas) - 1) // 2
+        minima = self.restricoes.distancia_minima
+        aceitas = np.empty((0, len(soltas)), dtype=np.int64)
+        sinais_aceitas = np.empty((0, pares), dtype=np.float32)
+        sem_progresso = 0
+        while len(aceitas) < quantidade:
+            lote = rng.permuted(np.tile(np.arange(len(soltas)), (TAMANHO_LOTE, 1)), axis=1)
+            sinais = _sinais_pares(lote)
+            # Candidatas já distantes das aceitas; entre si, escolha gulosa na ordem do lote
+            limite = minima - TOLERANCIA
+            distantes = np.ones(len(lote), dtype=bool) if not len(aceitas) else \
+                _distancias(sinais, sinais_aceitas).min(axis=1) >= limite
+            entre_si = _distancias(sinais, sinais)
+            escolhidas: List[int] = []
+            for candidata in np.flatnonzero(distantes):
+                if all(entre_si[candidata, outra] >= limite for outra in escolhidas):
+                    escolhidas.append(int(candidata))
+                    if len(aceitas) + len(escolhidas) == quantidade:
+                        break
+            if escolhidas:
+                aceitas = np.vstack([aceitas, lote[escolhidas]])
+                sinais_aceitas = np.vstack([sinais_aceitas, sinais[escolhidas]])
+                sem_progresso = 0
+            else:
+                sem_progresso += 1
+                if sem_progresso >= RODADAS_ANTES_DE_RELAXAR:
+                    # Abaixo de um par invertido a restrição deixa de existir (ordens podem repetir)
+                    minima = minima * FATOR_RELAXAMENTO if minima * FATOR_RELAXAMENTO * pares >= 1 else 0.0
+                    sem_progresso = 0
+
+        if minima < self.restricoes.distancia_minima:
+            logger.warning(
+                f"Distância mínima entre versões inatingível com {len(soltas)} questões móveis; "
+                f"relaxada para {minima:.2f}"
+            )
+
+        ordens[:, soltas] = soltas[aceitas]
+        if quantidade < 2:
+            return ordens, 1.0
+        distancias = _distancias(sinais_aceitas, sinais_aceitas)
+        np.fill_diagonal(distancias, np.inf)
+        return ordens, float(distancias.min())
+
+    # ------------------------------------------------------------------
+    # Letras do gabarito
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _maior_sequencia(letras: Sequence[int]) -> int:
+        maior = atual = 0
+        anterior = -1
+        for letra in letras:
+            atual = atual + 1 if letra >= 0 and letra == anterior else (1 if letra >= 0 else 0)
+            anterior = letra
+            maior = max(maior, atual)
+        return maior
+
+    @staticmethod
+    def _sequencia_com(ordem: 'np.ndarray', letras: List[int], posicao: int, letra: int) -> int:
+        """Tamanho da sequência de `letra` que a posição formaria com as vizinhas já definidas"""
+        tamanho = 1
+        p = posicao - 1
+        while p >= 0 and letras[ordem[p]] == letra:
+            tamanho += 1
+            p -= 1
+        p = posicao + 1
+        while p < len(ordem) and letras[ordem[p]] == letra:
+            tamanho += 1
+            p += 1
+        return tamanho
+
+    def _letras_versao(self, ordem: 'np.ndarray', n_alternativas: 'np.ndarray', corretas: 'np.ndarray',
+                       livres: 'np.ndarray', rng: 'np.random.Generator') -> List[int]:
+        """
+        Letra correta de cada questão (índice da questão original) em uma versão.
+
+        Questões com alternativas fixas mantêm a letra original. As demais são
+        percorridas na ordem da prova e sorteiam, com peso igual à cota restante,
+        uma letra que não estoure max_sequencia; uma letra com cota grande demais
+        para o que resta da prova é escolhida antes que fique impossível separá-la.
+        """
+        total = len(ordem)
+        letras = [-1] * total
+        objetivas = [q for q in range(total) if corretas[q] >= 0 and n_alternativas[q] > 0]
+        moveis = [q for q in objetivas if livres[q] and n_alternativas[q] > 1]
+        for q in objetivas:
+            if q not in moveis:
+                letras[q] = int(corretas[q])
+        if not moveis:
+            return letras
+
+        # Cotas iguais por letra (sobras para letras sorteadas), descontando as fixas
+        n_letras = int(max(n_alternativas[q] for q in objetivas))
+        if self.restricoes.balancear:
+            cotas = np.full(n_letras, len(objetivas) // n_letras, dtype=np.int64)
+            cotas[rng.permutation(n_letras)[:len(objetivas) % n_letras]] += 1
+            for q in objetivas:
+                if q not in moveis and letras[q] < n_letras:
+                    cotas[letras[q]] -= 1
+            cotas = np.maximum(cotas, 0)
+        else:
+            cotas = np.full(n_letras, len(moveis), dtype=np.int64)
+
+        limite = self.restricoes.max_sequencia or total
+        moveis_set = set(moveis)
+        restantes = len(moveis)
+        for p, q in enumerate(ordem.tolist()):
+            if q not in moveis_set:
+                continue
+            # Letras que estourariam a sequência com as vizinhas já definidas (inclusive fixas adiante)
+            permitidas = np.array([
+                letra for letra in range(n_alternativas[q])
+                if self._sequencia_com(ordem, letras, p, letra) <= limite
+            ], dtype=np.int64)
+            if not len(permitidas):
+                permitidas = np.arange(n_alternativas[q])
+            pesos = cotas[permitidas].astype(float)
+            if pesos.sum() == 0:
+                pesos = np.ones(len(permitidas))
+            # Cota que só cabe se usada agora (regra de separação com sequências de até `limite`)
+            urgentes = pesos > limite * (restantes - pesos) if self.restricoes.balancear else \
+                np.zeros(len(pesos), dtype=bool)
+            if urgentes.any():
+                letra = int(permitidas[urgentes][np.argmax(pesos[urgentes])])
+            else:
+                letra = int(rng.choice(permitidas, p=pesos / pesos.sum()))
+            letras[q] = letra
+            cotas[letra] = max(0, cotas[letra] - 1)
+            restantes -= 1
+
+        if self.restricoes.max_sequencia > 0:
+            self._quebrar_sequencias(ordem, letras, moveis, n_alternativas, self.restricoes.max_sequencia, rng)
+        return letras
+
+    def _quebrar_sequencias(self, ordem: 'np.ndarray', letras: List[int], moveis: List[int],
+                            n_alternativas: 'np.ndarray', limite: int, rng: 'np.random.Generator') -> None:
+        """Troca letras entre questões móveis até não haver sequência maior que o limite"""
+        posicao = {int(q): p for p, q in enumerate(ordem)}
+        moveis_set = set(moveis)
+
+        def sequencia_ate(p: int) -> int:
+            """Tamanho da sequência de letras iguais que termina na posição p"""
+            letra = letras[ordem[p]]
+            if letra < 0:
+                return 0
+            tamanho = 1
+            while p - tamanho >= 0 and letras[ordem[p - tamanho]] == letra:
+                tamanho += 1
+            return tamanho
+
+        def viola_em_volta(p: int) -> bool:
+            inicio = max(0, p - limite)
+            fim = min(len(ordem), p + limite + 1)
+            return any(sequencia_ate(i) > limite for i in range(inicio, fim))
+
+        def movel_na_sequencia(p: int) -> Optional[int]:
+            """Questão móvel (de trás para frente) na sequência que termina em p, se estourada"""
+            if sequencia_ate(p) <= limite:
+                return None
+            trecho = [int(ordem[i]) for i in range(p, p - limite - 1, -1)]
+            return next((q for q in trecho if q in moveis_set), None)
+
+        for _ in range(MAX_REPAROS_SEQUENCIA):
+            # Sequências só de questões com alternativas fixas não têm como ser quebradas
+            alvo = next((q for q in map(movel_na_sequencia, range(len(ordem))) if q is not None), None)
+            if alvo is None:
+                return
+            trocou = False
+            for outra in rng.permutation(moveis):
+                outra = int(outra)
+                la, lo = letras[alvo], letras[outra]
+                if la == lo or la >= n_alternativas[outra] or lo >= n_alternativas[alvo]:
+                    continue
+                letras[alvo], letras[outra] = lo, la
+                if viola_em_volta(posicao[alvo]) or viola_em_volta(posicao[outra]):
+                    letras[alvo], letras[outra] = la, lo
+                    continue
+                trocou = True
+                break
+            if not trocou:
+                break
+        logger.warning(f"Não foi possível limitar todas as sequências de letras a {limite}")
+
+    # ------------------------------------------------------------------
+    # Permutação das alternativas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _permutar_alternativas(n_alternativas: 'np.ndarray', corretas: 'np.ndarray', alvos: 'np.ndarray',
+                               livres: 'np.ndarray', rng: 'np.random.Generator') -> 'np.ndarray':
+        """
+        Permutações uniformes com a alternativa correta na letra alvo (todas as
+        versões e questões de uma vez).
+        """
+        versoes, total = n_alternativas.shape
+        maximo = int(n_alternativas.max(initial=0))
+        if maximo == 0:
+            return np.full((versoes, total, 0), -1, dtype=np.int64)
+
+        indices = np.arange(maximo).reshape(1, 1, -1)
+        validas = indices < n_alternativas[..., None]
+        # Chaves aleatórias; posições inexistentes vão para o fim
+        chaves = np.where(validas, rng.random((versoes, total, maximo)), np.inf)
+        # Alternativas fixas (ou sem gabarito a posicionar): ordem original
+        fixas = ~livres.reshape(1, -1) | (alvos < 0) | (corretas < 0)
+        chaves = np.where(fixas[..., None] & validas, indices.astype(float), chaves)
+        permutacoes = np.argsort(chaves, axis=2)
+
+        # Troca a correta para a posição alvo
+        mover = ~fixas
+        if mover.any():
+            v, q = np.nonzero(mover)
+            atual = np.argmax(permutacoes[v, q] == corretas[v, q][:, None], axis=1)
+            destino = alvos[v, q]
+            ocupante = permutacoes[v, q, destino]
+            permutacoes[v, q, destino] = corretas[v, q]
+            permutacoes[v, q, atual] = ocupante
+
+        return np.where(validas, permutacoes, -1)
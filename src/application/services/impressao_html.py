@@ -0,0 +1,193 @@
+"""
+Impressão de HTML em PDF com o Qt WebEngine (motor de rascunho sem LaTeX).
+
+O QWebEnginePage só pode ser usado na thread da aplicação Qt. A impressora
+vive nessa thread: chamada nela, roda um QEventLoop local até o PDF ficar
+pronto (linha de comando); chamada de outra thread (fila de exportação),
+envia o pedido por um sinal enfileirado e espera o resultado.
+
+Sem interface gráfica, get_impressora_html cria a aplicação Qt com a
+plataforma offscreen (QT_QPA_PLATFORM=offscreen), na thread principal.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+try:
+    from PyQt6.QtCore import (
+        QCoreApplication, QEventLoop, QMarginsF, QObject, QThread, QTimer, QUrl, Qt, pyqtSignal
+    )
+    from PyQt6.QtGui import QGuiApplication, QPageLayout, QPageSize
+    # Precisa ser importado antes de criar a aplicação Qt
+    from PyQt6.QtWebEngineCore import QWebEnginePage
+    WEBENGINE_AVAILABLE = True
+except ImportError:
+    QObject = object
+    WEBENGINE_AVAILABLE = False
+
+from src.application.services.contexto_exportacao import (
+    ContextoExportacao, ExportacaoCancelada, TempoEsgotadoError
+)
+
+logger = logging.getLogger(__name__)
+
+TEMPO_LIMITE_PADRAO = 60.0   # segundos por documento
+MARGENS_MM = (15.0, 15.0, 15.0, 15.0)  # esquerda, topo, direita, base
+
+
+@dataclass
+class _PedidoImpressao:
+    """Pedido de impressão entregue à thread da aplicação Qt"""
+    html: Path
+    pdf: Path
+    concluido: threading.Event = field(default_factory=threading.Event)
+    erro: Optional[str] = None
+
+
+class ImpressoraHtml(QObject):
+    """
+    Converte arquivos HTML em PDF (A4, retrato) com QWebEnginePage.printToPdf.
+
+    Uso:
+        get_impressora_html().imprimir(html, Path('lista.pdf'))
+    """
+
+    if WEBENGINE_AVAILABLE:
+        _pedido = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self._paginas = set()  # mantém as páginas vivas até o fim da impressão
+        self._pedido.connect(self._iniciar)
+
+    def imprimir(self, conteudo_html: str, caminho_pdf: Path,
+                 contexto: Optional[ContextoExportacao] = None,
+                 tempo_limite: float = TEMPO_LIMITE_PADRAO) -> Path:
+        """
+        Imprime o documento HTML em PDF.
+
+        Args:
+            conteudo_html: Documento HTML completo
+            caminho_pdf: Arquivo PDF de saída
+            contexto: Progresso e cancelamento (opcional)
+            tempo_limite: Segundos até desistir
+
+        Returns:
+            Caminho do PDF
+
+        Raises:
+            RuntimeError: Se a página não carregar ou a impressão falhar
+            TempoEsgotadoError: Se a impressão exceder o tempo limite
+            ExportacaoCancelada: Se a exportação for cancelada
+        """
+        caminho_pdf = Path(caminho_pdf)
+        caminho_pdf.parent.mkdir(parents=True, exist_ok=True)
+        # Arquivo em vez de setHtml: setHtml limita o conteúdo a 2 MB (imagens em data URI)
+        descritor, nome = tempfile.mkstemp(suffix='.html', prefix=f"{caminho_pdf.stem}_", dir=caminho_pdf.parent)
+        try:
+            with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(conteudo_html)
+            pedido = _PedidoImpressao(Path(nome), caminho_pdf)
+            if QThread.currentThread() == self.thread():
+                self._imprimir_local(pedido, tempo_limite)
+            else:
+                self._pedido.emit(pedido)
+                self._aguardar(pedido, contexto, tempo_limite)
+        finally:
+            Path(nome).unlink(missing_ok=True)
+        if pedido.erro:
+            raise RuntimeError(pedido.erro)
+        return caminho_pdf
+
+    def _imprimir_local(self, pedido: _PedidoImpressao, tempo_limite: float) -> None:
+        """Na thread da aplicação: roda um laço de eventos local até o PDF ficar pronto"""
+        laco = QEventLoop()
+        QTimer.singleShot(int(tempo_limite * 1000), laco.quit)
+        self._iniciar(pedido, laco.quit)
+        if not pedido.concluido.is_set():
+            laco.exec()
+        if not pedido.concluido.is_set():
+            raise TempoEsgotadoError(f"Impressão HTML excedeu {tempo_limite:.0f}s")
+
+    @staticmethod
+    def _aguardar(pedido: _PedidoImpressao, contexto: Optional[ContextoExportacao],
+                  tempo_limite: float) -> None:
+        """Em outra thread: espera o pedido, verificando o cancelamento"""
+        limite = time.monotonic() + tempo_limite
+        while not pedido.concluido.wait(0.1):
+            if contexto and contexto.cancelado:
+                raise ExportacaoCancelada()
+            if time.monotonic() > limite:
+                raise TempoEsgotadoError(f"Impressão HTML excedeu {tempo_limite:.0f}s")
+
+    def _iniciar(self, pedido: _PedidoImpressao, ao_concluir=None) -> None:
+        """Carrega o HTML e imprime quando a página terminar de carregar (assíncrono)"""
+        pagina = QWebEnginePage(self)
+        self._paginas.add(pagina)
+
+        def finalizar(erro: Optional[str] = None) -> None:
+            pedido.erro = erro
+            pedido.concluido.set()
+            self._paginas.discard(pagina)
+            pagina.deleteLater()
+            if ao_concluir:
+                ao_concluir()
+
+        def carregada(ok: bool) -> None:
+            if not ok:
+                finalizar(f"Falha ao carregar o HTML de {pedido.pdf.name}")
+                return
+            layout = QPageLayout(
+                QPageSize(QPageSize.PageSizeId.A4), QPageLayout.Orientation.Portrait,
+                QMarginsF(*MARGENS_MM), QPageLayout.Unit.Millimeter
+            )
+            pagina.printToPdf(str(pedido.pdf), layout)
+
+        def impresso(_caminho: str, sucesso: bool) -> None:
+            finalizar(None if sucesso else f"Falha ao imprimir {pedido.pdf.name}")
+
+        pagina.loadFinished.connect(carregada)
+        pagina.pdfPrintingFinished.connect(impresso)
+        pagina.load(QUrl.fromLocalFile(str(pedido.html)))
+
+
+def garantir_aplicacao():
+    """
+    Retorna a aplicação Qt, criando-a sem interface (offscreen) se ainda não existir.
+
+    Raises:
+        RuntimeError: Sem o Qt WebEngine, ou ao criar a aplicação fora da thread principal
+    """
+    if not WEBENGINE_AVAILABLE:
+        raise RuntimeError("Motor HTML indisponível: instale PyQt6-WebEngine")
+    aplicacao = QCoreApplication.instance()
+    if aplicacao is not None:
+        return aplicacao
+    if threading.current_thread() is not threading.main_thread():
+        raise RuntimeError("A aplicação Qt do motor HTML precisa ser criada na thread principal")
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    logger.info(f"Criando aplicação Qt para o motor HTML ({os.environ['QT_QPA_PLATFORM']})")
+    return QGuiApplication(['questoes-html'])
+
+
+_impressora_html: Optional[ImpressoraHtml] = None
+_lock = threading.Lock()
+
+
+def get_impressora_html() -> ImpressoraHtml:
+    """Retorna a impressora compartilhada, que vive na thread da aplicação Qt"""
+    global _impressora_html
+    with _lock:
+        if _impressora_html is None:
+            aplicacao = garantir_aplicacao()
+            impressora = ImpressoraHtml()
+            if impressora.thread() != aplicacao.thread():
+                impressora.moveToThread(aplicacao.thread())
+            _impressora_html = impressora
+    return _impressora_html
@@ -0,0 +1,683 @@
+"""
+Compilador da marcação das questões para LaTeX.
+
+Substitui a cadeia de passes de regex do ExportController (tabelas visuais,
+listas, alinhamento, tags HTML, escape com placeholders, imagens e resizebox)
+por um analisador que lê o texto uma única vez e monta uma árvore (AST), e por
+um emissor que percorre a árvore gerando o LaTeX em uma passada linear. Os
+caracteres especiais e símbolos Unicode são convertidos com uma única tabela
+de tradução (str.translate).
+
+Marcação reconhecida:
+    - [TABELA]...[/TABELA], com [CABECALHO] e [COR:#hex] nas células
+    - listas visuais (•, 1., a), A), i., I.) com 2 a 4 espaços de recuo
+    - [CENTRO]...[/CENTRO] e [FONTE]...[/FONTE]
+    - [IMG:caminho:escala]
+    - <b>, <i>, <u>, <sup> e <sub>
+    - matemática ($...$, $$...$$, \\[...\\], \\(...\\)) e comandos/ambientes
+      LaTeX digitados, que passam sem alteração
+
+As árvores ficam em um cache LRU por hash do conteúdo (get_cache_ast) e são
+reaproveitadas pelo emissor HTML de markup_html (editor e pré-visualização).
+
+A paridade com a cadeia anterior é verificada por tests/test_markup_paridade.
+"""
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.application.services.export_service import SUBSTITUICOES_UNICODE
+
+# Incrementar sempre que a saída gerada mudar
+VERSAO_COMPILADOR = 1
+
+
+# =============================================================================
+# AST
+# =============================================================================
+
+@dataclass
+class Texto:
+    """Texto literal (escapado na emissão)"""
+    texto: str
+
+
+@dataclass
+class Matematica:
+    """Bloco matemático mantido como digitado, com os delimitadores; só as tags são convertidas"""
+    filhos: List['No'] = field(default_factory=list)
+
+
+@dataclass
+class Latex:
+    """Comando ou ambiente LaTeX digitado, mantido como está"""
+    fonte: str
+    matematico: bool = False  # letra grega fora de modo matemático
+
+
+@dataclass
+class Formatacao:
+    """Trecho entre tags <b>, <i>, <u>, <sup> ou <sub>"""
+    estilo: str
+    filhos: List['No'] = field(default_factory=list)
+
+
+@dataclass
+class Alinhamento:
+    """Abertura ou fechamento de [CENTRO] / [FONTE]"""
+    tipo: str
+    abertura: bool
+
+
+@dataclass
+class Imagem:
+    """Placeholder [IMG:caminho:escala]"""
+    caminho: str
+    escala: str
+
+
+@dataclass
+class TabelaLatex:
+    """Ambiente tabular digitado diretamente em LaTeX"""
+    abertura: str
+    filhos: List['No'] = field(default_factory=list)
+    redimensionada: bool = False  # já envolvida em \resizebox pelo usuário
+
+
+@dataclass
+class Celula:
+    """Célula de uma tabela visual"""
+    filhos: List['No'] = field(default_factory=list)
+    cor: Optional[str] = None
+
+
+@dataclass
+class LinhaTabela:
+    """Linha de uma tabela visual"""
+    celulas: List[Celula] = field(default_factory=list)
+    cabecalho: bool = False
+
+
+@dataclass
+class Tabela:
+    """Bloco [TABELA]...[/TABELA]"""
+    colunas: int
+    linhas: List[LinhaTabela] = field(default_factory=list)
+
+
+@dataclass
+class ItemLista:
+    """Item de uma lista visual"""
+    filhos: List['No'] = field(default_factory=list)
+
+
+@dataclass
+class Lista:
+    """Lista visual; linhas em branco dentro da lista são guardadas como str"""
+    tipo: str
+    itens: List[Union[ItemLista, str]] = field(default_factory=list)
+
+
+@dataclass
+class Paragrafo:
+    """Sequência de linhas comuns (pode conter tabelas visuais)"""
+    filhos: List['No'] = field(default_factory=list)
+
+
+@dataclass
+class Documento:
+    """Raiz da árvore: parágrafos e listas, um por linha lógica"""
+    blocos: List[Union[Paragrafo, Lista]] = field(default_factory=list)
+
+
+No = Union[Texto, Matematica, Latex, Formatacao, Alinhamento, Imagem, TabelaLatex, Tabela]
+
+
+# =============================================================================
+# Analisador
+# =============================================================================
+
+# Tipos de lista visual, na ordem em que são testados
+LISTA_ITEMIZE = 'itemize'
+LISTA_ARABICA = 'arabica'
+LISTA_ALFA_MINUSCULA = 'alfa_minuscula'
+LISTA_ALFA_MAIUSCULA = 'alfa_maiuscula'
+LISTA_ROMANA_MINUSCULA = 'romana_minuscula'
+LISTA_ROMANA_MAIUSCULA = 'romana_maiuscula'
+
+# Exigem 2-4 espaços antes do marcador (como gerado pelo diálogo de listas)
+_PADROES_LISTA: List[Tuple[str, 're.Pattern']] = [
+    (LISTA_ITEMIZE, re.compile(r'^[ ]{2,4}([•○■□▸✓★])\s+(.+)$')),
+    (LISTA_ARABICA, re.compile(r'^[ ]{2,4}(\d+)\.\s+(.+)$')),
+    (LISTA_ALFA_MINUSCULA, re.compile(r'^[ ]{2,4}([a-z])\)\s+(.+)$')),
+    (LISTA_ALFA_MAIUSCULA, re.compile(r'^[ ]{2,4}([A-Z])\)\s+(.+)$')),
+    (LISTA_ROMANA_MINUSCULA, re.compile(r'^[ ]{2,4}(i{1,3}|iv|vi{0,3}|ix|xi{0,3})\.\s+(.+)$')),
+    (LISTA_ROMANA_MAIUSCULA, re.compile(r'^[ ]{2,4}(I{1,3}|IV|VI{0,3}|IX|XI{0,3})\.\s+(.+)$')),
+]
+
+_RE_TABELA = re.compile(r'\[TABELA\]\s*\n(.*?)\[/TABELA\]', re.DOTALL)
+_RE_COR = re.compile(r'\[COR:#([a-fA-F0-9]{6})\](.*?)\[/COR\]', re.DOTALL)
+_RE_MARCADORES_CELULA = re.compile(r'\[CABECALHO\]|\[/CABECALHO\]|\[COR:[^\]]+\]|\[/COR\]')
+_RES_ALINHAMENTO = {
+    'CENTRO': re.compile(r'\[CENTRO\].*?\[/CENTRO\]', re.DOTALL),
+    'FONTE': re.compile(r'\[FONTE\].*?\[/FONTE\]', re.DOTALL),
+}
+
+# Ambientes que a marcação gera; quando digitados, o conteúdo é escapado normalmente
+_AMBIENTES_GERADOS = r'(?:itemize|enumerate|tabular|center|flushright)\}'
+
+# Um único padrão com todos os tokens em linha; a ordem das alternativas
+# define a precedência quando mais de uma começa na mesma posição
+_RE_TOKEN = re.compile(
+    r'(?P<imagem>\[IMG:(?P<caminho>.+?):(?P<escala>[0-9.]+)\])'
+    r'|(?P<alinhamento>\[/?(?:CENTRO|FONTE)\])'
+    r'|<(?P<tag>b|i|u|sup|sub)>'
+    r'|(?P<matematica>\$\$[^$]+\$\$|\$(?!\s*\d)[^$]+\$|(?s:\\\[.*?\\\]|\\\(.*?\\\)))'
+    r'|(?P<resizebox>\\resizebox\{[^}]*\}\{[^}]*\}\{\s*(?=\\begin\{tabular\}))'
+    r'|(?P<tabular>\\begin\{tabular\}\{[^}]+\})'
+    r'|(?P<ambiente>\\begin\{(?!' + _AMBIENTES_GERADOS + r')[^}]+\}'
+    r'(?s:.*?)\\end\{(?!' + _AMBIENTES_GERADOS + r')[^}]+\})'
+    r'|(?P<escape>\\\\|\\[&%#$_{}])'
+    r'|(?P<comando>\\(?P<nome>[a-zA-Z]+)(?:\s*\{[^}]*\})*)'
+    r'|(?P<separador>&)'
+)
+
+_RE_TAG = re.compile(r'<(b|i|u|sup|sub)>')
+
+_FIM_TABULAR = '\\end{tabular}'
+
+# Letras gregas que, fora de modo matemático, são envolvidas em $...$
+LETRAS_GREGAS = frozenset((
+    'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'varepsilon', 'zeta', 'eta',
+    'theta', 'vartheta', 'iota', 'kappa', 'lambda', 'mu', 'nu', 'xi', 'pi',
+    'varpi', 'rho', 'varrho', 'sigma', 'varsigma', 'tau', 'upsilon', 'phi',
+    'varphi', 'chi', 'psi', 'omega', 'Gamma', 'Delta', 'Theta', 'Lambda', 'Xi',
+    'Pi', 'Sigma', 'Upsilon', 'Phi', 'Psi', 'Omega',
+))
+
+
+class _Analisador:
+    """Monta a AST de um texto; as posições dos tokens são absolutas no texto"""
+
+    def __init__(self, texto: str, blocos: bool = True):
+        self._texto = texto
+        self._tabelas = list(_RE_TABELA.finditer(texto)) if blocos else []
+        # Posição -> (tipo, abertura) dos marcadores de alinhamento pareados
+        self._alinhamentos: Dict[int, Tuple[str, bool]] = {}
+        if blocos:
+            for tipo, padrao in _RES_ALINHAMENTO.items():
+                fechamento = len(tipo) + 3  # "[/" + tipo + "]"
+                for m in padrao.finditer(texto):
+                    self._alinhamentos[m.start()] = (tipo, True)
+                    self._alinhamentos[m.end() - fechamento] = (tipo, False)
+
+    def documento(self) -> Documento:
+        texto = self._texto
+        doc = Documento()
+        lista: Optional[Lista] = None
+        paragrafo: Optional[List[int]] = None
+
+        for inicio, fim, tem_tabela in self._linhas():
+            item = None if tem_tabela else self._item_lista(inicio, fim)
+            if item:
+                tipo, item_inicio = item
+                if paragrafo:
+                    doc.blocos.append(self._paragrafo(*paragrafo))
+                    paragrafo = None
+                if lista is None or lista.tipo != tipo:
+                    lista = Lista(tipo)
+                    doc.blocos.append(lista)
+                lista.itens.append(ItemLista(self._trecho(item_inicio, fim)))
+                continue
+
+            if lista is not None:
+                linha = texto[inicio:fim]
+                if tem_tabela or linha.strip():
+                    lista = None
+                else:
+                    # Linhas em branco não encerram a lista
+                    lista.itens.append(linha)
+                    continue
+
+            if paragrafo is None:
+                paragrafo = [inicio, fim]
+            else:
+                paragrafo[1] = fim
+
+        if paragrafo:
+            doc.blocos.append(self._paragrafo(*paragrafo))
+        return doc
+
+    def _linhas(self):
+        """Gera (início, fim, contém tabela); uma tabela visual conta como parte de uma única linha"""
+        texto = self._texto
+        tamanho = len(texto)
+        tabelas = self._tabelas
+        indice = 0
+        pos = 0
+        while pos <= tamanho:
+            fim = texto.find('\n', pos)
+            if fim == -1:
+                fim = tamanho
+            tem_tabela = False
+            while indice < len(tabelas) and tabelas[indice].start() < fim:
+                tem_tabela = True
+                fim = texto.find('\n', tabelas[indice].end())
+                if fim == -1:
+                    fim = tamanho
+                indice += 1
+            yield pos, fim, tem_tabela
+            pos = fim + 1
+
+    def _item_lista(self, inicio: int, fim: int) -> Optional[Tuple[str, int]]:
+        linha = self._texto[inicio:fim]
+        for tipo, padrao in _PADROES_LISTA:
+            m = padrao.match(linha)
+            if m:
+                return tipo, inicio + m.start(2)
+        return None
+
+    def _paragrafo(self, inicio: int, fim: int) -> Paragrafo:
+        filhos = []
+        pos = inicio
+        for m in self._tabelas:
+            if m.start() < inicio:
+                continue
+            if m.start() >= fim:
+                break
+            filhos.extend(self._trecho(pos, m.start()))
+            filhos.append(self._tabela(m))
+            pos = m.end()
+        filhos.extend(self._trecho(pos, fim))
+        return Paragrafo(filhos)
+
+    def _tabela(self, m) -> Tabela:
+        linhas = m.group(1).strip().split('\n')
+        colunas = len(_RE_MARCADORES_CELULA.sub('', linhas[0]).split('|'))
+        tabela = Tabela(colunas)
+        for linha in linhas:
+            linha = linha.strip()
+            if not linha:
+                continue
+            cabecalho = '[CABECALHO]' in linha
+            if cabecalho:
+                linha = linha.replace('[CABECALHO]', '').replace('[/CABECALHO]', '')
+            tabela.linhas.append(LinhaTabela(
+                [self._celula(celula.strip()) for celula in linha.split('|')],
+                cabecalho
+            ))
+        return tabela
+
+    @staticmethod
+    def _celula(texto: str) -> Celula:
+        cor = None
+        m = _RE_COR.search(texto)
+        if m:
+            cor = m.group(1).upper()
+            texto = _RE_COR.sub(r'\2', texto)
+        return Celula(_Analisador(texto, blocos=False)._trecho(0, len(texto)), cor)
+
+    def _trecho(self, inicio: int, fim: int, em_tabular: bool = False) -> List[No]:
+        """Tokeniza texto[inicio:fim] em nós em linha"""
+        texto = self._texto
+        nos: List[No] = []
+        pos = inicio
+        fim_resizebox = -1
+
+        while pos < fim:
+            m = _RE_TOKEN.search(texto, pos, fim)
+            if m is None:
+                break
+            if m.start() > pos:
+                _adicionar_texto(nos, texto[pos:m.start()])
+            tipo = m.lastgroup
+            pos = m.end()
+
+            if tipo == 'imagem':
+                nos.append(Imagem(m.group('caminho'), m.group('escala')))
+            elif tipo == 'alinhamento':
+                marcador = self._alinhamentos.get(m.start())
+                if marcador:
+                    nos.append(Alinhamento(*marcador))
+                else:
+                    _adicionar_texto(nos, m.group(0))
+            elif tipo == 'tag':
+                estilo = m.group('tag')
+                # Como as tags não atravessam linhas, o fechamento é buscado só até o fim da linha
+                limite = texto.find('\n', pos, fim)
+                fechamento = texto.find(f'</{estilo}>', pos, fim if limite == -1 else limite)
+                if fechamento == -1:
+                    _adicionar_texto(nos, m.group(0))
+                else:
+                    nos.append(Formatacao(estilo, self._trecho(pos, fechamento, em_tabular)))
+                    pos = fechamento + len(estilo) + 3
+            elif tipo == 'matematica':
+                nos.append(Matematica(self._matematica(m.start(), pos)))
+            elif tipo == 'resizebox':
+                nos.append(Latex(m.group(0)))
+                fim_resizebox = pos
+            elif tipo == 'tabular':
+                fechamento = texto.find(_FIM_TABULAR, pos, fim)
+                if fechamento == -1:
+                    nos.append(Latex(m.group(0)))
+                else:
+                    nos.append(TabelaLatex(
+                        m.group(0),
+                        self._trecho(pos, fechamento, em_tabular=True),
+                        redimensionada=(m.start() == fim_resizebox)
+                    ))
+                    pos = fechamento + len(_FIM_TABULAR)
+            elif tipo == 'comando':
+                nos.append(Latex(m.group(0), matematico=m.group('nome') in LETRAS_GREGAS))
+            elif tipo == 'separador':
+                if em_tabular:
+                    nos.append(Latex('&'))
+                else:
+                    _adicionar_texto(nos, '&')
+            else:  # ambiente, escape
+                nos.append(Latex(m.group(0)))
+
+        if pos < fim:
+            _adicionar_texto(nos, texto[pos:fim])
+        return nos
+
+
+    def _matematica(self, inicio: int, fim: int) -> List[No]:
+        """Conteúdo matemático: sem escape, mas as tags HTML também viram comandos"""
+        texto = self._texto
+        nos: List[No] = []
+        pos = inicio
+        while pos < fim:
+            m = _RE_TAG.search(texto, pos, fim)
+            if m is None:
+                break
+            estilo = m.group(1)
+            limite = texto.find('\n', m.end(), fim)
+            fechamento = texto.find(f'</{estilo}>', m.end(), fim if limite == -1 else limite)
+            if fechamento == -1:
+                nos.append(Latex(texto[pos:m.end()]))
+                pos = m.end()
+                continue
+            if m.start() > pos:
+                nos.append(Latex(texto[pos:m.start()]))
+            nos.append(Formatacao(estilo, self._matematica(m.end(), fechamento)))
+            pos = fechamento + len(estilo) + 3
+        if pos < fim:
+            nos.append(Latex(texto[pos:fim]))
+        return nos
+
+
+def _adicionar_texto(nos: List[No], texto: str) -> None:
+    if nos and isinstance(nos[-1], Texto):
+        nos[-1].texto += texto
+    else:
+        nos.append(Texto(texto))
+
+
+def tokens_em_linha(texto: str):
+    """
+    Tokens em linha (imagem, matematica, comando, ...) como o analisador os
+    reconhece; m.lastgroup dá o tipo. Usado pelo verificador_latex.
+    """
+    return _RE_TOKEN.finditer(texto or '')
+
+
+def analisar(texto: str) -> Documento:
+    """
+    Analisa a marcação de um enunciado ou alternativa.
+
+    Args:
+        texto: Texto com a marcação do editor
+
+    Returns:
+        Documento (AST)
+    """
+    return _Analisador(texto or '').documento()
+
+
+class CacheAst:
+    """
+    LRU limitado de ASTs, indexado pelo hash do conteúdo do texto.
+
+    Editor, pré-visualização e exportação compartilham as árvores, então um
+    enunciado é analisado uma vez por edição e não uma vez por renderizador.
+    As árvores devolvidas são compartilhadas e não devem ser alteradas.
+    """
+
+    def __init__(self, capacidade: int = 512):
+        self._capacidade = capacidade
+        self._itens: 'OrderedDict[bytes, Documento]' = OrderedDict()
+        self._lock = Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(texto: str) -> bytes:
+        """Hash do conteúdo usado como chave"""
+        return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
+    def obter(self, texto: str) -> Documento:
+        """
+        Retorna a AST do texto, analisando-o apenas se não estiver em cache.
+
+        Args:
+            texto: Texto com a marcação do editor
+
+        Returns:
+            Documento (AST compartilhada)
+        """
+        texto = texto or ''
+        chave = self.chave(texto)
+        with self._lock:
+            documento = self._itens.get(chave)
+            if documento is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return documento
+            self.falhas += 1
+
+        documento = analisar(texto)
+        with self._lock:
+            self._itens[chave] = documento
+            while len(self._itens) > self._capacidade:
+                self._itens.popitem(last=False)
+        return documento
+
+    def limpar(self) -> None:
+        """Descarta todas as árvores"""
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+
+_cache_ast: Optional[CacheAst] = None
+
+
+def get_cache_ast() -> CacheAst:
+    """Retorna o cache de ASTs compartilhado"""
+    global _cache_ast
+    if _cache_ast is None:
+        _cache_ast = CacheAst()
+    return _cache_ast
+
+
+def obter_ast(texto: str) -> Documento:
+    """Atalho para get_cache_ast().obter(texto)"""
+    return get_cache_ast().obter(texto)
+
+
+# =============================================================================
+# Emissor LaTeX
+# =============================================================================
+
+# Caracteres especiais do LaTeX e símbolos Unicode, traduzidos em uma passada
+TABELA_TRADUCAO_LATEX = str.maketrans(dict(
+    [('&', r'\&'), ('%', r'\%'), ('#', r'\#'), ('$', r'\$')] + SUBSTITUICOES_UNICODE
+))
+
+COMANDOS_FORMATACAO = {
+    'b': 'textbf',
+    'i': 'textit',
+    'u': 'underline',
+    'sup': 'textsuperscript',
+    'sub': 'textsubscript',
+}
+
+ABERTURAS_LISTA = {
+    LISTA_ITEMIZE: '\\begin{itemize}',
+    LISTA_ARABICA: '\\begin{enumerate}',
+    LISTA_ALFA_MINUSCULA: '\\begin{enumerate}[label=\\alph*)]',
+    LISTA_ALFA_MAIUSCULA: '\\begin{enumerate}[label=\\Alph*)]',
+    LISTA_ROMANA_MINUSCULA: '\\begin{enumerate}[label=\\roman*.]',
+    LISTA_ROMANA_MAIUSCULA: '\\begin{enumerate}[label=\\Roman*.]',
+}
+
+MARCADORES_ALINHAMENTO = {
+    ('CENTRO', True): '\\begin{center}',
+    ('CENTRO', False): '\\end{center}',
+    ('FONTE', True): '\\begin{flushright}\\footnotesize ',
+    ('FONTE', False): '\\end{flushright}',
+}
+
+
+class Emissor:
+    """
+    Base dos emissores: percorre a AST uma única vez, despachando cada nó
+    para o método registrado para o seu tipo em self._emissores.
+
+    Os emissores não alteram a árvore, que pode vir do cache compartilhado.
+    """
+
+    def __init__(self):
+        self._emissores = {}
+
+    def emitir(self, no) -> str:
+        """Emite a saída de um nó (normalmente o Documento)"""
+        return self._emissores[type(no)](no)
+
+    def _filhos(self, filhos) -> str:
+        emissores = self._emissores
+        return ''.join([emissores[type(filho)](filho) for filho in filhos])
+
+
+class EmissorLatex(Emissor):
+    """Converte a AST em LaTeX"""
+
+    def __init__(self, centralizar_imagens: bool = True):
+        """
+        Args:
+            centralizar_imagens: Se True, imagens ficam em center; se False, em
+                minipage (usado nas alternativas)
+        """
+        super().__init__()
+        self.centralizar_imagens = centralizar_imagens
+        self._emissores = {
+            Documento: self._documento,
+            Paragrafo: self._sequencia,
+            Lista: self._lista,
+            Tabela: self._tabela,
+            Texto: self._texto,
+            Matematica: self._matematica,
+            Latex: self._latex,
+            Formatacao: self._formatacao,
+            Alinhamento: self._alinhamento,
+            Imagem: self._imagem,
+            TabelaLatex: self._tabela_latex,
+        }
+
+    def _documento(self, no: Documento) -> str:
+        return '\n'.join([self.emitir(bloco) for bloco in no.blocos])
+
+    def _sequencia(self, no) -> str:
+        return self._filhos(no.filhos)
+
+    def _lista(self, no: Lista) -> str:
+        linhas = [ABERTURAS_LISTA[no.tipo]]
+        for item in no.itens:
+            if isinstance(item, ItemLista):
+                linhas.append('    \\item ' + self._filhos(item.filhos))
+            else:
+                linhas.append(item)
+        linhas.append('\\end{itemize}' if no.tipo == LISTA_ITEMIZE else '\\end{enumerate}')
+        return '\n'.join(linhas)
+
+    def _tabela(self, no: Tabela) -> str:
+        linhas = [
+            '\\begin{center}',
+            '\\small',
+            '\\resizebox{0.8\\linewidth}{!}{%',
+            '\\begin{tabular}{|' + '|'.join(['c'] * no.colunas) + '|}',
+            '\\hline',
+        ]
+        for linha in no.linhas:
+            celulas = []
+            for celula in linha.celulas:
+                conteudo = self._filhos(celula.filhos)
+                if celula.cor:
+                    conteudo = '\\cellcolor[HTML]{' + celula.cor + '}' + conteudo
+                if linha.cabecalho and not conteudo.startswith(('\\textbf', '\\cellcolor')):
+                    conteudo = '\\textbf{' + conteudo + '}'
+                celulas.append(conteudo)
+            linhas.append(' & '.join(celulas) + ' \\\\')
+            linhas.append('\\hline')
+        linhas.extend(['\\end{tabular}', '}', '\\end{center}'])
+        return '\n'.join(linhas)
+
+    def _texto(self, no: Texto) -> str:
+        return no.texto.translate(TABELA_TRADUCAO_LATEX)
+
+    def _matematica(self, no: Matematica) -> str:
+        return self._filhos(no.filhos)
+
+    def _latex(self, no: Latex) -> str:
+        return f'${no.fonte}$' if no.matematico else no.fonte
+
+    def _formatacao(self, no: Formatacao) -> str:
+        return '\\' + COMANDOS_FORMATACAO[no.estilo] + '{' + self._filhos(no.filhos) + '}'
+
+    def _alinhamento(self, no: Alinhamento) -> str:
+        return MARCADORES_ALINHAMENTO[(no.tipo, no.abertura)]
+
+    def _imagem(self, no: Imagem) -> str:
+        caminho = no.caminho.replace('\\', '/')
+        ambiente = 'center' if self.centralizar_imagens else 'minipage'
+        largura = '' if self.centralizar_imagens else '{\\linewidth}'
+        return (
+            f"\n\n\\begin{{{ambiente}}}{largura}\n"
+            f"\\includegraphics[scale={no.escala}]{{{caminho}}}\n"
+            f"\\end{{{ambiente}}}\n\n"
+        )
+
+    def _tabela_latex(self, no: TabelaLatex) -> str:
+        tabular = no.abertura + self._filhos(no.filhos) + _FIM_TABULAR
+        if no.redimensionada:
+            return tabular
+        return f"\\resizebox{{\\columnwidth}}{{!}}{{\n{tabular}\n}}"
+
+
+_emissores_latex = {
+    True: EmissorLatex(centralizar_imagens=True),
+    False: EmissorLatex(centralizar_imagens=False),
+}
+
+
+def compilar_latex(texto: str, centralizar_imagens: bool = True) -> str:
+    """
+    Converte a marcação de um enunciado ou alternativa para LaTeX.
+
+    Args:
+        texto: Texto com a marcação do editor
+        centralizar_imagens: Se True, centraliza imagens; se False, usa minipage
+            (para alternativas)
+
+    Returns:
+        Fragmento LaTeX
+    """
+    if not texto:
+        return ''
+    return _emissores_latex[bool(centralizar_imagens)].emitir(obter_ast(texto))
@@ -0,0 +1,321 @@
+"""
+Emissor HTML da marcação das questões.
+
+Usa a mesma AST (e o mesmo cache) do compilador LaTeX de markup_compiler.
+Atende a pré-visualização do editor, que não tem folha de estilos e precisa
+de estilos inline, e a página de pré-visualização da questão, cujo CSS já
+estiliza tabelas e listas.
+"""
+import base64
+import html
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+from src.application.services.markup_compiler import (
+    Alinhamento,
+    Documento,
+    Emissor,
+    Formatacao,
+    Imagem,
+    Latex,
+    Lista,
+    ItemLista,
+    LISTA_ITEMIZE,
+    LISTA_ARABICA,
+    LISTA_ALFA_MINUSCULA,
+    LISTA_ALFA_MAIUSCULA,
+    LISTA_ROMANA_MINUSCULA,
+    LISTA_ROMANA_MAIUSCULA,
+    Matematica,
+    Paragrafo,
+    Tabela,
+    TabelaLatex,
+    Texto,
+    obter_ast,
+)
+
+logger = logging.getLogger(__name__)
+
+LETRAS_GREGAS_UNICODE = {
+    'alpha': 'α', 'beta': 'β', 'gamma': 'γ', 'delta': 'δ', 'epsilon': 'ε',
+    'varepsilon': 'ε', 'zeta': 'ζ', 'eta': 'η', 'theta': 'θ', 'vartheta': 'ϑ',
+    'iota': 'ι', 'kappa': 'κ', 'lambda': 'λ', 'mu': 'μ', 'nu': 'ν', 'xi': 'ξ',
+    'pi': 'π', 'varpi': 'ϖ', 'rho': 'ρ', 'varrho': 'ϱ', 'sigma': 'σ',
+    'varsigma': 'ς', 'tau': 'τ', 'upsilon': 'υ', 'phi': 'φ', 'varphi': 'φ',
+    'chi': 'χ', 'psi': 'ψ', 'omega': 'ω',
+    'Gamma': 'Γ', 'Delta': 'Δ', 'Theta': 'Θ', 'Lambda': 'Λ', 'Xi': 'Ξ',
+    'Pi': 'Π', 'Sigma': 'Σ', 'Upsilon': 'Υ', 'Phi': 'Φ', 'Psi': 'Ψ', 'Omega': 'Ω',
+}
+
+TAGS_FORMATACAO = {
+    'textbf': 'b',
+    'textit': 'i',
+    'underline': 'u',
+    'textsuperscript': 'sup',
+    'textsubscript': 'sub',
+}
+
+# tipo de lista -> (tag, list-style-type)
+LISTAS_HTML = {
+    LISTA_ITEMIZE: ('ul', None),
+    LISTA_ARABICA: ('ol', None),
+    LISTA_ALFA_MINUSCULA: ('ol', 'lower-alpha'),
+    LISTA_ALFA_MAIUSCULA: ('ol', 'upper-alpha'),
+    LISTA_ROMANA_MINUSCULA: ('ol', 'lower-roman'),
+    LISTA_ROMANA_MAIUSCULA: ('ol', 'upper-roman'),
+}
+
+ALINHAMENTOS_HTML = {
+    'CENTRO': '<div style="text-align:center;">',
+    'FONTE': '<div style="text-align:right;font-size:small;color:#555;">',
+}
+
+# Estilos inline, para quem não tem folha de estilos (pré-visualização do editor)
+_ESTILOS_INLINE = {
+    'table': ' style="width:80%; border-collapse:collapse; margin:10px auto; font-size:11px;"',
+    'th': ' style="border:1px solid #333; padding:2px 6px; background:#e0e0e0;"',
+    'td': ' style="border:1px solid #333; padding:2px 6px; text-align:center;"',
+    'lista': 'margin:5px 0;padding-left:25px;',
+    'li': ' style="margin:2px 0;"',
+}
+_SEM_ESTILOS = {chave: '' for chave in _ESTILOS_INLINE}
+
+_FRACAO = (
+    '<span style="display:inline-block;text-align:center;vertical-align:middle;">'
+    '<span style="display:block;border-bottom:1px solid #333;padding:0 2px;">{0}</span>'
+    '<span style="display:block;padding:0 2px;">{1}</span></span>'
+)
+
+_RE_COMANDO = re.compile(r'\\([a-zA-Z]+)((?:\s*\{[^}]*\})*)')
+_RE_ARGUMENTO = re.compile(r'\{([^}]*)\}')
+_RE_QUEBRAS = re.compile(r'\n{2,}')
+# Em trechos LaTeX, as tags de formatação (ex: <sup> dentro de $...$) já são HTML
+_RE_ESCAPE_LATEX = re.compile(r'&|<(?!/?(?:b|i|u|sup|sub)>)')
+_ESCAPES_HTML = {'&': '&amp;', '<': '&lt;'}
+
+_MIME_TYPES = {
+    'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
+    'gif': 'image/gif', 'bmp': 'image/bmp', 'svg': 'image/svg+xml'
+}
+
+
+def latex_para_html(fonte: str) -> str:
+    """
+    Converte um trecho LaTeX para HTML aproximado: formatação, frações,
+    raízes e letras gregas; o restante é mostrado como está.
+
+    Args:
+        fonte: Trecho LaTeX (sem delimitadores de modo matemático)
+
+    Returns:
+        HTML
+    """
+    partes = []
+    pos = 0
+    for m in _RE_COMANDO.finditer(fonte):
+        partes.append(_escapar_latex(fonte[pos:m.start()]))
+        partes.append(_comando_para_html(m))
+        pos = m.end()
+    partes.append(_escapar_latex(fonte[pos:]))
+    return ''.join(partes)
+
+
+def _escapar_latex(texto: str) -> str:
+    return _RE_ESCAPE_LATEX.sub(lambda m: _ESCAPES_HTML[m.group(0)], texto)
+
+
+def _comando_para_html(m) -> str:
+    nome = m.group(1)
+    argumentos = _RE_ARGUMENTO.findall(m.group(2))
+    if nome in LETRAS_GREGAS_UNICODE:
+        return LETRAS_GREGAS_UNICODE[nome] + ''.join(latex_para_html(a) for a in argumentos)
+    if nome in TAGS_FORMATACAO and len(argumentos) == 1:
+        tag = TAGS_FORMATACAO[nome]
+        return f'<{tag}>{latex_para_html(argumentos[0])}</{tag}>'
+    if nome == 'frac' and len(argumentos) == 2:
+        return _FRACAO.format(latex_para_html(argumentos[0]), latex_para_html(argumentos[1]))
+    if nome == 'sqrt' and len(argumentos) == 1:
+        return f'√({latex_para_html(argumentos[0])})'
+    return _escapar_latex(m.group(0))
+
+
+@lru_cache(maxsize=64)
+def _src_imagem_local(caminho: str, mtime: float) -> str:
+    # mtime faz parte da chave para que uma imagem substituída seja relida
+    with open(caminho, 'rb') as f:
+        dados = base64.b64encode(f.read()).decode()
+    mime = _MIME_TYPES.get(caminho.rsplit('.', 1)[-1].lower(), 'image/png')
+    return f'data:{mime};base64,{dados}'
+
+
+def src_imagem(caminho: str) -> str:
+    """
+    Retorna o src de uma imagem: a URL, se remota, ou um data URI, se local.
+
+    Args:
+        caminho: Caminho local ou URL
+
+    Returns:
+        Valor para o atributo src (vazio se a imagem não existir)
+    """
+    if caminho.startswith(('http://', 'https://')):
+        return caminho
+    try:
+        return _src_imagem_local(caminho, os.path.getmtime(caminho))
+    except OSError:
+        return ''
+    except Exception as e:
+        logger.error(f"Erro ao carregar imagem {caminho}: {e}")
+        return ''
+
+
+class EmissorHtml(Emissor):
+    """Converte a AST em HTML"""
+
+    def __init__(self, estilos_inline: bool = True):
+        """
+        Args:
+            estilos_inline: Se True, tabelas e listas levam estilos inline; se
+                False, ficam a cargo da folha de estilos da página
+        """
+        super().__init__()
+        self._estilos: Dict[str, str] = _ESTILOS_INLINE if estilos_inline else _SEM_ESTILOS
+        self._emissores = {
+            Documento: self._documento,
+            Paragrafo: self._paragrafo,
+            Lista: self._lista,
+            Tabela: self._tabela,
+            Texto: self._texto,
+            Matematica: self._matematica,
+            Latex: self._latex,
+            Formatacao: self._formatacao,
+            Alinhamento: self._alinhamento,
+            Imagem: self._imagem,
+            TabelaLatex: self._tabela_latex,
+        }
+
+    def _documento(self, no: Documento) -> str:
+        # Listas e tabelas já são blocos; não há <br> entre os blocos
+        return ''.join([self.emitir(bloco) for bloco in no.blocos])
+
+    def _paragrafo(self, no: Paragrafo) -> str:
+        filhos: List = no.filhos
+        partes = []
+        for i, filho in enumerate(filhos):
+            if not isinstance(filho, Texto):
+                partes.append(self.emitir(filho))
+                continue
+            # Quebras de linha junto a tabelas e blocos de alinhamento viram espaço extra
+            texto = filho.texto
+            if i > 0 and _fecha_bloco(filhos[i - 1]):
+                texto = texto.lstrip('\n')
+            if i + 1 < len(filhos) and _abre_bloco(filhos[i + 1]):
+                texto = texto.rstrip('\n')
+            partes.append(self._texto_html(texto))
+        return ''.join(partes)
+
+    def _lista(self, no: Lista) -> str:
+        tag, tipo_marcador = LISTAS_HTML[no.tipo]
+        estilo = self._estilos['lista']
+        if tipo_marcador:
+            estilo += f'list-style-type:{tipo_marcador};'
+        partes = [f'<{tag} style="{estilo}">' if estilo else f'<{tag}>']
+        li = self._estilos['li']
+        for item in no.itens:
+            if isinstance(item, ItemLista):
+                partes.append(f'<li{li}>{self._filhos(item.filhos)}</li>')
+        partes.append(f'</{tag}>')
+        return ''.join(partes)
+
+    def _tabela(self, no: Tabela) -> str:
+        estilos = self._estilos
+        partes = [f'<table{estilos["table"]}>']
+        for linha in no.linhas:
+            celula_tag = 'th' if linha.cabecalho else 'td'
+            estilo = estilos[celula_tag]
+            partes.append('<tr>')
+            for celula in linha.celulas:
+                conteudo = self._filhos(celula.filhos)
+                if celula.cor:
+                    conteudo = f'<span style="background-color: #{celula.cor};">{conteudo}</span>'
+                partes.append(f'<{celula_tag}{estilo}>{conteudo}</{celula_tag}>')
+            partes.append('</tr>')
+        partes.append('</table>')
+        return ''.join(partes)
+
+    def _texto(self, no: Texto) -> str:
+        return self._texto_html(no.texto)
+
+    @staticmethod
+    def _texto_html(texto: str) -> str:
+        texto = html.escape(texto, quote=False)
+        return _RE_QUEBRAS.sub('<br><br>', texto).replace('\n', '<br>')
+
+    def _matematica(self, no: Matematica) -> str:
+        partes = []
+        for filho in no.filhos:
+            if isinstance(filho, Latex):
+                partes.append(filho.fonte)
+            else:
+                partes.append(self.emitir(filho))
+        fonte = ''.join(partes)
+        for abertura, fechamento in (('$$', '$$'), ('$', '$'), ('\\[', '\\]'), ('\\(', '\\)')):
+            if fonte.startswith(abertura) and fonte.endswith(fechamento):
+                fonte = fonte[len(abertura):len(fonte) - len(fechamento)]
+                break
+        return latex_para_html(fonte)
+
+    def _latex(self, no: Latex) -> str:
+        return latex_para_html(no.fonte)
+
+    def _formatacao(self, no: Formatacao) -> str:
+        return f'<{no.estilo}>{self._filhos(no.filhos)}</{no.estilo}>'
+
+    def _alinhamento(self, no: Alinhamento) -> str:
+        return ALINHAMENTOS_HTML[no.tipo] if no.abertura else '</div>'
+
+    def _imagem(self, no: Imagem) -> str:
+        src = src_imagem(no.caminho)
+        if not src:
+            return ''
+        try:
+            largura = int(400 * float(no.escala))
+        except ValueError:
+            largura = 400
+        return f'<br><img src="{src}" style="max-width:{largura}px; display:block; margin:10px auto;"><br>'
+
+    def _tabela_latex(self, no: TabelaLatex) -> str:
+        return html.escape(no.abertura, quote=False) + self._filhos(no.filhos) + '\\end{tabular}'
+
+
+def _abre_bloco(no) -> bool:
+    return isinstance(no, Tabela) or (isinstance(no, Alinhamento) and no.abertura)
+
+
+def _fecha_bloco(no) -> bool:
+    return isinstance(no, Tabela) or (isinstance(no, Alinhamento) and not no.abertura)
+
+
+_emissores_html = {
+    True: EmissorHtml(estilos_inline=True),
+    False: EmissorHtml(estilos_inline=False),
+}
+
+
+def compilar_html(texto: str, estilos_inline: bool = True) -> str:
+    """
+    Converte a marcação de um enunciado ou alternativa para HTML.
+
+    Args:
+        texto: Texto com a marcação do editor
+        estilos_inline: Se True, tabelas e listas levam estilos inline
+
+    Returns:
+        Fragmento HTML
+    """
+    if not texto:
+        return ''
+    return _emissores_html[bool(estilos_inline)].emitir(obter_ast(texto))
@@ -0,0 +1,348 @@
+"""
+Instrumentação por etapa das exportações.
+
+Cada exportação (lista, versão randomizada ou conjunto de versões) é medida
+como uma sequência de spans: carga do snapshot, transformação de cada
+questão, montagem do template, imagens remotas, preparação das imagens,
+derivados, cada passada do pdflatex e finalização. Cada span guarda
+duração, bytes e número de imagens.
+
+Os spans vão para o MetricsCollector ("exportacao.<etapa>", com percentis) e
+o relatório de cada exportação entra no histórico das últimas N, gravado em
+disco para ser consultado pela interface e pelo CLI (python -m src.cli metricas).
+
+A medição em andamento é propagada por contextvars; fora de uma exportação
+span() não registra nada.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from src.infrastructure.logging import get_metrics_collector
+from src.infrastructure.logging.metrics_collector import percentil
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = 'database/metricas_exportacao.jsonl'
+LIMITE_PADRAO = 200
+
+# Etapas
+ETAPA_SNAPSHOT = 'snapshot'
+ETAPA_CACHE_ARTEFATO = 'cache_artefato'
+ETAPA_VERIFICACAO = 'verificacao_latex'
+ETAPA_TRANSFORMACAO = 'transformacao'
+ETAPA_FRAGMENTOS = 'cache_fragmentos'
+ETAPA_TEMPLATE = 'template'
+ETAPA_IMAGENS_REMOTAS = 'imagens_remotas'
+ETAPA_IMAGENS = 'imagens'
+ETAPA_DERIVADOS = 'derivados_imagem'
+ETAPA_TRECHOS = 'trechos_previa'
+ETAPA_GRAVACAO = 'gravacao_tex'
+ETAPA_PDFLATEX = 'pdflatex'
+ETAPA_IMPRESSAO_HTML = 'impressao_html'
+ETAPA_FINALIZACAO = 'finalizacao'
+
+ORDEM_ETAPAS = [
+    ETAPA_SNAPSHOT, ETAPA_CACHE_ARTEFATO, ETAPA_VERIFICACAO, ETAPA_FRAGMENTOS, ETAPA_TRANSFORMACAO,
+    ETAPA_TEMPLATE, ETAPA_IMAGENS_REMOTAS, ETAPA_IMAGENS, ETAPA_DERIVADOS, ETAPA_TRECHOS, ETAPA_GRAVACAO,
+    ETAPA_PDFLATEX, ETAPA_IMPRESSAO_HTML, ETAPA_FINALIZACAO
+]
+
+
+@dataclass
+class Span:
+    """Trecho medido de uma exportação"""
+    etapa: str
+    duracao_ms: float
+    bytes: int = 0
+    imagens: int = 0
+    detalhe: str = ''
+
+
+class SpanAberto:
+    """Span em andamento; bytes e imagens podem ser informados durante a etapa"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.imagens = 0
+
+    def registrar(self, bytes: int = 0, imagens: int = 0) -> None:
+        self.bytes += bytes
+        self.imagens += imagens
+
+
+class _SpanNulo(SpanAberto):
+    def registrar(self, bytes: int = 0, imagens: int = 0) -> None:
+        pass
+
+
+_SPAN_NULO = _SpanNulo()
+
+
+@dataclass
+class RelatorioExportacao:
+    """Spans de uma exportação"""
+    descricao: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    iniciada_em: float = field(default_factory=time.time)
+    duracao_ms: float = 0.0
+    sucesso: bool = True
+    erro: str = ''
+    spans: List[Span] = field(default_factory=list)
+
+    def por_etapa(self) -> Dict[str, Dict[str, float]]:
+        """Totais por etapa: ms, spans, bytes e imagens"""
+        totais: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            total = totais.setdefault(span.etapa, {'ms': 0.0, 'spans': 0, 'bytes': 0, 'imagens': 0})
+            total['ms'] += span.duracao_ms
+            total['spans'] += 1
+            total['bytes'] += span.bytes
+            total['imagens'] += span.imagens
+        return totais
+
+    def para_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> 'RelatorioExportacao':
+        spans = [Span(**span) for span in dados.get('spans', [])]
+        return cls(**{**dados, 'spans': spans})
+
+
+class MedicaoExportacao:
+    """Coleta os spans de uma exportação (várias threads podem registrar)"""
+
+    def __init__(self, descricao: str):
+        self.relatorio = RelatorioExportacao(descricao)
+        self._lock = Lock()
+        self._metrics = get_metrics_collector()
+
+    def adicionar(self, span: Span) -> None:
+        with self._lock:
+            self.relatorio.spans.append(span)
+        if self._metrics:
+            self._metrics.record_timing(f"exportacao.{span.etapa}", span.duracao_ms)
+            if span.bytes:
+                self._metrics.increment(f"exportacao.{span.etapa}.bytes", span.bytes)
+            if span.imagens:
+                self._metrics.increment(f"exportacao.{span.etapa}.imagens", span.imagens)
+
+    def incorporar(self, spans: Iterable[Span]) -> None:
+        """Adiciona spans medidos em outro processo (workers de compilação)"""
+        for span in spans:
+            self.adicionar(span)
+
+
+_medicao_atual: contextvars.ContextVar[Optional[MedicaoExportacao]] = contextvars.ContextVar(
+    'medicao_exportacao', default=None
+)
+
+
+def medicao_atual() -> Optional[MedicaoExportacao]:
+    return _medicao_atual.get()
+
+
+@contextmanager
+def medir_exportacao(descricao: str, registrar: bool = True) -> Iterator[MedicaoExportacao]:
+    """
+    Mede uma exportação. Chamadas aninhadas reutilizam a medição externa.
+
+    Args:
+        descricao: Texto do relatório (ex: código da lista e template)
+        registrar: Se False, não grava no histórico (workers devolvem os spans ao processo principal)
+    """
+    externa = _medicao_atual.get()
+    if externa is not None:
+        yield externa
+        return
+
+    medicao = MedicaoExportacao(descricao)
+    token = _medicao_atual.set(medicao)
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    except BaseException as e:
+        medicao.relatorio.sucesso = False
+        medicao.relatorio.erro = str(e) or type(e).__name__
+        raise
+    finally:
+        _medicao_atual.reset(token)
+        medicao.relatorio.duracao_ms = (time.perf_counter() - inicio) * 1000
+        if registrar:
+            get_historico_exportacoes().registrar(medicao.relatorio)
+
+
+def exportacao_medida(descricao: Callable[..., str]):
+    """Decorator: mede a chamada com medir_exportacao(descricao(*args, **kwargs))"""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with medir_exportacao(descricao(*args, **kwargs)):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorador
+
+
+@contextmanager
+def span(etapa: str, detalhe: str = '') -> Iterator[SpanAberto]:
+    """
+    Mede uma etapa da exportação em andamento.
+
+    Uso:
+        with span(ETAPA_TEMPLATE) as s:
+            documento = ...
+            s.registrar(bytes=len(documento))
+    """
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        yield _SPAN_NULO
+        return
+    aberto = SpanAberto()
+    inicio = time.perf_counter()
+    try:
+        yield aberto
+    finally:
+        medicao.adicionar(Span(
+            etapa, (time.perf_counter() - inicio) * 1000, aberto.bytes, aberto.imagens, detalhe
+        ))
+
+
+class HistoricoExportacoes:
+    """
+    Relatórios das últimas N exportações, em memória e em um arquivo JSON Lines.
+    """
+
+    def __init__(self, caminho: str = CAMINHO_PADRAO, limite: int = LIMITE_PADRAO):
+        self.caminho = Path(caminho)
+        self.limite = limite
+        self._relatorios: Optional[Deque[RelatorioExportacao]] = None
+        self._lock = Lock()
+
+    def _carregar(self) -> Deque[RelatorioExportacao]:
+        if self._relatorios is None:
+            relatorios: Deque[RelatorioExportacao] = deque(maxlen=self.limite)
+            if self.caminho.exists():
+                for linha in self.caminho.read_text(encoding='utf-8').splitlines():
+                    try:
+                        relatorios.append(RelatorioExportacao.de_dict(json.loads(linha)))
+                    except (ValueError, TypeError):
+                        continue  # Linha truncada ou de versão anterior
+            self._relatorios = relatorios
+        return self._relatorios
+
+    def registrar(self, relatorio: RelatorioExportacao) -> None:
+        with self._lock:
+            relatorios = self._carregar()
+            relatorios.append(relatorio)
+            try:
+                self.caminho.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.caminho, 'a', encoding='utf-8') as arquivo:
+                    arquivo.write(json.dumps(relatorio.para_dict(), ensure_ascii=False) + '\n')
+                # Reescreve quando o arquivo passa do dobro do limite
+                if sum(1 for _ in open(self.caminho, encoding='utf-8')) > 2 * self.limite:
+                    temporario = self.caminho.with_suffix('.tmp')
+                    temporario.write_text(
+                        ''.join(json.dumps(r.para_dict(), ensure_ascii=False) + '\n' for r in relatorios),
+                        encoding='utf-8'
+                    )
+                    os.replace(temporario, self.caminho)
+            except OSError as e:
+                logger.warning(f"Não foi possível gravar as métricas de exportação: {e}")
+
+    def ultimas(self, quantidade: int = 20) -> List[RelatorioExportacao]:
+        """Relatórios mais recentes primeiro"""
+        with self._lock:
+            relatorios = list(self._carregar())
+        return relatorios[::-1][:quantidade]
+
+    def recarregar(self) -> None:
+        """Relê o arquivo (inclui exportações feitas por outro processo, ex: o CLI)"""
+        with self._lock:
+            self._relatorios = None
+
+
+def resumo_etapas(relatorios: Iterable[RelatorioExportacao]) -> Dict[str, Dict[str, float]]:
+    """
+    Estatísticas por etapa sobre várias exportações (total da etapa em cada uma).
+
+    Returns:
+        Dict etapa -> count, p50_ms, p90_ms, max_ms, bytes, imagens
+    """
+    tempos: Dict[str, List[float]] = {}
+    somas: Dict[str, Dict[str, int]] = {}
+    for relatorio in relatorios:
+        for etapa, total in relatorio.por_etapa().items():
+            tempos.setdefault(etapa, []).append(total['ms'])
+            soma = somas.setdefault(etapa, {'bytes': 0, 'imagens': 0})
+            soma['bytes'] += total['bytes']
+            soma['imagens'] += total['imagens']
+    ordem = {etapa: i for i, etapa in enumerate(ORDEM_ETAPAS)}
+    return {
+        etapa: {
+            'count': len(valores),
+            'p50_ms': round(percentil(valores, 50), 1),
+            'p90_ms': round(percentil(valores, 90), 1),
+            'max_ms': round(max(valores), 1),
+            **somas[etapa],
+        }
+        for etapa, valores in sorted(tempos.items(), key=lambda item: ordem.get(item[0], len(ordem)))
+    }
+
+
+def _tamanho(bytes: float) -> str:
+    for unidade in ('B', 'KB', 'MB'):
+        if bytes < 1024:
+            return f"{bytes:.0f}{unidade}"
+        bytes /= 1024
+    return f"{bytes:.1f}GB"
+
+
+def formatar_relatorio(relatorios: List[RelatorioExportacao]) -> str:
+    """Texto do relatório das últimas exportações (interface e CLI)"""
+    if not relatorios:
+        return "Nenhuma exportação registrada."
+    linhas = [f"Últimas {len(relatorios)} exportações", ""]
+    for relatorio in relatorios:
+        quando = time.strftime('%d/%m %H:%M:%S', time.localtime(relatorio.iniciada_em))
+        estado = 'ok' if relatorio.sucesso else f"falhou: {relatorio.erro.splitlines()[0] if relatorio.erro else ''}"
+        linhas.append(f"{quando}  {relatorio.descricao}  {relatorio.duracao_ms / 1000:.2f}s  [{estado}]")
+        etapas = relatorio.por_etapa()
+        for etapa in sorted(etapas, key=lambda e: ORDEM_ETAPAS.index(e) if e in ORDEM_ETAPAS else len(ORDEM_ETAPAS)):
+            total = etapas[etapa]
+            extras = [f"{total['spans']}x"] if total['spans'] > 1 else []
+            if total['bytes']:
+                extras.append(_tamanho(total['bytes']))
+            if total['imagens']:
+                extras.append(f"{total['imagens']} imagens")
+            linhas.append(
+                f"    {etapa:<18}{total['ms']:>9.0f}ms  {', '.join(extras)}".rstrip()
+            )
+    linhas += ["", f"{'Etapa':<18}{'n':>5}{'p50':>10}{'p90':>10}{'máx':>10}"]
+    for etapa, estatisticas in resumo_etapas(relatorios).items():
+        linhas.append(
+            f"{etapa:<18}{estatisticas['count']:>5}{estatisticas['p50_ms']:>8.0f}ms"
+            f"{estatisticas['p90_ms']:>8.0f}ms{estatisticas['max_ms']:>8.0f}ms"
+        )
+    return "\n".join(linhas)
+
+
+_historico: Optional[HistoricoExportacoes] = None
+
+
+def get_historico_exportacoes() -> HistoricoExportacoes:
+    """Retorna o histórico global (arquivo via METRICAS_EXPORTACAO_PATH)"""
+    global _historico
+    if _historico is None:
+        _historico = HistoricoExportacoes(os.getenv('METRICAS_EXPORTACAO_PATH', CAMINHO_PADRAO))
+    return _historico
@@ -0,0 +1,286 @@
+"""
+Prévia incremental de listas costurada a partir de trechos PDF por questão.
+
+Pré-visualizar uma lista compilava o documento inteiro a cada clique, mesmo
+depois de corrigir uma única questão. Aqui cada bloco \\item é compilado como
+um documento avulso com o preâmbulo do template, dentro de uma caixa da
+largura da coluna e recortado na altura da questão pelo pacote preview
+(tightpage). Os trechos ficam em cache por hash do documento avulso (bloco,
+número, preâmbulo, largura e instalação do TeX) e os que faltam são
+compilados em paralelo.
+
+A prévia é o próprio template com cada questão trocada pelo PDF do seu
+trecho (\\includegraphics, já aceito pelo graphicx), então depois de uma
+edição só a questão alterada volta ao pdflatex e a compilação final apenas
+posiciona as páginas recortadas.
+
+Limitações: uma questão não quebra entre páginas (cada trecho é uma caixa)
+e a prévia não substitui a exportação final. EXPORT_PREVIA_INCREMENTAL=0
+volta a compilar o documento inteiro.
+"""
+import contextvars
+import hashlib
+import logging
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Mapping, Optional
+
+from src.application.services.contexto_exportacao import ContextoExportacao
+from src.application.services.derivados_imagem import MetadadosImagem
+from src.application.services.export_service import CompilacaoLatexError, ExportService
+from src.application.services.exportacao_paralela import numero_workers_padrao
+from src.application.services.formato_latex import get_formatos_latex, identificar_distribuicao
+from src.application.services.metricas_exportacao import ETAPA_TRECHOS, span
+from src.infrastructure.logging import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = 'database/cache_trechos'
+LIMITE_PADRAO_BYTES = 256 * 1024 * 1024
+# Incrementar quando montar_trecho mudar
+VERSAO_TRECHO = 1
+# Marcador do bloco de questões no documento montado pelo controller
+MARCADOR_QUESTOES = '%%QUESTOES_PREVIA%%'
+
+_INICIO_DOCUMENTO = '\\begin{document}'
+_RE_ABRE_LISTA = re.compile(r'\\begin\{enumerate\}(\[[^\]]*\])?')
+_RE_ABRE_COLUNAS = re.compile(r'\\begin\{multicols\*?\}\{(\d+)\}')
+_RE_FECHA_COLUNAS = re.compile(r'\\end\{multicols\*?\}')
+
+
+class TrechoInvalidoError(CompilacaoLatexError):
+    """O trecho de uma questão não compilou"""
+
+    def __init__(self, numero: int, erro: CompilacaoLatexError):
+        super().__init__(f"Questão {numero}: {erro}", erro.log)
+        self.numero = numero
+
+
+@dataclass(frozen=True)
+class EstruturaPrevia:
+    """O que os trechos herdam do documento: preâmbulo, abertura da lista e colunas"""
+    preambulo: str
+    abertura_lista: str
+    colunas: int
+
+
+def previa_incremental_habilitada() -> bool:
+    """A prévia incremental é usada a menos que EXPORT_PREVIA_INCREMENTAL seja '0'"""
+    return os.getenv('EXPORT_PREVIA_INCREMENTAL', '1') != '0'
+
+
+def analisar_documento(documento: str) -> Optional[EstruturaPrevia]:
+    """
+    Localiza o preâmbulo, o \\begin{enumerate} das questões e as colunas abertas
+    antes do MARCADOR_QUESTOES.
+
+    Args:
+        documento: Documento montado com MARCADOR_QUESTOES no lugar das questões
+
+    Returns:
+        EstruturaPrevia ou None se o template não tiver essa forma
+    """
+    inicio = documento.find(_INICIO_DOCUMENTO)
+    posicao = documento.find(MARCADOR_QUESTOES)
+    if inicio <= 0 or posicao < inicio:
+        return None
+    antes = documento[inicio:posicao]
+    aberturas = list(_RE_ABRE_LISTA.finditer(antes))
+    if not aberturas:
+        return None
+    colunas = 1
+    abertas = list(_RE_ABRE_COLUNAS.finditer(antes))
+    if len(abertas) > len(_RE_FECHA_COLUNAS.findall(antes)):
+        colunas = int(abertas[-1].group(1)) or 1
+    return EstruturaPrevia(documento[:inicio], aberturas[-1].group(0), colunas)
+
+
+def montar_trecho(estrutura: EstruturaPrevia, bloco: str, numero: int) -> str:
+    """
+    Documento avulso de uma questão, recortado na altura do bloco.
+
+    Args:
+        estrutura: Resultado de analisar_documento
+        bloco: Bloco \\item da questão
+        numero: Posição da questão na lista (rótulo do \\item)
+
+    Returns:
+        Documento LaTeX completo
+    """
+    if estrutura.colunas > 1:
+        largura = f"\\dimexpr(\\linewidth-\\columnsep*{estrutura.colunas - 1})/{estrutura.colunas}\\relax"
+    else:
+        largura = "\\linewidth"
+    return (
+        f"{estrutura.preambulo}"
+        "\\usepackage[active,tightpage]{preview}\n"
+        "\\setlength\\PreviewBorder{0pt}\n"
+        f"{_INICIO_DOCUMENTO}\n"
+        "\\begin{preview}\n"
+        f"\\begin{{minipage}}{{{largura}}}\n"
+        f"{estrutura.abertura_lista}\n"
+        f"\\setcounter{{enumi}}{{{numero - 1}}}\n"
+        f"{bloco}\n"
+        "\\end{enumerate}\n"
+        "\\end{minipage}\n"
+        "\\end{preview}\n"
+        "\\end{document}\n"
+    )
+
+
+def costurar(documento: str, trechos: List[Path]) -> str:
+    """
+    Troca o MARCADOR_QUESTOES pelos PDFs dos trechos, um \\item sem rótulo por
+    questão (o número já está no trecho), alinhados à margem da lista.
+    """
+    itens = "\n".join(
+        f"\\item[] \\hspace*{{-\\leftmargin}}\\includegraphics{{{trecho.resolve().as_posix()}}}"
+        for trecho in trechos
+    )
+    return documento.replace(MARCADOR_QUESTOES, itens, 1)
+
+
+def chave_trecho(documento: str, metadados_imagens: Optional[Mapping[str, MetadadosImagem]] = None) -> str:
+    """
+    Calcula a chave de conteúdo de um trecho.
+
+    Args:
+        documento: Documento avulso (montar_trecho)
+        metadados_imagens: Hash das imagens do banco; entram as citadas no documento
+
+    Returns:
+        Hash hexadecimal
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{VERSAO_TRECHO}:{identificar_distribuicao()}\n".encode('utf-8'))
+    for nome, metadados in sorted((metadados_imagens or {}).items()):
+        if nome in documento:
+            digest.update(f"{nome}:{metadados.hash_md5}\n".encode('utf-8'))
+    digest.update(documento.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CacheTrechos:
+    """
+    Trechos PDF em disco endereçados por conteúdo, com remoção LRU.
+    """
+
+    def __init__(self, diretorio: str = CAMINHO_PADRAO, limite_bytes: int = LIMITE_PADRAO_BYTES,
+                 max_workers: Optional[int] = None):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+        self.max_workers = max_workers
+        self._lock = Lock()
+        self._metrics = get_metrics_collector()
+
+    def obter_varios(self, documentos: List[str], colunas: int = 1,
+                     metadados_imagens: Optional[Mapping[str, MetadadosImagem]] = None,
+                     contexto: Optional[ContextoExportacao] = None) -> List[Path]:
+        """
+        Obtém os PDFs dos trechos, compilando em paralelo os que faltam.
+
+        Args:
+            documentos: Documentos avulsos (montar_trecho), na ordem da lista
+            colunas: Colunas do layout (derivados de imagem)
+            metadados_imagens: Hash/dimensões das imagens do banco
+            contexto: Progresso e cancelamento (opcional)
+
+        Returns:
+            PDF de cada trecho, na mesma ordem
+
+        Raises:
+            TrechoInvalidoError: Se o trecho de alguma questão não compilar
+        """
+        chaves = [chave_trecho(documento, metadados_imagens) for documento in documentos]
+        faltando: Dict[str, int] = {}  # chave -> índice do primeiro documento
+        for indice, chave in enumerate(chaves):
+            arquivo = self.diretorio / f"{chave}.pdf"
+            if arquivo.exists():
+                os.utime(arquivo)  # LRU
+            else:
+                faltando.setdefault(chave, indice)
+
+        if faltando:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            with span(ETAPA_TRECHOS, f"{len(faltando)} de {len(chaves)} compilados"):
+                self._compilar(
+                    {chave: documentos[indice] for chave, indice in faltando.items()},
+                    {chave: indice + 1 for chave, indice in faltando.items()},
+                    colunas, metadados_imagens, contexto
+                )
+            self._podar()
+        logger.info(f"Trechos da prévia: {len(faltando)} compilados, {len(chaves) - len(faltando)} do cache")
+        if self._metrics:
+            self._metrics.increment("cache_trechos_acertos", len(chaves) - len(faltando))
+        return [self.diretorio / f"{chave}.pdf" for chave in chaves]
+
+    def _compilar(self, documentos: Dict[str, str], numeros: Dict[str, int], colunas: int,
+                  metadados_imagens: Optional[Mapping[str, MetadadosImagem]],
+                  contexto: Optional[ContextoExportacao]) -> None:
+        """Compila os trechos em threads (o trabalho pesado é o subprocesso do TeX)"""
+        servico = ExportService(max_passadas=1)
+        if servico.usar_formatos:
+            # Todos os trechos têm o mesmo preâmbulo: um único formato antes do pool
+            get_formatos_latex().preparar(next(iter(documentos.values())))
+        area = self.diretorio / ".imagens_build"
+        workers = self.max_workers or numero_workers_padrao(len(documentos))
+        falhas: Dict[str, CompilacaoLatexError] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futuros = {
+                    executor.submit(
+                        contextvars.copy_context().run, servico.compilar_latex_para_pdf,
+                        documento, self.diretorio, chave, area, contexto, colunas, metadados_imagens
+                    ): chave
+                    for chave, documento in documentos.items()
+                }
+                for futuro in as_completed(futuros):
+                    try:
+                        futuro.result()
+                    except CompilacaoLatexError as e:
+                        falhas[futuros[futuro]] = e
+        finally:
+            shutil.rmtree(area, ignore_errors=True)
+        if falhas:
+            chave = min(falhas, key=numeros.get)
+            raise TrechoInvalidoError(numeros[chave], falhas[chave])
+
+    def _podar(self) -> None:
+        """Remove os trechos menos usados quando o total passa do limite"""
+        with self._lock:
+            arquivos = []
+            total = 0
+            for entrada in os.scandir(self.diretorio):
+                if entrada.is_file() and entrada.name.endswith('.pdf'):
+                    estado = entrada.stat()
+                    arquivos.append((estado.st_mtime, estado.st_size, entrada.path))
+                    total += estado.st_size
+            for _, tamanho, caminho in sorted(arquivos):
+                if total <= self.limite_bytes:
+                    break
+                Path(caminho).unlink(missing_ok=True)
+                total -= tamanho
+
+    def limpar(self) -> None:
+        """Remove todos os trechos"""
+        if not self.diretorio.exists():
+            return
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_file():
+                Path(entrada.path).unlink(missing_ok=True)
+
+
+_cache_trechos: Optional[CacheTrechos] = None
+
+
+def get_cache_trechos() -> CacheTrechos:
+    """Retorna o cache de trechos global (diretório via CACHE_TRECHOS_PATH)"""
+    global _cache_trechos
+    if _cache_trechos is None:
+        _cache_trechos = CacheTrechos(os.getenv('CACHE_TRECHOS_PATH', CAMINHO_PADRAO))
+    return _cache_trechos
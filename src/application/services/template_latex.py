@@ -0,0 +1,223 @@
+"""
+Templates LaTeX pré-compilados.
+
+Cada template é analisado uma única vez em uma lista de segmentos: texto
+literal, slots nomeados e seções opcionais. Há dois tipos de slot:
+
+    [TITULO_LISTA]        slot em linha (cabeçalho)
+    % [QUESTOES_AQUI]     slot de bloco (recebe um bloco inteiro: questões, gabarito...)
+
+Seções opcionais seguem o cabeçalho usado pelos templates e vão até o primeiro
+\\end{enumerate}:
+
+    % ============================================
+    % GABARITO (opcional)
+    % ============================================
+
+O documento é montado com um único join (ou gravado direto no arquivo) em vez
+de uma cópia do documento inteiro por placeholder. Slots sem valor mantêm o
+texto original, como as substituições anteriores faziam.
+
+Os templates ficam em cache com invalidação pelo mtime/tamanho do arquivo.
+"""
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_PADRAO = 'templates/latex'
+
+# Nomes normalizados das seções opcionais
+SECAO_GABARITO = 'GABARITO'
+SECAO_RESOLUCOES = 'RESOLUCOES'
+
+_RE_SECAO = re.compile(
+    r'% ={10,}\s*\n% (GABARITO|RESOLU[ÇC][ÕO]ES) \(opcional\)\s*\n% ={10,}\s*\n.*?\\end\{enumerate\}',
+    re.DOTALL
+)
+_RE_SLOT = re.compile(r'% \[([A-Z][A-Z_]*)_AQUI\]|\[([A-Z][A-Z_]{2,})\]')
+
+
+@dataclass(frozen=True)
+class Slot:
+    """Ponto de substituição do template"""
+    nome: str
+    original: str   # Texto mantido quando o slot não recebe valor
+    bloco: bool     # True para '% [NOME_AQUI]'
+
+
+@dataclass(frozen=True)
+class Secao:
+    """Seção opcional (incluída apenas quando habilitada)"""
+    nome: str
+    segmentos: Tuple[Union[str, Slot], ...]
+
+
+Segmento = Union[str, Slot, Secao]
+
+
+def _nome_secao(titulo: str) -> str:
+    return SECAO_RESOLUCOES if titulo.startswith('RESOLU') else titulo
+
+
+def _analisar_slots(texto: str) -> List[Union[str, Slot]]:
+    segmentos: List[Union[str, Slot]] = []
+    posicao = 0
+    for encontrado in _RE_SLOT.finditer(texto):
+        if encontrado.start() > posicao:
+            segmentos.append(texto[posicao:encontrado.start()])
+        bloco = encontrado.group(1) is not None
+        segmentos.append(Slot(encontrado.group(1) or encontrado.group(2), encontrado.group(0), bloco))
+        posicao = encontrado.end()
+    if posicao < len(texto):
+        segmentos.append(texto[posicao:])
+    return segmentos
+
+
+def analisar_template(conteudo: str) -> List[Segmento]:
+    """
+    Divide o conteúdo de um template em segmentos.
+
+    Args:
+        conteudo: Texto do template
+
+    Returns:
+        Lista de segmentos (str, Slot ou Secao)
+    """
+    segmentos: List[Segmento] = []
+    posicao = 0
+    for encontrado in _RE_SECAO.finditer(conteudo):
+        segmentos.extend(_analisar_slots(conteudo[posicao:encontrado.start()]))
+        segmentos.append(Secao(
+            _nome_secao(encontrado.group(1)),
+            tuple(_analisar_slots(encontrado.group(0)))
+        ))
+        posicao = encontrado.end()
+    segmentos.extend(_analisar_slots(conteudo[posicao:]))
+    return segmentos
+
+
+@dataclass
+class TemplateCompilado:
+    """Template analisado, pronto para ser preenchido"""
+    nome: str
+    segmentos: List[Segmento]
+    slots: List[str] = field(default_factory=list)
+    blocos: List[str] = field(default_factory=list)
+    secoes: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        for segmento in self._percorrer(self.segmentos, todas_secoes=True):
+            if isinstance(segmento, Slot):
+                destino = self.blocos if segmento.bloco else self.slots
+                if segmento.nome not in destino:
+                    destino.append(segmento.nome)
+        self.secoes = [s.nome for s in self.segmentos if isinstance(s, Secao)]
+
+    @staticmethod
+    def _percorrer(segmentos: Iterable[Segmento], secoes: Iterable[str] = (),
+                   todas_secoes: bool = False) -> Iterable[Union[str, Slot]]:
+        for segmento in segmentos:
+            if isinstance(segmento, Secao):
+                if todas_secoes or segmento.nome in secoes:
+                    yield from segmento.segmentos
+            else:
+                yield segmento
+
+    def _partes(self, valores: Dict[str, str], secoes: Iterable[str]) -> Iterable[str]:
+        secoes = set(secoes)
+        for segmento in self._percorrer(self.segmentos, secoes):
+            if isinstance(segmento, Slot):
+                valor = valores.get(segmento.nome)
+                yield segmento.original if valor is None else valor
+            else:
+                yield segmento
+
+    def renderizar(self, valores: Dict[str, str], secoes: Iterable[str] = ()) -> str:
+        """
+        Monta o documento.
+
+        Args:
+            valores: Slot -> texto (já escapado). Slots ausentes ou None mantêm o original
+            secoes: Seções opcionais a incluir (ex: [SECAO_GABARITO])
+
+        Returns:
+            Documento LaTeX completo
+        """
+        return ''.join(self._partes(valores, secoes))
+
+    def escrever(self, arquivo: TextIO, valores: Dict[str, str], secoes: Iterable[str] = ()) -> None:
+        """Grava o documento direto em um arquivo aberto (sem montar a string)."""
+        arquivo.writelines(self._partes(valores, secoes))
+
+
+class CacheTemplates:
+    """
+    Templates compilados em memória, recarregados quando o arquivo muda.
+    """
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO):
+        self.diretorio = Path(diretorio)
+        self._templates: Dict[str, Tuple[Tuple[int, int], TemplateCompilado]] = {}
+        self._lock = Lock()
+
+    def obter(self, nome_template: str) -> TemplateCompilado:
+        """
+        Retorna o template compilado, analisando o arquivo apenas se ele mudou.
+
+        Args:
+            nome_template: Nome do arquivo (ex: 'default.tex')
+
+        Raises:
+            FileNotFoundError: Se o template não existir
+        """
+        caminho = self.diretorio / nome_template
+        try:
+            estado = os.stat(caminho)
+        except OSError:
+            raise FileNotFoundError(f"Template LaTeX '{nome_template}' não encontrado.")
+        versao = (estado.st_mtime_ns, estado.st_size)
+
+        with self._lock:
+            em_cache = self._templates.get(nome_template)
+            if em_cache and em_cache[0] == versao:
+                return em_cache[1]
+
+        template = TemplateCompilado(nome_template, analisar_template(caminho.read_text(encoding='utf-8')))
+        logger.debug(
+            f"Template {nome_template} compilado: {len(template.segmentos)} segmentos, "
+            f"slots {template.slots + template.blocos}, seções {template.secoes}"
+        )
+        with self._lock:
+            self._templates[nome_template] = (versao, template)
+        return template
+
+    def placeholders(self, nome_template: str) -> Dict[str, List[str]]:
+        """
+        Placeholders disponíveis em um template (para a interface de exportação).
+
+        Returns:
+            Dict com 'slots' (em linha), 'blocos' e 'secoes' opcionais
+        """
+        template = self.obter(nome_template)
+        return {'slots': list(template.slots), 'blocos': list(template.blocos), 'secoes': list(template.secoes)}
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+
+_cache_templates: Optional[CacheTemplates] = None
+
+
+def get_cache_templates() -> CacheTemplates:
+    """Retorna o cache de templates global"""
+    global _cache_templates
+    if _cache_templates is None:
+        _cache_templates = CacheTemplates()
+    return _cache_templates
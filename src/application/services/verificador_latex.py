@@ -0,0 +1,581 @@
+"""
+Verificação estática de LaTeX antes da compilação.
+
+Encontra em uma passada linear, sem chamar o pdflatex, os erros que hoje só
+aparecem no meio de uma exportação longa:
+
+- chaves { } desbalanceadas (também ao atravessar o início/fim de uma fórmula);
+- $, $$, \\( \\) e \\[ \\] sem fechamento;
+- \\end{x} sem \\begin{x} e ambientes fechados fora de ordem;
+- & fora de tabela/alinhamento; _ e ^ fora do modo matemático;
+- % e # dentro de fórmulas da marcação (comentário/parâmetro no LaTeX);
+- comandos desconhecidos na marcação das questões (aviso).
+
+Dois modos: MODO_MARCACAO verifica os campos do editor (enunciado e
+alternativas) com as mesmas regras do markup_compiler, que escapa &, %, #
+e $ soltos no texto; MODO_LATEX verifica o documento gerado, só quanto à
+estrutura, já que os pacotes dos templates definem comandos que não conhecemos.
+
+Os resultados ficam em um cache LRU pelo hash do conteúdo (get_cache_verificacao),
+então reexportar ou salvar de novo um texto inalterado não o verifica outra vez.
+A verificação pode ser desligada com LATEX_VERIFICAR=0.
+"""
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from src.application.services.markup_compiler import LETRAS_GREGAS, tokens_em_linha
+from src.application.services.template_latex import DIRETORIO_PADRAO
+
+logger = logging.getLogger(__name__)
+
+MODO_MARCACAO = 'marcacao'
+MODO_LATEX = 'latex'
+
+GRAVIDADE_ERRO = 'erro'
+GRAVIDADE_AVISO = 'aviso'
+
+# Regras (identificadores estáveis, usados pela interface e pelos logs)
+REGRA_CHAVES = 'chaves'
+REGRA_MATEMATICA = 'matematica'
+REGRA_AMBIENTE = 'ambiente'
+REGRA_ALINHAMENTO = 'alinhamento'
+REGRA_FORA_MATEMATICA = 'fora_matematica'
+REGRA_CARACTERE = 'caractere'
+REGRA_COMANDO = 'comando_desconhecido'
+
+AMBIENTES_MATEMATICOS = frozenset((
+    'equation', 'equation*', 'align', 'align*', 'alignat', 'alignat*', 'gather', 'gather*',
+    'multline', 'multline*', 'flalign', 'flalign*', 'eqnarray', 'eqnarray*', 'displaymath', 'math',
+))
+
+# Ambientes em que & separa colunas
+AMBIENTES_ALINHAMENTO = frozenset((
+    'tabular', 'tabular*', 'tabularx', 'array', 'supertabular', 'longtable', 'tabu',
+    'align', 'align*', 'alignat', 'alignat*', 'aligned', 'alignedat', 'flalign', 'flalign*',
+    'eqnarray', 'eqnarray*', 'split', 'cases', 'dcases', 'rcases',
+    'matrix', 'pmatrix', 'bmatrix', 'Bmatrix', 'vmatrix', 'Vmatrix', 'smallmatrix',
+))
+
+# Conteúdo copiado sem interpretação até o \end correspondente
+AMBIENTES_LITERAIS = frozenset(('verbatim', 'verbatim*', 'lstlisting', 'comment', 'minted'))
+
+# Comandos cujo argumento é um nome/caminho (pode conter _, #, %, &)
+COMANDOS_ARGUMENTO_LITERAL = frozenset((
+    'includegraphics', 'label', 'ref', 'eqref', 'pageref', 'url', 'href', 'input', 'include',
+    'usepackage', 'documentclass', 'cite', 'graphicspath', 'definecolor', 'cellcolor',
+    'rowcolor', 'hypersetup', 'bibliography', 'bibliographystyle',
+))
+
+# Comandos aceitos na marcação das questões (além das letras gregas e dos definidos nos templates)
+COMANDOS_CONHECIDOS = frozenset((
+    # Texto e estrutura
+    'textbf', 'textit', 'textsl', 'textsc', 'texttt', 'textrm', 'textsf', 'textup', 'emph',
+    'underline', 'textsuperscript', 'textsubscript', 'textcolor', 'color', 'colorbox', 'fbox',
+    'mbox', 'makebox', 'framebox', 'parbox', 'raisebox', 'resizebox', 'scalebox', 'rotatebox',
+    'tiny', 'scriptsize', 'footnotesize', 'small', 'normalsize', 'large', 'Large', 'LARGE',
+    'huge', 'Huge', 'bfseries', 'itshape', 'mdseries', 'normalfont', 'rmfamily', 'sffamily',
+    'ttfamily', 'centering', 'raggedright', 'raggedleft', 'item', 'newline', 'linebreak',
+    'pagebreak', 'newpage', 'clearpage', 'par', 'noindent', 'indent', 'hspace', 'vspace',
+    'hfill', 'vfill', 'hfil', 'quad', 'qquad', 'smallskip', 'medskip', 'bigskip', 'enspace',
+    'thinspace', 'negthinspace', 'phantom', 'hphantom', 'vphantom', 'footnote', 'ldots',
+    'dots', 'cdots', 'vdots', 'ddots', 'dotsc', 'dotsb', 'textordmasculine', 'textordfeminine',
+    'textdegree', 'textless', 'textgreater', 'textbackslash', 'textasciitilde',
+    'textasciicircum', 'textbar', 'textbullet', 'textperiodcentered', 'S', 'P', 'copyright',
+    'euro', 'checkmark', 'LaTeX', 'TeX', 'today', 'linewidth', 'textwidth', 'columnwidth',
+    'hline', 'cline', 'multicolumn', 'multirow', 'cellcolor', 'rowcolor', 'arraystretch',
+    'toprule', 'midrule', 'bottomrule', 'cmidrule', 'hdashline', 'cdashline', 'tabularnewline',
+    'includegraphics', 'caption', 'label', 'ref', 'eqref', 'url', 'href', 'begin', 'end',
+    'rule', 'underbrace', 'overbrace', 'verb', 'relax', 'protect', 'displaystyle',
+    'textstyle', 'scriptstyle', 'scriptscriptstyle',
+    # Matemática
+    'frac', 'dfrac', 'tfrac', 'cfrac', 'sqrt', 'sum', 'prod', 'int', 'iint', 'iiint', 'oint',
+    'lim', 'limsup', 'liminf', 'sup', 'inf', 'max', 'min', 'arg', 'det', 'dim', 'gcd', 'deg',
+    'ker', 'hom', 'exp', 'log', 'ln', 'lg', 'sin', 'cos', 'tan', 'cot', 'sec', 'csc', 'sen', 'tg',
+    'cotg', 'cossec', 'arcsin', 'arccos', 'arctan', 'sinh', 'cosh', 'tanh', 'coth', 'mod',
+    'bmod', 'pmod', 'binom', 'dbinom', 'tbinom', 'choose', 'over', 'left', 'right', 'middle',
+    'big', 'Big', 'bigg', 'Bigg', 'bigl', 'bigr', 'Bigl', 'Bigr', 'biggl', 'biggr', 'Biggl',
+    'Biggr', 'text', 'textnormal', 'mathrm', 'mathbf', 'mathit', 'mathsf', 'mathtt', 'mathcal',
+    'mathbb', 'mathfrak', 'mathscr', 'boldsymbol', 'bm', 'operatorname', 'overline',
+    'underline', 'widehat', 'widetilde', 'hat', 'tilde', 'bar', 'vec', 'dot', 'ddot', 'acute',
+    'grave', 'breve', 'check', 'overrightarrow', 'overleftarrow', 'overleftrightarrow',
+    'stackrel', 'overset', 'underset', 'substack', 'limits', 'nolimits', 'cdot', 'times',
+    'div', 'pm', 'mp', 'ast', 'star', 'circ', 'bullet', 'oplus', 'ominus', 'otimes', 'odot',
+    'cap', 'cup', 'bigcap', 'bigcup', 'setminus', 'wedge', 'vee', 'neg', 'lnot', 'land',
+    'lor', 'le', 'leq', 'leqslant', 'ge', 'geq', 'geqslant', 'neq', 'ne', 'approx', 'cong',
+    'equiv', 'sim', 'simeq', 'propto', 'parallel', 'perp', 'mid', 'nmid', 'll', 'gg', 'prec',
+    'succ', 'in', 'notin', 'ni', 'subset', 'subseteq', 'subsetneq', 'supset', 'supseteq',
+    'supsetneq', 'not', 'emptyset', 'varnothing', 'infty', 'partial', 'nabla', 'forall',
+    'exists', 'nexists', 'therefore', 'because', 'angle', 'measuredangle', 'triangle',
+    'square', 'Box', 'diamond', 'degree', 'prime', 'hbar', 'ell', 'Re', 'Im', 'aleph',
+    'mathbb', 'to', 'gets', 'mapsto', 'rightarrow', 'leftarrow', 'leftrightarrow',
+    'Rightarrow', 'Leftarrow', 'Leftrightarrow', 'longrightarrow', 'longleftarrow',
+    'Longrightarrow', 'Longleftarrow', 'longleftrightarrow', 'Longleftrightarrow',
+    'implies', 'impliedby', 'iff', 'uparrow', 'downarrow', 'updownarrow', 'Uparrow',
+    'Downarrow', 'nearrow', 'searrow', 'nwarrow', 'swarrow', 'rightleftharpoons',
+    'xrightarrow', 'xleftarrow', 'langle', 'rangle', 'lceil', 'rceil', 'lfloor', 'rfloor',
+    'lvert', 'rvert', 'lVert', 'rVert', 'vert', 'Vert', 'backslash', 'lbrace', 'rbrace',
+    'overparen', 'underparen', 'boxed', 'cancel', 'bcancel', 'xcancel', 'cancelto', 'tag',
+    'nonumber', 'notag', 'intertext', 'hfill', 'mathring', 'imath', 'jmath', 'wp', 'Diamond',
+    'clubsuit', 'spadesuit', 'heartsuit', 'diamondsuit', 'flat', 'sharp', 'natural',
+    'varepsilon', 'varphi', 'vartheta', 'varpi', 'varrho', 'varsigma', 'varkappa', 'digamma',
+    'SI', 'si', 'num', 'unit', 'qty', 'ce', 'pu',
+))
+
+# Tokens do LaTeX relevantes para a verificação, em ordem de precedência
+_RE_TOKEN = re.compile(
+    r'(?P<escapado>\\[^a-zA-Z@()\[\]])'
+    r'|(?P<inicio>\\begin\s*\{(?P<ambiente_inicio>[^{}]*)\})'
+    r'|(?P<fim>\\end\s*\{(?P<ambiente_fim>[^{}]*)\})'
+    r'|(?P<abre>\\[(\[])'
+    r'|(?P<fecha>\\[)\]])'
+    r'|(?P<comando>\\(?P<nome>[a-zA-Z@]+)\*?)'
+    r'|(?P<cifrao>\$\$?)'
+    r'|(?P<chave>[{}])'
+    r'|(?P<especial>[&#_^%])'
+)
+_RE_DEFINICAO = re.compile(
+    r'\\(?:(?:re)?newcommand|providecommand|DeclareMathOperator|DeclareRobustCommand)\*?\s*\{?\\([a-zA-Z@]+)'
+    r'|\\(?:g|e|x)?def\s*\\([a-zA-Z@]+)'
+)
+_RE_MOEDA = re.compile(r'\$\s*\d')
+
+
+@dataclass(frozen=True)
+class ProblemaLatex:
+    """Problema encontrado, com a posição no texto verificado"""
+    regra: str
+    mensagem: str
+    deslocamento: int   # posição (0-based) no texto do campo
+    linha: int
+    coluna: int
+    gravidade: str = GRAVIDADE_ERRO
+    campo: str = ''     # ex: 'enunciado', 'alternativa B', 'documento'
+    questao: str = ''   # código da questão
+
+    @property
+    def erro(self) -> bool:
+        return self.gravidade == GRAVIDADE_ERRO
+
+    def descrever(self) -> str:
+        """Ex: 'Q-2026-0001, alternativa B, linha 2, coluna 5 (posição 40): ...'"""
+        local = [parte for parte in (self.questao, self.campo) if parte]
+        local.append(f"linha {self.linha}, coluna {self.coluna} (posição {self.deslocamento})")
+        return f"{', '.join(local)}: {self.mensagem}"
+
+
+class LatexInvalidoError(RuntimeError):
+    """LaTeX com erros que impediriam a compilação"""
+
+    def __init__(self, problemas: List[ProblemaLatex], origem: str = ''):
+        self.problemas = problemas
+        self.origem = origem
+        cabecalho = f"LaTeX inválido em {origem}" if origem else "LaTeX inválido"
+        super().__init__(f"{cabecalho}:\n{formatar_problemas(problemas)}")
+
+    def __reduce__(self):
+        # Reconstrói a partir dos argumentos (atravessa o ProcessPoolExecutor)
+        return type(self), (self.problemas, self.origem)
+
+
+class _Verificador:
+    """Percorre o texto uma vez mantendo pilhas de chaves, ambientes e fórmula aberta"""
+
+    def __init__(self, texto: str, modo: str, conhecidos: FrozenSet[str]):
+        self.modo = modo
+        self.conhecidos = conhecidos
+        self.problemas: List[Tuple[str, str, int, str]] = []
+        self.chaves: List[int] = []
+        self.ambientes: List[Tuple[str, int]] = []
+        # (delimitador de fechamento, posição da abertura, chaves abertas na entrada)
+        self.formula: Optional[Tuple[str, int, int]] = None
+        # Na marcação, $ só abre fórmula onde o markup_compiler reconhece uma (fora dela é
+        # escapado): abertura -> (posição do fechamento, tamanho do delimitador)
+        self.formulas_marcacao: Dict[int, Tuple[int, int]] = {}
+        self._fechamento = -1
+        if modo == MODO_MARCACAO:
+            texto = self._preparar_marcacao(texto)
+        self.texto = texto
+
+    def _preparar_marcacao(self, texto: str) -> str:
+        """Mascara as imagens e registra as fórmulas $...$ como o markup_compiler as vê"""
+        partes = []
+        pos = 0
+        for m in tokens_em_linha(texto):
+            if m.lastgroup == 'imagem':
+                partes.append(texto[pos:m.start()])
+                partes.append(' ' * (m.end() - m.start()))
+                pos = m.end()
+            elif m.lastgroup == 'matematica' and m.group(0).startswith('$'):
+                delimitador = 2 if m.group(0).startswith('$$') else 1
+                self.formulas_marcacao[m.start()] = (m.end() - delimitador, delimitador)
+        partes.append(texto[pos:])
+        return ''.join(partes)
+
+    def _problema(self, regra: str, mensagem: str, posicao: int, gravidade: str = GRAVIDADE_ERRO) -> None:
+        self.problemas.append((regra, mensagem, posicao, gravidade))
+
+    @property
+    def em_matematica(self) -> bool:
+        return self.formula is not None or any(nome in AMBIENTES_MATEMATICOS for nome, _ in self.ambientes)
+
+    def _em_alinhamento(self) -> bool:
+        return any(nome in AMBIENTES_ALINHAMENTO for nome, _ in self.ambientes)
+
+    def executar(self) -> List[Tuple[str, str, int, str]]:
+        texto = self.texto
+        pos = 0
+        while True:
+            m = _RE_TOKEN.search(texto, pos)
+            if m is None:
+                break
+            pos = self._token(m)
+        self._finalizar()
+        return self.problemas
+
+    def _token(self, m) -> int:
+        texto = self.texto
+        tipo = m.lastgroup
+        inicio = m.start()
+        pos = m.end()
+
+        if tipo == 'escapado':
+            return pos
+        if tipo == 'inicio':
+            nome = m.group('ambiente_inicio').strip()
+            if nome in AMBIENTES_LITERAIS:
+                fim = texto.find(f'\\end{{{nome}}}', pos)
+                if fim == -1:
+                    self._problema(REGRA_AMBIENTE, f"\\begin{{{nome}}} sem \\end{{{nome}}}", inicio)
+                    return len(texto)
+                return fim + len(nome) + 6
+            self.ambientes.append((nome, inicio))
+            return pos
+        if tipo == 'fim':
+            self._fechar_ambiente(m.group('ambiente_fim').strip(), inicio)
+            return pos
+        if tipo == 'abre':
+            fechamento = '\\)' if m.group(0) == '\\(' else '\\]'
+            if self.formula is not None:
+                self._problema(REGRA_MATEMATICA, f"{m.group(0)} dentro de uma fórmula já aberta", inicio)
+            else:
+                self.formula = (fechamento, inicio, len(self.chaves))
+            return pos
+        if tipo == 'fecha':
+            if self.formula is not None and self.formula[0] == m.group(0):
+                self._sair_formula(inicio)
+            else:
+                abertura = '\\(' if m.group(0) == '\\)' else '\\['
+                self._problema(REGRA_MATEMATICA, f"{m.group(0)} sem {abertura} correspondente", inicio)
+            return pos
+        if tipo == 'comando':
+            return self._comando(m)
+        if tipo == 'cifrao':
+            return self._cifrao(m)
+        if tipo == 'chave':
+            if m.group(0) == '{':
+                self.chaves.append(inicio)
+            elif self.formula is not None and len(self.chaves) <= self.formula[2]:
+                self._problema(REGRA_CHAVES, "'}' fecha uma chave aberta fora da fórmula", inicio)
+            elif self.chaves:
+                self.chaves.pop()
+            else:
+                self._problema(REGRA_CHAVES, "'}' sem '{' correspondente", inicio)
+            return pos
+        return self._especial(m.group(0), inicio)
+
+    def _fechar_ambiente(self, nome: str, posicao: int) -> None:
+        nomes = [aberto for aberto, _ in self.ambientes]
+        if nome not in nomes:
+            self._problema(REGRA_AMBIENTE, f"\\end{{{nome}}} sem \\begin{{{nome}}}", posicao)
+            return
+        while self.ambientes:
+            aberto, inicio = self.ambientes.pop()
+            if aberto == nome:
+                return
+            self._problema(
+                REGRA_AMBIENTE, f"\\begin{{{aberto}}} não foi fechado antes de \\end{{{nome}}}", inicio
+            )
+
+    def _comando(self, m) -> int:
+        texto = self.texto
+        nome = m.group('nome')
+        pos = m.end()
+        if nome == 'verb' and pos < len(texto):
+            fim = texto.find(texto[pos], pos + 1)
+            return len(texto) if fim == -1 else fim + 1
+        if self.modo == MODO_MARCACAO and nome not in self.conhecidos:
+            self._problema(REGRA_COMANDO, f"comando desconhecido \\{nome}", m.start(), GRAVIDADE_AVISO)
+        if nome in COMANDOS_ARGUMENTO_LITERAL:
+            return self._pular_argumentos(pos)
+        return pos
+
+    def _pular_argumentos(self, pos: int) -> int:
+        """Pula [opções] e o primeiro {argumento} (nomes de arquivo, rótulos, URLs)"""
+        texto = self.texto
+        tamanho = len(texto)
+        while pos < tamanho and texto[pos] in ' \t':
+            pos += 1
+        while pos < tamanho and texto[pos] == '[':
+            fim = texto.find(']', pos)
+            if fim == -1:
+                return pos
+            pos = fim + 1
+        if pos >= tamanho or texto[pos] != '{':
+            return pos
+        profundidade = 0
+        for i in range(pos, tamanho):
+            if texto[i] == '{':
+                profundidade += 1
+            elif texto[i] == '}':
+                profundidade -= 1
+                if profundidade == 0:
+                    return i + 1
+        return pos  # sem fechamento: a chave é reportada pela verificação normal
+
+    def _cifrao(self, m) -> int:
+        inicio = m.start()
+        token = m.group(0)
+        if self.modo == MODO_MARCACAO:
+            if self.formula is None and inicio in self.formulas_marcacao:
+                self._fechamento, tamanho = self.formulas_marcacao[inicio]
+                self.formula = ('$' * tamanho, inicio, len(self.chaves))
+                return inicio + tamanho
+            if self.formula is not None and inicio == self._fechamento:
+                tamanho = len(self.formula[0])
+                self._sair_formula(inicio)
+                return inicio + tamanho
+            if self.formula is None and not _RE_MOEDA.match(self.texto, inicio):
+                self._problema(
+                    REGRA_MATEMATICA, "'$' sem fechamento: será impresso como cifrão", inicio, GRAVIDADE_AVISO
+                )
+            return inicio + 1
+
+        if self.formula is None:
+            self.formula = (token, inicio, len(self.chaves))
+        elif self.formula[0] == token:
+            self._sair_formula(inicio)
+        else:
+            self._problema(REGRA_MATEMATICA, f"'{token}' dentro de fórmula aberta com '{self.formula[0]}'", inicio)
+        return m.end()
+
+    def _sair_formula(self, posicao: int) -> None:
+        _, abertura, chaves = self.formula
+        for chave in self.chaves[chaves:]:
+            self._problema(REGRA_CHAVES, "'{' aberta na fórmula não foi fechada antes do seu fim", chave)
+        del self.chaves[chaves:]
+        self.formula = None
+
+    def _especial(self, caractere: str, posicao: int) -> int:
+        marcacao = self.modo == MODO_MARCACAO
+        matematica = self.em_matematica
+        if caractere == '%':
+            if not marcacao:
+                fim = self.texto.find('\n', posicao)
+                return len(self.texto) if fim == -1 else fim + 1
+            if matematica:
+                self._problema(REGRA_CARACTERE, "'%' dentro da fórmula comenta o resto da linha (use \\%)", posicao)
+        elif caractere == '#':
+            if marcacao and matematica:
+                self._problema(REGRA_CARACTERE, "'#' dentro da fórmula (use \\#)", posicao)
+        elif caractere == '&':
+            # Na marcação, & fora de fórmula/tabela é escapado pelo compilador
+            if not self._em_alinhamento() and (matematica or not marcacao):
+                self._problema(REGRA_ALINHAMENTO, "'&' fora de tabela ou alinhamento (use \\&)", posicao)
+        elif not matematica:
+            self._problema(REGRA_FORA_MATEMATICA, f"'{caractere}' fora do modo matemático (use ${caractere}$ ou \\{caractere})", posicao)
+        return posicao + 1
+
+    def _finalizar(self) -> None:
+        if self.formula is not None:
+            abertura = {'\\)': '\\(', '\\]': '\\['}.get(self.formula[0], self.formula[0])
+            self._problema(REGRA_MATEMATICA, f"fórmula aberta com '{abertura}' não foi fechada", self.formula[1])
+        for nome, inicio in self.ambientes:
+            self._problema(REGRA_AMBIENTE, f"\\begin{{{nome}}} sem \\end{{{nome}}}", inicio)
+        for inicio in self.chaves:
+            self._problema(REGRA_CHAVES, "'{' sem '}' correspondente", inicio)
+
+
+def _posicao(texto: str, deslocamento: int) -> Tuple[int, int]:
+    linha = texto.count('\n', 0, deslocamento) + 1
+    coluna = deslocamento - (texto.rfind('\n', 0, deslocamento) + 1) + 1
+    return linha, coluna
+
+
+@lru_cache(maxsize=4)
+def comandos_dos_templates(diretorio: str = DIRETORIO_PADRAO) -> FrozenSet[str]:
+    """Comandos definidos (\\newcommand, \\def...) nos templates, aceitos na marcação"""
+    comandos = set()
+    for arquivo in Path(diretorio).glob('*.tex'):
+        try:
+            conteudo = arquivo.read_text(encoding='utf-8', errors='replace')
+        except OSError:
+            continue
+        for m in _RE_DEFINICAO.finditer(conteudo):
+            comandos.add(m.group(1) or m.group(2))
+    return frozenset(comandos)
+
+
+def _comandos_conhecidos() -> FrozenSet[str]:
+    return COMANDOS_CONHECIDOS | LETRAS_GREGAS | comandos_dos_templates()
+
+
+def analisar_latex(texto: str, modo: str = MODO_MARCACAO) -> Tuple[ProblemaLatex, ...]:
+    """
+    Verifica um texto sem usar o cache.
+
+    Args:
+        texto: Marcação de um campo (MODO_MARCACAO) ou LaTeX gerado (MODO_LATEX)
+        modo: MODO_MARCACAO ou MODO_LATEX
+
+    Returns:
+        Problemas na ordem em que aparecem no texto
+    """
+    texto = texto or ''
+    conhecidos = _comandos_conhecidos() if modo == MODO_MARCACAO else frozenset()
+    encontrados = _Verificador(texto, modo, conhecidos).executar()
+    return tuple(
+        ProblemaLatex(regra, mensagem, posicao, *_posicao(texto, posicao), gravidade=gravidade)
+        for regra, mensagem, posicao, gravidade in sorted(encontrados, key=lambda p: p[2])
+    )
+
+
+class CacheVerificacao:
+    """
+    LRU limitado de resultados da verificação, indexado pelo hash do conteúdo.
+    """
+
+    def __init__(self, capacidade: int = 4096):
+        self._capacidade = capacidade
+        self._itens: 'OrderedDict[bytes, Tuple[ProblemaLatex, ...]]' = OrderedDict()
+        self._lock = Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(texto: str, modo: str) -> bytes:
+        return hashlib.blake2b(f"{modo}\0{texto}".encode('utf-8'), digest_size=16).digest()
+
+    def obter(self, texto: str, modo: str = MODO_MARCACAO) -> Tuple[ProblemaLatex, ...]:
+        """
+        Retorna os problemas do texto, verificando-o apenas se não estiver em cache.
+
+        Args:
+            texto: Texto a verificar
+            modo: MODO_MARCACAO ou MODO_LATEX
+
+        Returns:
+            Problemas (sem campo/questão preenchidos)
+        """
+        texto = texto or ''
+        chave = self.chave(texto, modo)
+        with self._lock:
+            problemas = self._itens.get(chave)
+            if problemas is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return problemas
+            self.falhas += 1
+
+        problemas = analisar_latex(texto, modo)
+        with self._lock:
+            self._itens[chave] = problemas
+            while len(self._itens) > self._capacidade:
+                self._itens.popitem(last=False)
+        return problemas
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+        comandos_dos_templates.cache_clear()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+
+_cache_verificacao: Optional[CacheVerificacao] = None
+
+
+def get_cache_verificacao() -> CacheVerificacao:
+    """Retorna o cache de verificação compartilhado"""
+    global _cache_verificacao
+    if _cache_verificacao is None:
+        _cache_verificacao = CacheVerificacao()
+    return _cache_verificacao
+
+
+def verificacao_habilitada() -> bool:
+    """False com LATEX_VERIFICAR=0"""
+    return os.getenv('LATEX_VERIFICAR', '1') != '0'
+
+
+def verificar_campos(campos: Iterable[Tuple[str, str]], questao: str = '') -> List[ProblemaLatex]:
+    """
+    Verifica os campos com marcação de uma questão.
+
+    Args:
+        campos: Pares (nome do campo, texto), ex: ('enunciado', ...), ('alternativa A', ...)
+        questao: Código da questão (para as mensagens)
+
+    Returns:
+        Problemas de todos os campos, com campo e questão preenchidos
+    """
+    cache = get_cache_verificacao()
+    return [
+        replace(problema, campo=campo, questao=questao)
+        for campo, texto in campos
+        for problema in cache.obter(texto, MODO_MARCACAO)
+    ]
+
+
+def verificar_documento(latex: str, origem: str = '') -> List[ProblemaLatex]:
+    """
+    Verifica a estrutura de um documento LaTeX gerado.
+
+    Args:
+        latex: Documento completo
+        origem: Nome do arquivo (para as mensagens)
+
+    Returns:
+        Problemas encontrados
+    """
+    return [
+        replace(problema, campo=origem or 'documento')
+        for problema in get_cache_verificacao().obter(latex, MODO_LATEX)
+    ]
+
+
+def erros(problemas: Iterable[ProblemaLatex]) -> List[ProblemaLatex]:
+    return [problema for problema in problemas if problema.erro]
+
+
+def exigir_sem_erros(problemas: List[ProblemaLatex], origem: str = '') -> None:
+    """
+    Registra os avisos e levanta LatexInvalidoError se houver erros.
+
+    Raises:
+        LatexInvalidoError: Se algum problema tiver gravidade de erro
+    """
+    for problema in problemas:
+        if not problema.erro:
+            logger.warning(f"Aviso de LaTeX: {problema.descrever()}")
+    encontrados = erros(problemas)
+    if encontrados:
+        raise LatexInvalidoError(encontrados, origem)
+
+
+def formatar_problemas(problemas: List[ProblemaLatex], limite: int = 20) -> str:
+    """Lista legível dos problemas (no máximo `limite` linhas)"""
+    linhas = [
+        f"- [{problema.gravidade}] {problema.descrever()}" for problema in problemas[:limite]
+    ]
+    if len(problemas) > limite:
+        linhas.append(f"... e mais {len(problemas) - limite} problema(s)")
+    return "\n".join(linhas)
@@ -0,0 +1,533 @@
+"""
+Linha de comando sem interface gráfica: exportação em lote, importação e manutenção.
+
+Uso:
+    python -m src.cli exportar LST-2026-0001 LST-2026-0002 --template default.tex --saida pdfs/
+    python -m src.cli exportar --todas --template default.tex --saida pdfs/ --paralelo 4
+    python -m src.cli exportar LST-2026-0001 --template default.tex --saida pdfs/ --motor-pdf html
+    python -m src.cli importar questoes.json --lista LST-2026-0001
+    python -m src.cli estatisticas --json
+    python -m src.cli reindexar
+    python -m src.cli duplicatas --limiar 0.8
+    python -m src.cli vacuum
+    python -m src.cli benchmark LST-2026-0001 --template default.tex --repeticoes 5
+    python -m src.cli benchmark --inicializacao
+    python -m src.cli metricas --ultimas 20
+
+Importa apenas as camadas ORM, de serviços e de exportação (o PyQt6 só com
+--motor-pdf html, que cria uma aplicação Qt offscreen). Os imports pesados
+ficam dentro de cada subcomando para que a inicialização e o --help sejam
+rápidos; `benchmark --inicializacao` verifica esse orçamento.
+"""
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from src.application.dtos.export_dto import ExportOptionsDTO
+
+logger = logging.getLogger(__name__)
+
+# Orçamento de inicialização do CLI (ms), configurável por CLI_ORCAMENTO_INICIALIZACAO_MS
+ORCAMENTO_INICIALIZACAO_MS = 1500
+
+# Campos do ExportOptionsDTO preenchidos pelo próprio comando exportar
+_CAMPOS_INTERNOS = {'id_lista', 'output_dir', 'gerar_versoes_randomizadas', 'quantidade_versoes', 'sufixo_versao'}
+
+
+def _configurar_logging(verbose: bool) -> None:
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+
+def _imprimir(dados: Any, como_json: bool) -> None:
+    if como_json:
+        print(json.dumps(dados, ensure_ascii=False, indent=2, default=str))
+        return
+    if isinstance(dados, dict):
+        for chave, valor in dados.items():
+            if isinstance(valor, dict):
+                print(f"{chave}:")
+                for subchave, subvalor in valor.items():
+                    print(f"  {subchave}: {subvalor}")
+            else:
+                print(f"{chave}: {valor}")
+    else:
+        print(dados)
+
+
+# =============================================================================
+# exportar
+# =============================================================================
+
+def _adicionar_opcoes_exportacao(parser: argparse.ArgumentParser) -> None:
+    """Gera uma opção de linha de comando para cada campo do ExportOptionsDTO."""
+    from src.application.dtos.export_dto import ExportOptionsDTO
+
+    grupo = parser.add_argument_group('opções de exportação (ExportOptionsDTO)')
+    for campo in dataclasses.fields(ExportOptionsDTO):
+        if campo.name in _CAMPOS_INTERNOS:
+            continue
+        opcao = '--' + campo.name.replace('_', '-')
+        padrao = campo.default if campo.default is not dataclasses.MISSING else None
+        if campo.type in (bool, 'bool'):
+            grupo.add_argument(opcao, dest=campo.name, action=argparse.BooleanOptionalAction, default=padrao)
+        elif campo.type in (int, 'int'):
+            grupo.add_argument(opcao, dest=campo.name, type=int, default=padrao)
+        elif campo.type in (float, 'float'):
+            grupo.add_argument(opcao, dest=campo.name, type=float, default=padrao)
+        elif campo.name == 'questoes_config':
+            grupo.add_argument(
+                opcao, dest=campo.name, metavar='CODIGO=ESTILO', nargs='+',
+                help='Configuração por questão (wallon_av2): normal, 5linhas ou espaco_borda'
+            )
+        elif campo.name == 'semente_versoes':
+            grupo.add_argument(opcao, dest=campo.name, type=int, default=padrao,
+                               help='Semente das versões (padrão: derivada do código da lista)')
+        elif campo.name == 'questoes_fixas':
+            grupo.add_argument(opcao, dest=campo.name, metavar='CODIGO', nargs='+',
+                               help='Questões que mantêm a posição em todas as versões')
+        elif campo.name == 'motor_pdf':
+            grupo.add_argument(opcao, dest=campo.name, choices=('latex', 'html'), default=padrao,
+                               help='html: rascunho rápido sem LaTeX (Qt WebEngine, sem interface gráfica)')
+        elif campo.name == 'template_latex':
+            grupo.add_argument('--template', opcao, dest=campo.name, required=True)
+        else:
+            grupo.add_argument(opcao, dest=campo.name, default=padrao)
+
+
+def _opcoes_exportacao(args: argparse.Namespace, codigo_lista: str) -> "ExportOptionsDTO":
+    from src.application.dtos.export_dto import ExportOptionsDTO
+
+    valores = {
+        campo.name: getattr(args, campo.name)
+        for campo in dataclasses.fields(ExportOptionsDTO)
+        if campo.name not in _CAMPOS_INTERNOS
+    }
+    if valores.get('questoes_config'):
+        valores['questoes_config'] = dict(item.split('=', 1) for item in valores['questoes_config'])
+    return ExportOptionsDTO(id_lista=codigo_lista, output_dir=str(args.saida), **valores)
+
+
+def _exportar_uma(args: argparse.Namespace, codigo_lista: str) -> Dict[str, Any]:
+    """Exporta uma lista em sessão própria (executado em paralelo)."""
+    from src.database import session_manager
+    from src.controllers.export_controller import ExportController
+
+    inicio = time.perf_counter()
+    resultado = {'lista': codigo_lista, 'arquivos': [], 'erros': []}
+    try:
+        opcoes = _opcoes_exportacao(args, codigo_lista)
+        with session_manager.session_scope() as session:
+            controller = ExportController(session)
+            if args.versoes:
+                for versao in controller.exportar_versoes(opcoes, args.versoes, max_workers=args.workers):
+                    if versao.sucesso:
+                        resultado['arquivos'].append(str(versao.caminho))
+                    else:
+                        resultado['erros'].append(f"{versao.sufixo}: {versao.erro}")
+            else:
+                resultado['arquivos'].append(str(controller.exportar_lista(opcoes)))
+    except Exception as e:
+        logger.debug(f"Erro ao exportar {codigo_lista}", exc_info=True)
+        resultado['erros'].append(str(e))
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def comando_exportar(args: argparse.Namespace) -> int:
+    from concurrent.futures import ThreadPoolExecutor
+
+    codigos = list(args.listas)
+    if args.todas:
+        from src.database import session_manager
+        from src.services.lista_service import ListaService
+        with session_manager.session_scope() as session:
+            codigos += [lista['codigo'] for lista in ListaService(session).listar_listas(args.tipo_lista)]
+    codigos = list(dict.fromkeys(codigos))
+    if not codigos:
+        print("Nenhuma lista informada (use códigos ou --todas).", file=sys.stderr)
+        return 2
+
+    Path(args.saida).mkdir(parents=True, exist_ok=True)
+    # Cada exportação roda o pdflatex como subprocesso, então threads paralelizam
+    nucleos = os.cpu_count() or 1
+    if args.paralelo is None:
+        # Com --versoes o paralelismo padrão fica nas versões de cada lista
+        args.paralelo = 1 if args.versoes else nucleos
+    paralelo = max(1, min(args.paralelo, len(codigos)))
+    if args.versoes and args.workers is None and paralelo > 1:
+        # Divide os núcleos entre listas e versões (sem isso seriam até núcleos² pdflatex)
+        args.workers = max(1, nucleos // paralelo)
+    if args.motor_pdf == 'html':
+        # O Qt WebEngine imprime na thread da aplicação Qt (offscreen): uma lista por vez, nesta thread
+        from src.application.services.impressao_html import get_impressora_html
+        get_impressora_html()
+    with ThreadPoolExecutor(max_workers=paralelo) as executor:
+        mapear = map if args.motor_pdf == 'html' else executor.map
+        resultados = []
+        for resultado in mapear(lambda codigo: _exportar_uma(args, codigo), codigos):
+            resultados.append(resultado)
+            if not args.json:
+                situacao = 'ok' if resultado['arquivos'] and not resultado['erros'] else 'ERRO'
+                print(f"[{situacao}] {resultado['lista']} ({resultado['segundos']:.1f}s)")
+                for arquivo in resultado['arquivos']:
+                    print(f"    {arquivo}")
+                for erro in resultado['erros']:
+                    print(f"    erro: {erro}")
+
+    if args.json:
+        _imprimir(resultados, True)
+    return 0 if all(r['arquivos'] and not r['erros'] for r in resultados) else 1
+
+
+# =============================================================================
+# importar
+# =============================================================================
+
+_CAMPOS_QUESTAO = (
+    'tipo', 'enunciado', 'titulo', 'fonte', 'ano', 'dificuldade', 'observacoes', 'tags',
+    'niveis_escolares', 'alternativas', 'resposta_objetiva', 'resposta_discursiva'
+)
+
+
+def comando_importar(args: argparse.Namespace) -> int:
+    """
+    Importa questões de um arquivo JSON: uma lista de objetos com os parâmetros
+    de QuestaoService.criar_questao (tipo, enunciado, alternativas, tags...).
+    O arquivo inteiro é importado em uma transação.
+    """
+    from src.database import session_manager
+    from src.services.questao_service import QuestaoService
+    from src.services.lista_service import ListaService
+
+    dados = json.loads(Path(args.arquivo).read_text(encoding='utf-8'))
+    if isinstance(dados, dict):
+        dados = dados.get('questoes', [dados])
+
+    criadas: List[Dict[str, Any]] = []
+    session = session_manager.create_session()
+    try:
+        questao_service = QuestaoService(session)
+        lista_service = ListaService(session)
+        for posicao, item in enumerate(dados, start=1):
+            desconhecidos = set(item) - set(_CAMPOS_QUESTAO)
+            if desconhecidos:
+                raise ValueError(f"Questão {posicao}: campos desconhecidos {sorted(desconhecidos)}")
+            questao = questao_service.criar_questao(**item)
+            if args.lista:
+                lista_service.adicionar_questao(args.lista, questao['codigo'])
+            criadas.append({
+                'codigo': questao['codigo'],
+                'titulo': questao['titulo'],
+                'possiveis_duplicatas': [d.get('codigo') for d in questao.get('possiveis_duplicatas') or []],
+            })
+        if args.simular:
+            session.rollback()
+        else:
+            session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Importação cancelada: {e}", file=sys.stderr)
+        return 1
+    finally:
+        session.close()
+
+    if args.json:
+        _imprimir(criadas, True)
+    else:
+        acao = "seriam importadas" if args.simular else "importadas"
+        print(f"{len(criadas)} questões {acao}")
+        for questao in criadas:
+            aviso = f" (possível duplicata de {', '.join(questao['possiveis_duplicatas'])})" \
+                if questao['possiveis_duplicatas'] else ""
+            print(f"  {questao['codigo']} {questao['titulo']}{aviso}")
+    return 0
+
+
+# =============================================================================
+# estatisticas / reindexar / duplicatas / vacuum
+# =============================================================================
+
+def comando_estatisticas(args: argparse.Namespace) -> int:
+    from src.database import session_manager
+    from src.services.questao_service import QuestaoService
+    from src.services.lista_service import ListaService
+
+    with session_manager.session_scope() as session:
+        estatisticas = QuestaoService(session).obter_estatisticas()
+        listas = ListaService(session).listar_listas()
+    estatisticas['listas'] = len(listas)
+    estatisticas['banco_bytes'] = os.path.getsize(session_manager.database_path) \
+        if os.path.exists(session_manager.database_path) else 0
+    _imprimir(estatisticas, args.json)
+    return 0
+
+
+def comando_reindexar(args: argparse.Namespace) -> int:
+    """Reconstrói os índices derivados do banco e os índices do SQLite."""
+    from sqlalchemy import text
+    from src.database import session_manager
+    from src.repositories import QuestaoUsoRepository
+    from src.services.autocomplete_index import get_autocomplete_index
+    from src.services.duplicate_detector import get_duplicate_detector
+    from src.services.facet_index import get_facet_index
+
+    etapas = {}
+    inicio = time.perf_counter()
+    with session_manager.session_scope() as session:
+        repositorio = QuestaoUsoRepository(session)
+        repositorio.garantir_indice()
+        etapas['questao_uso'] = repositorio.backfill()
+        session.execute(text('REINDEX'))
+        session.execute(text('ANALYZE'))
+    etapas['sqlite'] = 'REINDEX, ANALYZE'
+
+    get_autocomplete_index().construir()
+    etapas['autocomplete'] = 'ok'
+    indice_facetas = get_facet_index()
+    if indice_facetas is not None:
+        indice_facetas.construir()
+        etapas['facetas'] = len(indice_facetas)
+    etapas['duplicatas'] = get_duplicate_detector().sincronizar()
+
+    if args.limpar_caches:
+        from src.application.services.cache_fragmentos import get_cache_fragmentos
+        get_cache_fragmentos().limpar()
+        etapas['cache_fragmentos'] = 'limpo'
+        from src.application.services.derivados_imagem import get_cache_derivados
+        get_cache_derivados().limpar()
+        etapas['derivados_imagem'] = 'limpo'
+        from src.application.services.cache_artefatos import get_cache_artefatos
+        get_cache_artefatos().limpar()
+        etapas['cache_artefatos'] = 'limpo'
+        from src.application.services.previa_incremental import get_cache_trechos
+        get_cache_trechos().limpar()
+        etapas['cache_trechos'] = 'limpo'
+
+    etapas['segundos'] = round(time.perf_counter() - inicio, 3)
+    _imprimir(etapas, args.json)
+    return 0
+
+
+def comando_duplicatas(args: argparse.Namespace) -> int:
+    """Relatório de clusters de prováveis questões duplicadas (MinHash/LSH)."""
+    from src.database import session_manager
+    from src.services.questao_service import QuestaoService
+
+    with session_manager.session_scope() as session:
+        clusters = QuestaoService(session).relatorio_duplicatas(args.limiar)
+    if args.json:
+        _imprimir(clusters, True)
+        return 0
+    if not clusters:
+        print(f"Nenhum cluster com similaridade >= {args.limiar}")
+        return 0
+    for numero, cluster in enumerate(clusters, 1):
+        print(f"Cluster {numero} ({cluster['total']} questões)")
+        for questao in cluster['questoes']:
+            print(f"  {questao['codigo']}  {questao['similaridade']:.3f}  {questao['titulo'] or ''}")
+    return 0
+
+
+def comando_metricas(args: argparse.Namespace) -> int:
+    """Relatório por etapa das últimas exportações (interface e CLI)."""
+    from src.application.services.metricas_exportacao import (
+        formatar_relatorio, get_historico_exportacoes, resumo_etapas
+    )
+
+    relatorios = get_historico_exportacoes().ultimas(args.ultimas)
+    if args.json:
+        _imprimir({
+            'exportacoes': [relatorio.para_dict() for relatorio in relatorios],
+            'etapas': resumo_etapas(relatorios),
+        }, True)
+    else:
+        print(formatar_relatorio(relatorios))
+    return 0
+
+
+def comando_vacuum(args: argparse.Namespace) -> int:
+    """Compacta o banco SQLite (e o cache de fragmentos)."""
+    import sqlite3
+    from src.database import session_manager
+
+    caminhos = [session_manager.database_path]
+    cache = Path(os.getenv('CACHE_FRAGMENTOS_PATH', 'database/cache_fragmentos.db'))
+    if cache.exists():
+        caminhos.append(str(cache))
+
+    resultado = {}
+    session_manager.engine.dispose()  # VACUUM exige que não haja outras conexões abertas
+    for caminho in caminhos:
+        antes = os.path.getsize(caminho)
+        conexao = sqlite3.connect(caminho)
+        try:
+            conexao.execute('VACUUM')
+        finally:
+            conexao.close()
+        resultado[caminho] = f"{antes} -> {os.path.getsize(caminho)} bytes"
+    _imprimir(resultado, args.json)
+    return 0
+
+
+# =============================================================================
+# benchmark
+# =============================================================================
+
+def _medir_inicializacao(repeticoes: int) -> Dict[str, Any]:
+    """Mede o tempo de `python -m src.cli --help` em processos novos."""
+    import subprocess
+
+    codigo = (
+        "import sys, time; inicio = time.perf_counter(); import src.cli; "
+        "src.cli.criar_parser(); "
+        "print((time.perf_counter() - inicio) * 1000, 'PyQt6' in sys.modules)"
+    )
+    raiz = Path(__file__).resolve().parent.parent
+    tempos = []
+    carregou_qt = False
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, '-c', codigo], cwd=raiz, capture_output=True, text=True, check=True
+        ).stdout.split()
+        tempos.append(float(saida[0]))
+        carregou_qt = carregou_qt or saida[1] == 'True'
+    configurado = os.getenv('CLI_ORCAMENTO_INICIALIZACAO_MS', '')
+    orcamento = float(configurado) if configurado.isdigit() else ORCAMENTO_INICIALIZACAO_MS
+    return {
+        'mediana_ms': round(statistics.median(tempos), 1),
+        'max_ms': round(max(tempos), 1),
+        'orcamento_ms': orcamento,
+        'carregou_pyqt6': carregou_qt,
+        'dentro_do_orcamento': statistics.median(tempos) <= orcamento and not carregou_qt,
+    }
+
+
+def comando_benchmark(args: argparse.Namespace) -> int:
+    if args.inicializacao:
+        resultado = _medir_inicializacao(args.repeticoes)
+        _imprimir(resultado, args.json)
+        return 0 if resultado['dentro_do_orcamento'] else 1
+
+    if not args.lista or not args.template:
+        print("Informe a lista e --template (ou use --inicializacao).", file=sys.stderr)
+        return 2
+
+    import tempfile
+    from src.application.dtos.export_dto import ExportOptionsDTO
+    from src.database import session_manager
+    from src.controllers.export_controller import ExportController
+
+    tempos = []
+    with tempfile.TemporaryDirectory() as saida, session_manager.session_scope() as session:
+        controller = ExportController(session)
+        opcoes = ExportOptionsDTO(
+            id_lista=args.lista, template_latex=args.template, output_dir=saida,
+            tipo_exportacao='direta' if args.compilar else 'manual'
+        )
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            controller.exportar_lista(opcoes)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+
+    _imprimir({
+        'lista': args.lista,
+        'etapa': 'geração + compilação' if args.compilar else 'geração do LaTeX',
+        'repeticoes': len(tempos),
+        'primeira_ms': round(tempos[0], 1),
+        'mediana_ms': round(statistics.median(tempos), 1),
+        'min_ms': round(min(tempos), 1),
+        'max_ms': round(max(tempos), 1),
+    }, args.json)
+    return 0
+
+
+# =============================================================================
+# parser
+# =============================================================================
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m src.cli',
+        description='Banco de questões sem interface gráfica'
+    )
+    parser.add_argument('-v', '--verbose', action='store_true', help='Exibe o log detalhado')
+    parser.add_argument('--json', action='store_true', help='Saída em JSON')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    exportar = subparsers.add_parser('exportar', help='Exporta uma ou várias listas')
+    exportar.add_argument('listas', nargs='*', metavar='LISTA', help='Códigos das listas')
+    exportar.add_argument('--todas', action='store_true', help='Exporta todas as listas')
+    exportar.add_argument('--tipo-lista', help='Com --todas: apenas listas deste tipo (PROVA, LISTA, SIMULADO)')
+    exportar.add_argument('--saida', required=True, type=Path, help='Diretório de saída')
+    exportar.add_argument('--versoes', type=int, default=0,
+                          help='Gera N versões randomizadas (TIPO A, B, ... até 40) de cada lista')
+    exportar.add_argument('--paralelo', type=int,
+                          help='Listas exportadas simultaneamente (padrão: núcleos; 1 com --versoes)')
+    exportar.add_argument('--workers', type=int,
+                          help='Processos por lista ao compilar versões (padrão: núcleos / --paralelo)')
+    _adicionar_opcoes_exportacao(exportar)
+    exportar.set_defaults(funcao=comando_exportar)
+
+    importar = subparsers.add_parser('importar', help='Importa questões de um arquivo JSON')
+    importar.add_argument('arquivo', type=Path)
+    importar.add_argument('--lista', help='Adiciona as questões importadas a esta lista')
+    importar.add_argument('--simular', action='store_true', help='Valida sem gravar no banco')
+    importar.set_defaults(funcao=comando_importar)
+
+    estatisticas = subparsers.add_parser('estatisticas', help='Estatísticas do banco')
+    estatisticas.set_defaults(funcao=comando_estatisticas)
+
+    reindexar = subparsers.add_parser('reindexar', help='Reconstrói índices do banco e em memória')
+    reindexar.add_argument('--limpar-caches', action='store_true', help='Também limpa os caches de fragmentos, derivados de imagem, artefatos e trechos da prévia')
+    reindexar.set_defaults(funcao=comando_reindexar)
+
+    duplicatas = subparsers.add_parser('duplicatas', help='Agrupa prováveis questões duplicadas')
+    duplicatas.add_argument('--limiar', type=float, default=0.7,
+                            help='Similaridade mínima entre 0 e 1 (padrão: 0.7)')
+    duplicatas.set_defaults(funcao=comando_duplicatas)
+
+    metricas = subparsers.add_parser('metricas', help='Tempos por etapa das últimas exportações')
+    metricas.add_argument('--ultimas', type=int, default=20, help='Quantidade de exportações (padrão: 20)')
+    metricas.set_defaults(funcao=comando_metricas)
+
+    vacuum = subparsers.add_parser('vacuum', help='Compacta o banco SQLite')
+    vacuum.set_defaults(funcao=comando_vacuum)
+
+    benchmark = subparsers.add_parser('benchmark', help='Mede tempos de exportação ou de inicialização')
+    benchmark.add_argument('lista', nargs='?')
+    benchmark.add_argument('--template')
+    benchmark.add_argument('--repeticoes', type=int, default=5)
+    benchmark.add_argument('--compilar', action='store_true', help='Inclui a compilação com pdflatex')
+    benchmark.add_argument('--inicializacao', action='store_true',
+                           help='Verifica o orçamento de inicialização do CLI (sem PyQt6)')
+    benchmark.set_defaults(funcao=comando_benchmark)
+
+    # Opções globais também aceitas após o subcomando
+    for subparser in subparsers.choices.values():
+        subparser.add_argument('--json', action='store_true', default=argparse.SUPPRESS, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = criar_parser().parse_args(argv)
+    _configurar_logging(args.verbose)
+    try:
+        return args.funcao(args)
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
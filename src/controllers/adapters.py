@@ -513,6 +513,7 @@ def inativar_disciplina(uuid_disc: str):
 def criar_fonte_questao(dados: dict):
     """Cria uma nova fonte de questão"""
     from src.database import session_manager
+    from src.services.autocomplete_index import get_autocomplete_index
     from src.repositories.fonte_questao_repository import FonteQuestaoRepository
     import uuid as uuid_mod
     from datetime import datetime
@@ -529,6 +530,7 @@ def criar_fonte_questao(dados: dict):
         )
         session.commit()
         if f:
+            get_autocomplete_index().registrar_fonte(f.uuid, f.sigla, f.nome_completo)
             return {'uuid': f.uuid, 'sigla': f.sigla, 'nome_completo': f.nome_completo, 'tipo_instituicao': f.tipo_instituicao}
         return None
     except Exception:
@@ -541,6 +543,7 @@ def criar_fonte_questao(dados: dict):
 def atualizar_fonte_questao(uuid_fonte: str, dados: dict):
     """Atualiza uma fonte de questão"""
     from src.database import session_manager
+    from src.services.autocomplete_index import get_autocomplete_index
     from src.repositories.fonte_questao_repository import FonteQuestaoRepository
 
     session = session_manager.create_session()
@@ -556,6 +559,7 @@ def atualizar_fonte_questao(uuid_fonte: str, dados: dict):
         f = repo.atualizar(uuid_fonte, **kwargs)
         session.commit()
         if f:
+            get_autocomplete_index().registrar_fonte(f.uuid, f.sigla, f.nome_completo)
             return {'uuid': f.uuid, 'sigla': f.sigla, 'nome_completo': f.nome_completo, 'tipo_instituicao': f.tipo_instituicao}
         return None
     except Exception:
@@ -568,6 +572,7 @@ def atualizar_fonte_questao(uuid_fonte: str, dados: dict):
 def inativar_fonte_questao(uuid_fonte: str):
     """Inativa uma fonte de questão (soft delete)"""
     from src.database import session_manager
+    from src.services.autocomplete_index import get_autocomplete_index
     from src.repositories.fonte_questao_repository import FonteQuestaoRepository
 
     session = session_manager.create_session()
@@ -575,6 +580,8 @@ def inativar_fonte_questao(uuid_fonte: str):
         repo = FonteQuestaoRepository(session)
         result = repo.desativar(uuid_fonte)
         session.commit()
+        if result:
+            get_autocomplete_index().remover_fonte(uuid_fonte)
         return result
     except Exception:
         session.rollback()
@@ -1,697 +1,660 @@
 """
 Controller para gerenciar a exportação de listas e outros dados.
 """
+import csv
 import logging
 import os
 import re
 import subprocess
 import sys
+import time
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
 
 # Corrigindo a importação para o DTO
 from src.application.dtos.export_dto import ExportOptionsDTO
 # Corrigindo a importação para o Service
-from src.application.services.export_service import ExportService, escape_latex
+from src.application.services.export_service import CompilacaoLatexError, ExportService, escape_latex
+from src.application.services.bissecao_latex import (
+    CompilacaoDiagnosticadaError, DiagnosticoCompilacao, diagnosticar_compilacao, diagnostico_habilitado
+)
+from src.application.services.cache_artefatos import (
+    cache_artefatos_habilitado, chave_artefato, chave_snapshot, get_cache_artefatos
+)
+from src.application.services.cache_fragmentos import chave_fragmento, get_cache_fragmentos
+from src.application.services.exportacao_paralela import ExportacaoParalela, ResultadoVersao, opcoes_da_versao
+from src.application.services.gerador_versoes import (
+    LETRAS, MAX_VERSOES, NUMPY_AVAILABLE, GeradorVersoes, PlanoVersoes, QuestaoPlano,
+    RestricoesVersoes, rotulo_versao, semente_da_lista
+)
+from src.application.services.contexto_exportacao import (
+    ContextoExportacao, ExportacaoCancelada, ESTADO_BUSCANDO, ESTADO_COMPILANDO, ESTADO_TRANSFORMANDO
+)
+from src.application.services.documento_html import MOTOR_HTML, QuestaoHtml, montar_documento_html
+from src.application.services.markup_compiler import compilar_latex
+from src.application.services.previa_incremental import (
+    MARCADOR_QUESTOES, TrechoInvalidoError, analisar_documento, costurar, get_cache_trechos, montar_trecho,
+    previa_incremental_habilitada
+)
+from src.application.services.metricas_exportacao import (
+    ETAPA_FRAGMENTOS, ETAPA_GRAVACAO, ETAPA_IMPRESSAO_HTML, ETAPA_SNAPSHOT, ETAPA_TEMPLATE, ETAPA_TRANSFORMACAO,
+    ETAPA_VERIFICACAO, exportacao_medida, medicao_atual, span
+)
+from src.application.services.verificador_latex import (
+    ProblemaLatex, exigir_sem_erros, verificacao_habilitada, verificar_campos
+)
+from src.application.services.template_latex import (
+    TemplateCompilado, SECAO_GABARITO, get_cache_templates
+)
 from src.services import services # Usando a fachada de serviços para buscar dados
+from src.services.export_snapshot import ExportSnapshot, carregar_snapshot
+from src.services.lista_service import ListaService
+from src.services.questao_service import QuestaoService
 
 logger = logging.getLogger(__name__)
 
+# Alternativas que se referem às demais pela posição (a questão mantém a ordem original)
+_RE_ALTERNATIVA_POSICIONAL = re.compile(
+    r'\b(todas|nenhuma|ambas)\s+(as\s+|das\s+|dos\s+)?(anteriores|alternativas|acima|itens)',
+    re.IGNORECASE
+)
+
+# Item de preenchimento dos documentos sem questões do diagnóstico (enumerate vazio não compila)
+_ITEM_VAZIO = "\\item \\mbox{}"
+
 class ExportController:
-    def __init__(self):
+    def __init__(self, session: Optional[Session] = None):
+        """
+        Args:
+            session: Sessão própria (jobs em segundo plano); sem ela usa a fachada de serviços
+        """
         # O ExportService não depende de sessão, então pode ser instanciado diretamente
         self.export_service = ExportService()
+        self._lista_service = ListaService(session) if session is not None else None
+        self._questao_service = QuestaoService(session) if session is not None else None
+
+    @property
+    def _listas(self) -> ListaService:
+        return self._lista_service or services.lista
+
+    @property
+    def _questoes(self) -> QuestaoService:
+        return self._questao_service or services.questao
 
-    def _processar_imagens_inline(self, texto: str, centralizar: bool = True) -> str:
+    def _processar_texto(self, texto: str, centralizar: bool = True) -> str:
         """
-        Processa placeholders de imagem [IMG:caminho:escala] e converte para LaTeX.
+        Converte a marcação de um enunciado ou alternativa para LaTeX.
 
         Args:
-            texto: Texto com placeholders de imagem
-            centralizar: Se True, centraliza a imagem. Se False, usa minipage (para alternativas)
+            texto: Texto com tabelas visuais, listas, alinhamento, tags HTML e imagens
+            centralizar: Se True, centraliza imagens. Se False, usa minipage (para alternativas)
 
         Returns:
-            Texto com comandos LaTeX includegraphics
+            Fragmento LaTeX
         """
-        # Padrão: [IMG:caminho:escala]
-        # O caminho pode conter : (Windows drive), então usamos um padrão mais específico
-        # Formato esperado: [IMG:C:/path/to/image.png:0.7] ou [IMG:C:\path\to\image.png:0.7]
-        pattern = r'\[IMG:(.+?):([0-9.]+)\]'
-
-        def replace_image(match):
-            caminho = match.group(1)
-            escala = match.group(2)
-            # Normalizar caminho para LaTeX (usar /)
-            caminho_latex = caminho.replace('\\', '/')
-            if centralizar:
-                return f"\n\n\\begin{{center}}\n\\includegraphics[scale={escala}]{{{caminho_latex}}}\n\\end{{center}}\n\n"
-            else:
-                # Usar minipage para alternativas (não centraliza)
-                return f"\n\n\\begin{{minipage}}{{\\linewidth}}\n\\includegraphics[scale={escala}]{{{caminho_latex}}}\n\\end{{minipage}}\n\n"
-
-        return re.sub(pattern, replace_image, texto)
+        return compilar_latex(texto, centralizar_imagens=centralizar)
 
-    def _processar_formatacoes_html(self, texto: str) -> str:
+    def _montar_item_questao(self, questao: dict, alternativas: List[dict], config_questao: str) -> str:
         """
-        Converte tags HTML de formatação para comandos LaTeX equivalentes.
+        Monta o bloco \\item de uma questão.
 
-        Deve ser chamado ANTES de _escape_preservando_comandos no pipeline.
+        Args:
+            questao: Dados da questão (enunciado, fonte, ano)
+            alternativas: Alternativas na ordem em que serão exibidas
+            config_questao: 'normal', '5linhas' ou 'espaco_borda' (wallon_av2)
 
-        Conversões:
-        - <b>texto</b> -> \\textbf{texto}
-        - <i>texto</i> -> \\textit{texto}
-        - <u>texto</u> -> \\underline{texto}
-        - <sup>texto</sup> -> \\textsuperscript{texto}
-        - <sub>texto</sub> -> \\textsubscript{texto}
+        Returns:
+            Bloco LaTeX da questão
         """
-        # Processar de dentro para fora (tags mais internas primeiro)
-        texto = re.sub(r'<sup>(.*?)</sup>', r'\\textsuperscript{\1}', texto)
-        texto = re.sub(r'<sub>(.*?)</sub>', r'\\textsubscript{\1}', texto)
-        texto = re.sub(r'<b>(.*?)</b>', r'\\textbf{\1}', texto)
-        texto = re.sub(r'<i>(.*?)</i>', r'\\textit{\1}', texto)
-        texto = re.sub(r'<u>(.*?)</u>', r'\\underline{\1}', texto)
-        return texto
-
-    def _escape_preservando_comandos(self, texto: str) -> str:
+        enunciado = self._processar_texto(questao.get('enunciado', ''))
+        fonte = questao.get('fonte') or ''
+        ano = str(questao.get('ano') or '')
+
+        # Cabecalho da questao: (FONTE - ANO) Enunciado (na mesma linha)
+        if fonte and ano:
+            item = f"\\item \\textbf{{({fonte} - {ano})}} {enunciado}\n\n"
+        elif fonte:
+            item = f"\\item \\textbf{{({fonte})}} {enunciado}\n\n"
+        elif ano:
+            item = f"\\item \\textbf{{({ano})}} {enunciado}\n\n"
+        else:
+            item = f"\\item {enunciado}\n\n"
+
+        if config_questao == '5linhas':
+            # Apenas enunciado + 5 linhas para resposta
+            item += "\\vspace{0.3cm}\n"
+            for _ in range(5):
+                item += "\\noindent\\rule{\\linewidth}{0.4pt}\\vspace{0.2cm}\n"
+        elif config_questao == 'espaco_borda':
+            # Apenas enunciado + caixa com borda 16cm x 5cm
+            item += "\\vspace{0.3cm}\n"
+            item += "\\noindent\\begin{tcolorbox}[colback=white, colframe=black, boxrule=0.5pt, width=16cm, height=5cm]\n"
+            item += "\\end{tcolorbox}\n"
+        else:
+            # Normal: adicionar alternativas (se objetiva)
+            if alternativas:
+                item += "\\begin{enumerate}[label=\\Alph*)]\n"
+                for alt in alternativas:
+                    texto_alt = self._processar_texto(alt.get('texto', ''), centralizar=False)
+                    item += f"    \\item {texto_alt}\n"
+                item += "\\end{enumerate}\n"
+
+        item += "\\vspace{0.5cm}\n"
+        return item
+
+    @staticmethod
+    def _verificar_questao(questao: dict, alternativas: List[dict],
+                           config_questao: str) -> List[ProblemaLatex]:
+        """Verificação estática da marcação dos campos que vão para o LaTeX"""
+        campos = [('enunciado', questao.get('enunciado') or '')]
+        if config_questao == 'normal':
+            campos += [(f"alternativa {alt.get('letra') or ''}".strip(), alt.get('texto') or '')
+                       for alt in alternativas]
+        return verificar_campos(campos, questao.get('codigo') or '')
+
+    def _renderizar_questoes(self, entradas: List[tuple]) -> List[str]:
         """
-        Escapa caracteres especiais do LaTeX, mas preserva comandos LaTeX já gerados.
-
-        Usa abordagem de placeholders para preservar comandos LaTeX de listas e tabelas.
+        Renderiza os blocos das questões usando o cache persistente de fragmentos.
 
         Args:
-            texto: Texto com possíveis comandos LaTeX
+            entradas: Tuplas (questao, alternativas, config_questao) na ordem da prova
 
         Returns:
-            Texto com caracteres escapados, mas comandos LaTeX preservados
+            Blocos LaTeX na mesma ordem das entradas
+
+        Raises:
+            LatexInvalidoError: Se a marcação de alguma questão não compilaria
         """
-        # Padrões de comandos LaTeX a preservar (listas, tabelas e alinhamento)
-        # IMPORTANTE: Math blocks PRIMEIRO, pois podem conter {} que confundem
-        # os padrões de comandos como \textsuperscript{[^}]*}
-        patterns = [
-            # Blocos de modo matemático - preservar ANTES dos comandos
-            # Display math ($$...$$)
-            r'\$\$[^$]+\$\$',
-            # Inline math ($...$) - não capturar $ seguido de espaço/dígito (moeda)
-            r'\$(?!\s|\d)[^$]+\$',
-            # Comandos de lista
-            r'\\begin\{itemize\}',
-            r'\\end\{itemize\}',
-            r'\\begin\{enumerate\}(?:\[label=\\[a-zA-Z]+\*[\.\)]\])?',
-            r'\\end\{enumerate\}',
-            r'\\item\s',
-            # Comandos de tabela
-            r'\\begin\{tabular\}\{[^}]+\}',
-            r'\\end\{tabular\}',
-            r'\\hline',
-            r'\\textbf\{[^}]*\}',
-            r'\\textit\{[^}]*\}',
-            r'\\underline\{[^}]*\}',
-            r'\\textsuperscript\{[^}]*\}',
-            r'\\textsubscript\{[^}]*\}',
-            r'\s*&\s*',  # Separador de células
-            r'\s*\\\\\s*',  # Quebra de linha em tabela
-            # Comandos de alinhamento
-            r'\\begin\{center\}',
-            r'\\end\{center\}',
-            r'\\begin\{flushright\}',
-            r'\\end\{flushright\}',
-            r'\\footnotesize\s',
+        if verificacao_habilitada():
+            with span(ETAPA_VERIFICACAO, f"{len(entradas)} questões"):
+                problemas = [
+                    problema
+                    for questao, alternativas, config_questao in entradas
+                    for problema in self._verificar_questao(questao, alternativas, config_questao)
+                ]
+            exigir_sem_erros(problemas)
+
+        chaves = [
+            chave_fragmento(
+                questao.get('enunciado', ''),
+                [alt.get('texto', '') for alt in alternativas] if config_questao == 'normal' else [],
+                config_questao,
+                centralizar_imagens=True,
+                fonte=questao.get('fonte') or '',
+                ano=str(questao.get('ano') or '')
+            )
+            for questao, alternativas, config_questao in entradas
         ]
+        cache = get_cache_fragmentos()
+        with span(ETAPA_FRAGMENTOS, f"{len(chaves)} questões"):
+            fragmentos = cache.obter_varios(chaves)
+
+        novos = {}
+        for chave, (questao, alternativas, config_questao) in zip(chaves, entradas):
+            if chave not in fragmentos:
+                with span(ETAPA_TRANSFORMACAO, questao.get('codigo') or '') as medido:
+                    fragmentos[chave] = novos[chave] = self._montar_item_questao(
+                        questao, alternativas, config_questao
+                    )
+                    medido.registrar(bytes=len(novos[chave].encode('utf-8')))
+        with span(ETAPA_FRAGMENTOS, f"{len(novos)} gravados"):
+            cache.gravar_varios(novos)
+        logger.info(f"Questões renderizadas: {len(novos)} de {len(entradas)} (demais do cache)")
+        return [fragmentos[chave] for chave in chaves]
 
-        # Salvar comandos com placeholders
-        preserved = {}
-        counter = [0]
-
-        def save_command(match):
-            key = f"__LATEX_CMD_{counter[0]}__"
-            preserved[key] = match.group(0)
-            counter[0] += 1
-            return key
-
-        # Substituir cada padrão por placeholder
-        texto_temp = texto
-        for pattern in patterns:
-            texto_temp = re.sub(pattern, save_command, texto_temp)
-
-        # Escapar o texto (sem os comandos LaTeX)
-        texto_escaped = escape_latex(texto_temp)
-
-        # Restaurar os comandos LaTeX
-        for key, value in preserved.items():
-            texto_escaped = texto_escaped.replace(key, value)
-
-        return texto_escaped
+    def listar_templates_disponiveis(self) -> List[str]:
+        """
+        Lista os arquivos de template LaTeX (.tex) disponíveis na pasta de templates.
+        """
+        template_dir = Path('templates/latex')
+        if not template_dir.exists():
+            logger.warning(f"Diretório de templates não encontrado: {template_dir.resolve()}")
+            return []
+        
+        templates = [f.name for f in template_dir.glob('*.tex')] 
+        logger.info(f"Templates LaTeX encontrados: {templates}")
+        return templates
 
-    def _processar_formatacao_celula(self, cell_text: str) -> str:
-        r"""
-        Processa formatações de uma célula de tabela e converte para LaTeX.
+    def _carregar_template(self, nome_template: str) -> TemplateCompilado:
+        """Obtém o template compilado (analisado uma vez e mantido em cache)."""
+        return get_cache_templates().obter(nome_template)
 
-        Formatos suportados:
-        - <b>texto</b> -> \textbf{texto}
-        - <i>texto</i> -> \textit{texto}
-        - <u>texto</u> -> \underline{texto}
-        - <sup>texto</sup> -> \textsuperscript{texto}
-        - <sub>texto</sub> -> \textsubscript{texto}
-        - [COR:#hexcolor]texto[/COR] -> \cellcolor[HTML]{hexcolor}texto
+    def listar_placeholders(self, nome_template: str) -> Dict[str, List[str]]:
+        """
+        Placeholders de um template, para a interface mostrar apenas os campos usados.
 
         Args:
-            cell_text: Texto da célula com possíveis formatações
+            nome_template: Nome do arquivo do template
 
         Returns:
-            Texto convertido para LaTeX
+            Dict com 'slots' (ex: PROFESSOR, TRIMESTRE), 'blocos' e 'secoes' opcionais
         """
-        result = cell_text
-
-        # Processar cor de fundo primeiro
-        color_pattern = re.compile(r'\[COR:#([a-fA-F0-9]{6})\](.*?)\[/COR\]', re.DOTALL)
-        color_match = color_pattern.search(result)
-        cell_color = None
-        if color_match:
-            cell_color = color_match.group(1).upper()
-            result = color_pattern.sub(r'\2', result)
-
-        # Extrair formatações ANTES do escape
-        # Usar placeholders para preservar as formatações
-        format_placeholders = {}
-        placeholder_counter = [0]
-
-        def extract_format(pattern, latex_cmd):
-            nonlocal result
-            def replacer(match):
-                inner_text = match.group(1)
-                # Escapar o texto interno
-                escaped_inner = escape_latex(inner_text)
-                key = f"__FMT_{placeholder_counter[0]}__"
-                # Usar concatenação para evitar problema com \u sendo interpretado como unicode
-                format_placeholders[key] = '\\' + latex_cmd + '{' + escaped_inner + '}'
-                placeholder_counter[0] += 1
-                return key
-            result = re.sub(pattern, replacer, result)
-
-        # Processar formatações (ordem: mais interno primeiro)
-        extract_format(r'<sup>(.*?)</sup>', 'textsuperscript')
-        extract_format(r'<sub>(.*?)</sub>', 'textsubscript')
-        extract_format(r'<b>(.*?)</b>', 'textbf')
-        extract_format(r'<i>(.*?)</i>', 'textit')
-        extract_format(r'<u>(.*?)</u>', 'underline')
-
-        # Escapar o texto restante (que não está em tags)
-        result = escape_latex(result)
-
-        # Restaurar as formatações
-        for key, value in format_placeholders.items():
-            result = result.replace(key, value)
-
-        # Adicionar cor de fundo se definida
-        if cell_color:
-            result = '\\cellcolor[HTML]{' + cell_color + '}' + result
-
-        return result
-
-    def _processar_tabelas_visuais(self, texto: str) -> str:
+        return get_cache_templates().placeholders(nome_template)
+
+    @staticmethod
+    def _campos_cabecalho(opcoes: ExportOptionsDTO) -> Dict[str, Optional[str]]:
+        """Valores informados para os slots do cabeçalho, sem escape"""
+        return {
+            'TRIMESTRE': opcoes.trimestre,
+            'PROFESSOR': opcoes.professor,
+            'DISCIPLINA': opcoes.disciplina,
+            'ANO': opcoes.ano,
+            # Template CEAB (simuladoCeab)
+            'DATA_APLICACAO': opcoes.data_aplicacao,
+            'SERIE_SIMULADO': opcoes.serie_simulado,
+            'UNIDADE': opcoes.unidade,
+            'TIPO_SIMULADO': opcoes.tipo_simulado,
+        }
+
+    @classmethod
+    def _valores_cabecalho(cls, opcoes: ExportOptionsDTO, titulo: str) -> Dict[str, Optional[str]]:
+        """Valores dos slots do cabeçalho (None mantém o placeholder do template)."""
+        campos = cls._campos_cabecalho(opcoes)
+        valores = {nome: escape_latex(valor) if valor else None for nome, valor in campos.items()}
+        valores['TITULO_LISTA'] = escape_latex(titulo)
+        return valores
+
+    def _montar_documento(self, opcoes: ExportOptionsDTO, titulo: str, formulas: str,
+                          questoes_latex: List[str], gabarito_latex: List[str]) -> str:
         """
-        Processa tabelas no formato visual e converte para LaTeX.
-
-        Formato de entrada:
-        [TABELA]
-        [CABECALHO]Col1 | Col2 | Col3[/CABECALHO]
-        Cell1 | Cell2 | Cell3
-        Cell4 | Cell5 | Cell6
-        [/TABELA]
+        Preenche o template em uma única passada.
 
         Args:
-            texto: Texto com tabelas em formato visual
-
-        Returns:
-            Texto com tabelas convertidas para LaTeX
+            opcoes: Opções de exportação
+            titulo: Título exibido no cabeçalho
+            formulas: Conteúdo da caixa de fórmulas (vazio para omitir)
+            questoes_latex: Itens das questões
+            gabarito_latex: Itens do gabarito (usados se incluir_gabarito)
         """
-        # Padrão para encontrar tabelas
-        table_pattern = re.compile(
-            r'\[TABELA\]\s*\n(.*?)\[/TABELA\]',
-            re.DOTALL
-        )
-
-        def convert_table(match):
-            table_content = match.group(1).strip()
-            lines = table_content.split('\n')
-
-            if not lines:
-                return ''
-
-            # Detectar número de colunas pela primeira linha
-            first_line = lines[0]
-            # Remover marcadores de cabeçalho e formatação para contar colunas
-            clean_first = re.sub(r'\[CABECALHO\]|\[/CABECALHO\]|\[COR:[^\]]+\]|\[/COR\]', '', first_line)
-            num_cols = len(clean_first.split('|'))
-
-            # Criar especificação de colunas (centralizado)
-            col_spec = '|' + '|'.join(['c'] * num_cols) + '|'
+        template = self._carregar_template(opcoes.template_latex)
+        valores = self._valores_cabecalho(opcoes, titulo)
 
-            latex_lines = []
-            # Centralizar e ajustar largura para 0.8 da página com fonte menor
-            latex_lines.append('\\begin{center}')
-            latex_lines.append('\\small')
-            latex_lines.append('\\resizebox{0.8\\linewidth}{!}{%')
-            latex_lines.append('\\begin{tabular}{' + col_spec + '}')
-            latex_lines.append('\\hline')
-
-            for i, line in enumerate(lines):
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Verificar se é cabeçalho
-                is_header = '[CABECALHO]' in line
-                if is_header:
-                    line = line.replace('[CABECALHO]', '').replace('[/CABECALHO]', '')
-
-                # Separar células
-                cells = [cell.strip() for cell in line.split('|')]
-
-                # Processar formatação de cada célula
-                processed_cells = []
-                for cell in cells:
-                    processed = self._processar_formatacao_celula(cell)
-                    if is_header and not processed.startswith('\\textbf') and not processed.startswith('\\cellcolor'):
-                        # Adicionar negrito ao cabeçalho se não tiver
-                        processed = '\\textbf{' + processed + '}'
-                    processed_cells.append(processed)
-
-                latex_lines.append(' & '.join(processed_cells) + ' \\\\')
-                latex_lines.append('\\hline')
+        # Caixa de fórmulas opcional (simples, sem cor, apenas com borda)
+        valores['FORMULAS'] = (
+            f"\\begin{{tcolorbox}}[colback=white, colframe=black, boxrule=0.5pt, title=Fórmulas, fonttitle=\\bfseries]\n{formulas}\n\\end{{tcolorbox}}\n\\vspace{{0.5cm}}"
+            if formulas else ""
+        )
 
-            latex_lines.append('\\end{tabular}')
-            latex_lines.append('}')  # Fecha resizebox
-            latex_lines.append('\\end{center}')
+        questoes_block = "\n".join(questoes_latex)
+        # Aplicar layout de colunas se necessário
+        if opcoes.layout_colunas == 2:
+            questoes_block = f"\\begin{{multicols}}{{2}}\n{questoes_block}\n\\end{{multicols}}"
+        valores['QUESTOES'] = questoes_block
 
-            return '\n'.join(latex_lines)
+        # Seção de gabarito incluída apenas quando pedida; resoluções ainda não são geradas
+        secoes = []
+        if opcoes.incluir_gabarito:
+            valores['GABARITO'] = "\n".join(gabarito_latex)
+            secoes.append(SECAO_GABARITO)
 
-        return table_pattern.sub(convert_table, texto)
+        with span(ETAPA_TEMPLATE, opcoes.template_latex) as medido:
+            documento = template.renderizar(valores, secoes)
+            medido.registrar(bytes=len(documento.encode('utf-8')))
+        return documento
 
-    def _processar_blocos_alinhamento(self, texto: str) -> str:
+    def _gerar_conteudo_html(self, opcoes: ExportOptionsDTO, titulo: str, formulas: str,
+                             entradas: List[tuple], respostas: List[str]) -> str:
         """
-        Processa blocos [CENTRO] e [FONTE] e converte para LaTeX.
+        Documento HTML do motor de rascunho, com as mesmas entradas do documento LaTeX.
 
-        [CENTRO]texto[/CENTRO] -> \\begin{center}texto\\end{center}
-        [FONTE]texto[/FONTE] -> \\begin{flushright}\\footnotesize texto\\end{flushright}
+        Args:
+            opcoes: Opções de exportação
+            titulo: Título exibido no cabeçalho
+            formulas: Conteúdo da caixa de fórmulas (vazio para omitir)
+            entradas: Tuplas (questao, alternativas, config_questao) na ordem da prova
+            respostas: Respostas do gabarito, na mesma ordem
         """
-        # [CENTRO]texto[/CENTRO]
-        texto = re.sub(
-            r'\[CENTRO\](.*?)\[/CENTRO\]',
-            r'\\begin{center}\1\\end{center}',
-            texto,
-            flags=re.DOTALL
-        )
-        # [FONTE]texto[/FONTE]
-        texto = re.sub(
-            r'\[FONTE\](.*?)\[/FONTE\]',
-            r'\\begin{flushright}\\footnotesize \1\\end{flushright}',
-            texto,
-            flags=re.DOTALL
-        )
-        return texto
+        questoes = [
+            QuestaoHtml(
+                enunciado=questao.get('enunciado') or '',
+                alternativas=[alt.get('texto') or '' for alt in alternativas] if config_questao == 'normal' else [],
+                config_questao=config_questao,
+                fonte=questao.get('fonte') or '',
+                ano=str(questao.get('ano') or '')
+            )
+            for questao, alternativas, config_questao in entradas
+        ]
+        with span(ETAPA_TEMPLATE, MOTOR_HTML) as medido:
+            documento = montar_documento_html(
+                titulo, questoes, self._campos_cabecalho(opcoes), formulas,
+                [str(resposta) for resposta in respostas] if opcoes.incluir_gabarito else None,
+                opcoes.layout_colunas
+            )
+            medido.registrar(bytes=len(documento.encode('utf-8')))
+        return documento
 
-    def _processar_listas(self, texto: str) -> str:
+    def _exportar_html(self, opcoes: ExportOptionsDTO, documento: str, base_filename: str,
+                       contexto: Optional[ContextoExportacao] = None) -> Path:
         """
-        Processa listas visuais (itemizadas e enumeradas) e converte para LaTeX.
-
-        IMPORTANTE: Para evitar falsos positivos, os padrões exigem que a linha
-        comece com 2-4 espaços seguidos pelo marcador (como gerado pelo diálogo de listas).
-
-        Formatos suportados:
-        - Itemizadas: •, ○, ■, □, ▸, –, ✓, ★
-        - Enumeradas: 1., a), A), i., I.
-
-        Args:
-            texto: Texto com listas em formato visual
+        Grava o .html (exportação manual) ou o imprime em PDF com o Qt WebEngine (direta).
 
         Returns:
-            Texto com listas convertidas para LaTeX
+            Caminho do arquivo gerado (.html ou .pdf)
         """
-        lines = texto.split('\n')
-        result = []
-        in_itemize = False
-        in_enumerate = False
-        enumerate_type = None
-
-        # Padrões para detectar itens de lista
-        # IMPORTANTE: Exigem 2-4 espaços no início para evitar falsos positivos
-        # O diálogo de listas gera: "   • Item" (3 espaços)
-        itemize_symbols = r'[•○■□▸✓★]'
-        itemize_pattern = re.compile(rf'^[ ]{{2,4}}({itemize_symbols})\s+(.+)$')
-
-        # Enumerate patterns - também exigem 2-4 espaços no início
-        arabic_pattern = re.compile(r'^[ ]{2,4}(\d+)\.\s+(.+)$')  # 1. 2. 3.
-        alpha_lower_pattern = re.compile(r'^[ ]{2,4}([a-z])\)\s+(.+)$')  # a) b) c)
-        alpha_upper_pattern = re.compile(r'^[ ]{2,4}([A-Z])\)\s+(.+)$')  # A) B) C)
-        roman_lower_pattern = re.compile(r'^[ ]{2,4}(i{1,3}|iv|vi{0,3}|ix|xi{0,3})\.\s+(.+)$')  # i. ii. iii.
-        roman_upper_pattern = re.compile(r'^[ ]{2,4}(I{1,3}|IV|VI{0,3}|IX|XI{0,3})\.\s+(.+)$')  # I. II. III.
-
-        def close_list():
-            nonlocal in_itemize, in_enumerate, enumerate_type
-            if in_itemize:
-                result.append('\\end{itemize}')
-                in_itemize = False
-            if in_enumerate:
-                result.append('\\end{enumerate}')
-                in_enumerate = False
-                enumerate_type = None
-
-        for line in lines:
-            # Verificar lista itemizada
-            itemize_match = itemize_pattern.match(line)
-            if itemize_match:
-                if not in_itemize:
-                    if in_enumerate:
-                        close_list()
-                    result.append('\\begin{itemize}')
-                    in_itemize = True
-                item_text = itemize_match.group(2)
-                result.append(f'    \\item {item_text}')
-                continue
-
-            # Verificar lista enumerada - arábico (1. 2. 3.)
-            arabic_match = arabic_pattern.match(line)
-            if arabic_match:
-                if not in_enumerate or enumerate_type != 'arabic':
-                    close_list()
-                    result.append('\\begin{enumerate}')
-                    in_enumerate = True
-                    enumerate_type = 'arabic'
-                item_text = arabic_match.group(2)
-                result.append(f'    \\item {item_text}')
-                continue
-
-            # Verificar lista enumerada - alfabético minúsculo (a) b) c))
-            alpha_lower_match = alpha_lower_pattern.match(line)
-            if alpha_lower_match:
-                if not in_enumerate or enumerate_type != 'alpha_lower':
-                    close_list()
-                    result.append('\\begin{enumerate}[label=\\alph*)]')
-                    in_enumerate = True
-                    enumerate_type = 'alpha_lower'
-                item_text = alpha_lower_match.group(2)
-                result.append(f'    \\item {item_text}')
-                continue
-
-            # Verificar lista enumerada - alfabético maiúsculo (A) B) C))
-            alpha_upper_match = alpha_upper_pattern.match(line)
-            if alpha_upper_match:
-                if not in_enumerate or enumerate_type != 'alpha_upper':
-                    close_list()
-                    result.append('\\begin{enumerate}[label=\\Alph*)]')
-                    in_enumerate = True
-                    enumerate_type = 'alpha_upper'
-                item_text = alpha_upper_match.group(2)
-                result.append(f'    \\item {item_text}')
-                continue
-
-            # Verificar lista enumerada - romano minúsculo (i. ii. iii.)
-            roman_lower_match = roman_lower_pattern.match(line)
-            if roman_lower_match and roman_lower_match.group(1).islower():
-                if not in_enumerate or enumerate_type != 'roman_lower':
-                    close_list()
-                    result.append('\\begin{enumerate}[label=\\roman*.]')
-                    in_enumerate = True
-                    enumerate_type = 'roman_lower'
-                item_text = roman_lower_match.group(2)
-                result.append(f'    \\item {item_text}')
-                continue
-
-            # Verificar lista enumerada - romano maiúsculo (I. II. III.)
-            if roman_upper_pattern.match(line):
-                roman_upper_match = roman_upper_pattern.match(line)
-                if not in_enumerate or enumerate_type != 'roman_upper':
-                    close_list()
-                    result.append('\\begin{enumerate}[label=\\Roman*.]')
-                    in_enumerate = True
-                    enumerate_type = 'roman_upper'
-                item_text = roman_upper_match.group(2)
-                result.append(f'    \\item {item_text}')
-                continue
-
-            # Linha não é item de lista
-            # Fechar listas abertas se linha não vazia (parágrafo normal)
-            if line.strip() and (in_itemize or in_enumerate):
-                close_list()
-
-            result.append(line)
-
-        # Fechar qualquer lista aberta no final
-        close_list()
-
-        return '\n'.join(result)
-
-    def _processar_tabelas(self, texto: str) -> str:
+        output_dir = Path(opcoes.output_dir)
+        if opcoes.tipo_exportacao != 'direta':
+            html_path = output_dir / f"{base_filename}.html"
+            with span(ETAPA_GRAVACAO, html_path.name) as medido:
+                html_path.write_text(documento, encoding='utf-8')
+                medido.registrar(bytes=len(documento.encode('utf-8')))
+            return html_path
+
+        # Import local: carrega o PyQt6 apenas quando o motor HTML é usado
+        from src.application.services.impressao_html import get_impressora_html
+        if contexto:
+            contexto.etapa(ESTADO_COMPILANDO, MOTOR_HTML)
+        with span(ETAPA_IMPRESSAO_HTML, base_filename) as medido:
+            pdf_path = get_impressora_html().imprimir(documento, output_dir / f"{base_filename}.pdf", contexto)
+            medido.registrar(bytes=pdf_path.stat().st_size)
+        logger.info(f"PDF (motor HTML) gerado: {pdf_path}")
+        return pdf_path
+
+    def carregar_snapshot(self, codigo_lista: str) -> ExportSnapshot:
         """
-        Processa tabelas LaTeX e envolve com resizebox se necessário.
-
-        Tabelas que não estão envolvidas em resizebox são automaticamente
-        envolvidas para garantir que não ultrapassem os limites da página/coluna.
+        Carrega os dados da lista uma única vez para todas as versões/templates de um job.
 
         Args:
-            texto: Texto com possíveis tabelas LaTeX
+            codigo_lista: Código da lista
 
         Returns:
-            Texto com tabelas envolvidas em resizebox
-        """
-        # Padrão para encontrar tabelas que NÃO estão já em resizebox
-        # Procura por \begin{tabular} que não seja precedido por resizebox
-
-        def wrap_table(match):
-            tabular_content = match.group(0)
-            # Verifica se já está envolvido em resizebox (olhando o contexto antes)
-            return f"\\resizebox{{\\columnwidth}}{{!}}{{\n{tabular_content}\n}}"
-
-        # Primeiro, encontra todas as tabelas
-        # Padrão: \begin{tabular}...\end{tabular}
-        tabular_pattern = r'\\begin\{tabular\}.*?\\end\{tabular\}'
-
-        # Encontra tabelas que NÃO estão precedidas por resizebox
-        # Usa negative lookbehind para verificar se não há resizebox antes
-        # Nota: lookbehind tem limitações, então usamos abordagem diferente
-
-        # Abordagem: marca tabelas já em resizebox, processa as outras
-        # Padrão para resizebox existente
-        resizebox_pattern = r'\\resizebox\{[^}]*\}\{[^}]*\}\{[^}]*\\begin\{tabular\}.*?\\end\{tabular\}[^}]*\}'
+            ExportSnapshot imutável
 
-        # Salva os resizeboxes existentes com placeholders
-        preserved = {}
-        counter = [0]
-
-        def save_resizebox(match):
-            key = f"__RESIZEBOX_{counter[0]}__"
-            preserved[key] = match.group(0)
-            counter[0] += 1
-            return key
-
-        # Preserva resizeboxes existentes
-        texto = re.sub(resizebox_pattern, save_resizebox, texto, flags=re.DOTALL)
-
-        # Agora processa tabelas que não estão em resizebox
-        texto = re.sub(tabular_pattern, wrap_table, texto, flags=re.DOTALL)
+        Raises:
+            ValueError: Se a lista não existir
+        """
+        with span(ETAPA_SNAPSHOT, codigo_lista) as medido:
+            snapshot = carregar_snapshot(self._listas.session, codigo_lista)
+            if snapshot is None:
+                raise ValueError(f"Lista com código {codigo_lista} não encontrada.")
+            medido.registrar(imagens=len(snapshot.imagens))
+        return snapshot
+
+    @staticmethod
+    def _extensao_artefato(opcoes: ExportOptionsDTO) -> str:
+        """Extensão do arquivo gerado: .pdf (direta), .tex ou .html (manual, conforme o motor)"""
+        if opcoes.tipo_exportacao == 'direta':
+            return '.pdf'
+        return '.html' if opcoes.motor_pdf == MOTOR_HTML else '.tex'
 
-        # Restaura os resizeboxes preservados
-        for key, value in preserved.items():
-            texto = texto.replace(key, value)
+    def _artefato_guardado(self, opcoes: ExportOptionsDTO, snapshot: ExportSnapshot, base_filename: str,
+                           indice_versao: Optional[int] = None,
+                           snapshot_hash: Optional[str] = None) -> Tuple[Optional[str], Optional[Path]]:
+        """
+        Procura o artefato de uma exportação idêntica no cache de artefatos.
 
-        return texto
+        Args:
+            opcoes: Opções da exportação (da versão, nas randomizadas)
+            snapshot: Dados da lista
+            base_filename: Nome base do arquivo de saída
+            indice_versao: Índice da versão randomizada (None para a lista)
+            snapshot_hash: chave_snapshot já calculada (compartilhada entre as versões)
 
-    def listar_templates_disponiveis(self) -> List[str]:
-        """
-        Lista os arquivos de template LaTeX (.tex) disponíveis na pasta de templates.
+        Returns:
+            Tupla (chave, arquivo copiado para o diretório de saída). A chave é None
+            com o cache desligado; o arquivo é None se não houver acerto ou se
+            opcoes.forcar_reconstrucao pedir um novo artefato
         """
-        template_dir = Path('templates/latex')
-        if not template_dir.exists():
-            logger.warning(f"Diretório de templates não encontrado: {template_dir.resolve()}")
-            return []
-        
-        templates = [f.name for f in template_dir.glob('*.tex')] 
-        logger.info(f"Templates LaTeX encontrados: {templates}")
-        return templates
-
-    def _carregar_template(self, nome_template: str) -> str:
-        """Carrega o conteúdo de um arquivo de template."""
-        template_path = Path('templates/latex') / nome_template
-        if not template_path.exists():
-            raise FileNotFoundError(f"Template LaTeX '{nome_template}' não encontrado.")
-        
-        return template_path.read_text(encoding='utf-8')
+        if not cache_artefatos_habilitado():
+            return None, None
+        semente = None
+        if indice_versao is not None:
+            semente = self._semente_versoes(opcoes, snapshot)
+        chave = chave_artefato(snapshot_hash or chave_snapshot(snapshot), opcoes, indice_versao, semente)
+        if opcoes.forcar_reconstrucao:
+            return chave, None
+        destino = Path(opcoes.output_dir) / f"{base_filename}{self._extensao_artefato(opcoes)}"
+        return chave, get_cache_artefatos().copiar_para(chave, destino)
+
+    def _exportar_com_cache(self, opcoes: ExportOptionsDTO, snapshot: ExportSnapshot, base_filename: str,
+                            gerar: Callable[[], Path], indice_versao: Optional[int] = None,
+                            snapshot_hash: Optional[str] = None) -> Path:
+        """Devolve o artefato de uma exportação idêntica ou executa gerar() e guarda o resultado"""
+        chave, caminho = self._artefato_guardado(opcoes, snapshot, base_filename, indice_versao, snapshot_hash)
+        if caminho is not None:
+            return caminho
+        caminho = gerar()
+        if chave is not None:
+            get_cache_artefatos().gravar(chave, caminho)
+        return caminho
+
+    @staticmethod
+    def _entradas_lista(opcoes: ExportOptionsDTO, snapshot: ExportSnapshot) -> Tuple[List[tuple], List[str]]:
+        """Entradas (questao, alternativas, config_questao) na ordem da lista e as respostas"""
+        entradas = [
+            (questao, questao.get('alternativas', []),
+             (opcoes.questoes_config or {}).get(questao.get('codigo', ''), 'normal'))
+            for questao in snapshot.questoes
+        ]
+        respostas = [str(questao.get('resposta') or 'N/A') for questao in snapshot.questoes]
+        return entradas, respostas
 
-    def _gerar_conteudo_latex(self, opcoes: ExportOptionsDTO) -> str:
+    def _gerar_conteudo_latex(self, opcoes: ExportOptionsDTO,
+                              contexto: Optional[ContextoExportacao] = None,
+                              snapshot: Optional[ExportSnapshot] = None) -> str:
         """
         Gera o conteudo LaTeX completo para a lista, aplicando as opcoes de exportacao.
         """
-        # 1. Buscar dados da lista
-        lista_dados = services.lista.buscar_lista(opcoes.id_lista)
-        if not lista_dados:
-            raise ValueError(f"Lista com codigo {opcoes.id_lista} nao encontrada.")
-
-        # 2. Carregar o template base
-        template_content = self._carregar_template(opcoes.template_latex)
-
-        # 3. Substituir placeholders do cabecalho
-        template_content = template_content.replace("[TITULO_LISTA]", escape_latex(lista_dados['titulo']))
-
-        # Substituir placeholders específicos de templates (ex: wallon_av2)
-        if opcoes.trimestre:
-            template_content = template_content.replace("[TRIMESTRE]", escape_latex(opcoes.trimestre))
-        if opcoes.professor:
-            template_content = template_content.replace("[PROFESSOR]", escape_latex(opcoes.professor))
-        if opcoes.disciplina:
-            template_content = template_content.replace("[DISCIPLINA]", escape_latex(opcoes.disciplina))
-        if opcoes.ano:
-            template_content = template_content.replace("[ANO]", escape_latex(opcoes.ano))
-
-        # Substituir placeholders específicos do template CEAB (simuladoCeab)
-        if opcoes.data_aplicacao:
-            template_content = template_content.replace("[DATA_APLICACAO]", escape_latex(opcoes.data_aplicacao))
-        if opcoes.serie_simulado:
-            template_content = template_content.replace("[SERIE_SIMULADO]", escape_latex(opcoes.serie_simulado))
-        if opcoes.unidade:
-            template_content = template_content.replace("[UNIDADE]", escape_latex(opcoes.unidade))
-        if opcoes.tipo_simulado:
-            template_content = template_content.replace("[TIPO_SIMULADO]", escape_latex(opcoes.tipo_simulado))
-
-        # Formulas (caixa de fórmulas opcional)
-        formulas = lista_dados.get('formulas', '') or ''
-        if formulas:
-            # Caixa simples sem cor, apenas com borda
-            formulas_block = f"\\begin{{tcolorbox}}[colback=white, colframe=black, boxrule=0.5pt, title=Fórmulas, fonttitle=\\bfseries]\n{formulas}\n\\end{{tcolorbox}}\n\\vspace{{0.5cm}}"
-            template_content = template_content.replace("% [FORMULAS_AQUI]", formulas_block)
-        else:
-            template_content = template_content.replace("% [FORMULAS_AQUI]", "")
-
-        # 4. Gerar o bloco de questoes
-        questoes_latex = []
-        for i, questao in enumerate(lista_dados['questoes'], 1):
-            enunciado_raw = questao.get('enunciado', '')
-            # Processar tabelas visuais PRIMEIRO (converte [TABELA] para LaTeX)
-            enunciado_com_tabelas = self._processar_tabelas_visuais(enunciado_raw)
-            # Processar listas (converte símbolos visuais para LaTeX)
-            enunciado_com_listas = self._processar_listas(enunciado_com_tabelas)
-            # Processar blocos de alinhamento (converte [CENTRO] e [FONTE] para LaTeX)
-            enunciado_com_alinhamento = self._processar_blocos_alinhamento(enunciado_com_listas)
-            # Converter tags HTML para comandos LaTeX
-            enunciado_com_formatacao = self._processar_formatacoes_html(enunciado_com_alinhamento)
-            # Escapar apenas o texto que não é comando LaTeX
-            enunciado_escaped = self._escape_preservando_comandos(enunciado_com_formatacao)
-            enunciado = self._processar_imagens_inline(enunciado_escaped)
-            enunciado = self._processar_tabelas(enunciado)
-            fonte = questao.get('fonte') or ''
-            ano = str(questao.get('ano') or '')
-
-            # Cabecalho da questao: (FONTE - ANO) Enunciado (na mesma linha)
-            if fonte and ano:
-                item = f"\\item \\textbf{{({fonte} - {ano})}} {enunciado}\n\n"
-            elif fonte:
-                item = f"\\item \\textbf{{({fonte})}} {enunciado}\n\n"
-            elif ano:
-                item = f"\\item \\textbf{{({ano})}} {enunciado}\n\n"
-            else:
-                item = f"\\item {enunciado}\n\n"
-
-            # Verificar configuração especial da questão (wallon_av2)
-            codigo_questao = questao.get('codigo', '')
-            config_questao = (opcoes.questoes_config or {}).get(codigo_questao, 'normal')
-
-            if config_questao == '5linhas':
-                # Apenas enunciado + 5 linhas para resposta
-                item += "\\vspace{0.3cm}\n"
-                for _ in range(5):
-                    item += "\\noindent\\rule{\\linewidth}{0.4pt}\\vspace{0.2cm}\n"
-            elif config_questao == 'espaco_borda':
-                # Apenas enunciado + caixa com borda 16cm x 5cm
-                item += "\\vspace{0.3cm}\n"
-                item += "\\noindent\\begin{tcolorbox}[colback=white, colframe=black, boxrule=0.5pt, width=16cm, height=5cm]\n"
-                item += "\\end{tcolorbox}\n"
-            else:
-                # Normal: adicionar alternativas (se objetiva)
-                alternativas = questao.get('alternativas', [])
-                if alternativas:
-                    item += "\\begin{enumerate}[label=\\Alph*)]\n"
-                    for alt in alternativas:
-                        texto_alt_raw = alt.get('texto', '')
-                        # Processar tabelas, listas e alinhamento nas alternativas também
-                        texto_alt_com_tabelas = self._processar_tabelas_visuais(texto_alt_raw)
-                        texto_alt_com_listas = self._processar_listas(texto_alt_com_tabelas)
-                        texto_alt_com_alinhamento = self._processar_blocos_alinhamento(texto_alt_com_listas)
-                        texto_alt_com_formatacao = self._processar_formatacoes_html(texto_alt_com_alinhamento)
-                        texto_alt_escaped = self._escape_preservando_comandos(texto_alt_com_formatacao)
-                        texto_alt = self._processar_imagens_inline(texto_alt_escaped, centralizar=False)
-                        texto_alt = self._processar_tabelas(texto_alt)
-                        item += f"    \\item {texto_alt}\n"
-                    item += "\\end{enumerate}\n"
-
-            item += "\\vspace{0.5cm}\n"
-            questoes_latex.append(item)
-
-        # Substituir placeholder de questoes
-        questoes_block = "\n".join(questoes_latex)
-
-        # Aplicar layout de colunas se necessário
-        if opcoes.layout_colunas == 2:
-            questoes_block = f"\\begin{{multicols}}{{2}}\n{questoes_block}\n\\end{{multicols}}"
-
-        template_content = template_content.replace("% [QUESTOES_AQUI]", questoes_block)
-
-        # 5. Gerar o bloco de gabarito ou remover secao inteira
-        if opcoes.incluir_gabarito:
-            gabarito_latex = []
-            for i, questao in enumerate(lista_dados['questoes'], 1):
-                resposta = questao.get('resposta') or 'N/A'
-                gabarito_latex.append(f"\\item Questao {i}: {escape_latex(str(resposta))}")
-            gabarito_block = "\n".join(gabarito_latex)
-            template_content = template_content.replace("% [GABARITO_AQUI]", gabarito_block)
-        else:
-            # Remover secao inteira de gabarito
-            template_content = re.sub(
-                r'% ={10,}\s*\n% GABARITO \(opcional\)\s*\n% ={10,}\s*\n.*?\\end\{enumerate\}',
-                '',
-                template_content,
-                flags=re.DOTALL
-            )
-
-        # 6. Remover secao inteira de resolucoes (nao implementada ainda)
-        template_content = re.sub(
-            r'% ={10,}\s*\n% RESOLU[ÇC][ÕO]ES \(opcional\)\s*\n% ={10,}\s*\n.*?\\end\{enumerate\}',
-            '',
-            template_content,
-            flags=re.DOTALL
+        # 1. Buscar dados da lista (se o snapshot não foi carregado pelo chamador)
+        if contexto:
+            contexto.etapa(ESTADO_BUSCANDO)
+        if snapshot is None:
+            snapshot = self.carregar_snapshot(opcoes.id_lista)
+
+        # 2. Gerar o bloco de questoes (apenas questoes alteradas sao transformadas)
+        if contexto:
+            contexto.etapa(ESTADO_TRANSFORMANDO)
+        entradas, respostas = self._entradas_lista(opcoes, snapshot)
+        questoes_latex = self._renderizar_questoes(entradas)
+
+        # 3. Gabarito
+        gabarito_latex = self._gabarito_lista(opcoes, respostas)
+
+        # 4. Montar o documento a partir do template
+        return self._montar_documento(
+            opcoes, snapshot.titulo, snapshot.formulas, questoes_latex, gabarito_latex
         )
 
-        return template_content
-
-    def exportar_lista(self, opcoes: ExportOptionsDTO) -> Path:
+    @staticmethod
+    def _gabarito_lista(opcoes: ExportOptionsDTO, respostas: List[str]) -> List[str]:
+        """Itens do gabarito da lista (vazio se o gabarito não foi pedido)"""
+        return [
+            f"\\item Questao {i}: {escape_latex(resposta)}"
+            for i, resposta in enumerate(respostas, 1)
+        ] if opcoes.incluir_gabarito else []
+
+    @exportacao_medida(lambda self, opcoes, *_, **__: f"{opcoes.id_lista} ({opcoes.template_latex})")
+    def exportar_lista(self, opcoes: ExportOptionsDTO,
+                       contexto: Optional[ContextoExportacao] = None,
+                       snapshot: Optional[ExportSnapshot] = None) -> Path:
         """
         Orquestra a exportação de uma lista para LaTeX ou PDF.
 
         Args:
             opcoes: DTO com todas as configurações de exportação.
+            contexto: Progresso e cancelamento (jobs em segundo plano).
+            snapshot: Dados já carregados da lista (reaproveitados entre templates).
 
         Returns:
-            Caminho do arquivo gerado (.tex ou .pdf).
+            Caminho do arquivo gerado (.tex ou .pdf; .html no motor HTML manual).
+            Uma exportação idêntica anterior é copiada do cache de artefatos.
         """
         logger.info(f"Iniciando exportação para lista ID {opcoes.id_lista} com opções: {opcoes}")
 
-        # Gerar o conteúdo LaTeX dinamicamente
-        # NOTE: A lógica de geração de conteúdo está agora no controller para acessar outros services
-        latex_content = self._gerar_conteudo_latex(opcoes)
+        if snapshot is None:
+            if contexto:
+                contexto.etapa(ESTADO_BUSCANDO)
+            snapshot = self.carregar_snapshot(opcoes.id_lista)
 
+        base_filename = f"{snapshot.titulo.replace(' ', '_')}_{opcoes.template_latex.replace('.tex', '')}"
+        return self._exportar_com_cache(
+            opcoes, snapshot, base_filename,
+            lambda: self._gerar_artefato_lista(opcoes, snapshot, base_filename, contexto)
+        )
+
+    def _gerar_artefato_lista(self, opcoes: ExportOptionsDTO, snapshot: ExportSnapshot, base_filename: str,
+                              contexto: Optional[ContextoExportacao] = None) -> Path:
+        """Executa o pipeline completo da lista (sem o cache de artefatos)"""
         output_dir = Path(opcoes.output_dir)
-        lista_dados = services.lista.buscar_lista(opcoes.id_lista)
-        base_filename = f"{lista_dados['titulo'].replace(' ', '_')}_{opcoes.template_latex.replace('.tex', '')}"
+        if opcoes.motor_pdf == MOTOR_HTML:
+            if contexto:
+                contexto.etapa(ESTADO_TRANSFORMANDO, MOTOR_HTML)
+            entradas, respostas = self._entradas_lista(opcoes, snapshot)
+            documento = self._gerar_conteudo_html(opcoes, snapshot.titulo, snapshot.formulas, entradas, respostas)
+            return self._exportar_html(opcoes, documento, base_filename, contexto)
+
+        if opcoes.tipo_exportacao == 'direta' and opcoes.previa_incremental and previa_incremental_habilitada():
+            pdf_path = self._exportar_previa_incremental(opcoes, snapshot, base_filename, contexto)
+            if pdf_path is not None:
+                return pdf_path
+
+        # Gerar o conteúdo LaTeX dinamicamente
+        # NOTE: A lógica de geração de conteúdo está agora no controller para acessar outros services
+        latex_content = self._gerar_conteudo_latex(opcoes, contexto, snapshot)
 
         if opcoes.tipo_exportacao == 'direta':
             logger.info(f"Compilando LaTeX para PDF para lista ID {opcoes.id_lista}...")
-            pdf_path = self.export_service.compilar_latex_para_pdf(latex_content, output_dir, base_filename)
-            return pdf_path
+            return self._compilar_com_diagnostico(
+                latex_content, output_dir, base_filename, opcoes, snapshot, contexto
+            )
         else: # 'manual'
             tex_path = output_dir / f"{base_filename}.tex"
             logger.info(f"Escrevendo arquivo .tex manual para: {tex_path}")
-            tex_path.write_text(latex_content, encoding='utf-8')
+            with span(ETAPA_GRAVACAO, tex_path.name) as medido:
+                tex_path.write_text(latex_content, encoding='utf-8')
+                medido.registrar(bytes=len(latex_content.encode('utf-8')))
             return tex_path
 
+    def _exportar_previa_incremental(self, opcoes: ExportOptionsDTO, snapshot: ExportSnapshot, base_filename: str,
+                                     contexto: Optional[ContextoExportacao] = None) -> Optional[Path]:
+        """
+        Prévia costurada dos trechos PDF por questão (ver previa_incremental).
+
+        Returns:
+            Caminho do PDF, ou None se o template não permitir a costura ou algum
+            trecho não compilar (o chamador compila o documento inteiro, com diagnóstico)
+        """
+        if contexto:
+            contexto.etapa(ESTADO_TRANSFORMANDO)
+        entradas, respostas = self._entradas_lista(opcoes, snapshot)
+        questoes_latex = self._renderizar_questoes(entradas)
+        documento = self._montar_documento(
+            opcoes, snapshot.titulo, snapshot.formulas, [MARCADOR_QUESTOES], self._gabarito_lista(opcoes, respostas)
+        )
+        estrutura = analisar_documento(documento)
+        if estrutura is None:
+            logger.info(f"Template {opcoes.template_latex} sem lista de questões identificável: prévia completa")
+            return None
+
+        if contexto:
+            contexto.etapa(ESTADO_COMPILANDO, f"{len(questoes_latex)} trechos")
+        try:
+            trechos = get_cache_trechos().obter_varios(
+                [montar_trecho(estrutura, bloco, numero) for numero, bloco in enumerate(questoes_latex, 1)],
+                opcoes.layout_colunas, snapshot.metadados_imagens, contexto
+            )
+            return self.export_service.compilar_latex_para_pdf(
+                costurar(documento, trechos), Path(opcoes.output_dir), base_filename,
+                contexto=contexto, colunas=opcoes.layout_colunas, metadados_imagens=snapshot.metadados_imagens
+            )
+        except TrechoInvalidoError as e:
+            logger.warning(f"Trecho da prévia não compilou ({e}); compilando o documento inteiro")
+        except CompilacaoLatexError as e:
+            logger.warning(f"Prévia costurada não compilou ({e}); compilando o documento inteiro")
+        return None
+
+    def _compilar_com_diagnostico(self, latex_content: str, output_dir: Path, base_filename: str,
+                                  opcoes: ExportOptionsDTO, snapshot: ExportSnapshot,
+                                  contexto: Optional[ContextoExportacao] = None,
+                                  indice_versao: Optional[int] = None) -> Path:
+        """
+        Compila o documento; se o pdflatex falhar, isola as questões responsáveis.
+
+        Raises:
+            CompilacaoDiagnosticadaError: Falha do pdflatex com o diagnóstico na mensagem
+            CompilacaoLatexError: Falha do pdflatex com o diagnóstico desligado ou sem resultado
+        """
+        try:
+            return self.export_service.compilar_latex_para_pdf(
+                latex_content, output_dir, base_filename, contexto=contexto,
+                colunas=opcoes.layout_colunas, metadados_imagens=snapshot.metadados_imagens
+            )
+        except CompilacaoLatexError as e:
+            if not diagnostico_habilitado():
+                raise
+            diagnostico = self._diagnostico_seguro(opcoes, snapshot, indice_versao, contexto=contexto)
+            if diagnostico is None:
+                raise
+            raise CompilacaoDiagnosticadaError(e, diagnostico) from e
+
+    def _diagnostico_seguro(self, opcoes: ExportOptionsDTO, snapshot: ExportSnapshot,
+                            indice_versao: Optional[int] = None, **kwargs) -> Optional[DiagnosticoCompilacao]:
+        """diagnosticar_falha sem deixar uma falha do próprio diagnóstico esconder o erro original"""
+        try:
+            return self.diagnosticar_falha(opcoes, snapshot, indice_versao, **kwargs)
+        except ExportacaoCancelada:
+            raise
+        except Exception as e:
+            logger.error(f"Diagnóstico da compilação falhou: {e}", exc_info=True)
+            return None
+
+    def diagnosticar_falha(self, opcoes: ExportOptionsDTO, snapshot: Optional[ExportSnapshot] = None,
+                           indice_versao: Optional[int] = None,
+                           plano: Optional[PlanoVersoes] = None,
+                           contexto: Optional[ContextoExportacao] = None) -> DiagnosticoCompilacao:
+        """
+        Isola por bisseção as questões que fazem a compilação da lista falhar.
+
+        Os documentos dos subconjuntos usam o mesmo template, cabeçalho e caixa
+        de fórmulas do documento exportado e compilam em paralelo.
+
+        Args:
+            opcoes: Opções da exportação que falhou
+            snapshot: Dados já carregados da lista (carregados aqui se ausente)
+            indice_versao: Índice da versão randomizada (None para a lista na ordem original)
+            plano: Plano das versões (gerado aqui para versões, se ausente)
+            contexto: Progresso e cancelamento (opcional)
+
+        Returns:
+            DiagnosticoCompilacao com as questões, campos e linhas do log
+        """
+        if snapshot is None:
+            snapshot = self.carregar_snapshot(opcoes.id_lista)
+        if indice_versao is None:
+            titulo = snapshot.titulo
+            entradas, respostas = self._entradas_lista(opcoes, snapshot)
+        else:
+            titulo = f"{snapshot.titulo}-{opcoes.sufixo_versao}"
+            entradas, respostas = self._entradas_versao(opcoes, snapshot, indice_versao, plano)
+
+        questoes_latex = self._renderizar_questoes(entradas)
+        gabarito_latex = [f"\\item {escape_latex(str(resposta))}" for resposta in respostas]
+
+        def montar(indices) -> str:
+            return self._montar_documento(
+                opcoes, titulo, snapshot.formulas,
+                [questoes_latex[i] for i in indices] or [_ITEM_VAZIO],
+                [gabarito_latex[i] for i in indices] or [_ITEM_VAZIO]
+            )
+
+        def campos(indice: int) -> List[Tuple[str, str]]:
+            questao, alternativas, config_questao = entradas[indice]
+            pares = [('enunciado', self._processar_texto(questao.get('enunciado', '')))]
+            if config_questao == 'normal':
+                pares += [
+                    (f"alternativa {letra}", self._processar_texto(alt.get('texto', ''), centralizar=False))
+                    for letra, alt in zip(LETRAS, alternativas)
+                ]
+            return pares
+
+        logger.info(f"Diagnosticando a compilação de {titulo} ({len(entradas)} questões)")
+        return diagnosticar_compilacao(
+            montar, [questao.get('codigo') or '' for questao, _, _ in entradas], campos,
+            Path(opcoes.output_dir), colunas=opcoes.layout_colunas,
+            metadados_imagens=snapshot.metadados_imagens, contexto=contexto
+        )
+
     def abrir_arquivo(self, caminho: Path) -> None:
         """
         Abre um arquivo com o aplicativo padrão do sistema.
@@ -714,24 +677,6 @@ class ExportController:
         except Exception as e:
             logger.warning(f"Não foi possível abrir o arquivo automaticamente: {e}")
 
-    def _obter_variantes_questao(self, codigo_questao: str) -> List[dict]:
-        """
-        Obtém as variantes de uma questão.
-
-        Args:
-            codigo_questao: Código da questão original
-
-        Returns:
-            Lista de dicts com dados das variantes ordenadas por código
-        """
-        try:
-            variantes = services.questao.obter_variantes(codigo_questao)
-            # Ordenar por código para garantir ordem consistente (A, B, C)
-            return sorted(variantes, key=lambda v: v.get('codigo', ''))
-        except Exception as e:
-            logger.warning(f"Erro ao obter variantes de {codigo_questao}: {e}")
-            return []
-
     def _randomizar_alternativas_com_gabarito(self, alternativas: List[dict], resposta_original: str, seed: int) -> tuple:
         """
         Randomiza a ordem das alternativas e retorna a nova letra da resposta correta.
@@ -784,7 +729,8 @@ class ExportController:
         logger.info(f"Alternativas randomizadas: resposta {resposta_original} -> {nova_resposta}")
         return alternativas_copia, nova_resposta
 
-    def _obter_versao_questao_ciclica(self, questao: dict, indice_versao: int) -> dict:
+    def _obter_versao_questao_ciclica(self, questao: dict, indice_versao: int,
+                                      snapshot: ExportSnapshot) -> dict:
         """
         Obtém a versão da questão a ser usada de forma cíclica.
 
@@ -799,30 +745,25 @@ class ExportController:
 
         Args:
             questao: Dados da questão original
-            indice_versao: Índice da versão (0=A, 1=B, 2=C, 3=D)
+            indice_versao: Índice da versão (0=A, 1=B, ..., 26=AA)
+            snapshot: Snapshot com as variantes já carregadas
 
         Returns:
             Dados da questão a ser usada
         """
         codigo_questao = questao.get('codigo', '')
-        variantes = self._obter_variantes_questao(codigo_questao)
 
-        # Montar lista: [original, variante1, variante2, ...]
-        todas_versoes = [questao]  # índice 0 = original
-
-        for var in variantes:
-            var_data = services.questao.buscar_questao(var['codigo'])
-            if var_data:
-                todas_versoes.append(var_data)
+        # [original, variante1, variante2, ...] ordenadas por código
+        todas_versoes = snapshot.versoes_questao(questao)
 
         # Usar índice cíclico
         indice_ciclico = indice_versao % len(todas_versoes)
         questao_escolhida = todas_versoes[indice_ciclico]
 
         if indice_ciclico == 0:
-            logger.info(f"Questão {codigo_questao}: usando ORIGINAL para TIPO {chr(65 + indice_versao)}")
+            logger.info(f"Questão {codigo_questao}: usando ORIGINAL para TIPO {rotulo_versao(indice_versao)}")
         else:
-            logger.info(f"Questão {codigo_questao}: usando VARIANTE {indice_ciclico} para TIPO {chr(65 + indice_versao)}")
+            logger.info(f"Questão {codigo_questao}: usando VARIANTE {indice_ciclico} para TIPO {rotulo_versao(indice_versao)}")
 
         return questao_escolhida
 
@@ -843,222 +784,390 @@ class ExportController:
             return questoes
 
         rng = random.Random(seed)
-        questoes_copia = questoes.copy()
+        questoes_copia = list(questoes)
         rng.shuffle(questoes_copia)
 
         return questoes_copia
 
-    def _gerar_conteudo_latex_randomizado(self, opcoes: ExportOptionsDTO, indice_versao: int) -> str:
+    def planejar_versoes(self, opcoes: ExportOptionsDTO, quantidade: int,
+                         snapshot: Optional[ExportSnapshot] = None) -> Optional[PlanoVersoes]:
         """
-        Gera o conteúdo LaTeX para uma versão randomizada específica.
+        Gera de uma vez a ordem, as alternativas e o gabarito de todas as versões.
 
-        Lógica:
-        - A ORDEM das questões é randomizada para cada versão
-        - Para cada questão, usa-se a versão cíclica (original, var1, var2, original, ...)
+        A semente é opcoes.semente_versoes ou, se ausente, derivada do código da
+        lista, então exportar de novo (ou uma versão isolada) gera as mesmas provas.
 
         Args:
-            opcoes: Opções de exportação
-            indice_versao: Índice da versão (0=A, 1=B, 2=C, 3=D)
+            opcoes: Opções com as restrições do gerador
+            quantidade: Número de versões
+            snapshot: Dados já carregados da lista
 
         Returns:
-            Conteúdo LaTeX completo
+            PlanoVersoes ou None se o NumPy não estiver disponível
+        """
+        if not NUMPY_AVAILABLE:
+            logger.warning("NumPy não disponível: versões geradas sem balanceamento do gabarito")
+            return None
+        if snapshot is None:
+            snapshot = self.carregar_snapshot(opcoes.id_lista)
+
+        fixas = set(opcoes.questoes_fixas or ())
+        questoes = [
+            self._questao_plano(questao, snapshot, questao['codigo'] in fixas)
+            for questao in snapshot.questoes
+        ]
+        semente = self._semente_versoes(opcoes, snapshot)
+        gerador = GeradorVersoes(RestricoesVersoes(
+            max_sequencia=opcoes.max_sequencia_letra,
+            distancia_minima=opcoes.distancia_minima_versoes,
+        ))
+        with span(ETAPA_TRANSFORMACAO, "plano de versões"):
+            return gerador.gerar(questoes, quantidade, semente)
+
+    @staticmethod
+    def _semente_versoes(opcoes: ExportOptionsDTO, snapshot: ExportSnapshot) -> int:
+        """opcoes.semente_versoes ou, se ausente, a semente derivada do código da lista"""
+        if opcoes.semente_versoes is not None:
+            return opcoes.semente_versoes
+        return semente_da_lista(snapshot.codigo)
+
+    @staticmethod
+    def _questao_plano(questao: dict, snapshot: ExportSnapshot, fixa: bool) -> QuestaoPlano:
+        """Alternativas e resposta de cada conteúdo (original e variantes) para o gerador"""
+        alternativas, corretas = [], []
+        permutar = True
+        for conteudo in snapshot.versoes_questao(questao):
+            letras = [(alt['letra'] or '').upper() for alt in conteudo['alternativas']]
+            resposta = (conteudo['resposta'] or '').strip().upper()
+            alternativas.append(len(letras))
+            corretas.append(letras.index(resposta) if resposta and resposta in letras else None)
+            # "Nenhuma das anteriores" e afins dependem da posição
+            if any(_RE_ALTERNATIVA_POSICIONAL.search(alt['texto'] or '') for alt in conteudo['alternativas']):
+                permutar = False
+        return QuestaoPlano(tuple(alternativas), tuple(corretas), fixa, permutar)
+
+    def _entradas_planejadas(self, opcoes: ExportOptionsDTO, snapshot: ExportSnapshot,
+                             plano: PlanoVersoes, indice_versao: int) -> Tuple[List[tuple], List[str]]:
+        """Entradas de renderização e respostas de uma versão segundo o plano"""
+        gabarito = plano.gabarito(indice_versao)
+        entradas, respostas = [], []
+        for posicao, indice_questao in enumerate(plano.ordem(indice_versao)):
+            original = snapshot.questoes[indice_questao]
+            questao = snapshot.versoes_questao(original)[plano.conteudo(indice_versao, indice_questao)]
+            alternativas = [
+                {**questao['alternativas'][origem], 'letra': LETRAS[destino]}
+                for destino, origem in enumerate(plano.alternativas(indice_versao, indice_questao))
+            ]
+            respostas.append(gabarito[posicao] or questao.get('resposta') or 'N/A')
+            config_questao = (opcoes.questoes_config or {}).get(original.get('codigo', ''), 'normal')
+            entradas.append((questao, alternativas, config_questao))
+        return entradas, respostas
+
+    def _entradas_aleatorias(self, opcoes: ExportOptionsDTO, snapshot: ExportSnapshot,
+                             indice_versao: int) -> Tuple[List[tuple], List[str]]:
+        """
+        Entradas e respostas sem o gerador (NumPy ausente): ordem embaralhada por
+        versão e alternativas embaralhadas nas questões sem variantes.
         """
-        import random
-
-        # 1. Buscar dados da lista
-        lista_dados = services.lista.buscar_lista(opcoes.id_lista)
-        if not lista_dados:
-            raise ValueError(f"Lista com código {opcoes.id_lista} não encontrada.")
-
-        # 2. Carregar o template base
-        template_content = self._carregar_template(opcoes.template_latex)
-
-        # 3. Substituir placeholders do cabeçalho
-        titulo_com_tipo = f"{lista_dados['titulo']}-{opcoes.sufixo_versao}"
-        template_content = template_content.replace("[TITULO_LISTA]", escape_latex(titulo_com_tipo))
-
-        # Substituir placeholders específicos de templates
-        if opcoes.trimestre:
-            template_content = template_content.replace("[TRIMESTRE]", escape_latex(opcoes.trimestre))
-        if opcoes.professor:
-            template_content = template_content.replace("[PROFESSOR]", escape_latex(opcoes.professor))
-        if opcoes.disciplina:
-            template_content = template_content.replace("[DISCIPLINA]", escape_latex(opcoes.disciplina))
-        if opcoes.ano:
-            template_content = template_content.replace("[ANO]", escape_latex(opcoes.ano))
-
-        # Substituir placeholders específicos do template CEAB (simuladoCeab)
-        if opcoes.data_aplicacao:
-            template_content = template_content.replace("[DATA_APLICACAO]", escape_latex(opcoes.data_aplicacao))
-        if opcoes.serie_simulado:
-            template_content = template_content.replace("[SERIE_SIMULADO]", escape_latex(opcoes.serie_simulado))
-        if opcoes.unidade:
-            template_content = template_content.replace("[UNIDADE]", escape_latex(opcoes.unidade))
-        if opcoes.tipo_simulado:
-            template_content = template_content.replace("[TIPO_SIMULADO]", escape_latex(opcoes.tipo_simulado))
-
-        # Fórmulas
-        formulas = lista_dados.get('formulas', '') or ''
-        if formulas:
-            formulas_block = f"\\begin{{tcolorbox}}[colback=white, colframe=black, boxrule=0.5pt, title=Fórmulas, fonttitle=\\bfseries]\n{formulas}\n\\end{{tcolorbox}}\n\\vspace{{0.5cm}}"
-            template_content = template_content.replace("% [FORMULAS_AQUI]", formulas_block)
-        else:
-            template_content = template_content.replace("% [FORMULAS_AQUI]", "")
-
-        # 4. Randomizar a ORDEM das questões
-        questoes_originais = lista_dados.get('questoes', [])
         seed_ordem = indice_versao * 12345  # Seed diferente para cada versão
-        questoes_randomizadas = self._randomizar_ordem_questoes(questoes_originais, seed_ordem)
-
-        logger.info(f"TIPO {chr(65 + indice_versao)}: ordem das questões randomizada com seed {seed_ordem}")
+        questoes_randomizadas = self._randomizar_ordem_questoes(snapshot.questoes, seed_ordem)
+        logger.info(f"TIPO {rotulo_versao(indice_versao)}: ordem das questões randomizada com seed {seed_ordem}")
 
-        # 5. Gerar o bloco de questões
-        # Armazenar mapeamento de respostas para o gabarito
-        respostas_gabarito = {}
-
-        questoes_latex = []
+        entradas, respostas = [], []
         for i, questao in enumerate(questoes_randomizadas, 1):
-            # Verificar se a questão tem variantes
             codigo_questao = questao.get('codigo', '')
-            variantes = self._obter_variantes_questao(codigo_questao)
-            tem_variantes = len(variantes) > 0
-
             # Obter a versão cíclica da questão (original ou variante)
-            questao_para_usar = self._obter_versao_questao_ciclica(questao, indice_versao)
-
-            enunciado_raw = questao_para_usar.get('enunciado', '')
-            # Processar formatações
-            enunciado_com_tabelas = self._processar_tabelas_visuais(enunciado_raw)
-            enunciado_com_listas = self._processar_listas(enunciado_com_tabelas)
-            enunciado_com_alinhamento = self._processar_blocos_alinhamento(enunciado_com_listas)
-            enunciado_com_formatacao = self._processar_formatacoes_html(enunciado_com_alinhamento)
-            enunciado_escaped = self._escape_preservando_comandos(enunciado_com_formatacao)
-            enunciado = self._processar_imagens_inline(enunciado_escaped)
-            enunciado = self._processar_tabelas(enunciado)
-            fonte = questao_para_usar.get('fonte') or ''
-            ano = str(questao_para_usar.get('ano') or '')
-
-            # Cabeçalho da questão
-            if fonte and ano:
-                item = f"\\item \\textbf{{({fonte} - {ano})}} {enunciado}\n\n"
-            elif fonte:
-                item = f"\\item \\textbf{{({fonte})}} {enunciado}\n\n"
-            elif ano:
-                item = f"\\item \\textbf{{({ano})}} {enunciado}\n\n"
-            else:
-                item = f"\\item {enunciado}\n\n"
-
-            # Alternativas
+            questao_para_usar = self._obter_versao_questao_ciclica(questao, indice_versao, snapshot)
             alternativas = questao_para_usar.get('alternativas', [])
             resposta_atual = questao_para_usar.get('resposta') or 'N/A'
 
             # Se NÃO tem variantes, randomizar as alternativas para criar diferenciação
-            if alternativas and not tem_variantes and indice_versao > 0:
-                # Seed baseada na versão e índice da questão para consistência
+            if alternativas and not snapshot.tem_variantes(questao) and indice_versao > 0:
                 seed_alternativas = (indice_versao * 1000) + i
                 alternativas, resposta_atual = self._randomizar_alternativas_com_gabarito(
                     alternativas, resposta_atual, seed_alternativas
                 )
-                logger.info(f"Questão {i} sem variantes: alternativas randomizadas para TIPO {chr(65 + indice_versao)}")
 
-            # Armazenar resposta para o gabarito
-            respostas_gabarito[i] = resposta_atual
-
-            # Verificar configuração especial da questão (wallon_av2)
+            respostas.append(resposta_atual)
             config_questao = (opcoes.questoes_config or {}).get(codigo_questao, 'normal')
+            entradas.append((questao_para_usar, alternativas, config_questao))
+        return entradas, respostas
+
+    def _entradas_versao(self, opcoes: ExportOptionsDTO, snapshot: ExportSnapshot, indice_versao: int,
+                         plano: Optional[PlanoVersoes] = None) -> Tuple[List[tuple], List[str]]:
+        """Entradas e respostas de uma versão: pelo plano (gerado se ausente) ou pelo sorteio sem NumPy"""
+        if plano is None:
+            plano = self.planejar_versoes(
+                opcoes, max(opcoes.quantidade_versoes, indice_versao + 1), snapshot
+            )
+        if plano is not None:
+            return self._entradas_planejadas(opcoes, snapshot, plano, indice_versao)
+        return self._entradas_aleatorias(opcoes, snapshot, indice_versao)
+
+    def _gerar_conteudo_latex_randomizado(self, opcoes: ExportOptionsDTO, indice_versao: int,
+                                          contexto: Optional[ContextoExportacao] = None,
+                                          snapshot: Optional[ExportSnapshot] = None,
+                                          plano: Optional[PlanoVersoes] = None) -> str:
+        """
+        Gera o conteúdo LaTeX para uma versão randomizada específica.
 
-            if config_questao == '5linhas':
-                # Apenas enunciado + 5 linhas para resposta
-                item += "\\vspace{0.3cm}\n"
-                for _ in range(5):
-                    item += "\\noindent\\rule{\\linewidth}{0.4pt}\\vspace{0.2cm}\n"
-            elif config_questao == 'espaco_borda':
-                # Apenas enunciado + caixa com borda 16cm x 5cm
-                item += "\\vspace{0.3cm}\n"
-                item += "\\noindent\\begin{tcolorbox}[colback=white, colframe=black, boxrule=0.5pt, width=16cm, height=5cm]\n"
-                item += "\\end{tcolorbox}\n"
-            else:
-                # Normal: alternativas
-                if alternativas:
-                    item += "\\begin{enumerate}[label=\\Alph*)]\n"
-                    for alt in alternativas:
-                        texto_alt_raw = alt.get('texto', '')
-                        texto_alt_com_tabelas = self._processar_tabelas_visuais(texto_alt_raw)
-                        texto_alt_com_listas = self._processar_listas(texto_alt_com_tabelas)
-                        texto_alt_com_alinhamento = self._processar_blocos_alinhamento(texto_alt_com_listas)
-                        texto_alt_com_formatacao = self._processar_formatacoes_html(texto_alt_com_alinhamento)
-                        texto_alt_escaped = self._escape_preservando_comandos(texto_alt_com_formatacao)
-                        texto_alt = self._processar_imagens_inline(texto_alt_escaped, centralizar=False)
-                        texto_alt = self._processar_tabelas(texto_alt)
-                        item += f"    \\item {texto_alt}\n"
-                    item += "\\end{enumerate}\n"
-
-            item += "\\vspace{0.5cm}\n"
-            questoes_latex.append(item)
-
-        # Substituir placeholder de questões
-        questoes_block = "\n".join(questoes_latex)
-
-        if opcoes.layout_colunas == 2:
-            questoes_block = f"\\begin{{multicols}}{{2}}\n{questoes_block}\n\\end{{multicols}}"
-
-        template_content = template_content.replace("% [QUESTOES_AQUI]", questoes_block)
-
-        # 6. Gerar gabarito usando as respostas armazenadas (já ajustadas para alternativas randomizadas)
-        if opcoes.incluir_gabarito:
-            gabarito_latex = []
-            for i in range(1, len(questoes_randomizadas) + 1):
-                resposta = respostas_gabarito.get(i, 'N/A')
-                gabarito_latex.append(f"\\item Questão {i}: {escape_latex(str(resposta))}")
+        Lógica:
+        - A ORDEM das questões e das alternativas vem do plano de versões
+          (gabarito balanceado, sem sequências longas da mesma letra)
+        - Para cada questão, usa-se a versão cíclica (original, var1, var2, original, ...)
 
-            gabarito_block = "\n".join(gabarito_latex)
-            template_content = template_content.replace("% [GABARITO_AQUI]", gabarito_block)
-        else:
-            template_content = re.sub(
-                r'% ={10,}\s*\n% GABARITO \(opcional\)\s*\n% ={10,}\s*\n.*?\\end\{enumerate\}',
-                '',
-                template_content,
-                flags=re.DOTALL
-            )
+        Args:
+            opcoes: Opções de exportação
+            indice_versao: Índice da versão (0=A, 1=B, ...)
+            contexto: Progresso e cancelamento (opcional)
+            snapshot: Dados já carregados da lista (compartilhados entre as versões)
+            plano: Plano de todas as versões (gerado aqui se ausente)
 
-        # 7. Remover seção de resoluções
-        template_content = re.sub(
-            r'% ={10,}\s*\n% RESOLU[ÇC][ÕO]ES \(opcional\)\s*\n% ={10,}\s*\n.*?\\end\{enumerate\}',
-            '',
-            template_content,
-            flags=re.DOTALL
+        Returns:
+            Conteúdo LaTeX completo
+        """
+        # 1. Buscar dados da lista (se o snapshot não foi carregado pelo chamador)
+        if contexto:
+            contexto.etapa(ESTADO_BUSCANDO, opcoes.sufixo_versao or '')
+        if snapshot is None:
+            snapshot = self.carregar_snapshot(opcoes.id_lista)
+
+        # 2. Ordem, variantes e alternativas da versão
+        if contexto:
+            contexto.etapa(ESTADO_TRANSFORMANDO, opcoes.sufixo_versao or '')
+        entradas, respostas = self._entradas_versao(opcoes, snapshot, indice_versao, plano)
+
+        # 3. Apenas questões cujo conteúdo mudou são transformadas
+        questoes_latex = self._renderizar_questoes(entradas)
+
+        # 4. Gabarito com as respostas já ajustadas às alternativas da versão
+        gabarito_latex = [
+            f"\\item Questão {i}: {escape_latex(str(resposta))}"
+            for i, resposta in enumerate(respostas, 1)
+        ] if opcoes.incluir_gabarito else []
+
+        # 5. Montar o documento a partir do template
+        titulo_com_tipo = f"{snapshot.titulo}-{opcoes.sufixo_versao}"
+        return self._montar_documento(
+            opcoes, titulo_com_tipo, snapshot.formulas, questoes_latex, gabarito_latex
         )
 
-        return template_content
-
-    def exportar_lista_randomizada(self, opcoes: ExportOptionsDTO, indice_versao: int) -> Path:
+    @exportacao_medida(
+        lambda self, opcoes, *_, **__: f"{opcoes.id_lista} {opcoes.sufixo_versao} ({opcoes.template_latex})"
+    )
+    def exportar_lista_randomizada(self, opcoes: ExportOptionsDTO, indice_versao: int,
+                                   contexto: Optional[ContextoExportacao] = None,
+                                   snapshot: Optional[ExportSnapshot] = None) -> Path:
         """
         Exporta uma versão randomizada da lista.
 
         Args:
             opcoes: Opções de exportação com sufixo_versao definido
-            indice_versao: Índice da versão (0=A, 1=B, 2=C, 3=D)
+            indice_versao: Índice da versão (0=A, 1=B, ...)
+            contexto: Progresso e cancelamento (opcional)
+            snapshot: Dados já carregados da lista (compartilhados entre as versões)
 
         Returns:
-            Caminho do arquivo gerado
+            Caminho do arquivo gerado (copiado do cache de artefatos se nada mudou)
         """
         logger.info(f"Exportando versão randomizada {opcoes.sufixo_versao} da lista {opcoes.id_lista}")
 
-        latex_content = self._gerar_conteudo_latex_randomizado(opcoes, indice_versao)
+        if snapshot is None:
+            if contexto:
+                contexto.etapa(ESTADO_BUSCANDO, opcoes.sufixo_versao or '')
+            snapshot = self.carregar_snapshot(opcoes.id_lista)
+        base_filename = self._nome_arquivo_versao(opcoes, snapshot)
+        return self._exportar_com_cache(
+            opcoes, snapshot, base_filename,
+            lambda: self._gerar_artefato_versao(opcoes, indice_versao, snapshot, base_filename, contexto),
+            indice_versao
+        )
 
-        output_dir = Path(opcoes.output_dir)
-        lista_dados = services.lista.buscar_lista(opcoes.id_lista)
+    def _gerar_artefato_versao(self, opcoes: ExportOptionsDTO, indice_versao: int, snapshot: ExportSnapshot,
+                               base_filename: str, contexto: Optional[ContextoExportacao] = None) -> Path:
+        """Executa o pipeline completo de uma versão randomizada (sem o cache de artefatos)"""
+        if opcoes.motor_pdf == MOTOR_HTML:
+            return self._exportar_versao_html(opcoes, indice_versao, snapshot, contexto=contexto)
+        latex_content = self._gerar_conteudo_latex_randomizado(opcoes, indice_versao, contexto, snapshot)
 
-        # Nome do arquivo: "Nome da Lista-TIPO A"
-        titulo_sanitizado = lista_dados['titulo'].replace(' ', '_')
-        sufixo_sanitizado = opcoes.sufixo_versao.replace(' ', '_')
-        base_filename = f"{titulo_sanitizado}-{sufixo_sanitizado}"
+        output_dir = Path(opcoes.output_dir)
 
         if opcoes.tipo_exportacao == 'direta':
-            pdf_path = self.export_service.compilar_latex_para_pdf(latex_content, output_dir, base_filename)
+            pdf_path = self._compilar_com_diagnostico(
+                latex_content, output_dir, base_filename, opcoes, snapshot, contexto, indice_versao
+            )
             logger.info(f"PDF gerado: {pdf_path}")
             return pdf_path
         else:
             tex_path = output_dir / f"{base_filename}.tex"
-            tex_path.write_text(latex_content, encoding='utf-8')
+            with span(ETAPA_GRAVACAO, tex_path.name) as medido:
+                tex_path.write_text(latex_content, encoding='utf-8')
+                medido.registrar(bytes=len(latex_content.encode('utf-8')))
             return tex_path
+
+    def _exportar_versao_html(self, opcoes: ExportOptionsDTO, indice_versao: int, snapshot: ExportSnapshot,
+                              plano: Optional[PlanoVersoes] = None,
+                              contexto: Optional[ContextoExportacao] = None) -> Path:
+        """Exporta uma versão randomizada pelo motor HTML"""
+        if contexto:
+            contexto.etapa(ESTADO_TRANSFORMANDO, opcoes.sufixo_versao or '')
+        entradas, respostas = self._entradas_versao(opcoes, snapshot, indice_versao, plano)
+        documento = self._gerar_conteudo_html(
+            opcoes, f"{snapshot.titulo}-{opcoes.sufixo_versao}", snapshot.formulas, entradas, respostas
+        )
+        return self._exportar_html(opcoes, documento, self._nome_arquivo_versao(opcoes, snapshot), contexto)
+
+    def _exportar_versoes_html(self, opcoes: ExportOptionsDTO, quantidade: int, snapshot: ExportSnapshot,
+                               plano: Optional[PlanoVersoes],
+                               contexto: Optional[ContextoExportacao] = None) -> List[ResultadoVersao]:
+        """Versões pelo motor HTML, em sequência (cada impressão leva uma fração de segundo)"""
+        resultados = []
+        snapshot_hash = chave_snapshot(snapshot) if cache_artefatos_habilitado() else None
+        for indice in range(quantidade):
+            opcoes_versao = opcoes_da_versao(opcoes, quantidade, indice)
+            resultado = ResultadoVersao(indice=indice, sufixo=opcoes_versao.sufixo_versao)
+            inicio = time.perf_counter()
+            try:
+                resultado.caminho = self._exportar_com_cache(
+                    opcoes_versao, snapshot, self._nome_arquivo_versao(opcoes_versao, snapshot),
+                    lambda: self._exportar_versao_html(opcoes_versao, indice, snapshot, plano, contexto),
+                    indice, snapshot_hash
+                )
+            except ExportacaoCancelada:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao exportar {resultado.sufixo} (motor HTML): {e}", exc_info=True)
+                resultado.erro = str(e)
+            resultado.tempo_compilacao = time.perf_counter() - inicio
+            resultados.append(resultado)
+        return resultados
+
+    def _nome_arquivo_versao(self, opcoes: ExportOptionsDTO,
+                             snapshot: Optional[ExportSnapshot] = None) -> str:
+        """Nome base do arquivo de uma versão (ex: Nome_da_Lista-TIPO_A)"""
+        if snapshot is None:
+            snapshot = self.carregar_snapshot(opcoes.id_lista)
+        titulo_sanitizado = snapshot.titulo.replace(' ', '_')
+        sufixo_sanitizado = opcoes.sufixo_versao.replace(' ', '_')
+        return f"{titulo_sanitizado}-{sufixo_sanitizado}"
+
+    def exportar_gabarito_consolidado(self, opcoes: ExportOptionsDTO, plano: PlanoVersoes,
+                                      snapshot: ExportSnapshot) -> Path:
+        """
+        Grava o gabarito de todas as versões em um CSV (separador ';').
+
+        Uma linha por questão da lista com, para cada versão, a posição da
+        questão e a letra correta.
+
+        Returns:
+            Caminho do CSV (ex: Nome_da_Lista-GABARITOS.csv)
+        """
+        caminho = Path(opcoes.output_dir) / f"{snapshot.titulo.replace(' ', '_')}-GABARITOS.csv"
+        cabecalho = ['Questão', 'Código']
+        for versao in range(plano.quantidade):
+            rotulo = rotulo_versao(versao)
+            cabecalho += [f"TIPO {rotulo} nº", f"TIPO {rotulo}"]
+
+        with span(ETAPA_GRAVACAO, caminho.name):
+            with open(caminho, 'w', newline='', encoding='utf-8-sig') as arquivo:
+                escritor = csv.writer(arquivo, delimiter=';')
+                escritor.writerow(cabecalho)
+                for numero, (questao, linha) in enumerate(
+                        zip(snapshot.questoes, plano.gabarito_consolidado()), 1):
+                    celulas = [numero, questao['codigo']]
+                    for posicao, letra in linha:
+                        celulas += [posicao, letra or questao.get('resposta') or '']
+                    escritor.writerow(celulas)
+        logger.info(f"Gabarito consolidado de {plano.quantidade} versões: {caminho}")
+        return caminho
+
+    def _exportar_versoes_latex(self, opcoes: ExportOptionsDTO, quantidade: int, snapshot: ExportSnapshot,
+                                plano: Optional[PlanoVersoes], max_workers: Optional[int] = None,
+                                contexto: Optional[ContextoExportacao] = None) -> List[ResultadoVersao]:
+        """
+        Versões compiladas em paralelo; a primeira que falhar no pdflatex é diagnosticada.
+        Versões idênticas a uma exportação anterior vêm do cache de artefatos e não compilam.
+        """
+        por_indice: Dict[int, ResultadoVersao] = {}
+        chaves: Dict[int, Optional[str]] = {}
+        snapshot_hash = chave_snapshot(snapshot) if cache_artefatos_habilitado() else None
+        for indice in range(quantidade):
+            opcoes_versao = opcoes_da_versao(opcoes, quantidade, indice)
+            chaves[indice], caminho = self._artefato_guardado(
+                opcoes_versao, snapshot, self._nome_arquivo_versao(opcoes_versao, snapshot), indice, snapshot_hash
+            )
+            if caminho is not None:
+                por_indice[indice] = ResultadoVersao(indice=indice, sufixo=opcoes_versao.sufixo_versao, caminho=caminho)
+
+        faltando = [indice for indice in range(quantidade) if indice not in por_indice]
+        if por_indice:
+            logger.info(f"{len(por_indice)} de {quantidade} versões reaproveitadas do cache de artefatos")
+        if faltando:
+            orquestrador = ExportacaoParalela(
+                lambda opcoes_versao, indice: self._gerar_conteudo_latex_randomizado(
+                    opcoes_versao, indice, contexto, snapshot, plano
+                ),
+                lambda opcoes_versao: self._nome_arquivo_versao(opcoes_versao, snapshot),
+                max_workers, contexto, snapshot.metadados_imagens
+            )
+            for resultado in orquestrador.exportar(opcoes, quantidade, faltando):
+                por_indice[resultado.indice] = resultado
+                if resultado.sucesso and chaves[resultado.indice] is not None:
+                    get_cache_artefatos().gravar(chaves[resultado.indice], resultado.caminho)
+        resultados = [por_indice[indice] for indice in sorted(por_indice)]
+        falha = next((r for r in resultados if r.falha_compilacao), None)
+        if falha is not None and diagnostico_habilitado():
+            # As versões têm as mesmas questões: basta diagnosticar a primeira que falhou
+            opcoes_versao = opcoes_da_versao(opcoes, quantidade, falha.indice)
+            diagnostico = self._diagnostico_seguro(
+                opcoes_versao, snapshot, falha.indice, plano=plano, contexto=contexto
+            )
+            if diagnostico is not None:
+                falha.erro = f"{falha.erro}\n\n{diagnostico.resumo()}"
+        return resultados
+
+    @exportacao_medida(
+        lambda self, opcoes, quantidade, *_, **__: f"{opcoes.id_lista} {quantidade} versões ({opcoes.template_latex})"
+    )
+    def exportar_versoes(self, opcoes: ExportOptionsDTO, quantidade: int,
+                         max_workers: Optional[int] = None,
+                         contexto: Optional[ContextoExportacao] = None) -> List[ResultadoVersao]:
+        """
+        Exporta várias versões randomizadas, compilando-as em paralelo
+        (no motor HTML, impressas em sequência).
+
+        Args:
+            opcoes: Opções comuns às versões (sufixo_versao é definido por versão)
+            quantidade: Número de versões (1 a MAX_VERSOES)
+            max_workers: Processos de compilação (padrão: EXPORT_WORKERS ou núcleos)
+            contexto: Progresso e cancelamento (compila em threads para compartilhá-lo)
+
+        Returns:
+            Resultado de cada versão (caminho ou erro e tempos) seguido do
+            gabarito consolidado (CSV) quando o plano de versões foi gerado
+        """
+        quantidade = max(1, min(quantidade, MAX_VERSOES))
+        logger.info(f"Exportando {quantidade} versões da lista {opcoes.id_lista} em paralelo")
+        if contexto:
+            contexto.etapa(ESTADO_BUSCANDO)
+        # Uma única carga do banco e um único plano para todas as versões
+        snapshot = self.carregar_snapshot(opcoes.id_lista)
+        plano = self.planejar_versoes(opcoes, quantidade, snapshot)
+        if opcoes.motor_pdf == MOTOR_HTML:
+            resultados = self._exportar_versoes_html(opcoes, quantidade, snapshot, plano, contexto)
+        else:
+            resultados = self._exportar_versoes_latex(opcoes, quantidade, snapshot, plano, max_workers, contexto)
+        if plano is not None:
+            resultado = ResultadoVersao(indice=quantidade, sufixo="GABARITOS")
+            try:
+                resultado.caminho = self.exportar_gabarito_consolidado(opcoes, plano, snapshot)
+            except OSError as e:
+                logger.error(f"Erro ao gravar o gabarito consolidado: {e}")
+                resultado.erro = str(e)
+            resultados.append(resultado)
+        medicao = medicao_atual()
+        erros = [f"{r.sufixo}: {r.erro}" for r in resultados if r.erro]
+        if medicao and erros:
+            medicao.relatorio.sucesso = False
+            medicao.relatorio.erro = "; ".join(erros)
+        return resultados
@@ -296,6 +296,23 @@ class QuestaoControllerORM:
             print(f"Erro ao listar questões principais: {e}")
             return []
 
+    @staticmethod
+    def contar_facetas(filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[Any, int]]:
+        """
+        Conta as questões de cada opção dos menus de filtro sob a seleção atual.
+
+        Args:
+            filtros: Dict com filtros (mesmo formato de listar_questoes_principais)
+
+        Returns:
+            Dict faceta -> {valor: contagem}
+        """
+        try:
+            return services.questao.contar_facetas(filtros)
+        except Exception as e:
+            print(f"Erro ao contar facetas: {e}")
+            return {}
+
     @staticmethod
     def listar_variantes(codigo: str) -> List[Dict[str, Any]]:
         """
@@ -363,3 +380,38 @@ class QuestaoControllerORM:
         except Exception as e:
             print(f"Erro ao contar variantes: {e}")
             return 0
+
+    @staticmethod
+    def verificar_duplicatas(enunciado: str, limiar: float = 0.7) -> List[Dict[str, Any]]:
+        """
+        Busca questões com enunciado parecido (prováveis duplicatas)
+
+        Args:
+            enunciado: Texto do enunciado
+            limiar: Similaridade mínima (0 a 1)
+
+        Returns:
+            Lista de dicts com codigo, uuid, titulo e similaridade
+        """
+        try:
+            return services.questao.verificar_duplicatas(enunciado, limiar)
+        except Exception as e:
+            print(f"Erro ao verificar duplicatas: {e}")
+            return []
+
+    @staticmethod
+    def relatorio_duplicatas(limiar: float = 0.7) -> List[Dict[str, Any]]:
+        """
+        Gera o relatório de clusters de prováveis duplicatas de todo o banco
+
+        Args:
+            limiar: Similaridade mínima (0 a 1)
+
+        Returns:
+            Lista de clusters {'total', 'questoes'}
+        """
+        try:
+            return services.questao.relatorio_duplicatas(limiar)
+        except Exception as e:
+            print(f"Erro ao gerar relatório de duplicatas: {e}")
+            return []
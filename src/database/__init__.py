@@ -1,6 +1,6 @@
 """
 Módulo de gerenciamento de banco de dados
 """
-from .session_manager import SessionManager, session_manager
+from .session_manager import SessionManager, session_manager, executar_apos_commit
 
-__all__ = ['SessionManager', 'session_manager']
+__all__ = ['SessionManager', 'session_manager', 'executar_apos_commit']
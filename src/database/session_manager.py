@@ -1,12 +1,56 @@
 """
 Gerenciador de Sessões do SQLAlchemy
 """
+import logging
 import os
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from typing import Callable
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from src.models.orm import Base
 
+logger = logging.getLogger(__name__)
+
+# Chave em Session.info com as ações agendadas para depois do commit
+_ACOES_APOS_COMMIT = 'acoes_apos_commit'
+
+
+def executar_apos_commit(session: Session, acao: Callable[[], None]) -> None:
+    """
+    Agenda uma ação para depois do commit da transação atual da sessão; no
+    rollback ela é descartada. Usado para corrigir índices em memória apenas
+    com dados confirmados.
+
+    A ação roda fora de transação e não deve acessar o banco (capture os
+    valores necessários ao agendar).
+
+    Args:
+        session: Sessão SQLAlchemy
+        acao: Função sem argumentos
+    """
+    pendentes = session.info.get(_ACOES_APOS_COMMIT)
+    if pendentes is None:
+        pendentes = session.info[_ACOES_APOS_COMMIT] = []
+        event.listen(session, 'after_commit', _executar_pendentes)
+        event.listen(session, 'after_rollback', _descartar_pendentes)
+    pendentes.append(acao)
+
+
+def _executar_pendentes(session: Session) -> None:
+    pendentes = session.info.get(_ACOES_APOS_COMMIT, [])
+    acoes = list(pendentes)
+    pendentes.clear()
+    for acao in acoes:
+        try:
+            acao()
+        except Exception:
+            # O commit já aconteceu: um índice desatualizado não deve derrubar a operação
+            logger.exception("Erro em ação agendada para depois do commit")
+
+
+def _descartar_pendentes(session: Session) -> None:
+    session.info.get(_ACOES_APOS_COMMIT, []).clear()
+
 
 class SessionManager:
     """Gerenciador singleton de sessões do SQLAlchemy"""
@@ -29,6 +73,7 @@ class SessionManager:
         """Inicializa engine e session factory"""
         # Determinar caminho do banco
         db_path = os.getenv('DATABASE_PATH', 'database/sistema_questoes_v2.db')
+        self._db_path = db_path
 
         # Criar engine
         self._engine = create_engine(
@@ -50,6 +95,11 @@ class SessionManager:
         """Retorna a engine"""
         return self._engine
 
+    @property
+    def database_path(self) -> str:
+        """Caminho do arquivo SQLite (índices auxiliares são gravados ao lado dele)"""
+        return self._db_path
+
     def create_session(self) -> Session:
         """
         Cria uma nova sessão
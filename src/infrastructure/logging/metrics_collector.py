@@ -2,7 +2,7 @@
 """Coletor de métricas de uso da aplicação."""
 
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from threading import Lock
 import time
 
@@ -15,6 +15,30 @@ except ImportError:
 from .machine_id import get_machine_id, get_app_version
 
 
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil p (0-100) com interpolação linear; 0.0 para lista vazia."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def resumir_tempos(times: List[float]) -> Dict[str, float]:
+    """Contagem, mínimo, máximo, média e percentis de uma lista de tempos (ms)."""
+    return {
+        "count": len(times),
+        "min_ms": round(min(times), 2),
+        "max_ms": round(max(times), 2),
+        "avg_ms": round(sum(times) / len(times), 2),
+        "p50_ms": round(percentil(times, 50), 2),
+        "p90_ms": round(percentil(times, 90), 2),
+        "p99_ms": round(percentil(times, 99), 2),
+    }
+
+
 class MetricsCollector:
     """Coletor de métricas de uso."""
     
@@ -90,6 +114,20 @@ class MetricsCollector:
     def time_operation(self, operation: str):
         """Context manager para medir tempo de uma operação."""
         return self.TimingContext(self, operation)
+
+    def timing_stats(self, prefix: str = "") -> Dict[str, Dict[str, float]]:
+        """Estatísticas (com percentis) das operações da sessão, opcionalmente filtradas por prefixo."""
+        with self._lock:
+            return {
+                op: resumir_tempos(times)
+                for op, times in self._timings.items()
+                if times and op.startswith(prefix)
+            }
+
+    def counters(self, prefix: str = "") -> Dict[str, int]:
+        """Contadores da sessão, opcionalmente filtrados por prefixo."""
+        with self._lock:
+            return {name: value for name, value in self._counters.items() if name.startswith(prefix)}
     
     def end_session(self) -> bool:
         """Encerra a sessão e envia métricas para MongoDB."""
@@ -105,15 +143,9 @@ class MetricsCollector:
                 session_end = datetime.now(timezone.utc)
                 duration = (session_end - self._session_start).total_seconds()
                 
-                timing_stats = {}
-                for op, times in self._timings.items():
-                    if times:
-                        timing_stats[op] = {
-                            "count": len(times),
-                            "min_ms": round(min(times), 2),
-                            "max_ms": round(max(times), 2),
-                            "avg_ms": round(sum(times) / len(times), 2),
-                        }
+                timing_stats = {
+                    op: resumir_tempos(times) for op, times in self._timings.items() if times
+                }
                 
                 doc = {
                     "timestamp": session_end,
@@ -4,6 +4,7 @@
 import sys
 import logging
 import atexit
+import multiprocessing
 import os
 from pathlib import Path
 
@@ -143,6 +144,10 @@ def setup_database() -> bool:
             from src.models.orm import TipoQuestao
             session.query(TipoQuestao).first()
 
+            # Índice de uso das questões (cria e preenche em bancos antigos)
+            from src.repositories import QuestaoUsoRepository
+            QuestaoUsoRepository(session).garantir_indice()
+
         logger.info("Conexão com banco de dados ORM validada")
         return True
 
@@ -274,6 +279,8 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos da exportação paralela em executáveis congelados
+    multiprocessing.freeze_support()
     try:
         exit_code = main()
         sys.exit(exit_code)
@@ -15,6 +15,7 @@ from .lista import Lista
 from .questao_tag import QuestaoTag
 from .lista_questao import ListaQuestao
 from .questao_versao import QuestaoVersao
+from .questao_uso import QuestaoUso
 from .codigo_generator import CodigoGenerator
 from .disciplina import Disciplina
 from .nivel_escolar import NivelEscolar
@@ -37,6 +38,7 @@ __all__ = [
     'QuestaoTag',
     'ListaQuestao',
     'QuestaoVersao',
+    'QuestaoUso',
     'CodigoGenerator',
     "Disciplina",
     "NivelEscolar",
@@ -1,7 +1,7 @@
 """
 Tabela de relacionamento Lista-Questão (N:N com ordem)
 """
-from sqlalchemy import Column, Text, ForeignKey, Integer, DateTime
+from sqlalchemy import Column, Text, ForeignKey, Integer, DateTime, Index
 from datetime import datetime
 from .base import Base
 
@@ -12,6 +12,10 @@ class ListaQuestao(Base):
     Permite ordem customizada
     """
     __tablename__ = 'lista_questao'
+    __table_args__ = (
+        # A PK começa por uuid_lista; consultas de uso partem da questão
+        Index('ix_lista_questao_questao_data', 'uuid_questao', 'data_adicao'),
+    )
 
     uuid_lista = Column(Text, ForeignKey('lista.uuid'), primary_key=True)
     uuid_questao = Column(Text, ForeignKey('questao.uuid'), primary_key=True)
@@ -44,6 +44,7 @@ class Questao(BaseModel):
     # Relationships 1:N
     alternativas = relationship("Alternativa", back_populates="questao", cascade="all, delete-orphan")
     resposta = relationship("RespostaQuestao", back_populates="questao", uselist=False, cascade="all, delete-orphan")
+    uso = relationship("QuestaoUso", back_populates="questao", uselist=False)
 
     # Relationships N:N
     tags = relationship("Tag", secondary="questao_tag", back_populates="questoes")
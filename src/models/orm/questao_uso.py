@@ -0,0 +1,27 @@
+"""
+Índice desnormalizado de uso das questões em listas
+"""
+from sqlalchemy import Column, Text, ForeignKey, Integer, DateTime
+from sqlalchemy.orm import relationship
+from .base import Base
+
+
+class QuestaoUso(Base):
+    """
+    Resumo de uso de cada questão em listas ativas
+
+    Mantido pelo ListaRepository (adicionar/remover questão, desativar lista)
+    e preenchido uma única vez por QuestaoUsoRepository.backfill().
+    """
+    __tablename__ = 'questao_uso'
+
+    uuid_questao = Column(Text, ForeignKey('questao.uuid'), primary_key=True)
+    total_usos = Column(Integer, nullable=False, default=0, index=True)
+    data_ultimo_uso = Column(DateTime, nullable=True, index=True)
+    uuid_ultima_lista = Column(Text, ForeignKey('lista.uuid'), nullable=True)
+
+    questao = relationship("Questao", back_populates="uso")
+    ultima_lista = relationship("Lista")
+
+    def __repr__(self):
+        return f"<QuestaoUso(questao={self.uuid_questao[:8]}, usos={self.total_usos})>"
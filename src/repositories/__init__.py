@@ -12,6 +12,7 @@ from .imagem_repository import ImagemRepository
 from .fonte_questao_repository import FonteQuestaoRepository
 from .ano_referencia_repository import AnoReferenciaRepository
 from .tipo_questao_repository import TipoQuestaoRepository
+from .questao_uso_repository import QuestaoUsoRepository, RecalculoUsoError
 
 __all__ = [
     'BaseRepository',
@@ -25,4 +26,6 @@ __all__ = [
     'FonteQuestaoRepository',
     'AnoReferenciaRepository',
     'TipoQuestaoRepository',
+    'QuestaoUsoRepository',
+    'RecalculoUsoError',
 ]
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from src.infrastructure.logging import get_audit_logger, get_metrics_collector
 from src.models.orm import Lista, Questao, Tag, CodigoGenerator
 from .base_repository import BaseRepository
+from .questao_uso_repository import QuestaoUsoRepository, RecalculoUsoError
 
 class ListaRepository(BaseRepository[Lista]):
     def __init__(self, session: Session):
@@ -13,6 +14,7 @@ class ListaRepository(BaseRepository[Lista]):
         self._audit = get_audit_logger()
         self._metrics = get_metrics_collector()
         self._logger = logging.getLogger(__name__)
+        self._uso_repo = QuestaoUsoRepository(session)
     
     def buscar_por_codigo(self, codigo: str) -> Optional[Lista]:
         return self.session.query(Lista).filter_by(codigo=codigo, ativo=True).first()
@@ -59,6 +61,7 @@ class ListaRepository(BaseRepository[Lista]):
             questao = self.session.query(Questao).filter_by(codigo=codigo_questao, ativo=True).first()
             if lista and questao:
                 lista.adicionar_questao(self.session, questao, ordem)
+                self._uso_repo.recalcular([questao.uuid])
                 if self._audit:
                     self._audit.lista_editada(
                         lista_id=str(lista.uuid),
@@ -68,6 +71,9 @@ class ListaRepository(BaseRepository[Lista]):
                     self._metrics.increment("lista_questoes_adicionadas")
                 return True
             return False
+        except RecalculoUsoError:
+            # Propaga para desfazer a transação em vez de deixar questao_uso defasado
+            raise
         except Exception as e:
             self._logger.error(f"Erro ao adicionar questão à lista: {e}", exc_info=True)
             if self._metrics:
@@ -80,6 +86,7 @@ class ListaRepository(BaseRepository[Lista]):
             questao = self.session.query(Questao).filter_by(codigo=codigo_questao).first()
             if lista and questao:
                 lista.remover_questao(self.session, questao)
+                self._uso_repo.recalcular([questao.uuid])
                 if self._audit:
                     self._audit.lista_editada(
                         lista_id=str(lista.uuid),
@@ -89,6 +96,9 @@ class ListaRepository(BaseRepository[Lista]):
                     self._metrics.increment("lista_questoes_removidas")
                 return True
             return False
+        except RecalculoUsoError:
+            # Propaga para desfazer a transação em vez de deixar questao_uso defasado
+            raise
         except Exception as e:
             self._logger.error(f"Erro ao remover questão da lista: {e}", exc_info=True)
             if self._metrics:
@@ -115,21 +125,50 @@ class ListaRepository(BaseRepository[Lista]):
                 self._metrics.increment("erros_lista_questoes_reordenadas")
             return False
     
-    def remover(self, uuid: str) -> bool:
+    def desativar(self, uuid: str) -> bool:
         """
-        Remove uma lista por UUID e registra na auditoria.
+        Desativa uma lista (soft delete) e atualiza o uso das suas questões.
         Sobrescreve o método da BaseRepository.
         """
         try:
             lista = self.buscar_por_uuid(uuid)
             if lista:
-                super().remover(uuid) # Chama o remover da BaseRepository
+                lista.ativo = False
+                self.session.flush()
+                self._uso_repo.recalcular_lista(uuid)
+                if self._audit:
+                    self._audit.lista_deletada(lista_id=str(lista.uuid), titulo=lista.titulo)
+                if self._metrics:
+                    self._metrics.increment("listas_deletadas")
+                return True
+            return False
+        except RecalculoUsoError:
+            raise
+        except Exception as e:
+            self._logger.error(f"Erro ao desativar lista: {e}", exc_info=True)
+            if self._metrics:
+                self._metrics.increment("erros_listas_deletadas")
+            return False
+
+    def remover(self, uuid: str) -> bool:
+        """
+        Remove uma lista por UUID (hard delete), atualiza o uso das suas
+        questões e registra na auditoria.
+        """
+        try:
+            lista = self.buscar_por_uuid(uuid)
+            if lista:
+                uuids_questoes = [questao.uuid for questao in lista.questoes]
+                super().deletar(uuid)
+                self._uso_repo.recalcular(uuids_questoes)
                 if self._audit:
                     self._audit.lista_deletada(lista_id=str(lista.uuid), titulo=lista.titulo)
                 if self._metrics:
                     self._metrics.increment("listas_deletadas")
                 return True
             return False
+        except RecalculoUsoError:
+            raise
         except Exception as e:
             self._logger.error(f"Erro ao remover lista por UUID: {e}", exc_info=True)
             if self._metrics:
@@ -3,12 +3,13 @@ Repository para operações com Questões
 """
 import logging
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from sqlalchemy import and_, or_
 
 from src.infrastructure.logging import get_audit_logger, get_metrics_collector
 from src.models.orm import Questao, Tag, FonteQuestao, AnoReferencia, Dificuldade, TipoQuestao, CodigoGenerator
 from .base_repository import BaseRepository
+from .questao_uso_repository import QuestaoUsoRepository, ordenar_por_uso
 
 
 class QuestaoRepository(BaseRepository[Questao]):
@@ -638,19 +639,98 @@ class QuestaoRepository(BaseRepository[Questao]):
             QuestaoVersao.uuid_questao_versao == uuid_questao
         ).first() is not None
 
+    def buscar_por_uuids(self, uuids: List[str], tamanho_lote: int = 500) -> List[Questao]:
+        """
+        Busca questões por uma lista de UUIDs (em lotes, respeitando o limite
+        de parâmetros do SQLite)
+
+        Args:
+            uuids: UUIDs das questões
+            tamanho_lote: Quantidade de UUIDs por consulta
+
+        Returns:
+            Lista de questões
+        """
+        questoes = []
+        for inicio in range(0, len(uuids), tamanho_lote):
+            lote = uuids[inicio:inicio + tamanho_lote]
+            questoes.extend(self.session.query(Questao).filter(Questao.uuid.in_(lote)).all())
+        return questoes
+
+    def buscar_uuids_por_texto(self, texto: str) -> List[str]:
+        """
+        Busca UUIDs de questões ativas cujo título ou enunciado contém o texto
+
+        Args:
+            texto: Texto para buscar
+
+        Returns:
+            Lista de UUIDs
+        """
+        termo = f"%{texto}%"
+        return [
+            uuid for (uuid,) in self.session.query(Questao.uuid).filter(
+                Questao.ativo == True,
+                or_(Questao.titulo.ilike(termo), Questao.enunciado.ilike(termo))
+            )
+        ]
+
+    def mapa_fontes(self) -> Dict[str, str]:
+        """
+        Retorna {sigla: uuid} de todas as fontes (o índice de facetas indexa
+        a fonte pelo UUID e os filtros da tela usam a sigla)
+        """
+        return dict(self.session.query(FonteQuestao.sigla, FonteQuestao.uuid).all())
+
     def listar_questoes_principais(self, filtros: Optional[Dict[str, Any]] = None) -> List[Questao]:
         """
         Lista apenas questões que NÃO são variantes de outras.
 
+        As facetas (fonte, ano, dificuldade, tipo, tags) são resolvidas pelo
+        índice de bitmaps em memória; a busca textual continua no SQL. Sem
+        NumPy, cai para a consulta SQL com joins.
+
         Args:
             filtros: Dicionário com filtros opcionais
                 - filter_mode: 'AND' ou 'OR' (default 'AND')
                 - fonte: string ou lista de strings (siglas)
                 - dificuldade, tipo, tags, titulo: filtros padrão
+                - nunca_usadas, nao_usadas_desde, max_usos, fora_das_ultimas_listas:
+                  filtros de uso (ver QuestaoUsoRepository.aplicar_filtros)
+                - ordenar_por: 'menos_recentes', 'mais_recentes', 'mais_usadas' ou 'menos_usadas'
 
         Returns:
             Lista de questões principais (não variantes)
         """
+        from src.services.facet_index import get_facet_index, expressao_de_filtros
+
+        indice = get_facet_index()
+        if indice is None:
+            return self._listar_questoes_principais_sql(filtros)
+
+        if self._metrics:
+            self._metrics.increment('questao_facet_queries')
+
+        uuids_texto = None
+        if filtros and filtros.get('titulo'):
+            uuids_texto = self.buscar_uuids_por_texto(filtros['titulo'])
+        fontes = self.mapa_fontes() if filtros and filtros.get('fonte') else None
+        uuids = indice.filtrar(expressao_de_filtros(filtros, uuids_texto, fontes))
+
+        # Filtros de uso (nunca usadas, sem uso desde...) são resolvidos no SQL via questao_uso
+        questoes = []
+        for inicio in range(0, len(uuids), 500):
+            query = self.session.query(Questao).filter(Questao.uuid.in_(uuids[inicio:inicio + 500]))
+            query = QuestaoUsoRepository.aplicar_filtros(query, filtros, self.session)
+            questoes.extend(query.options(contains_eager(Questao.uso)).all())
+
+        return ordenar_por_uso(questoes, (filtros or {}).get('ordenar_por'))
+
+    def _listar_questoes_principais_sql(self, filtros: Optional[Dict[str, Any]] = None) -> List[Questao]:
+        """
+        Versão SQL de listar_questoes_principais (joins por filtro + DISTINCT),
+        usada quando o índice de facetas não está disponível.
+        """
         from src.models.orm import QuestaoVersao
         from sqlalchemy import not_, exists
 
@@ -745,4 +825,6 @@ class QuestaoRepository(BaseRepository[Questao]):
                 # Distinct para evitar duplicatas com joins
                 query = query.distinct()
 
-        return query.all()
+        query = QuestaoUsoRepository.aplicar_filtros(query, filtros, self.session)
+        questoes = query.options(contains_eager(Questao.uso)).all()
+        return ordenar_por_uso(questoes, (filtros or {}).get('ordenar_por'))
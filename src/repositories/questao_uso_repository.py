@@ -0,0 +1,238 @@
+"""Repository para o índice de uso das questões (tabela questao_uso)"""
+import logging
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from src.infrastructure.logging import get_metrics_collector
+from src.models.orm import QuestaoUso, ListaQuestao, Lista, Questao
+from .base_repository import BaseRepository
+
+
+class RecalculoUsoError(RuntimeError):
+    """Falha ao recalcular questao_uso; a transação deve ser desfeita"""
+
+
+class QuestaoUsoRepository(BaseRepository[QuestaoUso]):
+    """
+    Mantém a tabela questao_uso (total de usos, data e lista do último uso)
+    a partir de lista_questao, considerando apenas listas ativas.
+    """
+
+    # Limite de parâmetros por consulta IN no SQLite
+    _TAMANHO_LOTE = 500
+
+    def __init__(self, session: Session):
+        super().__init__(QuestaoUso, session)
+        self._metrics = get_metrics_collector()
+        self._logger = logging.getLogger(__name__)
+
+    def _consulta_agregada(self):
+        # No SQLite, uma coluna "solta" junto de MAX() vem da mesma linha do máximo,
+        # o que dá a última lista sem uma segunda consulta
+        return self.session.query(
+            ListaQuestao.uuid_questao,
+            func.count(ListaQuestao.uuid_lista),
+            func.max(ListaQuestao.data_adicao),
+            ListaQuestao.uuid_lista
+        ).join(Lista, Lista.uuid == ListaQuestao.uuid_lista).filter(
+            Lista.ativo == True
+        ).group_by(ListaQuestao.uuid_questao)
+
+    def recalcular(self, uuids_questoes: Iterable[str]) -> int:
+        """
+        Recalcula o uso das questões informadas.
+
+        Args:
+            uuids_questoes: UUIDs das questões afetadas
+
+        Returns:
+            Quantidade de questões recalculadas
+
+        Raises:
+            RecalculoUsoError: Se o recálculo falhar (o índice ficaria defasado)
+        """
+        uuids = list(dict.fromkeys(uuids_questoes))
+        if not uuids:
+            return 0
+        try:
+            self.session.flush()
+            for inicio in range(0, len(uuids), self._TAMANHO_LOTE):
+                lote = uuids[inicio:inicio + self._TAMANHO_LOTE]
+                agregados = {
+                    uuid: (total, data, uuid_lista)
+                    for uuid, total, data, uuid_lista in self._consulta_agregada().filter(
+                        ListaQuestao.uuid_questao.in_(lote)
+                    )
+                }
+                existentes = {
+                    uso.uuid_questao: uso for uso in self.session.query(QuestaoUso).filter(
+                        QuestaoUso.uuid_questao.in_(lote)
+                    )
+                }
+                for uuid in lote:
+                    total, data, uuid_lista = agregados.get(uuid, (0, None, None))
+                    uso = existentes.get(uuid)
+                    if uso is None:
+                        uso = QuestaoUso(uuid_questao=uuid)
+                        self.session.add(uso)
+                    uso.total_usos = total
+                    uso.data_ultimo_uso = data
+                    uso.uuid_ultima_lista = uuid_lista
+            self.session.flush()
+            if self._metrics:
+                self._metrics.increment("questao_uso_recalculos", len(uuids))
+            return len(uuids)
+        except Exception as e:
+            self._logger.error(f"Erro ao recalcular uso de questões: {e}", exc_info=True)
+            if self._metrics:
+                self._metrics.increment("erros_questao_uso_recalculos")
+            raise RecalculoUsoError(f"Erro ao recalcular uso de questões: {e}") from e
+
+    def recalcular_lista(self, uuid_lista: str) -> int:
+        """
+        Recalcula o uso de todas as questões de uma lista (ex: lista desativada).
+
+        Args:
+            uuid_lista: UUID da lista
+
+        Returns:
+            Quantidade de questões recalculadas
+        """
+        uuids = [
+            uuid for (uuid,) in self.session.query(ListaQuestao.uuid_questao).filter(
+                ListaQuestao.uuid_lista == uuid_lista
+            )
+        ]
+        return self.recalcular(uuids)
+
+    def backfill(self) -> int:
+        """
+        Reconstrói a tabela inteira a partir de lista_questao (uma consulta agregada).
+
+        Returns:
+            Quantidade de questões com pelo menos um uso
+        """
+        try:
+            self.session.query(QuestaoUso).delete(synchronize_session=False)
+            total = 0
+            for uuid, usos, data, uuid_lista in self._consulta_agregada():
+                self.session.add(QuestaoUso(
+                    uuid_questao=uuid,
+                    total_usos=usos,
+                    data_ultimo_uso=data,
+                    uuid_ultima_lista=uuid_lista
+                ))
+                total += 1
+            self.session.flush()
+            self._logger.info(f"Índice questao_uso preenchido: {total} questões com uso")
+            return total
+        except Exception as e:
+            self._logger.error(f"Erro ao preencher questao_uso: {e}", exc_info=True)
+            return 0
+
+    def garantir_indice(self) -> bool:
+        """
+        Cria a tabela questao_uso e os índices auxiliares em bancos existentes
+        e faz o backfill na primeira execução.
+
+        Returns:
+            True se o backfill foi executado agora
+        """
+        bind = self.session.get_bind()
+        QuestaoUso.__table__.create(bind, checkfirst=True)
+        for indice in list(ListaQuestao.__table__.indexes) + list(QuestaoUso.__table__.indexes):
+            indice.create(bind, checkfirst=True)
+
+        if self.session.query(QuestaoUso).first() is not None:
+            return False
+        if self.session.query(ListaQuestao).first() is None:
+            return False
+        self.backfill()
+        return True
+
+    def buscar_por_questao(self, uuid_questao: str) -> Optional[QuestaoUso]:
+        """Retorna o resumo de uso de uma questão (None se nunca usada)"""
+        return self.session.query(QuestaoUso).filter_by(uuid_questao=uuid_questao).first()
+
+    @staticmethod
+    def aplicar_filtros(query, filtros: Optional[dict], session: Session):
+        """
+        Aplica filtros de uso a uma consulta de Questao (faz outerjoin com questao_uso).
+
+        Filtros reconhecidos:
+            - nunca_usadas: True para apenas questões sem uso
+            - nao_usadas_desde: datetime; sem uso desde a data (inclui nunca usadas)
+            - max_usos: número máximo de usos
+            - fora_das_ultimas_listas: N; exclui questões das N listas ativas mais recentes
+
+        Args:
+            query: Consulta sobre Questao
+            filtros: Dict de filtros
+            session: Sessão (para subconsultas)
+
+        Returns:
+            Consulta filtrada
+        """
+        query = query.outerjoin(QuestaoUso, QuestaoUso.uuid_questao == Questao.uuid)
+        if not filtros:
+            return query
+
+        if filtros.get('nunca_usadas'):
+            query = query.filter(or_(QuestaoUso.uuid_questao == None, QuestaoUso.total_usos == 0))
+
+        if filtros.get('nao_usadas_desde'):
+            query = query.filter(or_(
+                QuestaoUso.data_ultimo_uso == None,
+                QuestaoUso.data_ultimo_uso < filtros['nao_usadas_desde']
+            ))
+
+        if filtros.get('max_usos') is not None:
+            query = query.filter(func.coalesce(QuestaoUso.total_usos, 0) <= filtros['max_usos'])
+
+        if filtros.get('fora_das_ultimas_listas'):
+            ultimas_listas = session.query(Lista.uuid).filter(Lista.ativo == True).order_by(
+                Lista.data_criacao.desc()
+            ).limit(int(filtros['fora_das_ultimas_listas'])).subquery()
+            usadas = session.query(ListaQuestao.uuid_questao).filter(
+                ListaQuestao.uuid_lista.in_(ultimas_listas.select())
+            )
+            query = query.filter(~Questao.uuid.in_(usadas))
+
+        return query
+
+
+# Chaves de ordenação por uso aceitas em filtros['ordenar_por']
+ORDENACOES_USO = ('menos_recentes', 'mais_recentes', 'mais_usadas', 'menos_usadas')
+
+
+def ordenar_por_uso(questoes: List[Questao], ordenar_por: Optional[str]) -> List[Questao]:
+    """
+    Ordena questões (com 'uso' carregado) por uma chave de uso.
+
+    'menos_recentes' coloca as nunca usadas primeiro.
+
+    Args:
+        questoes: Lista de questões
+        ordenar_por: Uma das ORDENACOES_USO (outros valores não alteram a ordem)
+
+    Returns:
+        Lista ordenada
+    """
+    if ordenar_por not in ORDENACOES_USO:
+        return questoes
+
+    def total(q):
+        return q.uso.total_usos if q.uso else 0
+
+    def timestamp(q):
+        return q.uso.data_ultimo_uso.timestamp() if q.uso and q.uso.data_ultimo_uso else 0.0
+
+    if ordenar_por == 'menos_recentes':
+        return sorted(questoes, key=timestamp)
+    if ordenar_por == 'mais_recentes':
+        return sorted(questoes, key=timestamp, reverse=True)
+    if ordenar_por == 'mais_usadas':
+        return sorted(questoes, key=total, reverse=True)
+    return sorted(questoes, key=total)
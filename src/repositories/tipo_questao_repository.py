@@ -1,5 +1,5 @@
 """Repository para Tipos de Questões"""
-from typing import Optional
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from src.models.orm import TipoQuestao
 from .base_repository import BaseRepository
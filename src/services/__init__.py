@@ -6,6 +6,7 @@ from .questao_service import QuestaoService
 from .lista_service import ListaService
 from .tag_service import TagService
 from .alternativa_service import AlternativaService
+from .autocomplete_index import AutocompleteIndex, get_autocomplete_index
 
 __all__ = [
     'services',
@@ -13,4 +14,6 @@ __all__ = [
     'ListaService',
     'TagService',
     'AlternativaService',
+    'AutocompleteIndex',
+    'get_autocomplete_index',
 ]
@@ -0,0 +1,404 @@
+"""
+Índice de prefixos em memória para auto-complete e "ir para"
+
+Mantém arrays ordenados com as chaves normalizadas (sem acento, casefold) de
+códigos e títulos de questões, siglas de fontes, nomes/caminhos de tags e
+títulos de listas. As consultas usam bisect, portanto custam O(log n + k).
+
+O índice é construído uma única vez a partir do banco e depois corrigido
+incrementalmente pelos services nas operações de escrita, após o commit
+(executar_apos_commit), para não exibir dados de transações desfeitas.
+"""
+import bisect
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Categorias indexadas
+CATEGORIA_QUESTAO = 'questao'
+CATEGORIA_FONTE = 'fonte'
+CATEGORIA_TAG = 'tag'
+CATEGORIA_LISTA = 'lista'
+
+CATEGORIAS = (CATEGORIA_QUESTAO, CATEGORIA_FONTE, CATEGORIA_TAG, CATEGORIA_LISTA)
+
+# Separadores a partir dos quais uma palavra também vira chave de prefixo
+_SEPARADORES = re.compile(r'[\s\-_/>.,;:()\[\]]+')
+
+
+def normalizar_chave(texto: Optional[str]) -> str:
+    """
+    Normaliza um texto para comparação: remove acentos e aplica casefold.
+
+    Args:
+        texto: Texto original
+
+    Returns:
+        Texto normalizado ('' se None)
+    """
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acento = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return sem_acento.casefold().strip()
+
+
+def _gerar_chaves(textos: Iterable[Optional[str]]) -> List[str]:
+    """
+    Gera as chaves de prefixo de um item: o texto completo e cada sufixo
+    que começa em uma fronteira de palavra (ex: 'FUNÇÃO AFIM' -> 'funcao afim', 'afim').
+    """
+    chaves = set()
+    for texto in textos:
+        normalizado = normalizar_chave(texto)
+        if not normalizado:
+            continue
+        chaves.add(normalizado)
+        for match in _SEPARADORES.finditer(normalizado):
+            sufixo = normalizado[match.end():]
+            if sufixo:
+                chaves.add(sufixo)
+    return sorted(chaves)
+
+
+@dataclass(frozen=True)
+class EntradaAutocomplete:
+    """Resultado de uma consulta ao índice"""
+    categoria: str
+    id: str          # UUID do registro de origem
+    valor: str       # Texto a inserir no campo (código, sigla, nome)
+    rotulo: str      # Texto exibido no popup
+
+
+class PrefixIndex:
+    """
+    Índice de prefixos baseado em uma lista ordenada de tuplas (chave, categoria, id).
+
+    Inserção e remoção usam bisect (O(log n) para localizar + deslocamento da lista),
+    o que é suficiente para os volumes do banco e muito mais barato que reconstruir.
+    """
+
+    def __init__(self):
+        self._chaves: List[Tuple[str, str, str]] = []
+        self._entradas: Dict[Tuple[str, str], EntradaAutocomplete] = {}
+        self._chaves_por_item: Dict[Tuple[str, str], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def limpar(self):
+        """Remove todas as entradas"""
+        self._chaves = []
+        self._entradas = {}
+        self._chaves_por_item = {}
+
+    def carregar(self, itens: Iterable[Tuple[EntradaAutocomplete, List[str]]]):
+        """
+        Carrega itens em lote (ordena uma única vez ao final).
+
+        Args:
+            itens: Iterável de (entrada, textos_indexáveis)
+        """
+        self.limpar()
+        for entrada, textos in itens:
+            item_id = (entrada.categoria, entrada.id)
+            chaves = _gerar_chaves(textos)
+            self._entradas[item_id] = entrada
+            self._chaves_por_item[item_id] = chaves
+            self._chaves.extend((chave, entrada.categoria, entrada.id) for chave in chaves)
+        self._chaves.sort()
+
+    def inserir(self, entrada: EntradaAutocomplete, textos: Iterable[Optional[str]]):
+        """
+        Insere ou substitui um item.
+
+        Args:
+            entrada: Entrada a indexar
+            textos: Textos dos quais as chaves de prefixo são geradas
+        """
+        self.remover(entrada.categoria, entrada.id)
+        item_id = (entrada.categoria, entrada.id)
+        chaves = _gerar_chaves(textos)
+        self._entradas[item_id] = entrada
+        self._chaves_por_item[item_id] = chaves
+        for chave in chaves:
+            bisect.insort(self._chaves, (chave, entrada.categoria, entrada.id))
+
+    def remover(self, categoria: str, item_id: str) -> bool:
+        """
+        Remove um item do índice.
+
+        Returns:
+            True se o item existia
+        """
+        chave_item = (categoria, item_id)
+        chaves = self._chaves_por_item.pop(chave_item, None)
+        if chaves is None:
+            return False
+        self._entradas.pop(chave_item, None)
+        for chave in chaves:
+            alvo = (chave, categoria, item_id)
+            pos = bisect.bisect_left(self._chaves, alvo)
+            if pos < len(self._chaves) and self._chaves[pos] == alvo:
+                del self._chaves[pos]
+        return True
+
+    def obter(self, categoria: str, item_id: str) -> Optional[EntradaAutocomplete]:
+        """Retorna a entrada de um item, se indexado"""
+        return self._entradas.get((categoria, item_id))
+
+    def buscar(
+        self,
+        prefixo: str,
+        categorias: Optional[Iterable[str]] = None,
+        limite: int = 20
+    ) -> List[EntradaAutocomplete]:
+        """
+        Busca itens cuja alguma chave começa com o prefixo.
+
+        Args:
+            prefixo: Texto digitado (será normalizado)
+            categorias: Restringe às categorias informadas (None = todas)
+            limite: Máximo de resultados
+
+        Returns:
+            Lista de entradas sem duplicatas, em ordem de chave
+        """
+        prefixo_norm = normalizar_chave(prefixo)
+        if not prefixo_norm:
+            return []
+        filtro = set(categorias) if categorias else None
+
+        resultados: List[EntradaAutocomplete] = []
+        vistos = set()
+        pos = bisect.bisect_left(self._chaves, (prefixo_norm,))
+        total = len(self._chaves)
+        while pos < total and len(resultados) < limite:
+            chave, categoria, item_id = self._chaves[pos]
+            if not chave.startswith(prefixo_norm):
+                break
+            pos += 1
+            if filtro is not None and categoria not in filtro:
+                continue
+            if (categoria, item_id) in vistos:
+                continue
+            vistos.add((categoria, item_id))
+            resultados.append(self._entradas[(categoria, item_id)])
+        return resultados
+
+    def listar(self, categoria: str) -> List[EntradaAutocomplete]:
+        """Lista todas as entradas de uma categoria ordenadas pelo valor"""
+        entradas = [e for (cat, _), e in self._entradas.items() if cat == categoria]
+        return sorted(entradas, key=lambda e: normalizar_chave(e.valor))
+
+
+class AutocompleteIndex:
+    """
+    Índice global de auto-complete do aplicativo.
+
+    Usage:
+        indice = get_autocomplete_index()
+        indice.buscar('fuv', categorias=[CATEGORIA_FONTE])
+
+    Os métodos registrar_* / remover_* são no-op enquanto o índice não foi
+    construído: nesse caso a primeira consulta já lê o estado atual do banco.
+    """
+
+    def __init__(self):
+        self._indice = PrefixIndex()
+        self._lock = RLock()
+        self._construido = False
+
+    @property
+    def construido(self) -> bool:
+        """Indica se o índice já foi carregado do banco"""
+        return self._construido
+
+    def construir(self, session=None):
+        """
+        Carrega todas as entradas do banco em lote.
+
+        Args:
+            session: Sessão SQLAlchemy (opcional, cria uma temporária se None)
+        """
+        if session is None:
+            from src.database import session_manager
+            with session_manager.session_scope() as nova_sessao:
+                self.construir(nova_sessao)
+            return
+
+        from src.models.orm import Questao, FonteQuestao, Tag, Lista
+
+        itens = []
+
+        for uuid, codigo, titulo in session.query(
+            Questao.uuid, Questao.codigo, Questao.titulo
+        ).filter(Questao.ativo == True):
+            itens.append(self._item_questao(uuid, codigo, titulo))
+
+        for uuid, sigla, nome in session.query(
+            FonteQuestao.uuid, FonteQuestao.sigla, FonteQuestao.nome_completo
+        ).filter(FonteQuestao.ativo == True):
+            itens.append(self._item_fonte(uuid, sigla, nome))
+
+        # Caminhos das tags calculados em memória (evita lazy-load de tag_pai por tag)
+        tags = {
+            uuid: (nome, pai, ativo)
+            for uuid, nome, pai, ativo in session.query(
+                Tag.uuid, Tag.nome, Tag.uuid_tag_pai, Tag.ativo
+            )
+        }
+        for uuid, (nome, _, ativo) in tags.items():
+            if ativo:
+                itens.append(self._item_tag(uuid, nome, self._caminho_tag(uuid, tags)))
+
+        for uuid, codigo, titulo in session.query(
+            Lista.uuid, Lista.codigo, Lista.titulo
+        ).filter(Lista.ativo == True):
+            itens.append(self._item_lista(uuid, codigo, titulo))
+
+        with self._lock:
+            self._indice.carregar(itens)
+            self._construido = True
+        logger.info(f"Índice de auto-complete construído com {len(itens)} entradas")
+
+    def _garantir_construido(self):
+        if not self._construido:
+            try:
+                self.construir()
+            except Exception as e:
+                logger.error(f"Erro ao construir índice de auto-complete: {e}", exc_info=True)
+
+    def invalidar(self):
+        """Descarta o índice; será reconstruído na próxima consulta"""
+        with self._lock:
+            self._indice.limpar()
+            self._construido = False
+
+    def buscar(
+        self,
+        prefixo: str,
+        categorias: Optional[Iterable[str]] = None,
+        limite: int = 20
+    ) -> List[EntradaAutocomplete]:
+        """
+        Consulta o índice por prefixo.
+
+        Args:
+            prefixo: Texto digitado
+            categorias: Categorias aceitas (None = todas)
+            limite: Máximo de resultados
+
+        Returns:
+            Lista de EntradaAutocomplete
+        """
+        self._garantir_construido()
+        with self._lock:
+            return self._indice.buscar(prefixo, categorias, limite)
+
+    def listar(self, categoria: str) -> List[EntradaAutocomplete]:
+        """Lista todas as entradas de uma categoria"""
+        self._garantir_construido()
+        with self._lock:
+            return self._indice.listar(categoria)
+
+    # ------------------------------------------------------------------
+    # Montagem de itens
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _caminho_tag(uuid: str, tags: Dict[str, Tuple[str, Optional[str], bool]]) -> str:
+        partes = []
+        atual = uuid
+        visitados = set()
+        while atual and atual in tags and atual not in visitados:
+            visitados.add(atual)
+            nome, pai, _ = tags[atual]
+            partes.insert(0, nome)
+            atual = pai
+        return " > ".join(partes)
+
+    @staticmethod
+    def _item_questao(uuid: str, codigo: str, titulo: Optional[str]):
+        rotulo = f"{codigo} — {titulo}" if titulo else codigo
+        return EntradaAutocomplete(CATEGORIA_QUESTAO, uuid, codigo, rotulo), [codigo, titulo]
+
+    @staticmethod
+    def _item_fonte(uuid: str, sigla: str, nome_completo: Optional[str]):
+        rotulo = f"{sigla} — {nome_completo}" if nome_completo and nome_completo != sigla else sigla
+        return EntradaAutocomplete(CATEGORIA_FONTE, uuid, sigla, rotulo), [sigla, nome_completo]
+
+    @staticmethod
+    def _item_tag(uuid: str, nome: str, caminho: Optional[str]):
+        return EntradaAutocomplete(CATEGORIA_TAG, uuid, nome, caminho or nome), [nome, caminho]
+
+    @staticmethod
+    def _item_lista(uuid: str, codigo: str, titulo: str):
+        rotulo = f"{titulo} ({codigo})"
+        return EntradaAutocomplete(CATEGORIA_LISTA, uuid, codigo, rotulo), [titulo, codigo]
+
+    # ------------------------------------------------------------------
+    # Correções incrementais (chamadas pelos services)
+    # ------------------------------------------------------------------
+
+    def _inserir(self, item):
+        if not self._construido:
+            return
+        entrada, textos = item
+        with self._lock:
+            self._indice.inserir(entrada, textos)
+
+    def _remover(self, categoria: str, item_id: str):
+        if not self._construido:
+            return
+        with self._lock:
+            self._indice.remover(categoria, item_id)
+
+    def registrar_questao(self, uuid: str, codigo: str, titulo: Optional[str]):
+        """Insere/atualiza uma questão"""
+        self._inserir(self._item_questao(uuid, codigo, titulo))
+
+    def remover_questao(self, uuid: str):
+        """Remove uma questão (inativada)"""
+        self._remover(CATEGORIA_QUESTAO, uuid)
+
+    def registrar_fonte(self, uuid: str, sigla: str, nome_completo: Optional[str] = None):
+        """Insere/atualiza uma fonte"""
+        self._inserir(self._item_fonte(uuid, sigla, nome_completo))
+
+    def remover_fonte(self, uuid: str):
+        """Remove uma fonte (inativada)"""
+        self._remover(CATEGORIA_FONTE, uuid)
+
+    def registrar_tag(self, uuid: str, nome: str, caminho: Optional[str] = None):
+        """Insere/atualiza uma tag"""
+        self._inserir(self._item_tag(uuid, nome, caminho))
+
+    def remover_tag(self, uuid: str):
+        """Remove uma tag (inativada)"""
+        self._remover(CATEGORIA_TAG, uuid)
+
+    def registrar_lista(self, uuid: str, codigo: str, titulo: str):
+        """Insere/atualiza uma lista"""
+        self._inserir(self._item_lista(uuid, codigo, titulo))
+
+    def remover_lista(self, uuid: str):
+        """Remove uma lista (inativada)"""
+        self._remover(CATEGORIA_LISTA, uuid)
+
+
+# Instância global
+_autocomplete_index: Optional[AutocompleteIndex] = None
+
+
+def get_autocomplete_index() -> AutocompleteIndex:
+    """Retorna o índice global de auto-complete (criado sob demanda)"""
+    global _autocomplete_index
+    if _autocomplete_index is None:
+        _autocomplete_index = AutocompleteIndex()
+    return _autocomplete_index
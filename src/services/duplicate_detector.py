@@ -0,0 +1,470 @@
+"""
+Detecção de questões quase duplicadas com MinHash + LSH
+
+O enunciado é normalizado (remove comandos LaTeX, marcadores [IMG:...]/[TABELA],
+tags HTML e acentos), dividido em shingles de palavras e resumido em uma
+assinatura MinHash calculada de forma vetorizada com NumPy. As assinaturas são
+distribuídas em bandas (LSH), de modo que uma consulta só compara o enunciado
+com os candidatos que colidem em pelo menos uma banda, em vez do banco inteiro.
+
+O índice é persistido em um arquivo .npz ao lado do banco SQLite e sincronizado
+na carga comparando um digest do texto normalizado de cada questão.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros do MinHash/LSH: 128 permutações em 32 bandas de 4 linhas
+# (limiar de colisão ~ (1/32)^(1/4) = 0.42, confirmado depois pela similaridade estimada)
+NUM_PERMUTACOES = 128
+NUM_BANDAS = 32
+LINHAS_POR_BANDA = NUM_PERMUTACOES // NUM_BANDAS
+TAMANHO_SHINGLE = 3
+SEMENTE = 1
+
+LIMIAR_PADRAO = 0.7
+
+_PRIMO_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Versão do formato persistido (mudar invalida o arquivo salvo)
+_VERSAO_INDICE = 1
+
+_RE_MARCADOR = re.compile(r'\[/?[A-Z_]+(?::[^\]]*)?\]')
+_RE_HTML = re.compile(r'<[^>]+>')
+_RE_COMANDO_LATEX = re.compile(r'\\[a-zA-Z]+\*?')
+_RE_NAO_ALFANUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar_enunciado(texto: Optional[str]) -> str:
+    """
+    Normaliza um enunciado para comparação.
+
+    Remove marcadores ([IMG:...], [TABELA], [CENTRO]...), tags HTML e comandos
+    LaTeX (mantendo o conteúdo dos argumentos), remove acentos e pontuação.
+
+    Args:
+        texto: Enunciado original
+
+    Returns:
+        Texto normalizado em minúsculas, com palavras separadas por espaço
+    """
+    if not texto:
+        return ''
+    texto = _RE_MARCADOR.sub(' ', texto)
+    texto = _RE_HTML.sub(' ', texto)
+    texto = _RE_COMANDO_LATEX.sub(' ', texto)
+    decomposto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+    return _RE_NAO_ALFANUM.sub(' ', texto).strip()
+
+
+def _digest(texto_normalizado: str) -> str:
+    return hashlib.blake2b(texto_normalizado.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _shingles(texto_normalizado: str) -> Set[str]:
+    """Shingles de palavras; textos muito curtos caem para shingles de caracteres."""
+    palavras = texto_normalizado.split()
+    if len(palavras) >= TAMANHO_SHINGLE:
+        return {' '.join(palavras[i:i + TAMANHO_SHINGLE]) for i in range(len(palavras) - TAMANHO_SHINGLE + 1)}
+    if len(texto_normalizado) >= 5:
+        return {texto_normalizado[i:i + 5] for i in range(len(texto_normalizado) - 4)}
+    return {texto_normalizado} if texto_normalizado else set()
+
+
+class MinHasher:
+    """Calcula assinaturas MinHash com permutações universais vetorizadas"""
+
+    def __init__(self, num_permutacoes: int = NUM_PERMUTACOES, semente: int = SEMENTE):
+        gerador = np.random.RandomState(semente)
+        self.num_permutacoes = num_permutacoes
+        self._a = gerador.randint(1, _PRIMO_MERSENNE, size=num_permutacoes, dtype=np.uint64)
+        self._b = gerador.randint(0, _PRIMO_MERSENNE, size=num_permutacoes, dtype=np.uint64)
+
+    def assinatura(self, texto_normalizado: str) -> Optional["np.ndarray"]:
+        """
+        Calcula a assinatura MinHash de um texto já normalizado.
+
+        Args:
+            texto_normalizado: Saída de normalizar_enunciado()
+
+        Returns:
+            Vetor uint64 de tamanho num_permutacoes, ou None se o texto for vazio
+        """
+        shingles = _shingles(texto_normalizado)
+        if not shingles:
+            return None
+        # Hash estável entre execuções (hash() do Python é aleatorizado por processo)
+        valores = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+             for s in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        # Matriz (shingles x permutações); o estouro de uint64 faz parte da família de hash
+        with np.errstate(over='ignore'):
+            permutados = (np.outer(valores, self._a) + self._b) % np.uint64(_PRIMO_MERSENNE)
+        permutados &= np.uint64(_MAX_HASH)
+        return permutados.min(axis=0)
+
+
+def similaridade_estimada(sig_a: "np.ndarray", sig_b: "np.ndarray") -> float:
+    """Estimativa do índice de Jaccard entre duas assinaturas"""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+class DuplicateDetector:
+    """
+    Índice LSH de enunciados para detecção de quase duplicatas.
+
+    Usage:
+        detector = get_duplicate_detector()
+        detector.buscar_similares("Qual é a capital do Brasil?")
+        # [{'uuid': '...', 'similaridade': 0.86}]
+
+    Se o NumPy não estiver disponível, o detector fica desabilitado e as
+    consultas retornam listas vazias.
+    """
+
+    def __init__(self, caminho_indice: Optional[str] = None):
+        self._caminho = caminho_indice
+        self._lock = RLock()
+        self._hasher = MinHasher() if NUMPY_AVAILABLE else None
+        self._assinaturas: Dict[str, "np.ndarray"] = {}
+        self._digests: Dict[str, str] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [defaultdict(set) for _ in range(NUM_BANDAS)]
+        self._carregado = False
+        self._modificado = False
+
+    @property
+    def disponivel(self) -> bool:
+        """Indica se o NumPy está instalado"""
+        return NUMPY_AVAILABLE
+
+    def __len__(self) -> int:
+        return len(self._assinaturas)
+
+    # ------------------------------------------------------------------
+    # Estrutura LSH
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _bandas(assinatura: "np.ndarray") -> Iterable[Tuple[int, bytes]]:
+        for banda in range(NUM_BANDAS):
+            inicio = banda * LINHAS_POR_BANDA
+            yield banda, assinatura[inicio:inicio + LINHAS_POR_BANDA].tobytes()
+
+    def _inserir(self, uuid: str, assinatura: "np.ndarray", digest: str):
+        self._remover(uuid)
+        self._assinaturas[uuid] = assinatura
+        self._digests[uuid] = digest
+        for banda, chave in self._bandas(assinatura):
+            self._buckets[banda][chave].add(uuid)
+
+    def _remover(self, uuid: str) -> bool:
+        assinatura = self._assinaturas.pop(uuid, None)
+        self._digests.pop(uuid, None)
+        if assinatura is None:
+            return False
+        for banda, chave in self._bandas(assinatura):
+            bucket = self._buckets[banda].get(chave)
+            if bucket:
+                bucket.discard(uuid)
+                if not bucket:
+                    del self._buckets[banda][chave]
+        return True
+
+    def _candidatos(self, assinatura: "np.ndarray") -> Set[str]:
+        candidatos = set()
+        for banda, chave in self._bandas(assinatura):
+            candidatos.update(self._buckets[banda].get(chave, ()))
+        return candidatos
+
+    # ------------------------------------------------------------------
+    # Carga, sincronização e persistência
+    # ------------------------------------------------------------------
+
+    def _caminho_padrao(self) -> str:
+        if self._caminho:
+            return self._caminho
+        from src.database import session_manager
+        base, _ = os.path.splitext(session_manager.database_path)
+        return f"{base}.minhash.npz"
+
+    def carregar(self) -> bool:
+        """
+        Carrega o índice persistido em disco.
+
+        Returns:
+            True se o arquivo existia e era compatível
+        """
+        caminho = self._caminho_padrao()
+        if not NUMPY_AVAILABLE or not os.path.exists(caminho):
+            return False
+        try:
+            with np.load(caminho, allow_pickle=False) as dados:
+                parametros = tuple(int(x) for x in dados['parametros'])
+                if parametros != (_VERSAO_INDICE, NUM_PERMUTACOES, NUM_BANDAS, SEMENTE, TAMANHO_SHINGLE):
+                    logger.info("Índice de duplicatas com parâmetros antigos; será reconstruído")
+                    return False
+                uuids = dados['uuids']
+                digests = dados['digests']
+                assinaturas = dados['assinaturas']
+            with self._lock:
+                for uuid, digest, assinatura in zip(uuids, digests, assinaturas):
+                    self._inserir(str(uuid), assinatura.copy(), str(digest))
+            return True
+        except Exception as e:
+            logger.warning(f"Erro ao carregar índice de duplicatas ({caminho}): {e}")
+            return False
+
+    def salvar(self):
+        """Grava o índice em disco (escrita atômica via arquivo temporário)"""
+        if not NUMPY_AVAILABLE:
+            return
+        caminho = self._caminho_padrao()
+        with self._lock:
+            uuids = list(self._assinaturas.keys())
+            assinaturas = (np.vstack([self._assinaturas[u] for u in uuids])
+                           if uuids else np.zeros((0, NUM_PERMUTACOES), dtype=np.uint64))
+            digests = [self._digests[u] for u in uuids]
+            self._modificado = False
+        temporario = caminho + '.tmp.npz'
+        try:
+            np.savez_compressed(
+                temporario,
+                parametros=np.array([_VERSAO_INDICE, NUM_PERMUTACOES, NUM_BANDAS, SEMENTE, TAMANHO_SHINGLE]),
+                uuids=np.array(uuids, dtype=str),
+                digests=np.array(digests, dtype=str),
+                assinaturas=assinaturas
+            )
+            os.replace(temporario, caminho)
+        except Exception as e:
+            logger.error(f"Erro ao salvar índice de duplicatas: {e}", exc_info=True)
+
+    def salvar_se_modificado(self):
+        """Grava o índice apenas se houve alterações desde a última gravação"""
+        if self._modificado:
+            self.salvar()
+
+    def sincronizar(self, session=None) -> int:
+        """
+        Sincroniza o índice com o banco: recalcula apenas enunciados novos ou
+        alterados e remove questões inativas ou variantes.
+
+        Args:
+            session: Sessão SQLAlchemy (opcional, cria uma temporária se None)
+
+        Returns:
+            Número de assinaturas recalculadas
+        """
+        if not NUMPY_AVAILABLE:
+            return 0
+        if session is None:
+            from src.database import session_manager
+            with session_manager.session_scope() as nova_sessao:
+                return self.sincronizar(nova_sessao)
+
+        from src.models.orm import Questao, QuestaoVersao
+
+        variantes = session.query(QuestaoVersao.uuid_questao_versao)
+        linhas = session.query(Questao.uuid, Questao.enunciado).filter(
+            Questao.ativo == True,
+            ~Questao.uuid.in_(variantes)
+        ).all()
+
+        recalculadas = 0
+        with self._lock:
+            vistos = set()
+            for uuid, enunciado in linhas:
+                vistos.add(uuid)
+                normalizado = normalizar_enunciado(enunciado)
+                digest = _digest(normalizado)
+                if self._digests.get(uuid) == digest:
+                    continue
+                assinatura = self._hasher.assinatura(normalizado)
+                if assinatura is None:
+                    self._remover(uuid)
+                    continue
+                self._inserir(uuid, assinatura, digest)
+                recalculadas += 1
+            for uuid in [u for u in self._assinaturas if u not in vistos]:
+                self._remover(uuid)
+                recalculadas += 1
+            self._carregado = True
+            if recalculadas:
+                self._modificado = True
+
+        if recalculadas:
+            logger.info(f"Índice de duplicatas sincronizado: {recalculadas} alterações, {len(self)} questões")
+            self.salvar()
+        return recalculadas
+
+    def _garantir_carregado(self):
+        if self._carregado or not NUMPY_AVAILABLE:
+            return
+        with self._lock:
+            if self._carregado:
+                return
+            self.carregar()
+            try:
+                self.sincronizar()
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar índice de duplicatas: {e}", exc_info=True)
+            self._carregado = True
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def registrar(self, uuid: str, enunciado: Optional[str]):
+        """
+        Insere/atualiza o enunciado de uma questão no índice.
+
+        Args:
+            uuid: UUID da questão
+            enunciado: Texto do enunciado
+        """
+        if not NUMPY_AVAILABLE or not self._carregado:
+            return
+        normalizado = normalizar_enunciado(enunciado)
+        digest = _digest(normalizado)
+        with self._lock:
+            if self._digests.get(uuid) == digest:
+                return
+            assinatura = self._hasher.assinatura(normalizado)
+            if assinatura is None:
+                self._remover(uuid)
+            else:
+                self._inserir(uuid, assinatura, digest)
+            self._modificado = True
+
+    def remover(self, uuid: str):
+        """Remove uma questão do índice"""
+        if not NUMPY_AVAILABLE or not self._carregado:
+            return
+        with self._lock:
+            if self._remover(uuid):
+                self._modificado = True
+
+    def buscar_similares(
+        self,
+        enunciado: str,
+        limiar: float = LIMIAR_PADRAO,
+        limite: int = 5,
+        excluir: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, float]]:
+        """
+        Busca questões com enunciado parecido.
+
+        Args:
+            enunciado: Texto a verificar
+            limiar: Similaridade (Jaccard estimado) mínima
+            limite: Máximo de resultados
+            excluir: UUIDs a ignorar (ex: a própria questão)
+
+        Returns:
+            Lista de {'uuid', 'similaridade'} em ordem decrescente de similaridade
+        """
+        if not NUMPY_AVAILABLE:
+            return []
+        self._garantir_carregado()
+        assinatura = self._hasher.assinatura(normalizar_enunciado(enunciado))
+        if assinatura is None:
+            return []
+        ignorar = set(excluir or ())
+        with self._lock:
+            candidatos = [u for u in self._candidatos(assinatura) if u not in ignorar]
+            if not candidatos:
+                return []
+            matriz = np.vstack([self._assinaturas[u] for u in candidatos])
+        similaridades = (matriz == assinatura).mean(axis=1)
+        ordem = np.argsort(-similaridades)
+        resultado = []
+        for i in ordem:
+            if similaridades[i] < limiar or len(resultado) >= limite:
+                break
+            resultado.append({'uuid': candidatos[i], 'similaridade': round(float(similaridades[i]), 3)})
+        return resultado
+
+    def encontrar_clusters(self, limiar: float = LIMIAR_PADRAO) -> List[List[Tuple[str, float]]]:
+        """
+        Agrupa todo o banco em clusters de quase duplicatas.
+
+        Os pares candidatos vêm das colisões de banda; cada par é confirmado
+        pela similaridade estimada e unido via union-find.
+
+        Args:
+            limiar: Similaridade mínima para ligar duas questões
+
+        Returns:
+            Lista de clusters (cada um com 2+ itens (uuid, maior_similaridade)),
+            ordenados do maior para o menor
+        """
+        if not NUMPY_AVAILABLE:
+            return []
+        self._garantir_carregado()
+
+        pai: Dict[str, str] = {}
+
+        def raiz(x):
+            pai.setdefault(x, x)
+            while pai[x] != x:
+                pai[x] = pai[pai[x]]
+                x = pai[x]
+            return x
+
+        melhor: Dict[str, float] = defaultdict(float)
+        with self._lock:
+            verificados = set()
+            for buckets in self._buckets:
+                for membros in buckets.values():
+                    if len(membros) < 2:
+                        continue
+                    membros = sorted(membros)
+                    for i, a in enumerate(membros):
+                        for b in membros[i + 1:]:
+                            if (a, b) in verificados:
+                                continue
+                            verificados.add((a, b))
+                            sim = similaridade_estimada(self._assinaturas[a], self._assinaturas[b])
+                            if sim < limiar:
+                                continue
+                            melhor[a] = max(melhor[a], sim)
+                            melhor[b] = max(melhor[b], sim)
+                            ra, rb = raiz(a), raiz(b)
+                            if ra != rb:
+                                pai[ra] = rb
+
+        grupos: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for uuid in melhor:
+            grupos[raiz(uuid)].append((uuid, round(melhor[uuid], 3)))
+        clusters = [sorted(g, key=lambda item: -item[1]) for g in grupos.values() if len(g) > 1]
+        return sorted(clusters, key=len, reverse=True)
+
+
+# Instância global
+_duplicate_detector: Optional[DuplicateDetector] = None
+
+
+def get_duplicate_detector() -> DuplicateDetector:
+    """Retorna o detector global de duplicatas (criado sob demanda)"""
+    global _duplicate_detector
+    if _duplicate_detector is None:
+        _duplicate_detector = DuplicateDetector()
+        atexit.register(_duplicate_detector.salvar_se_modificado)
+    return _duplicate_detector
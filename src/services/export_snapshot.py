@@ -0,0 +1,198 @@
+"""
+Snapshot imutável dos dados de uma lista para exportação.
+
+Carrega, em um número fixo de consultas, a lista, suas questões na ordem da
+prova, as variantes de cada questão, alternativas, respostas e as referências
+de imagens (com hash e dimensões da tabela imagem). O mesmo snapshot atende
+todas as versões (TIPO A, B, ..., Z, AA, ...) e templates de um job, então o
+tempo de banco não cresce com o número de versões.
+"""
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import PurePath
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from src.application.services.derivados_imagem import MetadadosImagem
+from src.models.orm import Imagem, Lista, ListaQuestao, Questao, QuestaoVersao
+from src.infrastructure.logging import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+_RE_IMAGEM = re.compile(r'\[IMG:(.+?):[0-9.]+\]')
+
+QuestaoSnapshot = Mapping[str, object]
+
+
+@dataclass(frozen=True)
+class ExportSnapshot:
+    """
+    Dados de uma lista prontos para exportação (somente leitura).
+
+    As questões são mapeamentos imutáveis com as mesmas chaves usadas pela
+    exportação: codigo, uuid, titulo, tipo, enunciado, fonte, ano,
+    alternativas (uuid, letra, texto) e resposta (letra ou gabarito discursivo).
+    """
+    codigo: str
+    uuid: str
+    titulo: str
+    tipo: str
+    formulas: str
+    questoes: Tuple[QuestaoSnapshot, ...]
+    variantes: Mapping[str, Tuple[QuestaoSnapshot, ...]]  # código original -> variantes por código
+    imagens: Tuple[str, ...]                              # caminhos/URLs dos [IMG:...]
+    metadados_imagens: Mapping[str, MetadadosImagem]      # nome do arquivo -> hash/dimensões
+    carregado_em: float = field(default_factory=time.time)
+
+    def versoes_questao(self, questao: QuestaoSnapshot) -> Tuple[QuestaoSnapshot, ...]:
+        """Original seguida das variantes (ordem usada no rodízio entre versões)"""
+        return (questao,) + self.variantes.get(questao['codigo'], ())
+
+    def tem_variantes(self, questao: QuestaoSnapshot) -> bool:
+        return bool(self.variantes.get(questao['codigo']))
+
+
+def _fonte(questao: Questao) -> Optional[str]:
+    # Primeiro o campo fonte, depois as tags de vestibular (numeracao começa com V)
+    if questao.fonte:
+        return questao.fonte.sigla
+    for tag in questao.tags:
+        if tag.ativo and tag.numeracao and tag.numeracao.startswith('V'):
+            return tag.nome
+    return None
+
+
+def _resposta(questao: Questao) -> Optional[str]:
+    resposta = questao.resposta
+    if not resposta:
+        return None
+    if resposta.uuid_alternativa_correta:
+        for alternativa in questao.alternativas:
+            if alternativa.uuid == resposta.uuid_alternativa_correta:
+                return alternativa.letra
+    return resposta.gabarito_discursivo
+
+
+def _congelar(questao: Questao) -> QuestaoSnapshot:
+    alternativas = tuple(
+        MappingProxyType({'uuid': alt.uuid, 'letra': alt.letra, 'texto': alt.texto})
+        for alt in sorted(questao.alternativas, key=lambda a: a.letra)
+    )
+    return MappingProxyType({
+        'codigo': questao.codigo,
+        'uuid': questao.uuid,
+        'titulo': questao.titulo,
+        'tipo': questao.tipo.codigo if questao.tipo else None,
+        'enunciado': questao.enunciado,
+        'fonte': _fonte(questao),
+        'ano': questao.ano.ano if questao.ano else None,
+        'alternativas': alternativas,
+        'resposta': _resposta(questao),
+    })
+
+
+def _imagens(questoes) -> Tuple[str, ...]:
+    encontradas: Dict[str, None] = {}
+    for questao in questoes:
+        textos = [questao['enunciado'] or ''] + [alt['texto'] or '' for alt in questao['alternativas']]
+        for texto in textos:
+            for caminho in _RE_IMAGEM.findall(texto):
+                encontradas.setdefault(caminho, None)
+    return tuple(encontradas)
+
+
+def _metadados_imagens(session: Session, imagens: Tuple[str, ...]) -> Mapping[str, MetadadosImagem]:
+    nomes = {PurePath(caminho.replace('\\', '/')).name for caminho in imagens if '://' not in caminho}
+    if not nomes:
+        return MappingProxyType({})
+    return MappingProxyType({
+        nome: MetadadosImagem(hash_md5, largura, altura)
+        for nome, hash_md5, largura, altura in session.query(
+            Imagem.nome_arquivo, Imagem.hash_md5, Imagem.largura, Imagem.altura
+        ).filter(Imagem.nome_arquivo.in_(nomes), Imagem.ativo == True)
+    })
+
+
+def carregar_snapshot(session: Session, codigo_lista: str) -> Optional[ExportSnapshot]:
+    """
+    Carrega o snapshot de exportação de uma lista.
+
+    Consultas: lista, ordem das questões, vínculos de variantes, as questões
+    (originais e variantes) com tipo/fonte/ano, alternativas, resposta e tags
+    carregados em lote e os metadados das imagens, independentemente do número
+    de questões ou versões.
+
+    Args:
+        session: Sessão SQLAlchemy
+        codigo_lista: Código da lista
+
+    Returns:
+        ExportSnapshot ou None se a lista não existir
+    """
+    inicio = time.perf_counter()
+    lista = session.query(Lista).filter_by(codigo=codigo_lista, ativo=True).first()
+    if not lista:
+        return None
+
+    ordem = [
+        uuid for (uuid,) in session.query(ListaQuestao.uuid_questao)
+        .filter(ListaQuestao.uuid_lista == lista.uuid)
+        .order_by(ListaQuestao.ordem_na_lista)
+    ]
+    vinculos = session.query(
+        QuestaoVersao.uuid_questao_original, QuestaoVersao.uuid_questao_versao
+    ).filter(QuestaoVersao.uuid_questao_original.in_(ordem)).all() if ordem else []
+
+    uuids = set(ordem) | {versao for _, versao in vinculos}
+    carregadas = {
+        questao.uuid: questao
+        for questao in session.query(Questao).options(
+            joinedload(Questao.tipo),
+            joinedload(Questao.fonte),
+            joinedload(Questao.ano),
+            selectinload(Questao.alternativas),
+            selectinload(Questao.resposta),
+            selectinload(Questao.tags),
+        ).filter(Questao.uuid.in_(uuids), Questao.ativo == True)
+    } if uuids else {}
+
+    questoes = tuple(_congelar(carregadas[uuid]) for uuid in ordem if uuid in carregadas)
+
+    variantes_por_original: Dict[str, list] = {}
+    for original, versao in vinculos:
+        if original in carregadas and versao in carregadas:
+            variantes_por_original.setdefault(carregadas[original].codigo, []).append(
+                _congelar(carregadas[versao])
+            )
+    variantes = MappingProxyType({
+        codigo: tuple(sorted(lista_variantes, key=lambda v: v['codigo'] or ''))
+        for codigo, lista_variantes in variantes_por_original.items()
+    })
+
+    todas = list(questoes) + [v for grupo in variantes.values() for v in grupo]
+    imagens = _imagens(todas)
+    snapshot = ExportSnapshot(
+        codigo=lista.codigo,
+        uuid=lista.uuid,
+        titulo=lista.titulo,
+        tipo=lista.tipo,
+        formulas=lista.formulas or '',
+        questoes=questoes,
+        variantes=variantes,
+        imagens=imagens,
+        metadados_imagens=_metadados_imagens(session, imagens),
+    )
+
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    metrics = get_metrics_collector()
+    if metrics:
+        metrics.record_timing("carregar_snapshot_exportacao", duracao_ms)
+    logger.info(
+        f"Snapshot de {codigo_lista}: {len(questoes)} questões, "
+        f"{sum(len(v) for v in variantes.values())} variantes em {duracao_ms:.0f}ms"
+    )
+    return snapshot
@@ -0,0 +1,419 @@
+"""
+Índice de facetas em bitmaps para os filtros do banco de questões
+
+Cada valor de faceta (fonte, ano, dificuldade, tipo, tag) tem um bitmap NumPy
+(uma posição por questão ativa e não variante). Expressões AND/OR/NOT são
+avaliadas com operações bit a bit e as contagens de cada opção dos menus saem
+de um único produto matriz x máscara, sem montar joins SQL por combinação.
+
+A fonte é indexada pelo UUID (renomear a sigla não invalida os bitmaps);
+expressao_de_filtros traduz as siglas da tela com o mapa {sigla: uuid}.
+
+Expressões são tuplas aninhadas:
+    ('fonte', uuid_fonte)                 -> questões da fonte
+    ('ano', 2019, 2024)                   -> anos no intervalo (limites opcionais: None)
+    ('AND', [expr, ...]) / ('OR', [expr, ...])
+    ('NOT', expr)
+    ('UUIDS', [uuid, ...])                -> conjunto explícito (ex: busca textual)
+"""
+import logging
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FACETA_FONTE = 'fonte'
+FACETA_ANO = 'ano'
+FACETA_DIFICULDADE = 'dificuldade'
+FACETA_TIPO = 'tipo'
+FACETA_TAGS = 'tags'
+
+FACETAS = (FACETA_FONTE, FACETA_ANO, FACETA_DIFICULDADE, FACETA_TIPO, FACETA_TAGS)
+
+_CAPACIDADE_INICIAL = 1024
+
+
+class FacetIndex:
+    """
+    Bitmaps por valor de faceta sobre as questões principais ativas.
+
+    Usage:
+        indice = get_facet_index()
+        uuids = indice.filtrar(('AND', [('fonte', uuid_enem), ('NOT', ('tipo', 'DISCURSIVA'))]))
+        contagens = indice.contar_facetas(filtros, fontes={'ENEM': uuid_enem})
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._construido = False
+        self._limpar()
+
+    def _limpar(self):
+        self._capacidade = _CAPACIDADE_INICIAL
+        self._uuids: List[Optional[str]] = []
+        self._linha_por_uuid: Dict[str, int] = {}
+        self._livres: List[int] = []
+        self._vivas = np.zeros(self._capacidade, dtype=bool)
+        self._bitmaps: Dict[str, Dict[Any, "np.ndarray"]] = {f: {} for f in FACETAS}
+        self._valores_por_linha: Dict[int, Dict[str, Tuple]] = {}
+
+    @property
+    def construido(self) -> bool:
+        """Indica se o índice já foi carregado do banco"""
+        return self._construido
+
+    def __len__(self) -> int:
+        return len(self._linha_por_uuid)
+
+    # ------------------------------------------------------------------
+    # Estrutura
+    # ------------------------------------------------------------------
+
+    def _crescer(self):
+        nova = self._capacidade * 2
+        vivas = np.zeros(nova, dtype=bool)
+        vivas[:self._capacidade] = self._vivas
+        self._vivas = vivas
+        for valores in self._bitmaps.values():
+            for valor, bitmap in valores.items():
+                novo = np.zeros(nova, dtype=bool)
+                novo[:self._capacidade] = bitmap
+                valores[valor] = novo
+        self._capacidade = nova
+
+    def _alocar_linha(self, uuid: str) -> int:
+        if self._livres:
+            linha = self._livres.pop()
+            self._uuids[linha] = uuid
+        else:
+            linha = len(self._uuids)
+            if linha >= self._capacidade:
+                self._crescer()
+            self._uuids.append(uuid)
+        self._linha_por_uuid[uuid] = linha
+        return linha
+
+    def _bitmap(self, faceta: str, valor) -> "np.ndarray":
+        valores = self._bitmaps[faceta]
+        bitmap = valores.get(valor)
+        if bitmap is None:
+            bitmap = np.zeros(self._capacidade, dtype=bool)
+            valores[valor] = bitmap
+        return bitmap
+
+    def _inserir(self, uuid: str, fonte, ano, dificuldade, tipo, tags: Iterable[str]):
+        self._remover(uuid)
+        linha = self._alocar_linha(uuid)
+        valores = {
+            FACETA_FONTE: (fonte,) if fonte else (),
+            FACETA_ANO: (ano,) if ano is not None else (),
+            FACETA_DIFICULDADE: (dificuldade,) if dificuldade else (),
+            FACETA_TIPO: (tipo,) if tipo else (),
+            FACETA_TAGS: tuple(set(tags or ())),
+        }
+        for faceta, lista in valores.items():
+            for valor in lista:
+                self._bitmap(faceta, valor)[linha] = True
+        self._valores_por_linha[linha] = valores
+        self._vivas[linha] = True
+
+    def _remover(self, uuid: str) -> bool:
+        linha = self._linha_por_uuid.pop(uuid, None)
+        if linha is None:
+            return False
+        for faceta, lista in self._valores_por_linha.pop(linha, {}).items():
+            for valor in lista:
+                bitmap = self._bitmaps[faceta].get(valor)
+                if bitmap is not None:
+                    bitmap[linha] = False
+        self._vivas[linha] = False
+        self._uuids[linha] = None
+        self._livres.append(linha)
+        return True
+
+    # ------------------------------------------------------------------
+    # Construção e atualização
+    # ------------------------------------------------------------------
+
+    def construir(self, session=None):
+        """
+        Carrega todas as questões principais ativas em lote (duas consultas).
+
+        Args:
+            session: Sessão SQLAlchemy (opcional, cria uma temporária se None)
+        """
+        if session is None:
+            from src.database import session_manager
+            with session_manager.session_scope() as nova_sessao:
+                self.construir(nova_sessao)
+            return
+
+        linhas = consultar_facetas(session)
+
+        with self._lock:
+            self._limpar()
+            while self._capacidade < len(linhas):
+                self._capacidade *= 2
+            self._vivas = np.zeros(self._capacidade, dtype=bool)
+            for linha in linhas:
+                self._inserir(*linha)
+            self._construido = True
+        logger.info(f"Índice de facetas construído com {len(linhas)} questões")
+
+    def _garantir_construido(self):
+        if not self._construido:
+            self.construir()
+
+    def registrar(self, uuid: str, fonte: Optional[str], ano: Optional[int],
+                  dificuldade: Optional[str], tipo: Optional[str], tags: Iterable[str]):
+        """
+        Insere/atualiza uma questão a partir dos valores lidos por consultar_facetas.
+
+        Args:
+            uuid: UUID da questão
+            fonte: UUID da fonte
+            ano: Ano de referência
+            dificuldade: Código da dificuldade
+            tipo: Código do tipo
+            tags: UUIDs das tags
+        """
+        if not self._construido:
+            return
+        with self._lock:
+            self._inserir(uuid, fonte, ano, dificuldade, tipo, tags)
+
+    def remover_questao(self, uuid: str):
+        """Remove uma questão (inativada ou transformada em variante)"""
+        if not self._construido:
+            return
+        with self._lock:
+            self._remover(uuid)
+
+    # ------------------------------------------------------------------
+    # Avaliação de expressões
+    # ------------------------------------------------------------------
+
+    def _avaliar(self, expressao) -> "np.ndarray":
+        operador = expressao[0]
+        if operador == 'AND':
+            mascara = self._vivas.copy()
+            for sub in expressao[1]:
+                mascara &= self._avaliar(sub)
+            return mascara
+        if operador == 'OR':
+            mascara = np.zeros(self._capacidade, dtype=bool)
+            for sub in expressao[1]:
+                mascara |= self._avaliar(sub)
+            return mascara
+        if operador == 'NOT':
+            return self._vivas & ~self._avaliar(expressao[1])
+        if operador == 'UUIDS':
+            mascara = np.zeros(self._capacidade, dtype=bool)
+            linhas = [self._linha_por_uuid[u] for u in expressao[1] if u in self._linha_por_uuid]
+            mascara[linhas] = True
+            return mascara
+        if operador == FACETA_ANO:
+            inicio, fim = expressao[1], expressao[2]
+            mascara = np.zeros(self._capacidade, dtype=bool)
+            for ano, bitmap in self._bitmaps[FACETA_ANO].items():
+                if (inicio is None or ano >= inicio) and (fim is None or ano <= fim):
+                    mascara |= bitmap
+            return mascara
+        if operador in self._bitmaps:
+            bitmap = self._bitmaps[operador].get(expressao[1])
+            if bitmap is None:
+                return np.zeros(self._capacidade, dtype=bool)
+            return bitmap.copy()
+        raise ValueError(f"Operador de filtro desconhecido: {operador}")
+
+    def avaliar(self, expressao=None) -> "np.ndarray":
+        """
+        Avalia uma expressão e retorna a máscara booleana de linhas.
+
+        Args:
+            expressao: Expressão de filtro (None = todas as questões)
+
+        Returns:
+            Máscara booleana com o tamanho da capacidade atual
+        """
+        self._garantir_construido()
+        with self._lock:
+            if expressao is None:
+                return self._vivas.copy()
+            return self._avaliar(expressao) & self._vivas
+
+    def filtrar(self, expressao=None) -> List[str]:
+        """
+        Retorna os UUIDs das questões que satisfazem a expressão.
+
+        Args:
+            expressao: Expressão de filtro (None = todas)
+
+        Returns:
+            Lista de UUIDs
+        """
+        mascara = self.avaliar(expressao)
+        with self._lock:
+            return [self._uuids[i] for i in np.flatnonzero(mascara)]
+
+    def contar(self, expressao=None) -> int:
+        """Conta as questões que satisfazem a expressão"""
+        return int(np.count_nonzero(self.avaliar(expressao)))
+
+    def contar_facetas(
+        self,
+        filtros: Optional[Dict[str, Any]] = None,
+        uuids_texto: Optional[Iterable[str]] = None,
+        facetas: Iterable[str] = (FACETA_FONTE, FACETA_DIFICULDADE, FACETA_TIPO, FACETA_ANO, FACETA_TAGS),
+        fontes: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Dict[Any, int]]:
+        """
+        Conta, para cada opção de cada faceta, quantas questões restariam.
+
+        A contagem de uma faceta desconsidera a seleção atual da própria faceta
+        (as opções de um mesmo menu são alternativas entre si).
+
+        Args:
+            filtros: Filtros no formato de listar_questoes_principais
+            uuids_texto: Resultado da busca textual, se houver
+            facetas: Facetas a contar
+            fontes: Mapa {sigla: uuid} das fontes; com ele os filtros e as
+                contagens de fonte usam a sigla em vez do UUID
+
+        Returns:
+            Dict faceta -> {valor: contagem}
+        """
+        self._garantir_construido()
+        filtros = filtros or {}
+        siglas = {uuid: sigla for sigla, uuid in fontes.items()} if fontes is not None else None
+        resultado = {}
+        with self._lock:
+            for faceta in facetas:
+                outros = {k: v for k, v in filtros.items() if k not in _chaves_da_faceta(faceta)}
+                expressao = expressao_de_filtros(outros, uuids_texto, fontes)
+                base = self._vivas if expressao is None else self._avaliar(expressao) & self._vivas
+                valores = list(self._bitmaps[faceta].keys())
+                if not valores:
+                    resultado[faceta] = {}
+                    continue
+                matriz = np.vstack([self._bitmaps[faceta][v] for v in valores])
+                contagens = np.count_nonzero(matriz & base, axis=1)
+                if faceta == FACETA_FONTE and siglas is not None:
+                    resultado[faceta] = {siglas[v]: int(c) for v, c in zip(valores, contagens) if v in siglas}
+                else:
+                    resultado[faceta] = {v: int(c) for v, c in zip(valores, contagens)}
+        return resultado
+
+
+def consultar_facetas(session, uuids: Optional[Iterable[str]] = None) -> List[Tuple]:
+    """
+    Lê os valores de faceta das questões principais ativas (duas consultas).
+
+    Args:
+        session: Sessão SQLAlchemy
+        uuids: Restringe a essas questões (None = todas)
+
+    Returns:
+        Lista de (uuid, uuid_fonte, ano, dificuldade, tipo, [uuids das tags]);
+        questões inativas ou variantes ficam de fora
+    """
+    from src.models.orm import (
+        Questao, QuestaoVersao, QuestaoTag, AnoReferencia, Dificuldade, TipoQuestao
+    )
+
+    variantes = session.query(QuestaoVersao.uuid_questao_versao)
+    consulta = session.query(
+        Questao.uuid, Questao.uuid_fonte, AnoReferencia.ano,
+        Dificuldade.codigo, TipoQuestao.codigo
+    ).outerjoin(AnoReferencia, Questao.uuid_ano_referencia == AnoReferencia.uuid) \
+     .outerjoin(Dificuldade, Questao.uuid_dificuldade == Dificuldade.uuid) \
+     .outerjoin(TipoQuestao, Questao.uuid_tipo_questao == TipoQuestao.uuid) \
+     .filter(Questao.ativo == True, ~Questao.uuid.in_(variantes))
+    consulta_tags = session.query(QuestaoTag.c.uuid_questao, QuestaoTag.c.uuid_tag)
+    if uuids is not None:
+        uuids = list(uuids)
+        consulta = consulta.filter(Questao.uuid.in_(uuids))
+        consulta_tags = consulta_tags.filter(QuestaoTag.c.uuid_questao.in_(uuids))
+
+    tags_por_questao: Dict[str, List[str]] = {}
+    for uuid_questao, uuid_tag in consulta_tags:
+        tags_por_questao.setdefault(uuid_questao, []).append(uuid_tag)
+    return [
+        (uuid, fonte, ano, dificuldade, tipo, tags_por_questao.get(uuid, []))
+        for uuid, fonte, ano, dificuldade, tipo in consulta.all()
+    ]
+
+
+def _chaves_da_faceta(faceta: str) -> Set[str]:
+    if faceta == FACETA_ANO:
+        return {'ano_inicio', 'ano_fim'}
+    return {faceta}
+
+
+def expressao_de_filtros(
+    filtros: Optional[Dict[str, Any]],
+    uuids_texto: Optional[Iterable[str]] = None,
+    fontes: Optional[Dict[str, str]] = None
+):
+    """
+    Converte o dict de filtros da tela (filter_mode, fonte, ano_inicio/fim,
+    dificuldade, tipo, tags) em uma expressão de facetas.
+
+    Valores múltiplos de uma mesma faceta são combinados com OR; as facetas
+    entre si seguem filter_mode ('AND' ou 'OR'). A busca textual, quando
+    informada, é sempre combinada com AND.
+
+    Args:
+        filtros: Dict de filtros
+        uuids_texto: UUIDs que casaram com a busca textual (None = sem busca)
+        fontes: Mapa {sigla: uuid} para traduzir o filtro de fonte (siglas
+            desconhecidas não casam com nenhuma questão)
+
+    Returns:
+        Expressão ou None se não houver filtro
+    """
+    filtros = filtros or {}
+    condicoes = []
+
+    def _lista(valor):
+        return [valor] if isinstance(valor, (str, int)) else list(valor)
+
+    for faceta in (FACETA_FONTE, FACETA_DIFICULDADE, FACETA_TIPO, FACETA_TAGS):
+        if filtros.get(faceta):
+            valores = _lista(filtros[faceta])
+            if faceta == FACETA_FONTE and fontes is not None:
+                valores = [fontes.get(v) for v in valores]
+            condicoes.append(('OR', [(faceta, v) for v in valores]))
+
+    if filtros.get('ano_inicio') or filtros.get('ano_fim'):
+        condicoes.append((FACETA_ANO, filtros.get('ano_inicio'), filtros.get('ano_fim')))
+
+    expressao = None
+    if condicoes:
+        modo = 'OR' if filtros.get('filter_mode') == 'OR' else 'AND'
+        expressao = (modo, condicoes)
+
+    if uuids_texto is not None:
+        texto = ('UUIDS', list(uuids_texto))
+        expressao = texto if expressao is None else ('AND', [texto, expressao])
+    return expressao
+
+
+# Instância global
+_facet_index: Optional[FacetIndex] = None
+
+
+def get_facet_index() -> Optional[FacetIndex]:
+    """Retorna o índice global de facetas (None se o NumPy não estiver instalado)"""
+    global _facet_index
+    if not NUMPY_AVAILABLE:
+        return None
+    if _facet_index is None:
+        _facet_index = FacetIndex()
+    return _facet_index
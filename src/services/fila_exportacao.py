@@ -0,0 +1,233 @@
+"""Fila de exportações em segundo plano com progresso, cancelamento e histórico."""
+
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from src.application.dtos.export_dto import ExportOptionsDTO
+from src.application.services.contexto_exportacao import (
+    ContextoExportacao, ExportacaoCancelada, ESTADOS_FINAIS, ROTULOS_ESTADO,
+    ESTADO_NA_FILA, ESTADO_CONCLUIDO, ESTADO_FALHOU, ESTADO_CANCELADO
+)
+from src.database import session_manager
+from src.infrastructure.logging import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Exportações simultâneas (cada uma pode compilar várias versões em paralelo)
+SLOTS_PADRAO = 2
+LIMITE_HISTORICO = 100
+
+
+@dataclass
+class TarefaExportacao:
+    """Job de exportação e seu estado"""
+    id: int
+    descricao: str
+    opcoes: ExportOptionsDTO
+    quantidade_versoes: int = 0  # 0 = exportação simples; N = versões randomizadas
+    abrir_ao_concluir: bool = False
+    estado: str = ESTADO_NA_FILA
+    detalhe: str = ''
+    criada_em: float = field(default_factory=time.time)
+    iniciada_em: Optional[float] = None
+    finalizada_em: Optional[float] = None
+    arquivos: List[Path] = field(default_factory=list)
+    erros: List[str] = field(default_factory=list)
+    tempos_etapas: Dict[str, float] = field(default_factory=dict)
+    contexto: Optional[ContextoExportacao] = field(default=None, repr=False)
+
+    @property
+    def rotulo_estado(self) -> str:
+        rotulo = ROTULOS_ESTADO.get(self.estado, self.estado)
+        return f"{rotulo} ({self.detalhe})" if self.detalhe else rotulo
+
+    @property
+    def finalizada(self) -> bool:
+        return self.estado in ESTADOS_FINAIS
+
+    @property
+    def duracao(self) -> Optional[float]:
+        """Segundos em execução (até agora, se ainda rodando)"""
+        if self.iniciada_em is None:
+            return None
+        return (self.finalizada_em or time.time()) - self.iniciada_em
+
+
+class FilaExportacao(QObject):
+    """Executa exportações fora da thread da interface.
+
+    Cada job usa sua própria sessão do banco e um ContextoExportacao, que
+    informa as etapas (buscando, gerando LaTeX, imagens, passadas do pdflatex)
+    e permite cancelar encerrando a árvore de processos do TeX.
+
+    Signals:
+        tarefa_atualizada(object): TarefaExportacao mudou de estado/etapa.
+        tarefa_finalizada(object): TarefaExportacao concluída, falhou ou foi cancelada.
+    """
+
+    tarefa_atualizada = pyqtSignal(object)
+    tarefa_finalizada = pyqtSignal(object)
+
+    def __init__(self, slots: Optional[int] = None, timeout_processo: Optional[float] = None):
+        super().__init__()
+        if slots is None:
+            configurado = os.getenv('EXPORT_SLOTS', '')
+            slots = int(configurado) if configurado.isdigit() and int(configurado) > 0 else SLOTS_PADRAO
+        self.slots = slots
+        self.timeout_processo = timeout_processo
+        self._fila: 'queue.Queue[Optional[TarefaExportacao]]' = queue.Queue()
+        self._tarefas: Dict[int, TarefaExportacao] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._metrics = get_metrics_collector()
+        self._workers = [
+            threading.Thread(target=self._executar_worker, name=f"exportacao-{i + 1}", daemon=True)
+            for i in range(self.slots)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def enfileirar(self, opcoes: ExportOptionsDTO, descricao: str,
+                   quantidade_versoes: int = 0, abrir_ao_concluir: bool = False) -> TarefaExportacao:
+        """Adiciona uma exportação à fila.
+
+        Args:
+            opcoes: Opções de exportação.
+            descricao: Texto exibido no histórico.
+            quantidade_versoes: 0 para exportação simples; N para versões randomizadas.
+            abrir_ao_concluir: Abre os arquivos gerados ao concluir (ex: preview).
+
+        Returns:
+            TarefaExportacao criada.
+        """
+        tarefa = TarefaExportacao(
+            id=next(self._ids), descricao=descricao, opcoes=opcoes,
+            quantidade_versoes=quantidade_versoes, abrir_ao_concluir=abrir_ao_concluir
+        )
+        tarefa.contexto = ContextoExportacao(
+            lambda estado, detalhe: self._atualizar(tarefa, estado, detalhe), self.timeout_processo
+        )
+        with self._lock:
+            self._tarefas[tarefa.id] = tarefa
+            self._podar_historico()
+        self._fila.put(tarefa)
+        logger.info(f"Exportação #{tarefa.id} enfileirada: {descricao}")
+        self.tarefa_atualizada.emit(tarefa)
+        return tarefa
+
+    def cancelar(self, id_tarefa: int) -> bool:
+        """Cancela um job na fila ou em execução (encerra o pdflatex)."""
+        tarefa = self._tarefas.get(id_tarefa)
+        if tarefa is None or tarefa.finalizada:
+            return False
+        logger.info(f"Cancelando exportação #{id_tarefa}")
+        tarefa.contexto.cancelar()
+        if tarefa.estado == ESTADO_NA_FILA:
+            self._finalizar(tarefa, ESTADO_CANCELADO)
+        return True
+
+    def historico(self) -> List[TarefaExportacao]:
+        """Jobs conhecidos, do mais recente para o mais antigo."""
+        with self._lock:
+            return sorted(self._tarefas.values(), key=lambda t: t.id, reverse=True)
+
+    def limpar_finalizadas(self) -> None:
+        """Remove do histórico os jobs já finalizados."""
+        with self._lock:
+            for id_tarefa in [t.id for t in self._tarefas.values() if t.finalizada]:
+                del self._tarefas[id_tarefa]
+
+    def _podar_historico(self) -> None:
+        finalizadas = sorted((t for t in self._tarefas.values() if t.finalizada), key=lambda t: t.id)
+        for tarefa in finalizadas[:max(0, len(self._tarefas) - LIMITE_HISTORICO)]:
+            del self._tarefas[tarefa.id]
+
+    def _atualizar(self, tarefa: TarefaExportacao, estado: str, detalhe: str = '') -> None:
+        agora = time.time()
+        if tarefa.estado != estado and tarefa.iniciada_em is not None:
+            # Acumula o tempo da etapa anterior
+            inicio = tarefa.tempos_etapas.pop('_inicio', tarefa.iniciada_em)
+            tarefa.tempos_etapas[tarefa.estado] = tarefa.tempos_etapas.get(tarefa.estado, 0.0) + agora - inicio
+            tarefa.tempos_etapas['_inicio'] = agora
+        tarefa.estado = estado
+        tarefa.detalhe = detalhe
+        self.tarefa_atualizada.emit(tarefa)
+
+    def _finalizar(self, tarefa: TarefaExportacao, estado: str) -> None:
+        if tarefa.finalizada:
+            return
+        self._atualizar(tarefa, estado)
+        tarefa.tempos_etapas.pop('_inicio', None)
+        tarefa.finalizada_em = time.time()
+        if self._metrics and tarefa.duracao is not None:
+            self._metrics.record_timing(f"exportacao_job_{estado}", tarefa.duracao * 1000)
+        logger.info(
+            f"Exportação #{tarefa.id} {ROTULOS_ESTADO.get(estado, estado).lower()}"
+            + (f" em {tarefa.duracao:.1f}s" if tarefa.duracao is not None else "")
+        )
+        self.tarefa_finalizada.emit(tarefa)
+
+    def _executar_worker(self) -> None:
+        while True:
+            tarefa = self._fila.get()
+            if tarefa is None:
+                break
+            if tarefa.finalizada:
+                continue  # Cancelada enquanto estava na fila
+            tarefa.iniciada_em = time.time()
+            try:
+                self._executar(tarefa)
+                self._finalizar(tarefa, ESTADO_CONCLUIDO if tarefa.arquivos else ESTADO_FALHOU)
+            except ExportacaoCancelada:
+                self._finalizar(tarefa, ESTADO_CANCELADO)
+            except Exception as e:
+                logger.error(f"Erro na exportação #{tarefa.id}: {e}", exc_info=True)
+                tarefa.erros.append(str(e))
+                self._finalizar(tarefa, ESTADO_FALHOU)
+
+    def _executar(self, tarefa: TarefaExportacao) -> None:
+        from src.controllers.export_controller import ExportController
+
+        # Sessão própria: a fachada de serviços pertence à thread da interface
+        with session_manager.session_scope() as session:
+            controller = ExportController(session)
+            if tarefa.quantidade_versoes:
+                resultados = controller.exportar_versoes(
+                    tarefa.opcoes, tarefa.quantidade_versoes, contexto=tarefa.contexto
+                )
+                tarefa.arquivos = [r.caminho for r in resultados if r.sucesso]
+                tarefa.erros = [f"{r.sufixo}: {r.erro}" for r in resultados if r.erro]
+            else:
+                tarefa.arquivos = [controller.exportar_lista(tarefa.opcoes, tarefa.contexto)]
+
+        if tarefa.abrir_ao_concluir:
+            for arquivo in tarefa.arquivos:
+                controller.abrir_arquivo(arquivo)
+
+    def encerrar(self) -> None:
+        """Cancela os jobs pendentes e para os workers."""
+        for tarefa in self.historico():
+            if not tarefa.finalizada:
+                self.cancelar(tarefa.id)
+        for _ in self._workers:
+            self._fila.put(None)
+
+
+_fila_exportacao: Optional[FilaExportacao] = None
+
+
+def get_fila_exportacao() -> FilaExportacao:
+    """Retorna a fila de exportação global (criada no primeiro uso)."""
+    global _fila_exportacao
+    if _fila_exportacao is None:
+        _fila_exportacao = FilaExportacao()
+    return _fila_exportacao
@@ -1,9 +1,12 @@
 """
 Service para gerenciar Listas - usa apenas ORM
 """
+from functools import partial
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
+from src.database import executar_apos_commit
 from src.repositories import ListaRepository, QuestaoRepository
+from src.services.autocomplete_index import get_autocomplete_index
 
 
 class ListaService:
@@ -41,6 +44,9 @@ class ListaService:
                 self.lista_repo.adicionar_questao(lista.codigo, codigo, ordem)
 
         self.session.flush()
+        executar_apos_commit(self.session, partial(
+            get_autocomplete_index().registrar_lista, lista.uuid, lista.codigo, lista.titulo
+        ))
 
         return {
             'codigo': lista.codigo,
@@ -199,6 +205,9 @@ class ListaService:
             lista.formulas = formulas
 
         self.session.flush()
+        executar_apos_commit(self.session, partial(
+            get_autocomplete_index().registrar_lista, lista.uuid, lista.codigo, lista.titulo
+        ))
 
         return {
             'codigo': lista.codigo,
@@ -210,8 +219,7 @@ class ListaService:
     def deletar_lista(self, codigo: str) -> bool:
         """Desativa lista (soft delete)"""
         lista = self.lista_repo.buscar_por_codigo(codigo)
-        if lista:
-            lista.ativo = False
-            self.session.flush()
+        if lista and self.lista_repo.desativar(lista.uuid):
+            executar_apos_commit(self.session, partial(get_autocomplete_index().remover_lista, lista.uuid))
             return True
         return False
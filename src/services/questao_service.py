@@ -1,14 +1,19 @@
 """
 Service para gerenciar Questões - usa apenas ORM
 """
+from functools import partial
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
+from src.database import executar_apos_commit
 from src.repositories import (
     QuestaoRepository,
     AlternativaRepository,
     RespostaQuestaoRepository,
     TagRepository
 )
+from src.services.autocomplete_index import get_autocomplete_index
+from src.services.duplicate_detector import get_duplicate_detector
+from src.services.facet_index import consultar_facetas, get_facet_index
 
 
 class QuestaoService:
@@ -193,6 +198,13 @@ class QuestaoService:
             )
 
         self.session.flush()
+        executar_apos_commit(self.session, partial(
+            get_autocomplete_index().registrar_questao, questao.uuid, questao.codigo, questao.titulo
+        ))
+
+        possiveis_duplicatas = self.verificar_duplicatas(enunciado, excluir=[questao.uuid])
+        executar_apos_commit(self.session, partial(get_duplicate_detector().registrar, questao.uuid, enunciado))
+        self._atualizar_indice_facetas(questao)
 
         return {
             'codigo': questao.codigo,
@@ -200,6 +212,7 @@ class QuestaoService:
             'titulo': questao.titulo,
             'tipo': tipo,
             'enunciado': questao.enunciado,
+            'possiveis_duplicatas': possiveis_duplicatas,
             'alternativas': [
                 {
                     'uuid': alt.uuid,
@@ -442,6 +455,14 @@ class QuestaoService:
                     )
 
         self.session.flush()
+        executar_apos_commit(self.session, partial(
+            get_autocomplete_index().registrar_questao, questao.uuid, questao.codigo, questao.titulo
+        ))
+        if not self.questao_repo.eh_variante(questao.uuid):
+            executar_apos_commit(self.session, partial(
+                get_duplicate_detector().registrar, questao.uuid, questao.enunciado
+            ))
+            self._atualizar_indice_facetas(questao)
         return self.buscar_questao(codigo)
 
     def deletar_questao(self, codigo: str) -> bool:
@@ -458,6 +479,9 @@ class QuestaoService:
         if questao:
             questao.ativo = False
             self.session.flush()
+            executar_apos_commit(self.session, partial(get_autocomplete_index().remover_questao, questao.uuid))
+            executar_apos_commit(self.session, partial(get_duplicate_detector().remover, questao.uuid))
+            self._atualizar_indice_facetas(questao)
             return True
         return False
 
@@ -476,16 +500,70 @@ class QuestaoService:
         if questao:
             questao.ativo = True
             self.session.flush()
+            executar_apos_commit(self.session, partial(
+                get_autocomplete_index().registrar_questao, questao.uuid, questao.codigo, questao.titulo
+            ))
+            if not self.questao_repo.eh_variante(questao.uuid):
+                executar_apos_commit(self.session, partial(
+                    get_duplicate_detector().registrar, questao.uuid, questao.enunciado
+                ))
+                self._atualizar_indice_facetas(questao)
             return True
         return False
 
     def adicionar_tag(self, codigo_questao: str, nome_tag: str) -> bool:
         """Adiciona tag à questão"""
-        return self.questao_repo.adicionar_tag(codigo_questao, nome_tag)
+        sucesso = self.questao_repo.adicionar_tag(codigo_questao, nome_tag)
+        if sucesso:
+            self._atualizar_indice_facetas(self.questao_repo.buscar_por_codigo(codigo_questao))
+        return sucesso
 
     def remover_tag(self, codigo_questao: str, nome_tag: str) -> bool:
         """Remove tag da questão"""
-        return self.questao_repo.remover_tag(codigo_questao, nome_tag)
+        sucesso = self.questao_repo.remover_tag(codigo_questao, nome_tag)
+        if sucesso:
+            self._atualizar_indice_facetas(self.questao_repo.buscar_por_codigo(codigo_questao))
+        return sucesso
+
+    def _atualizar_indice_facetas(self, questao) -> None:
+        """
+        Agenda a propagação da questão para o índice de facetas em memória.
+
+        Os valores são lidos do banco agora (após o flush), porque depois do
+        commit os objetos estão expirados e não se pode consultar o banco.
+
+        Args:
+            questao: Objeto Questao (inativas e variantes são removidas do índice)
+        """
+        indice = get_facet_index()
+        if indice is None or questao is None:
+            return
+        self.session.flush()
+        linhas = consultar_facetas(self.session, [questao.uuid])
+        if linhas:
+            acao = partial(indice.registrar, *linhas[0])
+        else:
+            acao = partial(indice.remover_questao, questao.uuid)
+        executar_apos_commit(self.session, acao)
+
+    def contar_facetas(self, filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[Any, int]]:
+        """
+        Conta quantas questões principais restariam para cada opção dos menus
+        de filtro (fonte, dificuldade, tipo, ano, tags) sob a seleção atual.
+
+        Args:
+            filtros: Mesmo formato de listar_questoes_principais
+
+        Returns:
+            Dict faceta -> {valor: contagem} (vazio se o índice não estiver disponível)
+        """
+        indice = get_facet_index()
+        if indice is None:
+            return {}
+        uuids_texto = None
+        if filtros and filtros.get('titulo'):
+            uuids_texto = self.questao_repo.buscar_uuids_por_texto(filtros['titulo'])
+        return indice.contar_facetas(filtros, uuids_texto, fontes=self.questao_repo.mapa_fontes())
 
     def obter_estatisticas(self) -> Dict[str, Any]:
         """Retorna estatísticas sobre questões"""
@@ -624,6 +702,9 @@ class QuestaoService:
         )
 
         self.session.flush()
+        executar_apos_commit(self.session, partial(
+            get_autocomplete_index().registrar_questao, variante.uuid, variante.codigo, variante.titulo
+        ))
 
         return {
             'codigo': variante.codigo,
@@ -635,6 +716,84 @@ class QuestaoService:
             'numero_variante': num_variante
         }
 
+    def verificar_duplicatas(
+        self,
+        enunciado: str,
+        limiar: float = 0.7,
+        limite: int = 5,
+        excluir: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca questões ativas com enunciado muito parecido (MinHash/LSH).
+
+        Usado antes de salvar uma questão nova e pelo importador em lote.
+
+        Args:
+            enunciado: Texto do enunciado a verificar
+            limiar: Similaridade mínima (0 a 1)
+            limite: Máximo de resultados
+            excluir: UUIDs a ignorar
+
+        Returns:
+            Lista de dicts com codigo, uuid, titulo e similaridade
+        """
+        similares = get_duplicate_detector().buscar_similares(enunciado, limiar, limite, excluir)
+        if not similares:
+            return []
+
+        questoes = {
+            q.uuid: q for q in self.session.query(self.questao_repo.model_class).filter(
+                self.questao_repo.model_class.uuid.in_([s['uuid'] for s in similares])
+            )
+        }
+        resultado = []
+        for item in similares:
+            questao = questoes.get(item['uuid'])
+            if questao and questao.ativo:
+                resultado.append({
+                    'codigo': questao.codigo,
+                    'uuid': questao.uuid,
+                    'titulo': questao.titulo,
+                    'similaridade': item['similaridade']
+                })
+        return resultado
+
+    def relatorio_duplicatas(self, limiar: float = 0.7) -> List[Dict[str, Any]]:
+        """
+        Agrupa todo o banco em clusters de prováveis duplicatas.
+
+        Args:
+            limiar: Similaridade mínima para agrupar duas questões
+
+        Returns:
+            Lista de clusters {'total', 'questoes': [{codigo, uuid, titulo, similaridade}]},
+            do maior para o menor
+        """
+        clusters = get_duplicate_detector().encontrar_clusters(limiar)
+        if not clusters:
+            return []
+
+        uuids = [uuid for cluster in clusters for uuid, _ in cluster]
+        modelo = self.questao_repo.model_class
+        questoes = {
+            q.uuid: q for q in self.session.query(modelo).filter(modelo.uuid.in_(uuids))
+        }
+        relatorio = []
+        for cluster in clusters:
+            itens = [
+                {
+                    'codigo': questoes[uuid].codigo,
+                    'uuid': uuid,
+                    'titulo': questoes[uuid].titulo,
+                    'similaridade': similaridade
+                }
+                for uuid, similaridade in cluster
+                if uuid in questoes
+            ]
+            if len(itens) > 1:
+                relatorio.append({'total': len(itens), 'questoes': itens})
+        return relatorio
+
     def listar_questoes_principais(self, filtros: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Lista questões que NÃO são variantes, incluindo contagem de variantes.
@@ -666,6 +825,8 @@ class QuestaoService:
                 'ativo': q.ativo,
                 'quantidade_variantes': num_variantes,
                 'data_criacao': q.data_criacao,
+                'total_usos': q.uso.total_usos if q.uso else 0,
+                'data_ultimo_uso': q.uso.data_ultimo_uso if q.uso else None,
             })
 
         return resultado
@@ -1,9 +1,12 @@
 """
 Service para gerenciar Tags - usa apenas ORM
 """
+from functools import partial
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
+from src.database import executar_apos_commit
 from src.repositories import TagRepository
+from src.services.autocomplete_index import get_autocomplete_index
 
 
 class TagService:
@@ -374,6 +377,7 @@ class TagService:
         )
 
         self.session.flush()
+        self._atualizar_indice_autocomplete(tag)
 
         return {
             'id': hash(tag.uuid) % 2147483647,
@@ -404,6 +408,7 @@ class TagService:
             return None
 
         self.session.flush()
+        self._atualizar_indice_autocomplete(tag)
 
         return {
             'id': hash(tag.uuid) % 2147483647,
@@ -413,6 +418,28 @@ class TagService:
             'nivel': tag.nivel
         }
 
+    def _atualizar_indice_autocomplete(self, tag):
+        """
+        Atualiza a tag e suas descendentes ativas no índice de auto-complete
+        (renomear uma tag altera o caminho completo de toda a subárvore).
+
+        Args:
+            tag: Objeto Tag
+        """
+        entradas = []
+        pendentes = [tag]
+        while pendentes:
+            atual = pendentes.pop()
+            entradas.append((atual.uuid, atual.nome, atual.obter_caminho_completo()))
+            pendentes.extend(t for t in atual.tags_filhas if t.ativo)
+
+        def registrar():
+            indice = get_autocomplete_index()
+            for entrada in entradas:
+                indice.registrar_tag(*entrada)
+
+        executar_apos_commit(self.session, registrar)
+
     def deletar_tag(self, uuid: str) -> bool:
         """
         Deleta uma tag (soft delete)
@@ -438,6 +465,8 @@ class TagService:
 
         result = self.tag_repo.desativar(uuid)
         self.session.flush()
+        if result:
+            executar_apos_commit(self.session, partial(get_autocomplete_index().remover_tag, uuid))
         return result
 
     def pode_criar_subtag(self, uuid_tag_pai: str) -> bool:
@@ -481,6 +510,8 @@ class TagService:
 
         result = self.tag_repo.desativar(uuid)
         self.session.flush()
+        if result:
+            executar_apos_commit(self.session, partial(get_autocomplete_index().remover_tag, uuid))
         return result
 
     def reativar_tag(self, uuid: str) -> bool:
@@ -506,6 +537,7 @@ class TagService:
 
         tag.ativo = True
         self.session.flush()
+        self._atualizar_indice_autocomplete(tag)
         return True
 
     def obter_arvore_tags_inativas(self) -> List[Any]:
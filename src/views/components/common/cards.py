@@ -1,10 +1,8 @@
 # src/views/components/common/cards.py
-from PyQt6.QtWidgets import QFrame, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QSizePolicy, QGraphicsDropShadowEffect
+from PyQt6.QtWidgets import QFrame, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QGraphicsDropShadowEffect
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QColor
 from src.views.design.constants import Color, Spacing, Typography, Dimensions
-from src.views.design.enums import DifficultyEnum
-from src.views.components.common.badges import Badge, DifficultyBadge
 
 class BaseCard(QFrame):
     """
@@ -104,110 +102,9 @@ class StatCard(BaseCard):
             }}
         """)
 
-class QuestionCard(BaseCard):
-    """
-    Card to display a question summary (code, title, formula, tags).
-    """
-    def __init__(self, question_id: str, title: str, formula: str = None, tags: list = None, difficulty: DifficultyEnum = None, variant_count: int = 0, parent=None):
-        super().__init__(parent, object_name="question_card")
-
-        main_layout = QVBoxLayout(self)
-        main_layout.setContentsMargins(Spacing.MD, Spacing.MD, Spacing.MD, Spacing.MD)
-        main_layout.setSpacing(Spacing.SM)
-
-        # Header: Question ID, Variant Badge and Options
-        header_layout = QHBoxLayout()
-        question_id_label = QLabel(question_id)
-        question_id_label.setObjectName("card_id")
-        question_id_label.setStyleSheet(f"""
-            QLabel#card_id {{
-                color: {Color.PRIMARY_BLUE};
-                font-size: {Typography.FONT_SIZE_MD};
-                font-weight: {Typography.FONT_WEIGHT_BOLD};
-                letter-spacing: 0.5px;
-            }}
-        """)
-        header_layout.addWidget(question_id_label)
-
-        # Variant count badge
-        if variant_count > 0:
-            variant_text = f"({variant_count} variante{'s' if variant_count > 1 else ''})"
-            variant_label = QLabel(variant_text)
-            variant_label.setObjectName("variant_badge")
-            variant_label.setStyleSheet(f"""
-                QLabel#variant_badge {{
-                    color: {Color.GRAY_TEXT};
-                    font-size: {Typography.FONT_SIZE_SM};
-                    font-weight: {Typography.FONT_WEIGHT_MEDIUM};
-                    padding-left: {Spacing.XS}px;
-                }}
-            """)
-            header_layout.addWidget(variant_label)
-
-        header_layout.addStretch()
-        # Add placeholders for card_type and card_menu if needed, e.g., icon buttons
-        # header_layout.addWidget(QLabel("Type")) # Placeholder
-        # header_layout.addWidget(QLabel("Menu")) # Placeholder
-        main_layout.addLayout(header_layout)
-
-        # Title
-        title_label = QLabel(title)
-        title_label.setObjectName("card_title")
-        title_label.setWordWrap(True)
-        title_label.setStyleSheet(f"""
-            QLabel#card_title {{
-                font-size: {Typography.FONT_SIZE_LG};
-                font-weight: {Typography.FONT_WEIGHT_SEMIBOLD};
-                color: {Color.DARK_TEXT};
-            }}
-        """)
-        main_layout.addWidget(title_label)
-
-        # Formula Box
-        if formula:
-            formula_box = QFrame()
-            formula_box.setObjectName("formula_box")
-            formula_box.setStyleSheet(f"""
-                QFrame#formula_box {{
-                    background-color: {Color.LIGHT_GRAY_BACKGROUND};
-                    border: 1px dashed {Color.BORDER_MEDIUM};
-                    border-radius: {Dimensions.BORDER_RADIUS_MD};
-                    padding: {Spacing.LG}px;
-                }}
-            """)
-            formula_layout = QVBoxLayout(formula_box)
-            formula_text = QLabel(formula)
-            formula_text.setObjectName("formula_text")
-            formula_text.setWordWrap(True)
-            formula_text.setStyleSheet(f"""
-                QLabel#formula_text {{
-                    font-family: "Times New Roman", serif;
-                    font-style: italic;
-                    font-size: {Typography.FONT_SIZE_LG};
-                    color: {Color.DARK_TEXT};
-                }}
-            """)
-            formula_layout.addWidget(formula_text)
-            formula_box.setLayout(formula_layout)
-            main_layout.addWidget(formula_box)
-
-        # Tags and Difficulty
-        tag_difficulty_layout = QHBoxLayout()
-        if tags:
-            for tag_text in tags:
-                tag_difficulty_layout.addWidget(Badge(tag_text)) # Default gray for tags
-        if difficulty:
-            tag_difficulty_layout.addWidget(DifficultyBadge(difficulty))
-        tag_difficulty_layout.addStretch()
-        main_layout.addLayout(tag_difficulty_layout)
-
-        self.setLayout(main_layout)
-        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        self.setMinimumHeight(180) # Example minimum height, will adjust based on content
-
 if __name__ == '__main__':
     import sys
-    from PyQt6.QtWidgets import QApplication, QVBoxLayout, QWidget, QGridLayout
+    from PyQt6.QtWidgets import QApplication, QVBoxLayout, QWidget
 
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
@@ -227,37 +124,6 @@ if __name__ == '__main__':
     stat_card_layout.addStretch()
     main_layout.addLayout(stat_card_layout)
 
-    # Question Cards
-    main_layout.addWidget(QLabel("<h3>Question Cards:</h3>"))
-    question_grid_layout = QGridLayout()
-    question_grid_layout.addWidget(QuestionCard(
-        question_id="#Q-1042",
-        title="Integral definida de funções trigonométricas",
-        formula="$$\\int_{0}^{\\pi/2} \\sin^2(x) dx$$",
-        tags=["Cálculo", "Integrais"],
-        difficulty=DifficultyEnum.MEDIUM
-    ), 0, 0)
-    question_grid_layout.addWidget(QuestionCard(
-        question_id="#Q-2051",
-        title="Problema de otimização com derivadas",
-        tags=["Otimização", "Derivadas"],
-        difficulty=DifficultyEnum.HARD
-    ), 0, 1)
-    question_grid_layout.addWidget(QuestionCard(
-        question_id="#Q-4592",
-        title="Equações lineares e sistemas",
-        formula="$A\\mathbf{x} = \\mathbf{b}$",
-        tags=["Álgebra", "Sistemas Lineares"],
-        difficulty=DifficultyEnum.EASY
-    ), 1, 0)
-    question_grid_layout.addWidget(QuestionCard(
-        question_id="#Q-5000",
-        title="Geometria analítica: distância entre pontos",
-        tags=["Geometria", "Distância"],
-        difficulty=DifficultyEnum.EASY
-    ), 1, 1)
-    question_grid_layout.setColumnStretch(2, 1) # Make third column stretchable
-    main_layout.addLayout(question_grid_layout)
     main_layout.addStretch()
 
 
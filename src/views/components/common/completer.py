@@ -0,0 +1,120 @@
+# src/views/components/common/completer.py
+"""
+Auto-complete baseado no índice de prefixos (src.services.autocomplete_index).
+
+Todos os QCompleter do aplicativo compartilham um único AutocompleteModel:
+apenas um popup fica visível por vez, então o completer ativo repopula o
+modelo com o resultado da consulta ao índice a cada tecla digitada.
+"""
+from typing import Iterable, List, Optional
+
+from PyQt6.QtWidgets import QCompleter, QLineEdit
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, pyqtSignal
+
+from src.services.autocomplete_index import (
+    EntradaAutocomplete,
+    get_autocomplete_index,
+)
+
+# Roles adicionais expostas pelo modelo
+CATEGORIA_ROLE = Qt.ItemDataRole.UserRole
+ID_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class AutocompleteModel(QAbstractListModel):
+    """Modelo de lista com os resultados correntes do índice de auto-complete"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entradas: List[EntradaAutocomplete] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._entradas)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._entradas):
+            return None
+        entrada = self._entradas[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return entrada.rotulo
+        if role == Qt.ItemDataRole.EditRole:
+            return entrada.valor
+        if role == CATEGORIA_ROLE:
+            return entrada.categoria
+        if role == ID_ROLE:
+            return entrada.id
+        return None
+
+    def entrada(self, row: int) -> Optional[EntradaAutocomplete]:
+        """Retorna a entrada da linha informada"""
+        if 0 <= row < len(self._entradas):
+            return self._entradas[row]
+        return None
+
+    def atualizar(self, prefixo: str, categorias: Optional[Iterable[str]] = None, limite: int = 20):
+        """
+        Repopula o modelo com o resultado da consulta ao índice.
+
+        Args:
+            prefixo: Texto digitado
+            categorias: Categorias aceitas (None = todas)
+            limite: Máximo de resultados
+        """
+        entradas = get_autocomplete_index().buscar(prefixo, categorias, limite)
+        self.beginResetModel()
+        self._entradas = entradas
+        self.endResetModel()
+
+
+_shared_model: Optional[AutocompleteModel] = None
+
+
+def get_autocomplete_model() -> AutocompleteModel:
+    """Retorna o modelo compartilhado por todos os completers"""
+    global _shared_model
+    if _shared_model is None:
+        _shared_model = AutocompleteModel()
+    return _shared_model
+
+
+class IndexCompleter(QCompleter):
+    """
+    QCompleter que consulta o índice de prefixos em vez de filtrar uma lista fixa.
+
+    Emite entry_selected com a entrada escolhida no popup.
+    """
+    entry_selected = pyqtSignal(object)  # EntradaAutocomplete
+
+    def __init__(self, line_edit: QLineEdit, categorias: Optional[Iterable[str]] = None,
+                 limite: int = 20, parent=None):
+        super().__init__(parent or line_edit)
+        self._line_edit = line_edit
+        self._categorias = list(categorias) if categorias else None
+        self._limite = limite
+
+        self.setModel(get_autocomplete_model())
+        # A filtragem já foi feita pelo índice
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.setCompletionRole(Qt.ItemDataRole.EditRole)
+        self.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setMaxVisibleItems(12)
+
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self._on_text_edited)
+        self.activated[QModelIndex].connect(self._on_activated)
+
+    def _on_text_edited(self, texto: str):
+        modelo = get_autocomplete_model()
+        modelo.atualizar(texto, self._categorias, self._limite)
+        if modelo.rowCount() > 0 and texto.strip():
+            self.complete()
+        else:
+            self.popup().hide()
+
+    def _on_activated(self, index: QModelIndex):
+        # Em UnfilteredPopupCompletion as linhas do popup coincidem com as do modelo
+        entrada = get_autocomplete_model().entrada(index.row())
+        if entrada:
+            self.entry_selected.emit(entrada)
@@ -0,0 +1,246 @@
+# src/views/components/common/question_grid.py
+"""
+Virtualized question grid: a QAbstractListModel of question dicts painted as
+cards by a QStyledItemDelegate in a QListView (IconMode, uniform item sizes).
+
+Only the visible cards are painted and no widget is created per question, so
+filters and pages change without rebuilding a widget tree or polishing
+stylesheets. Each card shows the code, variant count, title and up to three
+tags plus the difficulty badge.
+
+IconMode still computes one item rect per row on every model reset and
+viewport resize, so pages are capped at MAX_CARDS_PER_PAGE cards to keep
+that layout pass short.
+"""
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen
+from PyQt6.QtWidgets import QAbstractItemView, QListView, QStyle, QStyledItemDelegate, QStyleOptionViewItem
+
+from src.views.design.constants import Color, Spacing, Typography, Dimensions
+from src.views.design.enums import DifficultyEnum
+from src.views.components.common.badges import DifficultyBadge
+
+# Additional roles exposed by the model
+QUESTION_ROLE = Qt.ItemDataRole.UserRole
+UUID_ROLE = Qt.ItemDataRole.UserRole + 1
+
+CARD_HEIGHT = 180
+CARD_MIN_WIDTH = 280
+MAX_TAGS = 3
+# Upper bound for one page: scrolling is virtualized, but the per-row layout
+# pass on reset/resize grows with the row count
+MAX_CARDS_PER_PAGE = 1000
+
+DIFFICULTY_MAP = {
+    'FACIL': DifficultyEnum.EASY,
+    'MEDIO': DifficultyEnum.MEDIUM,
+    'DIFICIL': DifficultyEnum.HARD,
+    'MUITO_DIFICIL': DifficultyEnum.VERY_HARD,
+}
+DIFFICULTY_COLORS = {
+    DifficultyEnum.EASY: (Color.TAG_GREEN, Color.WHITE),
+    DifficultyEnum.MEDIUM: (Color.TAG_YELLOW, Color.DARK_TEXT),
+    DifficultyEnum.HARD: (Color.TAG_ORANGE, Color.WHITE),
+    DifficultyEnum.VERY_HARD: (Color.TAG_RED, Color.WHITE),
+}
+
+
+def _px(value: str) -> int:
+    """Convert a design constant such as '14px' to an int."""
+    return int(str(value).rstrip('px'))
+
+
+class QuestionListModel(QAbstractListModel):
+    """List model over the question dicts returned by the controller."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._questions: List[Dict] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._questions)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._questions):
+            return None
+        question = self._questions[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            titulo = question.get('titulo')
+            return titulo if titulo and titulo.strip() else "Sem título"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"#{question.get('codigo', 'N/A')} - {question.get('titulo') or 'Sem título'}"
+        if role == QUESTION_ROLE:
+            return question
+        if role == UUID_ROLE:
+            return question.get('uuid')
+        return None
+
+    def set_questions(self, questions: List[Dict]):
+        """Replace the rows (the list is referenced, not copied)."""
+        self.beginResetModel()
+        self._questions = questions
+        self.endResetModel()
+
+    def question(self, row: int) -> Optional[Dict]:
+        """Return the question dict at the given row."""
+        if 0 <= row < len(self._questions):
+            return self._questions[row]
+        return None
+
+
+class QuestionCardDelegate(QStyledItemDelegate):
+    """Paints a question card for each model row (no child widgets)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._id_font = self._font(Typography.FONT_SIZE_MD, QFont.Weight.Bold)
+        self._variant_font = self._font(Typography.FONT_SIZE_SM, QFont.Weight.Medium)
+        self._title_font = self._font(Typography.FONT_SIZE_LG, QFont.Weight.DemiBold)
+        self._badge_font = self._font(Typography.FONT_SIZE_XS, QFont.Weight.Bold)
+        self._radius = _px(Dimensions.BORDER_RADIUS_LG)
+        self._badge_radius = _px(Dimensions.BORDER_RADIUS_SM)
+
+    @staticmethod
+    def _font(size: str, weight: QFont.Weight) -> QFont:
+        font = QFont()
+        font.setPixelSize(_px(size))
+        font.setWeight(weight)
+        return font
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        return QSize(CARD_MIN_WIDTH, CARD_HEIGHT)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex):
+        question = index.data(QUESTION_ROLE)
+        if question is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Half the grid spacing on each side gives the same gap as the old QGridLayout
+        margin = Spacing.LG // 2
+        card = QRectF(option.rect.adjusted(margin, margin, -margin, -margin))
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+
+        # Shadow, then the card body
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 20))
+        painter.drawRoundedRect(card.translated(0, 3), self._radius, self._radius)
+        painter.setBrush(QColor(Color.WHITE))
+        border = Color.PRIMARY_BLUE if hovered or selected else Color.BORDER_LIGHT
+        painter.setPen(QPen(QColor(border), 1))
+        painter.drawRoundedRect(card, self._radius, self._radius)
+
+        content = card.toRect().adjusted(Spacing.MD, Spacing.MD, -Spacing.MD, -Spacing.MD)
+        self._paint_header(painter, content, question)
+        badges_height = QFontMetrics(self._badge_font).height() + 2 * Spacing.XXS
+        header_height = QFontMetrics(self._id_font).height() + Spacing.SM
+        title_rect = QRect(
+            content.left(), content.top() + header_height,
+            content.width(), content.height() - header_height - badges_height - Spacing.SM
+        )
+        painter.setFont(self._title_font)
+        painter.setPen(QColor(Color.DARK_TEXT))
+        painter.drawText(
+            title_rect, int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap),
+            index.data(Qt.ItemDataRole.DisplayRole)
+        )
+        self._paint_badges(
+            painter, QRect(content.left(), content.bottom() - badges_height, content.width(), badges_height),
+            question
+        )
+        painter.restore()
+
+    def _paint_header(self, painter: QPainter, content: QRect, question: Dict):
+        """Question code and variant count on the first line."""
+        code = f"#{question.get('codigo', 'N/A')}"
+        painter.setFont(self._id_font)
+        painter.setPen(QColor(Color.PRIMARY_BLUE))
+        id_metrics = QFontMetrics(self._id_font)
+        painter.drawText(content.left(), content.top() + id_metrics.ascent(), code)
+
+        variant_count = question.get('quantidade_variantes', 0) or 0
+        if variant_count > 0:
+            text = f"({variant_count} variante{'s' if variant_count > 1 else ''})"
+            painter.setFont(self._variant_font)
+            painter.setPen(QColor(Color.GRAY_TEXT))
+            x = content.left() + id_metrics.horizontalAdvance(code) + Spacing.XS
+            painter.drawText(x, content.top() + id_metrics.ascent(), text)
+
+    def _paint_badges(self, painter: QPainter, row: QRect, question: Dict):
+        """Up to MAX_TAGS gray tag badges followed by the difficulty badge."""
+        tags = question.get('tags', [])
+        tags = [str(tag) for tag in tags if tag][:MAX_TAGS] if isinstance(tags, list) else []
+        dificuldade = question.get('dificuldade') or 'MEDIO'
+        difficulty = DIFFICULTY_MAP.get(dificuldade.upper(), DifficultyEnum.MEDIUM)
+        badges = [(tag, Color.TAG_GRAY, Color.WHITE) for tag in tags]
+        badges.append((
+            DifficultyBadge.DIFFICULTY_LABELS.get(difficulty, difficulty.value.upper()),
+            *DIFFICULTY_COLORS.get(difficulty, (Color.TAG_GRAY, Color.WHITE))
+        ))
+
+        metrics = QFontMetrics(self._badge_font)
+        painter.setFont(self._badge_font)
+        x = row.left()
+        for text, background, foreground in badges:
+            available = row.right() - x - 2 * Spacing.XS
+            if available < metrics.horizontalAdvance('…') + 2 * Spacing.XS:
+                break
+            text = metrics.elidedText(text, Qt.TextElideMode.ElideRight, available)
+            width = max(20, metrics.horizontalAdvance(text) + 2 * Spacing.XS)
+            badge = QRect(x, row.top(), width, row.height())
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(background))
+            painter.drawRoundedRect(QRectF(badge), self._badge_radius, self._badge_radius)
+            painter.setPen(QColor(foreground))
+            painter.drawText(badge, int(Qt.AlignmentFlag.AlignCenter), text)
+            x += width + Spacing.XS
+
+
+class QuestionGridView(QListView):
+    """
+    Card grid over a QuestionListModel. Emits question_clicked with the UUID.
+
+    Columns follow the viewport width (at least CARD_MIN_WIDTH each) and all
+    cells share one size, so layout is O(1) per item and only visible rows are painted.
+    """
+    question_clicked = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("question_grid")
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setSpacing(0)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(Spacing.LG * 2)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setMouseTracking(True)  # hover border
+        self.setFrameShape(QListView.Shape.NoFrame)
+        self.viewport().setAutoFillBackground(False)
+        self.setStyleSheet("QListView#question_grid { background-color: transparent; }")
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setItemDelegate(QuestionCardDelegate(self))
+        self.clicked.connect(self._on_clicked)
+
+    def _on_clicked(self, index: QModelIndex):
+        uuid = index.data(UUID_ROLE)
+        if uuid:
+            self.question_clicked.emit(uuid)
+
+    def resizeEvent(self, event):
+        """Spread the columns across the viewport width."""
+        width = self.viewport().width()
+        columns = max(1, width // CARD_MIN_WIDTH)
+        self.setGridSize(QSize(max(CARD_MIN_WIDTH, width // columns), CARD_HEIGHT))
+        super().resizeEvent(event)
@@ -5,10 +5,12 @@ Diálogos modais reutilizáveis
 from src.views.components.dialogs.image_insert_dialog import ImageInsertDialog
 from src.views.components.dialogs.table_editor_dialog import TableSizeDialog, TableEditorDialog
 from src.views.components.dialogs.color_picker_dialog import ColorPickerDialog
+from src.views.components.dialogs.export_jobs_dialog import ExportJobsDialog
 
 __all__ = [
     'ImageInsertDialog',
     'TableSizeDialog',
     'TableEditorDialog',
     'ColorPickerDialog',
+    'ExportJobsDialog',
 ]
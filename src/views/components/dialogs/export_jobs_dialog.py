@@ -0,0 +1,193 @@
+"""
+Component: ExportJobsDialog
+Painel das exportações em segundo plano (estado, duração, cancelamento)
+"""
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView, QPlainTextEdit
+)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFontDatabase
+import logging
+
+from src.application.services.metricas_exportacao import formatar_relatorio, get_historico_exportacoes
+from src.controllers.adapters import criar_export_controller
+from src.services.fila_exportacao import get_fila_exportacao, TarefaExportacao
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobsDialog(QDialog):
+    """Histórico das exportações com progresso e cancelamento (não modal)."""
+
+    COLUNAS = ["Descrição", "Estado", "Duração", "Resultado"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Exportações")
+        self.setModal(False)
+        self.resize(720, 320)
+        self.fila = get_fila_exportacao()
+        self._linhas = {}  # id da tarefa -> linha da tabela
+        self.init_ui()
+
+        # Sinais emitidos pelas threads da fila chegam na thread da interface
+        self.fila.tarefa_atualizada.connect(self._on_tarefa_atualizada)
+        self.fila.tarefa_finalizada.connect(self._on_tarefa_atualizada)
+
+        # Atualiza a duração dos jobs em execução
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._atualizar_duracoes)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(self.COLUNAS))
+        self.table.setHorizontalHeaderLabels(self.COLUNAS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.table.itemSelectionChanged.connect(self._atualizar_botoes)
+        self.table.itemDoubleClicked.connect(lambda _: self._on_abrir())
+        layout.addWidget(self.table)
+
+        botoes = QHBoxLayout()
+        self.btn_cancelar = QPushButton("Cancelar exportação")
+        self.btn_cancelar.clicked.connect(self._on_cancelar)
+        botoes.addWidget(self.btn_cancelar)
+
+        self.btn_abrir = QPushButton("Abrir arquivos")
+        self.btn_abrir.clicked.connect(self._on_abrir)
+        botoes.addWidget(self.btn_abrir)
+
+        self.btn_limpar = QPushButton("Limpar finalizadas")
+        self.btn_limpar.clicked.connect(self._on_limpar)
+        botoes.addWidget(self.btn_limpar)
+
+        self.btn_metricas = QPushButton("Métricas")
+        self.btn_metricas.setToolTip("Tempo, bytes e imagens por etapa das últimas exportações")
+        self.btn_metricas.clicked.connect(self._on_metricas)
+        botoes.addWidget(self.btn_metricas)
+
+        botoes.addStretch()
+        btn_fechar = QPushButton("Fechar")
+        btn_fechar.clicked.connect(self.close)
+        botoes.addWidget(btn_fechar)
+        layout.addLayout(botoes)
+
+        self._atualizar_botoes()
+
+    def _recarregar(self):
+        self.table.setRowCount(0)
+        self._linhas.clear()
+        # historico() vem do mais recente para o mais antigo; novos jobs entram no topo
+        for tarefa in reversed(self.fila.historico()):
+            self._on_tarefa_atualizada(tarefa)
+
+    def _on_tarefa_atualizada(self, tarefa: TarefaExportacao):
+        linha = self._linhas.get(tarefa.id)
+        if linha is None:
+            self.table.insertRow(0)
+            self._linhas = {id_tarefa: l + 1 for id_tarefa, l in self._linhas.items()}
+            self._linhas[tarefa.id] = linha = 0
+            item = QTableWidgetItem(tarefa.descricao)
+            item.setData(Qt.ItemDataRole.UserRole, tarefa.id)
+            self.table.setItem(linha, 0, item)
+
+        self.table.setItem(linha, 1, QTableWidgetItem(tarefa.rotulo_estado))
+        self.table.setItem(linha, 2, QTableWidgetItem(self._formatar_duracao(tarefa)))
+
+        if tarefa.erros:
+            resultado = "; ".join(tarefa.erros)
+        elif tarefa.arquivos:
+            resultado = ", ".join(arquivo.name for arquivo in tarefa.arquivos)
+        else:
+            resultado = ""
+        item_resultado = QTableWidgetItem(resultado)
+        item_resultado.setToolTip("\n".join(
+            [str(arquivo) for arquivo in tarefa.arquivos] + tarefa.erros
+        ))
+        self.table.setItem(linha, 3, item_resultado)
+        self._atualizar_botoes()
+
+    @staticmethod
+    def _formatar_duracao(tarefa: TarefaExportacao) -> str:
+        duracao = tarefa.duracao
+        if duracao is None:
+            return "—"
+        texto = f"{duracao:.1f}s"
+        # Tempo de cada etapa, para jobs finalizados
+        if tarefa.finalizada and tarefa.tempos_etapas:
+            etapas = ", ".join(
+                f"{estado}: {segundos:.1f}s" for estado, segundos in tarefa.tempos_etapas.items()
+                if not estado.startswith('_')
+            )
+            texto += f" ({etapas})"
+        return texto
+
+    def _atualizar_duracoes(self):
+        for tarefa in self.fila.historico():
+            linha = self._linhas.get(tarefa.id)
+            if linha is not None and not tarefa.finalizada and tarefa.iniciada_em is not None:
+                self.table.setItem(linha, 2, QTableWidgetItem(self._formatar_duracao(tarefa)))
+
+    def _tarefa_selecionada(self):
+        linhas = self.table.selectionModel().selectedRows()
+        if not linhas:
+            return None
+        id_tarefa = self.table.item(linhas[0].row(), 0).data(Qt.ItemDataRole.UserRole)
+        return next((t for t in self.fila.historico() if t.id == id_tarefa), None)
+
+    def _atualizar_botoes(self):
+        tarefa = self._tarefa_selecionada()
+        self.btn_cancelar.setEnabled(tarefa is not None and not tarefa.finalizada)
+        self.btn_abrir.setEnabled(tarefa is not None and bool(tarefa.arquivos))
+
+    def _on_cancelar(self):
+        tarefa = self._tarefa_selecionada()
+        if tarefa:
+            self.fila.cancelar(tarefa.id)
+
+    def _on_abrir(self):
+        tarefa = self._tarefa_selecionada()
+        if not tarefa or not tarefa.arquivos:
+            return
+        export_controller = criar_export_controller()
+        for arquivo in tarefa.arquivos:
+            export_controller.abrir_arquivo(arquivo)
+
+    def _on_limpar(self):
+        self.fila.limpar_finalizadas()
+        self._recarregar()
+
+    def _on_metricas(self):
+        historico = get_historico_exportacoes()
+        historico.recarregar()  # Inclui exportações feitas pelo CLI
+        dialogo = QDialog(self)
+        dialogo.setWindowTitle("Métricas das exportações")
+        dialogo.resize(760, 520)
+        layout = QVBoxLayout(dialogo)
+        texto = QPlainTextEdit(formatar_relatorio(historico.ultimas(20)))
+        texto.setReadOnly(True)
+        texto.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        layout.addWidget(texto)
+        btn_fechar = QPushButton("Fechar")
+        btn_fechar.clicked.connect(dialogo.accept)
+        layout.addWidget(btn_fechar, alignment=Qt.AlignmentFlag.AlignRight)
+        dialogo.exec()
+
+    def showEvent(self, event):
+        self._recarregar()
+        self._timer.start(1000)
+        super().showEvent(event)
+
+    def closeEvent(self, event):
+        self._timer.stop()
+        super().closeEvent(event)
@@ -1,10 +1,12 @@
 # src/views/components/layout/navbar.py
 from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QVBoxLayout, QFrame, QPushButton
 from PyQt6.QtGui import QIcon, QPixmap
-from PyQt6.QtCore import Qt, QSize, pyqtSignal
+from PyQt6.QtCore import Qt, QSize, pyqtSignal, QTimer
 from src.views.design.constants import Color, Spacing, Typography, Dimensions, Text
 from src.views.design.enums import PageEnum, ActionEnum, ButtonTypeEnum
 from src.views.components.common.buttons import IconButton, ContextualActionButton
+from src.views.components.common.inputs import SearchInput
+from src.views.components.common.completer import IndexCompleter
 
 class NavItem(QWidget):
     """
@@ -117,6 +119,7 @@ class Navbar(QFrame):
     settings_clicked = pyqtSignal()
     profile_clicked = pyqtSignal()
     logout_clicked = pyqtSignal()
+    goto_requested = pyqtSignal(object)  # EntradaAutocomplete escolhida na busca "Ir para..."
 
     def __init__(self, current_page: PageEnum = PageEnum.DASHBOARD, user_data: dict = None, parent=None):
         super().__init__(parent)
@@ -149,6 +152,13 @@ class Navbar(QFrame):
 
         main_layout.addStretch()
 
+        # Busca global "Ir para..." (questões, listas, tags e fontes)
+        self.goto_input = SearchInput(self, placeholder_text="Ir para... (código, título, tag, fonte)", object_name="search_input")
+        self.goto_input.setFixedWidth(280)
+        self.goto_completer = IndexCompleter(self.goto_input, parent=self)
+        self.goto_completer.entry_selected.connect(self._on_goto_selected)
+        main_layout.addWidget(self.goto_input)
+
         # 3. Action Area
         action_area_layout = QHBoxLayout()
         action_area_layout.setSpacing(Spacing.SM)
@@ -223,6 +233,10 @@ class Navbar(QFrame):
         main_layout.addLayout(action_area_layout)
         self.setLayout(main_layout)
 
+    def _on_goto_selected(self, entrada):
+        self.goto_requested.emit(entrada)
+        QTimer.singleShot(0, self.goto_input.clear)
+
     def update_navbar_for_page(self, new_page: PageEnum):
         self.nav_menu.update_active_item(new_page)
         # Logic to update contextual button based on page
@@ -4,10 +4,12 @@ from PyQt6.QtWidgets import (
     QScrollArea, QSizePolicy, QComboBox, QListWidget, QListWidgetItem,
     QAbstractItemView, QPushButton, QInputDialog, QMessageBox
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from src.views.design.constants import Color, Spacing, Typography, Dimensions
 from src.views.components.common.inputs import SearchInput
 from src.views.components.common.badges import RemovableBadge, Badge
+from src.views.components.common.completer import IndexCompleter
+from src.services.autocomplete_index import CATEGORIA_TAG
 from src.controllers.adapters import criar_tag_controller
 
 class TagsTab(QWidget):
@@ -123,6 +125,12 @@ class TagsTab(QWidget):
         tags_header_layout.addWidget(self.btn_criar_tag)
         tags_layout.addLayout(tags_header_layout)
 
+        # Busca rapida de tags por nome ou caminho (qualquer disciplina)
+        self.tag_search_input = SearchInput(tags_frame, placeholder_text="Buscar tag por nome ou caminho...")
+        self.tag_search_completer = IndexCompleter(self.tag_search_input, categorias=[CATEGORIA_TAG], parent=self)
+        self.tag_search_completer.entry_selected.connect(self._on_tag_search_selected)
+        tags_layout.addWidget(self.tag_search_input)
+
         self.tags_list = QListWidget(tags_frame)
         self.tags_list.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
         self.tags_list.setMinimumHeight(200)
@@ -200,6 +208,32 @@ class TagsTab(QWidget):
         except Exception as e:
             print(f"Erro ao carregar tags da disciplina: {e}")
 
+    def _on_tag_search_selected(self, entrada):
+        """Seleciona a tag escolhida na busca, trocando de disciplina se necessario."""
+        if not self._selecionar_item_tag(entrada.id):
+            try:
+                tag_info = self.tag_controller.buscar_tag_por_uuid(entrada.id)
+                uuid_disciplina = tag_info.get('uuid_disciplina') if tag_info else None
+                if uuid_disciplina:
+                    idx = self.disciplina_combo.findData(uuid_disciplina)
+                    if idx >= 0:
+                        self.disciplina_combo.setCurrentIndex(idx)
+                        self._selecionar_item_tag(entrada.id)
+            except Exception as e:
+                print(f"Erro ao selecionar tag da busca: {e}")
+        # O completer grava o texto escolhido depois deste slot; limpar no próximo ciclo
+        QTimer.singleShot(0, self.tag_search_input.clear)
+
+    def _selecionar_item_tag(self, tag_uuid: str) -> bool:
+        """Marca a tag na lista atual. Retorna False se ela nao estiver listada."""
+        for i in range(self.tags_list.count()):
+            item = self.tags_list.item(i)
+            if item.data(Qt.ItemDataRole.UserRole) == tag_uuid:
+                item.setSelected(True)
+                self.tags_list.scrollToItem(item)
+                return True
+        return False
+
     def _on_criar_tag_clicked(self):
         """Handler para criar uma nova tag."""
         uuid_disciplina = self.disciplina_combo.currentData()
@@ -15,6 +15,7 @@ from src.views.components.common.buttons import PrimaryButton, SecondaryButton
 from src.controllers.lista_controller_orm import ListaControllerORM
 from src.controllers.questao_controller_orm import QuestaoControllerORM
 from src.controllers.adapters import criar_export_controller
+from src.application.services.gerador_versoes import MAX_VERSOES, rotulo_versao
 
 
 class QuestionListItem(QListWidgetItem):
@@ -149,6 +150,8 @@ class ExamListPage(QWidget):
         self.current_exam_data: Optional[Dict] = None
         self.exams_list: List[Dict] = []
         self._original_title: str = ""
+        self._tarefas_exportacao = set()  # ids dos jobs de exportação desta página
+        self._export_jobs_dialog = None
 
         self._setup_ui()
         self._load_data()
@@ -684,7 +687,7 @@ class ExamListPage(QWidget):
         qty_layout.addWidget(qty_label)
 
         self.versoes_spinbox = QSpinBox(self.randomize_options_frame)
-        self.versoes_spinbox.setRange(1, 4)
+        self.versoes_spinbox.setRange(1, MAX_VERSOES)
         self.versoes_spinbox.setValue(2)
         self.versoes_spinbox.setFixedWidth(60)
         self.versoes_spinbox.valueChanged.connect(self._update_tipos_preview)
@@ -870,8 +873,11 @@ class ExamListPage(QWidget):
 
     def _update_tipos_preview(self, quantidade: int):
         """Update the preview of version types."""
-        tipos = ['A', 'B', 'C', 'D'][:quantidade]
-        self.tipos_preview_label.setText(f"Tipos: {', '.join(tipos)}")
+        if quantidade > 6:
+            self.tipos_preview_label.setText(f"Tipos: A a {rotulo_versao(quantidade - 1)}")
+        else:
+            tipos = [rotulo_versao(i) for i in range(quantidade)]
+            self.tipos_preview_label.setText(f"Tipos: {', '.join(tipos)}")
 
     def _load_data(self):
         """Load data from database."""
@@ -910,6 +916,15 @@ class ExamListPage(QWidget):
             self._load_exam_details(codigo)
             self.exam_selected.emit(codigo)
 
+    def select_exam(self, codigo: str):
+        """Seleciona uma lista pelo código (usado pela busca "Ir para...")."""
+        for i in range(self.exam_list_widget.count()):
+            item = self.exam_list_widget.item(i)
+            if item.data(Qt.ItemDataRole.UserRole) == codigo:
+                self.exam_list_widget.setCurrentItem(item)
+                self._on_exam_clicked(item)
+                return
+
     def _load_exam_details(self, codigo: str):
         """Load exam details for editing."""
         try:
@@ -1248,19 +1263,7 @@ class ExamListPage(QWidget):
                 questoes_config=questoes_config if questoes_config else None
             )
 
-            export_controller = criar_export_controller()
-            pdf_path = export_controller.exportar_lista(opcoes)
-
-            # Perguntar se deseja abrir o arquivo
-            reply = QMessageBox.question(
-                self, "PDF Gerado",
-                f"PDF gerado com sucesso!\n\n{pdf_path}\n\nDeseja abrir o arquivo?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                QMessageBox.StandardButton.Yes
-            )
-
-            if reply == QMessageBox.StandardButton.Yes:
-                export_controller.abrir_arquivo(pdf_path)
+            self._enfileirar_exportacao(opcoes, f"PDF {self.current_exam_codigo}")
 
         except Exception as e:
             QMessageBox.critical(
@@ -1381,13 +1384,7 @@ class ExamListPage(QWidget):
                 questoes_config=questoes_config if questoes_config else None
             )
 
-            export_controller = criar_export_controller()
-            tex_path = export_controller.exportar_lista(opcoes)
-
-            QMessageBox.information(
-                self, "Sucesso",
-                f"Arquivo LaTeX exportado com sucesso!\n\n{tex_path}"
-            )
+            self._enfileirar_exportacao(opcoes, f"LaTeX {self.current_exam_codigo}")
 
         except Exception as e:
             QMessageBox.critical(
@@ -1404,79 +1401,91 @@ class ExamListPage(QWidget):
             if not self._validate_ceab_fields():
                 return
 
-        tipos = ['A', 'B', 'C', 'D']
         quantidade = self.versoes_spinbox.value()
-        arquivos_gerados = []
 
         try:
-            # Mostrar cursor de espera
-            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-            QApplication.processEvents()
-
-            export_controller = criar_export_controller()
-
-            for i in range(quantidade):
-                tipo = tipos[i]
-
-                opcoes = ExportOptionsDTO(
-                    id_lista=self.current_exam_codigo,
-                    template_latex=template,
-                    tipo_exportacao=tipo_exportacao,
-                    output_dir=output_dir,
-                    layout_colunas=1 if self.single_column_radio.isChecked() else 2,
-                    incluir_gabarito=self.answer_key_checkbox.isChecked(),
-                    # Campos do template Wallon
-                    disciplina=self.disciplina_input.text().strip() or None,
-                    professor=self.professor_input.text().strip() or None,
-                    trimestre=self.trimestre_combo.currentData() or None,
-                    ano=self.ano_input.text().strip() or None,
-                    # Campos do template CEAB
-                    data_aplicacao=self.data_aplicacao_input.text().strip() or None,
-                    serie_simulado=self.serie_simulado_input.text().strip() or None,
-                    # Unidade: usar campo do Wallon para listaWallon, ou campo CEAB para simuladoCeab
-                    unidade=self.wallon_unidade_combo.currentData() or self.unidade_combo.currentData() or None,
-                    tipo_simulado=self.tipo_simulado_combo.currentData() or None,
-                    # Campos de randomização
-                    gerar_versoes_randomizadas=True,
-                    quantidade_versoes=quantidade,
-                    sufixo_versao=f"TIPO {tipo}",
-                    questoes_config=questoes_config if questoes_config else None
-                )
-
-                result_path = export_controller.exportar_lista_randomizada(opcoes, indice_versao=i)
-                if result_path:
-                    arquivos_gerados.append(result_path)
+            opcoes = ExportOptionsDTO(
+                id_lista=self.current_exam_codigo,
+                template_latex=template,
+                tipo_exportacao=tipo_exportacao,
+                output_dir=output_dir,
+                layout_colunas=1 if self.single_column_radio.isChecked() else 2,
+                incluir_gabarito=self.answer_key_checkbox.isChecked(),
+                # Campos do template Wallon
+                disciplina=self.disciplina_input.text().strip() or None,
+                professor=self.professor_input.text().strip() or None,
+                trimestre=self.trimestre_combo.currentData() or None,
+                ano=self.ano_input.text().strip() or None,
+                # Campos do template CEAB
+                data_aplicacao=self.data_aplicacao_input.text().strip() or None,
+                serie_simulado=self.serie_simulado_input.text().strip() or None,
+                # Unidade: usar campo do Wallon para listaWallon, ou campo CEAB para simuladoCeab
+                unidade=self.wallon_unidade_combo.currentData() or self.unidade_combo.currentData() or None,
+                tipo_simulado=self.tipo_simulado_combo.currentData() or None,
+                questoes_config=questoes_config if questoes_config else None
+            )
 
-                QApplication.processEvents()
+            # Versões compiladas em paralelo (TIPO A, B, ...) em segundo plano
+            extensao = "PDF" if tipo_exportacao == 'direta' else "LaTeX"
+            self._enfileirar_exportacao(
+                opcoes, f"{quantidade} versões {extensao} {self.current_exam_codigo}", quantidade
+            )
 
-            QApplication.restoreOverrideCursor()
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao gerar versões randomizadas: {str(e)}")
 
-            if arquivos_gerados:
-                extensao = "PDF" if tipo_exportacao == 'direta' else "LaTeX"
-                msg = f"Versões {extensao} geradas com sucesso!\n\nArquivos criados em:\n{output_dir}\n\n"
-                msg += "Arquivos:\n" + "\n".join([f"• {p.name}" for p in arquivos_gerados])
+    def _enfileirar_exportacao(self, opcoes, descricao: str, quantidade_versoes: int = 0):
+        """Envia a exportação para a fila em segundo plano e mostra o painel."""
+        from src.services.fila_exportacao import get_fila_exportacao
+
+        fila = get_fila_exportacao()
+        if not self._tarefas_exportacao:
+            fila.tarefa_finalizada.connect(self._on_exportacao_finalizada)
+        tarefa = fila.enfileirar(opcoes, descricao, quantidade_versoes)
+        self._tarefas_exportacao.add(tarefa.id)
+        self._mostrar_exportacoes()
+
+    def _mostrar_exportacoes(self):
+        """Mostra o painel de exportações (não modal)."""
+        from src.views.components.dialogs import ExportJobsDialog
+
+        if self._export_jobs_dialog is None:
+            self._export_jobs_dialog = ExportJobsDialog(self)
+        self._export_jobs_dialog.show()
+        self._export_jobs_dialog.raise_()
+
+    def _on_exportacao_finalizada(self, tarefa):
+        """Resultado de uma exportação iniciada por esta página."""
+        if tarefa.id not in self._tarefas_exportacao:
+            return
+        self._tarefas_exportacao.discard(tarefa.id)
+        from src.application.services.contexto_exportacao import ESTADO_CANCELADO
 
-                # Se for PDF, perguntar se deseja abrir os arquivos
-                if tipo_exportacao == 'direta':
-                    msg += "\n\nDeseja abrir os arquivos?"
-                    reply = QMessageBox.question(
-                        self, "Sucesso",
-                        msg,
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                        QMessageBox.StandardButton.Yes
-                    )
+        if tarefa.estado == ESTADO_CANCELADO:
+            return
+        erros = "\n".join(f"• {erro}" for erro in tarefa.erros)
+        if not tarefa.arquivos:
+            QMessageBox.warning(self, "Erro", f"Nenhum arquivo foi gerado.\n\n{erros}")
+            return
 
-                    if reply == QMessageBox.StandardButton.Yes:
-                        for pdf_path in arquivos_gerados:
-                            export_controller.abrir_arquivo(pdf_path)
-                else:
-                    QMessageBox.information(self, "Sucesso", msg)
-            else:
-                QMessageBox.warning(self, "Erro", "Nenhum arquivo foi gerado.")
+        msg = f"{tarefa.descricao}: exportação concluída!\n\nArquivos:\n"
+        msg += "\n".join(f"• {caminho}" for caminho in tarefa.arquivos)
+        if erros:
+            msg += f"\n\nVersões com erro:\n{erros}"
 
-        except Exception as e:
-            QApplication.restoreOverrideCursor()
-            QMessageBox.critical(self, "Erro", f"Erro ao gerar versões randomizadas: {str(e)}")
+        if tarefa.opcoes.tipo_exportacao == 'direta':
+            reply = QMessageBox.question(
+                self, "Sucesso",
+                msg + "\n\nDeseja abrir os arquivos?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.Yes
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                export_controller = criar_export_controller()
+                for caminho in tarefa.arquivos:
+                    export_controller.abrir_arquivo(caminho)
+        else:
+            QMessageBox.information(self, "Sucesso", msg)
 
     def _get_export_config(self) -> Dict:
         """Get current export configuration."""
@@ -7,7 +7,7 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QCheckBox, QRadioButton, QButtonGroup, QSpinBox, QSlider,
     QComboBox, QGroupBox, QFileDialog, QMessageBox, QLineEdit,
-    QSizePolicy, QProgressBar, QApplication
+    QSizePolicy, QProgressBar
 )
 from PyQt6.QtCore import Qt
 import logging
@@ -16,12 +16,12 @@ from pathlib import Path
 from src.utils import ErrorHandler
 from src.controllers.adapters import criar_export_controller
 from src.application.dtos.export_dto import ExportOptionsDTO
+from src.application.services.documento_html import MOTOR_HTML, MOTOR_LATEX
+from src.application.services.gerador_versoes import MAX_VERSOES, rotulo_versao
+from src.application.services.impressao_html import WEBENGINE_AVAILABLE
 
 logger = logging.getLogger(__name__)
 
-# Tipos de versão disponíveis
-TIPOS_VERSAO = ['A', 'B', 'C', 'D']
-
 
 class ExportDialog(QDialog):
     """Diálogo de configuração de exportação LaTeX"""
@@ -49,6 +49,24 @@ class ExportDialog(QDialog):
         self.direct_radio.setChecked(True)
         mode_layout.addWidget(self.direct_radio)
         mode_layout.addWidget(self.manual_radio)
+
+        # Motor do PDF: pdflatex (final) ou impressão HTML pelo Qt WebEngine (rascunho rápido)
+        motor_layout = QHBoxLayout()
+        motor_layout.addWidget(QLabel("Motor do PDF:"))
+        self.motor_combo = QComboBox()
+        self.motor_combo.addItem("LaTeX (pdflatex)", MOTOR_LATEX)
+        self.motor_combo.addItem("Rascunho rápido (HTML, sem LaTeX)", MOTOR_HTML)
+        self.motor_combo.setToolTip(
+            "O rascunho usa a mesma renderização da pré-visualização das questões e gera o PDF\n"
+            "em menos de um segundo; fórmulas e layout são aproximados."
+        )
+        self.motor_combo.setEnabled(WEBENGINE_AVAILABLE)
+        motor_layout.addWidget(self.motor_combo)
+        motor_layout.addStretch()
+        mode_layout.addLayout(motor_layout)
+        # Exportações idênticas a uma anterior são copiadas do cache de artefatos
+        self.forcar_check = QCheckBox("Forçar reconstrução (ignorar exportação idêntica já gerada)")
+        mode_layout.addWidget(self.forcar_check)
         layout.addWidget(mode_group)
 
         content_group = QGroupBox("Conteúdo")
@@ -88,7 +106,7 @@ class ExportDialog(QDialog):
         qty_layout = QHBoxLayout()
         qty_layout.addWidget(QLabel("Quantidade de versões:"))
         self.versoes_spin = QSpinBox()
-        self.versoes_spin.setRange(1, 4)
+        self.versoes_spin.setRange(1, MAX_VERSOES)
         self.versoes_spin.setValue(2)
         self.versoes_spin.valueChanged.connect(self._atualizar_preview_tipos)
         qty_layout.addWidget(self.versoes_spin)
@@ -255,18 +273,21 @@ class ExportDialog(QDialog):
             ErrorHandler.handle_exception(self, e, "Erro ao carregar templates LaTeX.")
 
     def _on_template_changed(self, template_name: str):
-        """Mostra/oculta campos específicos do template selecionado."""
-        is_wallon = "wallon" in template_name.lower()
-        is_lista_wallon = "listawallon" in template_name.lower()
-        is_wallon_av2 = "wallon_av2" in template_name.lower()
+        """Mostra/oculta campos específicos conforme os placeholders do template."""
+        try:
+            slots = set(self.controller.listar_placeholders(template_name)['slots']) if template_name else set()
+        except FileNotFoundError:
+            slots = set()
+
+        is_wallon = bool(slots & {'PROFESSOR', 'DISCIPLINA'})
 
         self.wallon_group.setVisible(is_wallon)
 
         # Mostrar campos específicos baseado no template
         if is_wallon:
             # listaWallon usa Unidade, wallon_av2 usa Trimestre
-            self.trimestre_layout_widget.setVisible(is_wallon_av2)
-            self.unidade_layout_widget.setVisible(is_lista_wallon)
+            self.trimestre_layout_widget.setVisible('TRIMESTRE' in slots)
+            self.unidade_layout_widget.setVisible('UNIDADE' in slots)
 
         self.adjustSize()
 
@@ -278,83 +299,53 @@ class ExportDialog(QDialog):
 
     def _atualizar_preview_tipos(self, quantidade: int):
         """Atualiza o preview dos tipos de versão."""
-        tipos = [f"TIPO {t}" for t in TIPOS_VERSAO[:quantidade]]
-        self.tipos_label.setText(f"Tipos a gerar: {', '.join(tipos)}")
+        if quantidade > 6:
+            self.tipos_label.setText(f"Tipos a gerar: TIPO A a TIPO {rotulo_versao(quantidade - 1)}")
+        else:
+            tipos = [f"TIPO {rotulo_versao(i)}" for i in range(quantidade)]
+            self.tipos_label.setText(f"Tipos a gerar: {', '.join(tipos)}")
 
     def perform_preview(self):
         """Gera um PDF temporário para preview antes da exportação final."""
-        import tempfile
-        import subprocess
-        import sys
-        import os
-        from PyQt6.QtWidgets import QApplication
-
         logger.info(f"Iniciando preview para lista ID: {self.id_lista}")
 
         try:
-            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-            QApplication.processEvents()
-
-            try:
-                temp_dir = Path.home() / ".questoes_preview"
-                temp_dir.mkdir(parents=True, exist_ok=True)
-                logger.info(f"Diretório temporário: {temp_dir}")
-
-                template_selecionado = self.template_combo.currentText()
-                logger.info(f"Template selecionado: '{template_selecionado}'")
-
-                if not template_selecionado:
-                    QApplication.restoreOverrideCursor()
-                    ErrorHandler.show_error(self, "Erro", "Nenhum template LaTeX selecionado.")
-                    return
-
-                opcoes = ExportOptionsDTO(
-                    id_lista=self.id_lista,
-                    layout_colunas=self.colunas_spin.value(),
-                    incluir_gabarito=self.gabarito_check.isChecked(),
-                    incluir_resolucoes=self.resolucao_check.isChecked(),
-                    randomizar_questoes=self.randomizar_check.isChecked(),
-                    escala_imagens=self.escala_slider.value() / 100.0,
-                    template_latex=template_selecionado,
-                    tipo_exportacao="direta",
-                    output_dir=str(temp_dir),
-                    trimestre=self.trimestre_combo.currentText() if self.wallon_group.isVisible() and self.trimestre_layout_widget.isVisible() else None,
-                    professor=self.professor_input.text() if self.wallon_group.isVisible() else None,
-                    disciplina=self.disciplina_input.text() if self.wallon_group.isVisible() else None,
-                    ano=self.ano_input.text() if self.wallon_group.isVisible() else None,
-                    unidade=self.unidade_combo.currentText() if self.wallon_group.isVisible() and self.unidade_layout_widget.isVisible() else None
-                )
-
-                logger.info(f"Opções de exportação: {opcoes}")
-                result_path = self.controller.exportar_lista(opcoes)
-                logger.info(f"Resultado da exportação: {result_path}")
-
-            finally:
-                QApplication.restoreOverrideCursor()
-
-            if result_path:
-                result_path = Path(result_path) if not isinstance(result_path, Path) else result_path
-                logger.info(f"Verificando existência do arquivo: {result_path}")
-                if result_path.exists():
-                    logger.info(f"Preview gerado com sucesso: {result_path}")
-                    if sys.platform == 'win32':
-                        os.startfile(str(result_path))
-                    elif sys.platform == 'darwin':
-                        subprocess.run(['open', str(result_path)])
-                    else:
-                        subprocess.run(['xdg-open', str(result_path)])
-                    return
-                else:
-                    logger.error(f"Arquivo não existe: {result_path}")
-
-            ErrorHandler.show_error(self, "Erro", "Não foi possível gerar o preview.")
+            temp_dir = Path.home() / ".questoes_preview"
+            temp_dir.mkdir(parents=True, exist_ok=True)
+
+            template_selecionado = self.template_combo.currentText()
+            logger.info(f"Template selecionado: '{template_selecionado}'")
+
+            if not template_selecionado:
+                ErrorHandler.show_error(self, "Erro", "Nenhum template LaTeX selecionado.")
+                return
+
+            opcoes = ExportOptionsDTO(
+                id_lista=self.id_lista,
+                layout_colunas=self.colunas_spin.value(),
+                incluir_gabarito=self.gabarito_check.isChecked(),
+                incluir_resolucoes=self.resolucao_check.isChecked(),
+                randomizar_questoes=self.randomizar_check.isChecked(),
+                escala_imagens=self.escala_slider.value() / 100.0,
+                template_latex=template_selecionado,
+                tipo_exportacao="direta",
+                motor_pdf=self.motor_combo.currentData(),
+                # Só as questões alteradas desde a última prévia voltam ao pdflatex
+                previa_incremental=True,
+                forcar_reconstrucao=self.forcar_check.isChecked(),
+                output_dir=str(temp_dir),
+                trimestre=self.trimestre_combo.currentText() if self.wallon_group.isVisible() and self.trimestre_layout_widget.isVisible() else None,
+                professor=self.professor_input.text() if self.wallon_group.isVisible() else None,
+                disciplina=self.disciplina_input.text() if self.wallon_group.isVisible() else None,
+                ano=self.ano_input.text() if self.wallon_group.isVisible() else None,
+                unidade=self.unidade_combo.currentText() if self.wallon_group.isVisible() and self.unidade_layout_widget.isVisible() else None
+            )
+
+            logger.info(f"Opções de exportação: {opcoes}")
+            # O PDF é aberto pela fila quando a compilação terminar
+            self._enfileirar(opcoes, f"Preview lista {self.id_lista}", abrir_ao_concluir=True)
 
-        except RuntimeError as re:
-            QApplication.restoreOverrideCursor()
-            logger.error(f"RuntimeError no preview: {re}")
-            QMessageBox.critical(self, "Erro de Compilação", str(re) + "\nVerifique se há erros no conteúdo LaTeX.")
         except Exception as e:
-            QApplication.restoreOverrideCursor()
             logger.error(f"Exception no preview: {e}", exc_info=True)
             QMessageBox.critical(self, "Erro no Preview", f"Erro ao gerar preview:\n\n{str(e)}")
 
@@ -383,6 +374,8 @@ class ExportDialog(QDialog):
                 escala_imagens=self.escala_slider.value() / 100.0,
                 template_latex=self.template_combo.currentText(),
                 tipo_exportacao="direta" if self.direct_radio.isChecked() else "manual",
+                motor_pdf=self.motor_combo.currentData(),
+                forcar_reconstrucao=self.forcar_check.isChecked(),
                 output_dir=str(output_dir),
                 trimestre=self.trimestre_combo.currentText() if self.wallon_group.isVisible() and self.trimestre_layout_widget.isVisible() else None,
                 professor=self.professor_input.text() if self.wallon_group.isVisible() else None,
@@ -391,24 +384,11 @@ class ExportDialog(QDialog):
                 unidade=self.unidade_combo.currentText() if self.wallon_group.isVisible() and self.unidade_layout_widget.isVisible() else None
             )
 
-            result_path = self.controller.exportar_lista(opcoes)
-
-            if result_path:
-                msg = f"Exportação concluída com sucesso para:\n{result_path}"
-                ErrorHandler.show_success(self, "Sucesso na Exportação", msg)
-
-                if opcoes.tipo_exportacao == "direta" and result_path.suffix == ".pdf":
-                    reply = QMessageBox.question(
-                        self, "Abrir PDF", "Deseja abrir o arquivo PDF gerado agora?",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                    )
-                    if reply == QMessageBox.StandardButton.Yes:
-                        import os
-                        os.startfile(result_path)
-
-                self.accept()
-            else:
-                ErrorHandler.show_error(self, "Erro", "A exportação não gerou nenhum arquivo.")
+            extensao = "PDF" if opcoes.tipo_exportacao == "direta" else (
+                "HTML" if opcoes.motor_pdf == MOTOR_HTML else "LaTeX"
+            )
+            self._enfileirar(opcoes, f"{extensao} lista {self.id_lista}")
+            self.accept()
 
         except ValueError as ve:
             ErrorHandler.show_warning(self, "Erro de Configuração", str(ve))
@@ -421,54 +401,44 @@ class ExportDialog(QDialog):
         """Executa a exportação de múltiplas versões randomizadas."""
         try:
             quantidade = self.versoes_spin.value()
-            arquivos_gerados = []
-
-            # Mostrar cursor de espera
-            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-
-            for i in range(quantidade):
-                tipo = TIPOS_VERSAO[i]
-                logger.info(f"Gerando versão TIPO {tipo}...")
-
-                opcoes = ExportOptionsDTO(
-                    id_lista=self.id_lista,
-                    layout_colunas=self.colunas_spin.value(),
-                    incluir_gabarito=self.gabarito_check.isChecked(),
-                    incluir_resolucoes=self.resolucao_check.isChecked(),
-                    randomizar_questoes=False,
-                    escala_imagens=self.escala_slider.value() / 100.0,
-                    template_latex=self.template_combo.currentText(),
-                    tipo_exportacao="direta" if self.direct_radio.isChecked() else "manual",
-                    output_dir=str(output_dir),
-                    trimestre=self.trimestre_combo.currentText() if self.wallon_group.isVisible() and self.trimestre_layout_widget.isVisible() else None,
-                    professor=self.professor_input.text() if self.wallon_group.isVisible() else None,
-                    disciplina=self.disciplina_input.text() if self.wallon_group.isVisible() else None,
-                    ano=self.ano_input.text() if self.wallon_group.isVisible() else None,
-                    unidade=self.unidade_combo.currentText() if self.wallon_group.isVisible() and self.unidade_layout_widget.isVisible() else None,
-                    gerar_versoes_randomizadas=True,
-                    quantidade_versoes=quantidade,
-                    sufixo_versao=f"TIPO {tipo}"
-                )
-
-                result_path = self.controller.exportar_lista_randomizada(opcoes, indice_versao=i)
-                if result_path:
-                    arquivos_gerados.append(result_path)
-
-                QApplication.processEvents()
-
-            QApplication.restoreOverrideCursor()
-
-            if arquivos_gerados:
-                msg = f"Versões geradas com sucesso!\n\nArquivos criados em:\n{output_dir}\n\n"
-                msg += "Arquivos:\n" + "\n".join([f"- {p.name}" for p in arquivos_gerados])
-                ErrorHandler.show_success(self, "Sucesso", msg)
-                self.accept()
-            else:
-                ErrorHandler.show_error(self, "Erro", "Nenhum arquivo foi gerado.")
+
+            opcoes = ExportOptionsDTO(
+                id_lista=self.id_lista,
+                layout_colunas=self.colunas_spin.value(),
+                incluir_gabarito=self.gabarito_check.isChecked(),
+                incluir_resolucoes=self.resolucao_check.isChecked(),
+                randomizar_questoes=False,
+                escala_imagens=self.escala_slider.value() / 100.0,
+                template_latex=self.template_combo.currentText(),
+                tipo_exportacao="direta" if self.direct_radio.isChecked() else "manual",
+                motor_pdf=self.motor_combo.currentData(),
+                forcar_reconstrucao=self.forcar_check.isChecked(),
+                output_dir=str(output_dir),
+                trimestre=self.trimestre_combo.currentText() if self.wallon_group.isVisible() and self.trimestre_layout_widget.isVisible() else None,
+                professor=self.professor_input.text() if self.wallon_group.isVisible() else None,
+                disciplina=self.disciplina_input.text() if self.wallon_group.isVisible() else None,
+                ano=self.ano_input.text() if self.wallon_group.isVisible() else None,
+                unidade=self.unidade_combo.currentText() if self.wallon_group.isVisible() and self.unidade_layout_widget.isVisible() else None
+            )
+
+            # Versões compiladas em paralelo (TIPO A, B, ...) em segundo plano
+            self._enfileirar(opcoes, f"{quantidade} versões lista {self.id_lista}", quantidade)
+            self.accept()
 
         except Exception as e:
-            QApplication.restoreOverrideCursor()
             ErrorHandler.handle_exception(self, e, "Erro ao gerar versões randomizadas.")
 
+    def _enfileirar(self, opcoes: ExportOptionsDTO, descricao: str,
+                    quantidade_versoes: int = 0, abrir_ao_concluir: bool = False):
+        """Envia a exportação para a fila em segundo plano e mostra o painel de exportações."""
+        from src.services.fila_exportacao import get_fila_exportacao
+        from src.views.components.dialogs import ExportJobsDialog
+
+        get_fila_exportacao().enfileirar(opcoes, descricao, quantidade_versoes, abrir_ao_concluir)
+        # O painel pertence à janela principal: continua aberto após este diálogo fechar
+        painel = ExportJobsDialog(self.parent())
+        painel.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        painel.show()
+
 
 logger.info("ExportDialog carregado")
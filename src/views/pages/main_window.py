@@ -43,6 +43,7 @@ class MainWindow(QMainWindow):
         self.navbar.page_changed.connect(self._handle_page_change)
         self.navbar.action_clicked.connect(self._handle_action_clicked)
         self.navbar.logout_clicked.connect(self._handle_logout)
+        self.navbar.goto_requested.connect(self._handle_goto_requested)
         self.central_layout.addWidget(self.navbar)
 
         # Content Area (Sidebar + Main Content)
@@ -161,6 +162,25 @@ class MainWindow(QMainWindow):
         """Handler para logout — emite signal para main.py."""
         self.logout_requested.emit()
 
+    def _handle_goto_requested(self, entrada):
+        """Handler para a busca global "Ir para..." da Navbar."""
+        from src.services.autocomplete_index import (
+            CATEGORIA_QUESTAO, CATEGORIA_LISTA, CATEGORIA_TAG, CATEGORIA_FONTE
+        )
+        if entrada.categoria == CATEGORIA_QUESTAO:
+            self._set_current_page(PageEnum.QUESTION_BANK)
+            self.question_bank_page.open_question_by_code(entrada.valor)
+        elif entrada.categoria == CATEGORIA_LISTA:
+            self.exam_list_page.refresh_data()
+            self._set_current_page(PageEnum.LISTS)
+            self.exam_list_page.select_exam(entrada.valor)
+        elif entrada.categoria == CATEGORIA_TAG:
+            self._set_current_page(PageEnum.QUESTION_BANK)
+            self.question_bank_page.set_tag_filter(entrada.id, entrada.rotulo)
+        elif entrada.categoria == CATEGORIA_FONTE:
+            self._set_current_page(PageEnum.QUESTION_BANK)
+            self.question_bank_page.set_source_filter(entrada.valor)
+
     def _handle_tag_filter_change(self, tag_uuid: str, is_checked: bool):
         """Handler for tag filter changes from Sidebar."""
         self.toast.show_message(f"Tag '{tag_uuid}' filter changed: {'checked' if is_checked else 'unchecked'}", "info")
@@ -259,7 +279,16 @@ class MainWindow(QMainWindow):
 
                 if resultado:
                     codigo = resultado.get('codigo') if isinstance(resultado, dict) else resultado
-                    self.toast.show_message(f"Questão criada com sucesso! Código: {codigo}", "success")
+                    duplicatas = resultado.get('possiveis_duplicatas') if isinstance(resultado, dict) else None
+                    if duplicatas:
+                        codigos = ", ".join(
+                            f"{d['codigo']} ({d['similaridade']:.0%})" for d in duplicatas
+                        )
+                        self.toast.show_message(
+                            f"Questão {codigo} criada. Possíveis duplicatas: {codigos}", "warning"
+                        )
+                    else:
+                        self.toast.show_message(f"Questão criada com sucesso! Código: {codigo}", "success")
                     self.question_editor_page.clear_form()
                     if hasattr(self.question_bank_page, 'refresh_data'):
                         self.question_bank_page.refresh_data()
@@ -10,10 +10,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 import logging
-import re
-import os
-import base64
 
+from src.application.services.markup_html import compilar_html
 from src.utils import ErrorHandler
 
 logger = logging.getLogger(__name__)
@@ -397,230 +395,7 @@ li {{
 
     def _formatar_texto(self, texto: str) -> str:
         """Formata texto com suporte a tabelas, listas e formatações."""
-        if not texto:
-            return ""
-
-        # Processar tabelas
-        texto = self._processar_tabelas_para_html(texto)
-
-        # Processar listas
-        texto = self._processar_listas_para_html(texto)
-
-        # Processar imagens
-        texto = self._processar_imagens(texto)
-
-        # Formatações de texto
-        texto = re.sub(r'\\textbf\{([^}]*)\}', r'<b>\1</b>', texto)
-        texto = re.sub(r'\\textit\{([^}]*)\}', r'<i>\1</i>', texto)
-        texto = re.sub(r'\\underline\{([^}]*)\}', r'<u>\1</u>', texto)
-        texto = re.sub(r'\\textsuperscript\{([^}]*)\}', r'<sup>\1</sup>', texto)
-        texto = re.sub(r'\\textsubscript\{([^}]*)\}', r'<sub>\1</sub>', texto)
-
-        # Letras gregas
-        gregas = {
-            r'\alpha': 'α', r'\beta': 'β', r'\gamma': 'γ', r'\delta': 'δ',
-            r'\epsilon': 'ε', r'\zeta': 'ζ', r'\eta': 'η', r'\theta': 'θ',
-            r'\iota': 'ι', r'\kappa': 'κ', r'\lambda': 'λ', r'\mu': 'μ',
-            r'\nu': 'ν', r'\xi': 'ξ', r'\pi': 'π', r'\rho': 'ρ',
-            r'\sigma': 'σ', r'\tau': 'τ', r'\upsilon': 'υ', r'\phi': 'φ',
-            r'\chi': 'χ', r'\psi': 'ψ', r'\omega': 'ω',
-            r'\Gamma': 'Γ', r'\Delta': 'Δ', r'\Theta': 'Θ', r'\Lambda': 'Λ',
-            r'\Xi': 'Ξ', r'\Pi': 'Π', r'\Sigma': 'Σ', r'\Upsilon': 'Υ',
-            r'\Phi': 'Φ', r'\Psi': 'Ψ', r'\Omega': 'Ω',
-        }
-        texto = re.sub(r'\$([^$]+)\$', r'\1', texto)
-        for latex, unicode_char in gregas.items():
-            texto = texto.replace(latex, unicode_char)
-
-        # Converter múltiplas quebras de linha em uma única <br>
-        texto = re.sub(r'\n{2,}', '<br><br>', texto)
-        texto = texto.replace('\n', '<br>')
-
-        # Remover <br> redundantes ao redor de tabelas
-        texto = re.sub(r'(<br>)+(<table)', r'\2', texto)
-        texto = re.sub(r'(</table>)(<br>)+', r'\1', texto)
-
-        return texto
-
-    def _processar_imagens(self, texto: str) -> str:
-        """Processa placeholders de imagem [IMG:caminho:escala]."""
-        pattern = r'\[IMG:(.+?):([0-9.]+)\]'
-
-        def replace_image(match):
-            caminho = match.group(1)
-            escala = float(match.group(2))
-            width = int(400 * escala)
-
-            # Se for URL (http/https), usar diretamente
-            if caminho.startswith(('http://', 'https://')):
-                return f'<br><img src="{caminho}" style="max-width:{width}px; display:block; margin:10px auto;"><br>'
-
-            # Se for arquivo local, converter para base64 data URI
-            if os.path.exists(caminho):
-                try:
-                    with open(caminho, 'rb') as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    ext = caminho.rsplit('.', 1)[-1].lower()
-                    mime_types = {
-                        'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
-                        'gif': 'image/gif', 'bmp': 'image/bmp', 'svg': 'image/svg+xml'
-                    }
-                    mime = mime_types.get(ext, 'image/png')
-                    return f'<br><img src="data:{mime};base64,{img_data}" style="max-width:{width}px; display:block; margin:10px auto;"><br>'
-                except Exception as e:
-                    logger.error(f"Erro ao carregar imagem {caminho}: {e}")
-                    return ''
-            return ''
-
-        return re.sub(pattern, replace_image, texto)
-
-    def _processar_tabelas_para_html(self, texto: str) -> str:
-        """Converte tabelas no formato [TABELA]...[/TABELA] para HTML."""
-        table_pattern = re.compile(
-            r'\[TABELA\]\s*\n(.*?)\[/TABELA\]',
-            re.DOTALL
-        )
-
-        def convert_table(match):
-            table_content = match.group(1).strip()
-            lines = table_content.split('\n')
-
-            if not lines:
-                return ''
-
-            html_lines = ['<table>']
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                is_header = '[CABECALHO]' in line
-                if is_header:
-                    line = line.replace('[CABECALHO]', '').replace('[/CABECALHO]', '')
-
-                cells = [cell.strip() for cell in line.split('|')]
-
-                html_lines.append('<tr>')
-                for cell in cells:
-                    cell_html = self._processar_formatacao_celula(cell)
-                    if is_header:
-                        html_lines.append(f'<th>{cell_html}</th>')
-                    else:
-                        html_lines.append(f'<td>{cell_html}</td>')
-                html_lines.append('</tr>')
-
-            html_lines.append('</table>')
-            return ''.join(html_lines)
-
-        return table_pattern.sub(convert_table, texto)
-
-    def _processar_formatacao_celula(self, cell_text: str) -> str:
-        """Processa formatações de uma célula de tabela."""
-        result = cell_text
-
-        # Processar cor de fundo
-        color_pattern = re.compile(r'\[COR:#([a-fA-F0-9]{6})\](.*?)\[/COR\]', re.DOTALL)
-        color_match = color_pattern.search(result)
-        if color_match:
-            cell_color = color_match.group(1)
-            inner_text = color_match.group(2)
-            result = f'<span style="background-color:#{cell_color};">{inner_text}</span>'
-            result = color_pattern.sub(result, cell_text)
-
-        return result
-
-    def _processar_listas_para_html(self, texto: str) -> str:
-        """Converte listas visuais para HTML."""
-        lines = texto.split('\n')
-        result = []
-        in_list = False
-        list_type = None
-
-        itemize_symbols = r'[•○■□▸✓★–]'
-        itemize_pattern = re.compile(rf'^[ ]{{2,4}}({itemize_symbols})\s+(.+)$')
-        arabic_pattern = re.compile(r'^[ ]{2,4}(\d+)\.\s+(.+)$')
-        alpha_lower_pattern = re.compile(r'^[ ]{2,4}([a-z])\)\s+(.+)$')
-        alpha_upper_pattern = re.compile(r'^[ ]{2,4}([A-Z])\)\s+(.+)$')
-        roman_lower_pattern = re.compile(r'^[ ]{2,4}(i{1,3}|iv|vi{0,3}|ix|xi{0,3})\.\s+(.+)$')
-        roman_upper_pattern = re.compile(r'^[ ]{2,4}(I{1,3}|IV|VI{0,3}|IX|XI{0,3})\.\s+(.+)$')
-
-        def close_list():
-            nonlocal in_list, list_type
-            if in_list:
-                result.append(f'</{list_type}>')
-                in_list = False
-                list_type = None
-
-        for line in lines:
-            itemize_match = itemize_pattern.match(line)
-            if itemize_match:
-                if not in_list or list_type != 'ul':
-                    close_list()
-                    result.append('<ul>')
-                    in_list = True
-                    list_type = 'ul'
-                result.append(f'<li>{itemize_match.group(2)}</li>')
-                continue
-
-            arabic_match = arabic_pattern.match(line)
-            if arabic_match:
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol>')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li>{arabic_match.group(2)}</li>')
-                continue
-
-            alpha_lower_match = alpha_lower_pattern.match(line)
-            if alpha_lower_match:
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="list-style-type:lower-alpha;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li>{alpha_lower_match.group(2)}</li>')
-                continue
-
-            alpha_upper_match = alpha_upper_pattern.match(line)
-            if alpha_upper_match:
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="list-style-type:upper-alpha;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li>{alpha_upper_match.group(2)}</li>')
-                continue
-
-            roman_lower_match = roman_lower_pattern.match(line)
-            if roman_lower_match and roman_lower_match.group(1).islower():
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="list-style-type:lower-roman;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li>{roman_lower_match.group(2)}</li>')
-                continue
-
-            roman_upper_match = roman_upper_pattern.match(line)
-            if roman_upper_match:
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="list-style-type:upper-roman;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li>{roman_upper_match.group(2)}</li>')
-                continue
-
-            if line.strip() and in_list:
-                close_list()
-
-            result.append(line)
-
-        close_list()
-        # Juntar sem newlines para evitar <br> extras
-        return ''.join(result)
+        return compilar_html(texto, estilos_inline=False)
 
     def _on_edit_clicked(self):
         """Handler para botão de editar."""
@@ -28,7 +28,7 @@ logger = logging.getLogger(__name__)
 class SelectableQuestionCard(QFrame):
     """
     Card de questão com checkbox para seleção.
-    Visualmente igual ao QuestionCard do banco de questões.
+    Visualmente igual aos cards do banco de questões (question_grid).
     """
     selection_changed = pyqtSignal(str, bool)  # codigo, is_selected
     preview_requested = pyqtSignal(str)  # codigo
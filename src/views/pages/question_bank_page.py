@@ -1,17 +1,15 @@
 # src/views/pages/question_bank_page.py
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QGridLayout,
-    QScrollArea, QSizePolicy, QSpacerItem, QFrame, QPushButton, QMenu
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QPushButton, QMenu
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QSize
 from PyQt6.QtGui import QIcon, QAction
 from typing import Dict, List, Any, Optional
 
 from src.views.design.constants import Color, Spacing, Typography, Dimensions, Text, IconPath
-from src.views.design.enums import DifficultyEnum
 from src.views.components.common.inputs import SearchInput
 from src.views.components.common.buttons import PrimaryButton, SecondaryButton
-from src.views.components.common.cards import QuestionCard
+from src.views.components.common.question_grid import MAX_CARDS_PER_PAGE, QuestionListModel, QuestionGridView
 from src.controllers.questao_controller_orm import QuestaoControllerORM
 
 
@@ -81,7 +79,7 @@ class QuestionBankPage(QWidget):
         # State
         self.current_filters: Dict[str, Any] = {}
         self.current_page = 1
-        self.page_size = 12
+        self.page_size = MAX_CARDS_PER_PAGE
         self.total_results = 0
         self.questions_data: List[Dict] = []
         self.selected_tag_path: str = ""
@@ -180,6 +178,10 @@ class QuestionBankPage(QWidget):
         self.tag_filter_btn.setEnabled(False)  # Desabilitado até selecionar disciplina
         filter_buttons_layout.addWidget(self.tag_filter_btn)
 
+        self.usage_filter_btn = SecondaryButton("Uso ▼", parent=self)
+        self.usage_filter_btn.clicked.connect(self._show_usage_menu)
+        filter_buttons_layout.addWidget(self.usage_filter_btn)
+
         filter_buttons_layout.addStretch()
 
         # Toggle AND/OR
@@ -215,27 +217,24 @@ class QuestionBankPage(QWidget):
 
         main_layout.addWidget(filter_bar_frame)
 
-        # 4. Question Grid (Scrollable)
-        self.scroll_area = QScrollArea(self)
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setObjectName("main_scroll")
-        self.scroll_area.setStyleSheet(f"""
-            QScrollArea#main_scroll {{
-                border: none;
-                background-color: transparent;
+        # 4. Question Grid (virtualized: model/delegate, only visible cards are painted)
+        self.question_model = QuestionListModel(self)
+        self.question_grid = QuestionGridView(self)
+        self.question_grid.setModel(self.question_model)
+        self.question_grid.question_clicked.connect(self._on_question_clicked)
+        main_layout.addWidget(self.question_grid, 1)
+
+        self.empty_label = QLabel(Text.EMPTY_NO_QUESTIONS, self)
+        self.empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.empty_label.setStyleSheet(f"""
+            QLabel {{
+                font-size: {Typography.FONT_SIZE_LG};
+                color: {Color.GRAY_TEXT};
+                padding: {Spacing.XL}px;
             }}
         """)
-
-        self.questions_container = QWidget()
-        self.questions_container.setObjectName("questions_container")
-        self.questions_container.setStyleSheet("background-color: transparent;")
-
-        self.grid_layout = QGridLayout(self.questions_container)
-        self.grid_layout.setContentsMargins(0, 0, 0, 0)
-        self.grid_layout.setSpacing(Spacing.LG)
-
-        self.scroll_area.setWidget(self.questions_container)
-        main_layout.addWidget(self.scroll_area)
+        self.empty_label.hide()
+        main_layout.addWidget(self.empty_label, 1)
 
         # 5. Pagination
         pagination_layout = QHBoxLayout()
@@ -260,29 +259,47 @@ class QuestionBankPage(QWidget):
         pagination_layout.addStretch()
         main_layout.addLayout(pagination_layout)
 
+    def _build_controller_filters(self, filters: Optional[Dict] = None) -> Dict:
+        """Converte os filtros da tela para o formato do controller."""
+        controller_filters = {}
+
+        if filters:
+            if 'search' in filters and filters['search']:
+                # Buscar por título ou enunciado
+                controller_filters['titulo'] = filters['search']
+            if 'fonte' in filters and filters['fonte']:
+                controller_filters['fonte'] = filters['fonte']
+            if 'dificuldade' in filters and filters['dificuldade']:
+                controller_filters['dificuldade'] = filters['dificuldade']
+            if 'tipo' in filters and filters['tipo']:
+                controller_filters['tipo'] = filters['tipo']
+            if 'tags' in filters and filters['tags']:
+                # Se tags é uma lista de UUIDs, converter para nomes se necessário
+                controller_filters['tags'] = filters['tags']
+            if 'uso' in filters and filters['uso']:
+                # Filtros/ordenação por uso em listas (nunca_usadas, fora_das_ultimas_listas, ordenar_por)
+                controller_filters.update(filters['uso'])
+
+        # Pass filter mode
+        if controller_filters:
+            controller_filters['filter_mode'] = self.filter_mode
+
+        return controller_filters
+
+    def _get_facet_counts(self) -> Dict:
+        """Contagens por opção de filtro sob a seleção atual ({} se indisponível)."""
+        return QuestaoControllerORM.contar_facetas(self._build_controller_filters(self.current_filters))
+
+    @staticmethod
+    def _label_with_count(label: str, counts: Dict, value) -> str:
+        if not counts:
+            return label
+        return f"{label} ({counts.get(value, 0)})"
+
     def _load_data(self, filters: Optional[Dict] = None):
         """Load questions from the database (only main questions, not variants)."""
         try:
-            # Build filter dict for controller
-            controller_filters = {}
-
-            if filters:
-                if 'search' in filters and filters['search']:
-                    # Buscar por título ou enunciado
-                    controller_filters['titulo'] = filters['search']
-                if 'fonte' in filters and filters['fonte']:
-                    controller_filters['fonte'] = filters['fonte']
-                if 'dificuldade' in filters and filters['dificuldade']:
-                    controller_filters['dificuldade'] = filters['dificuldade']
-                if 'tipo' in filters and filters['tipo']:
-                    controller_filters['tipo'] = filters['tipo']
-                if 'tags' in filters and filters['tags']:
-                    # Se tags é uma lista de UUIDs, converter para nomes se necessário
-                    controller_filters['tags'] = filters['tags']
-
-            # Pass filter mode
-            if controller_filters:
-                controller_filters['filter_mode'] = self.filter_mode
+            controller_filters = self._build_controller_filters(filters)
 
             # Fetch only main questions (not variants) from database
             # This method includes 'quantidade_variantes' in each question dict
@@ -294,11 +311,13 @@ class QuestionBankPage(QWidget):
             self.questions_data = [q for q in self.questions_data if q.get('ativo', True)]
 
             # Ordenar: 1º por ano (desc), 2º por tag (asc), 3º por data de criação (desc)
-            self.questions_data.sort(key=lambda q: (
-                -(q.get('ano') or 0),                               # Ano descendente
-                (q.get('tags', [''])[0] if q.get('tags') else ''),  # Primeira tag ascendente
-                -(q.get('data_criacao').timestamp() if q.get('data_criacao') else 0),  # Criação desc
-            ))
+            # (exceto quando o filtro de uso já define a ordem)
+            if not controller_filters.get('ordenar_por'):
+                self.questions_data.sort(key=lambda q: (
+                    -(q.get('ano') or 0),                               # Ano descendente
+                    (q.get('tags', [''])[0] if q.get('tags') else ''),  # Primeira tag ascendente
+                    -(q.get('data_criacao').timestamp() if q.get('data_criacao') else 0),  # Criação desc
+                ))
 
             self.total_results = len(self.questions_data)
             self._update_ui()
@@ -342,125 +361,19 @@ class QuestionBankPage(QWidget):
 
     def _update_question_grid(self):
         """Update the question grid with current page data."""
-        # Clear existing cards
-        while self.grid_layout.count():
-            item = self.grid_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-            elif item.spacerItem():
-                self.grid_layout.removeItem(item)
-
-        # Check if we have questions
-        if not self.questions_data:
-            # Show empty state message
-            empty_label = QLabel(Text.EMPTY_NO_QUESTIONS, self)
-            empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            empty_label.setStyleSheet(f"""
-                QLabel {{
-                    font-size: {Typography.FONT_SIZE_LG};
-                    color: {Color.GRAY_TEXT};
-                    padding: {Spacing.XL}px;
-                }}
-            """)
-            self.grid_layout.addWidget(empty_label, 0, 0, 1, 3)
-            return
-
-        # Get current page questions
         start_idx = (self.current_page - 1) * self.page_size
-        end_idx = start_idx + self.page_size
-        page_questions = self.questions_data[start_idx:end_idx]
+        page_questions = self.questions_data[start_idx:start_idx + self.page_size]
 
-        if not page_questions:
-            # No questions on this page
-            empty_label = QLabel("Nenhuma questão nesta página.", self)
-            empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            empty_label.setStyleSheet(f"""
-                QLabel {{
-                    font-size: {Typography.FONT_SIZE_LG};
-                    color: {Color.GRAY_TEXT};
-                    padding: {Spacing.XL}px;
-                }}
-            """)
-            self.grid_layout.addWidget(empty_label, 0, 0, 1, 3)
-            return
+        self.question_model.set_questions(page_questions)
+        self.question_grid.scrollToTop()
 
-        # Add question cards
-        row = 0
-        col = 0
-        max_cols = 3
-
-        for q_data in page_questions:
-            card = self._create_question_card(q_data)
-            # Store UUID for click handling
-            question_uuid = q_data.get('uuid')
-            if question_uuid:
-                # Create a wrapper function to capture the UUID correctly
-                def make_click_handler(uuid):
-                    def click_handler(event):
-                        self._on_question_clicked(uuid)
-                    return click_handler
-                card.mousePressEvent = make_click_handler(question_uuid)
-            self.grid_layout.addWidget(card, row, col)
-
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
-
-        # Add spacers for empty cells
-        while col > 0 and col < max_cols:
-            self.grid_layout.addItem(
-                QSpacerItem(0, 0, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum),
-                row, col
+        if not page_questions:
+            # Show empty state message
+            self.empty_label.setText(
+                Text.EMPTY_NO_QUESTIONS if not self.questions_data else "Nenhuma questão nesta página."
             )
-            col += 1
-
-        # Add vertical spacer at the end
-        self.grid_layout.addItem(
-            QSpacerItem(0, 0, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding),
-            row + 1, 0
-        )
-
-    def _create_question_card(self, q_data: Dict) -> QuestionCard:
-        """Create a QuestionCard from question data."""
-        # Extract data from database response
-        codigo = q_data.get('codigo', 'N/A')
-        titulo = q_data.get('titulo')
-
-        # Usar apenas o título - não mostrar enunciado no card
-        if not titulo or not titulo.strip():
-            titulo = "Sem título"
-
-        # Get tags (list of tag names)
-        tags = q_data.get('tags', [])
-        if isinstance(tags, list):
-            # Ensure tags are strings
-            tags = [str(tag) for tag in tags if tag]
-        else:
-            tags = []
-
-        # Map difficulty string to enum
-        dificuldade_str = q_data.get('dificuldade', 'MEDIO')
-        difficulty_map = {
-            'FACIL': DifficultyEnum.EASY,
-            'MEDIO': DifficultyEnum.MEDIUM,
-            'DIFICIL': DifficultyEnum.HARD,
-            'MUITO_DIFICIL': DifficultyEnum.VERY_HARD,
-        }
-        difficulty = difficulty_map.get(dificuldade_str.upper() if dificuldade_str else 'MEDIO', DifficultyEnum.MEDIUM)
-
-        # Get variant count (available when using listar_questoes_principais)
-        variant_count = q_data.get('quantidade_variantes', 0)
-
-        return QuestionCard(
-            question_id=f"#{codigo}",
-            title=titulo,
-            formula=None,  # Não mostrar fórmulas no card para padronizar
-            tags=tags[:3] if tags else [],  # Limit to 3 tags for display
-            difficulty=difficulty,
-            variant_count=variant_count,
-            parent=self
-        )
+        self.question_grid.setVisible(bool(page_questions))
+        self.empty_label.setVisible(not page_questions)
 
     def _update_pagination(self):
         """Update pagination controls."""
@@ -729,9 +642,10 @@ class QuestionBankPage(QWidget):
         try:
             from src.controllers.adapters import listar_fontes_questao
             fontes = listar_fontes_questao()
+            fonte_counts = self._get_facet_counts().get('fonte', {})
             for fonte in fontes:
                 sigla = fonte.get('sigla', '')
-                item = QListWidgetItem(sigla)
+                item = QListWidgetItem(self._label_with_count(sigla, fonte_counts, sigla))
                 item.setData(Qt.ItemDataRole.UserRole, sigla)
                 list_widget.addItem(item)
                 if sigla in current_fontes:
@@ -744,7 +658,7 @@ class QuestionBankPage(QWidget):
         def apply_filter_now():
             selected_items = list_widget.selectedItems()
             selected_siglas = [item.data(Qt.ItemDataRole.UserRole) for item in selected_items]
-            selected_names = [item.text() for item in selected_items]
+            selected_names = [item.data(Qt.ItemDataRole.UserRole) for item in selected_items]
             self._apply_source_filter_multi(selected_siglas, selected_names)
 
         list_widget.itemSelectionChanged.connect(apply_filter_now)
@@ -793,8 +707,9 @@ class QuestionBankPage(QWidget):
             ("Médio", "MEDIO"),
             ("Difícil", "DIFICIL")
         ]
+        difficulty_counts = self._get_facet_counts().get('dificuldade', {})
         for label, value in difficulties:
-            action = QAction(label, self)
+            action = QAction(self._label_with_count(label, difficulty_counts, value), self)
             action.triggered.connect(lambda checked, v=value, l=label: self._apply_difficulty_filter(v, l))
             menu.addAction(action)
 
@@ -831,8 +746,9 @@ class QuestionBankPage(QWidget):
             ("Objetiva", "OBJETIVA"),
             ("Discursiva", "DISCURSIVA")
         ]
+        type_counts = self._get_facet_counts().get('tipo', {})
         for label, value in types:
-            action = QAction(label, self)
+            action = QAction(self._label_with_count(label, type_counts, value), self)
             action.triggered.connect(lambda checked, v=value, l=label: self._apply_type_filter(v, l))
             menu.addAction(action)
 
@@ -898,6 +814,58 @@ class QuestionBankPage(QWidget):
         self.current_page = 1
         self._load_data(self.current_filters)
 
+    def _show_usage_menu(self):
+        """Show usage (questao_uso) filter menu."""
+        menu = QMenu(self)
+        menu.setStyleSheet(f"""
+            QMenu {{
+                background-color: {Color.WHITE};
+                border: 1px solid {Color.BORDER_LIGHT};
+                border-radius: {Dimensions.BORDER_RADIUS_MD};
+                padding: {Spacing.XS}px;
+            }}
+            QMenu::item {{
+                padding: {Spacing.SM}px {Spacing.MD}px;
+                border-radius: {Dimensions.BORDER_RADIUS_SM};
+            }}
+            QMenu::item:selected {{
+                background-color: {Color.LIGHT_BLUE_BG_1};
+                color: {Color.PRIMARY_BLUE};
+            }}
+        """)
+
+        action_all = QAction("Qualquer uso", self)
+        action_all.triggered.connect(lambda: self._apply_usage_filter(None))
+        menu.addAction(action_all)
+        menu.addSeparator()
+
+        options = [
+            ("Nunca usadas", {'nunca_usadas': True}),
+            ("Fora das últimas 5 listas", {'fora_das_ultimas_listas': 5}),
+            ("Fora das últimas 10 listas", {'fora_das_ultimas_listas': 10}),
+            ("Usadas há mais tempo primeiro", {'ordenar_por': 'menos_recentes'}),
+            ("Menos usadas primeiro", {'ordenar_por': 'menos_usadas'}),
+        ]
+        for label, value in options:
+            action = QAction(label, self)
+            action.triggered.connect(lambda checked, v=value, l=label: self._apply_usage_filter(v, l))
+            menu.addAction(action)
+
+        menu.exec(self.usage_filter_btn.mapToGlobal(self.usage_filter_btn.rect().bottomLeft()))
+
+    def _apply_usage_filter(self, usage: Optional[Dict], label: str = None):
+        """Apply usage filter/sort."""
+        if usage:
+            self.current_filters['uso'] = usage
+            self.usage_filter_btn.setText(f"{label} ▼")
+            self._add_filter_chip(f"Uso: {label}", "uso")
+        else:
+            self.current_filters.pop('uso', None)
+            self.usage_filter_btn.setText("Uso ▼")
+            self._remove_chip_by_key("uso")
+        self.current_page = 1
+        self._load_data(self.current_filters)
+
     def _show_discipline_menu(self):
         """Show discipline filter menu."""
         menu = QMenu(self)
@@ -1198,6 +1166,7 @@ class QuestionBankPage(QWidget):
         self.discipline_filter_btn.setText("Disciplina ▼")
         self.tag_filter_btn.setText("Conteúdo ▼")
         self.tag_filter_btn.setEnabled(False)
+        self.usage_filter_btn.setText("Uso ▼")
 
         # Remover todos os chips
         while self.chips_container.count():
@@ -1258,6 +1227,8 @@ class QuestionBankPage(QWidget):
             self._remove_chip_by_key("tag")
         elif filter_key == 'tag':
             self.tag_filter_btn.setText("Conteúdo ▼")
+        elif filter_key == 'uso':
+            self.usage_filter_btn.setText("Uso ▼")
 
         # Remove chip widget
         for i in range(self.chips_container.count()):
@@ -1298,6 +1269,30 @@ class QuestionBankPage(QWidget):
         self.current_page = 1
         self._load_data(self.current_filters)
 
+    def set_source_filter(self, sigla: str):
+        """Aplica filtro por uma única fonte (usado pela busca "Ir para...")."""
+        self._apply_source_filter(sigla)
+        self.current_page = 1
+        self._load_data(self.current_filters)
+
+    def open_question_by_code(self, codigo: str):
+        """Abre o preview de uma questão pelo código, mesmo fora da página atual."""
+        import logging
+        logger = logging.getLogger(__name__)
+        try:
+            complete_data = QuestaoControllerORM.buscar_questao(codigo)
+            if not complete_data:
+                logger.warning(f"Questão {codigo} não encontrada no banco de dados")
+                return
+
+            from src.views.pages.questao_preview_page import QuestaoPreview
+            preview_dialog = QuestaoPreview(self._format_data_for_preview(complete_data), parent=self)
+            preview_dialog.edit_requested.connect(self._on_edit_question_requested)
+            preview_dialog.create_variant_requested.connect(self._on_create_variant_requested)
+            preview_dialog.exec()
+        except Exception as e:
+            logger.error(f"Erro ao abrir preview da questão {codigo}: {e}", exc_info=True)
+
     def refresh_data(self):
         """Public method to refresh question list."""
         self._load_data(self.current_filters)
@@ -1,15 +1,13 @@
 # src/views/pages/question_editor_page.py
-import re
-import os
-import base64
-import logging
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QTabWidget, QStackedWidget, QSpacerItem, QSizePolicy, QFrame,
-    QCompleter, QMessageBox, QInputDialog
+    QMessageBox, QInputDialog
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QSize
 from PyQt6.QtGui import QIcon
+from src.application.services.markup_html import compilar_html
+from src.application.services.verificador_latex import erros, formatar_problemas, verificar_campos
 from src.controllers.adapters import criar_tag_controller
 from src.views.design.constants import Color, Spacing, Typography, Dimensions, Text
 from src.views.design.enums import ActionEnum, PageEnum
@@ -260,278 +258,8 @@ class QuestionEditorPage(QWidget):
         self.preview_tab.set_question_data(question_html, resolution_html)
 
     def _format_text_for_preview(self, texto: str) -> str:
-        """Formata texto para preview, processando tabelas, listas e formatações."""
-        if not texto:
-            return ""
-
-        # Processar tabelas primeiro (antes de converter newlines)
-        texto = self._processar_tabelas_para_html(texto)
-
-        # Processar listas
-        texto = self._processar_listas_para_html(texto)
-
-        # Processar blocos de alinhamento (antes de converter newlines)
-        texto = self._processar_blocos_alinhamento(texto)
-
-        # Processar formatações de texto
-        texto = self._processar_formatacoes_texto(texto)
-
-        # Processar imagens
-        texto = self._processar_imagens(texto)
-
-        # Converter múltiplas quebras de linha em uma única <br>
-        texto = re.sub(r'\n{2,}', '<br><br>', texto)
-        texto = texto.replace('\n', '<br>')
-
-        # Remover <br> redundantes ao redor de tabelas e blocos de alinhamento
-        texto = re.sub(r'(<br>)+(<table)', r'\2', texto)
-        texto = re.sub(r'(</table>)(<br>)+', r'\1', texto)
-        texto = re.sub(r'(<br>)+(<div style="text-align:)', r'\2', texto)
-        texto = re.sub(r'(</div>)(<br>)+', r'\1', texto)
-
-        return texto
-
-    def _processar_blocos_alinhamento(self, texto: str) -> str:
-        """Processa blocos [CENTRO] e [FONTE] para HTML."""
-        # [CENTRO]texto[/CENTRO] -> div centralizado
-        texto = re.sub(
-            r'\[CENTRO\](.*?)\[/CENTRO\]',
-            r'<div style="text-align:center;">\1</div>',
-            texto,
-            flags=re.DOTALL
-        )
-        # [FONTE]texto[/FONTE] -> div alinhado à direita com tamanho reduzido
-        texto = re.sub(
-            r'\[FONTE\](.*?)\[/FONTE\]',
-            r'<div style="text-align:right;font-size:small;color:#555;">\1</div>',
-            texto,
-            flags=re.DOTALL
-        )
-        return texto
-
-    def _processar_tabelas_para_html(self, texto: str) -> str:
-        """Converte tabelas no formato [TABELA]...[/TABELA] para HTML."""
-        table_pattern = re.compile(
-            r'\[TABELA\]\s*\n(.*?)\[/TABELA\]',
-            re.DOTALL
-        )
-
-        def convert_table(match):
-            table_content = match.group(1).strip()
-            lines = table_content.split('\n')
-
-            if not lines:
-                return ''
-
-            html_lines = []
-            html_lines.append('<table style="width:80%; border-collapse:collapse; margin:10px auto; font-size:11px;">')
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                is_header = '[CABECALHO]' in line
-                if is_header:
-                    line = line.replace('[CABECALHO]', '').replace('[/CABECALHO]', '')
-
-                cells = [cell.strip() for cell in line.split('|')]
-
-                html_lines.append('<tr>')
-                for cell in cells:
-                    cell_html = self._processar_formatacao_celula_html(cell)
-                    if is_header:
-                        html_lines.append(f'<th style="border:1px solid #333; padding:2px 6px; background:#e0e0e0;">{cell_html}</th>')
-                    else:
-                        html_lines.append(f'<td style="border:1px solid #333; padding:2px 6px; text-align:center;">{cell_html}</td>')
-                html_lines.append('</tr>')
-
-            html_lines.append('</table>')
-            # Usar espaço vazio para juntar, evitando <br> extras após conversão
-            return ''.join(html_lines)
-
-        return table_pattern.sub(convert_table, texto)
-
-    def _processar_formatacao_celula_html(self, cell_text: str) -> str:
-        """Processa formatações de uma célula de tabela para HTML."""
-        result = cell_text
-
-        # Processar cor de fundo
-        color_pattern = re.compile(r'\[COR:#([a-fA-F0-9]{6})\](.*?)\[/COR\]', re.DOTALL)
-        color_match = color_pattern.search(result)
-        cell_style = ''
-        if color_match:
-            cell_color = color_match.group(1)
-            cell_style = f' style="background-color: #{cell_color};"'
-            result = color_pattern.sub(r'\2', result)
-
-        if cell_style:
-            result = f'<span{cell_style}>{result}</span>'
-
-        return result
-
-    def _processar_listas_para_html(self, texto: str) -> str:
-        """Converte listas visuais para HTML."""
-        lines = texto.split('\n')
-        result = []
-        in_list = False
-        list_type = None
-
-        itemize_symbols = r'[•○■□▸✓★–]'
-        itemize_pattern = re.compile(rf'^[ ]{{2,4}}({itemize_symbols})\s+(.+)$')
-        arabic_pattern = re.compile(r'^[ ]{2,4}(\d+)\.\s+(.+)$')
-        alpha_lower_pattern = re.compile(r'^[ ]{2,4}([a-z])\)\s+(.+)$')
-        alpha_upper_pattern = re.compile(r'^[ ]{2,4}([A-Z])\)\s+(.+)$')
-        roman_lower_pattern = re.compile(r'^[ ]{2,4}(i{1,3}|iv|vi{0,3}|ix|xi{0,3})\.\s+(.+)$')
-        roman_upper_pattern = re.compile(r'^[ ]{2,4}(I{1,3}|IV|VI{0,3}|IX|XI{0,3})\.\s+(.+)$')
-
-        def close_list():
-            nonlocal in_list, list_type
-            if in_list:
-                result.append(f'</{list_type}>')
-                in_list = False
-                list_type = None
-
-        for line in lines:
-            itemize_match = itemize_pattern.match(line)
-            if itemize_match:
-                if not in_list or list_type != 'ul':
-                    close_list()
-                    result.append('<ul style="margin:5px 0;padding-left:25px;">')
-                    in_list = True
-                    list_type = 'ul'
-                result.append(f'<li style="margin:2px 0;">{itemize_match.group(2)}</li>')
-                continue
-
-            arabic_match = arabic_pattern.match(line)
-            if arabic_match:
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="margin:5px 0;padding-left:25px;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li style="margin:2px 0;">{arabic_match.group(2)}</li>')
-                continue
-
-            alpha_lower_match = alpha_lower_pattern.match(line)
-            if alpha_lower_match:
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="margin:5px 0;padding-left:25px;list-style-type:lower-alpha;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li style="margin:2px 0;">{alpha_lower_match.group(2)}</li>')
-                continue
-
-            alpha_upper_match = alpha_upper_pattern.match(line)
-            if alpha_upper_match:
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="margin:5px 0;padding-left:25px;list-style-type:upper-alpha;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li style="margin:2px 0;">{alpha_upper_match.group(2)}</li>')
-                continue
-
-            roman_lower_match = roman_lower_pattern.match(line)
-            if roman_lower_match and roman_lower_match.group(1).islower():
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="margin:5px 0;padding-left:25px;list-style-type:lower-roman;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li style="margin:2px 0;">{roman_lower_match.group(2)}</li>')
-                continue
-
-            roman_upper_match = roman_upper_pattern.match(line)
-            if roman_upper_match:
-                if not in_list or list_type != 'ol':
-                    close_list()
-                    result.append('<ol style="margin:5px 0;padding-left:25px;list-style-type:upper-roman;">')
-                    in_list = True
-                    list_type = 'ol'
-                result.append(f'<li style="margin:2px 0;">{roman_upper_match.group(2)}</li>')
-                continue
-
-            if line.strip() and in_list:
-                close_list()
-
-            result.append(line)
-
-        close_list()
-        # Juntar sem newlines para evitar <br> extras
-        return ''.join(result)
-
-    def _processar_formatacoes_texto(self, texto: str) -> str:
-        """Processa formatações de texto (negrito, itálico, etc.) para HTML."""
-        # Tags HTML simples já estão em HTML
-        # Processar comandos LaTeX
-        texto = re.sub(r'\\textbf\{([^}]*)\}', r'<b>\1</b>', texto)
-        texto = re.sub(r'\\textit\{([^}]*)\}', r'<i>\1</i>', texto)
-        texto = re.sub(r'\\underline\{([^}]*)\}', r'<u>\1</u>', texto)
-        texto = re.sub(r'\\textsuperscript\{([^}]*)\}', r'<sup>\1</sup>', texto)
-        texto = re.sub(r'\\textsubscript\{([^}]*)\}', r'<sub>\1</sub>', texto)
-
-        # Fração e raiz quadrada
-        texto = re.sub(
-            r'\\frac\{([^}]*)\}\{([^}]*)\}',
-            r'<span style="display:inline-block;text-align:center;vertical-align:middle;">'
-            r'<span style="display:block;border-bottom:1px solid #333;padding:0 2px;">\1</span>'
-            r'<span style="display:block;padding:0 2px;">\2</span></span>',
-            texto
-        )
-        texto = re.sub(r'\\sqrt\{([^}]*)\}', r'√(\1)', texto)
-
-        # Letras gregas
-        gregas = {
-            r'\alpha': 'α', r'\beta': 'β', r'\gamma': 'γ', r'\delta': 'δ',
-            r'\epsilon': 'ε', r'\zeta': 'ζ', r'\eta': 'η', r'\theta': 'θ',
-            r'\iota': 'ι', r'\kappa': 'κ', r'\lambda': 'λ', r'\mu': 'μ',
-            r'\nu': 'ν', r'\xi': 'ξ', r'\pi': 'π', r'\rho': 'ρ',
-            r'\sigma': 'σ', r'\tau': 'τ', r'\upsilon': 'υ', r'\phi': 'φ',
-            r'\chi': 'χ', r'\psi': 'ψ', r'\omega': 'ω',
-            r'\Gamma': 'Γ', r'\Delta': 'Δ', r'\Theta': 'Θ', r'\Lambda': 'Λ',
-            r'\Xi': 'Ξ', r'\Pi': 'Π', r'\Sigma': 'Σ', r'\Upsilon': 'Υ',
-            r'\Phi': 'Φ', r'\Psi': 'Ψ', r'\Omega': 'Ω',
-        }
-        texto = re.sub(r'\$([^$]+)\$', r'\1', texto)
-        for latex, unicode_char in gregas.items():
-            texto = texto.replace(latex, unicode_char)
-
-        return texto
-
-    def _processar_imagens(self, texto: str) -> str:
-        """Processa placeholders de imagem [IMG:caminho:escala] para HTML."""
-        logger = logging.getLogger(__name__)
-        pattern = r'\[IMG:(.+?):([0-9.]+)\]'
-
-        def replace_image(match):
-            caminho = match.group(1)
-            escala = float(match.group(2))
-            width = int(400 * escala)
-
-            # Se for URL (http/https), usar diretamente
-            if caminho.startswith(('http://', 'https://')):
-                return f'<br><img src="{caminho}" style="max-width:{width}px; display:block; margin:10px auto;"><br>'
-
-            # Se for arquivo local, converter para base64 data URI
-            if os.path.exists(caminho):
-                try:
-                    with open(caminho, 'rb') as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    ext = caminho.rsplit('.', 1)[-1].lower()
-                    mime_types = {
-                        'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
-                        'gif': 'image/gif', 'bmp': 'image/bmp', 'svg': 'image/svg+xml'
-                    }
-                    mime = mime_types.get(ext, 'image/png')
-                    return f'<br><img src="data:{mime};base64,{img_data}" style="max-width:{width}px; display:block; margin:10px auto;"><br>'
-                except Exception as e:
-                    logger.error(f"Erro ao carregar imagem {caminho}: {e}")
-                    return ''
-            return ''
-
-        return re.sub(pattern, replace_image, texto)
+        """Formata texto para preview (tabelas, listas, alinhamento, formatações e imagens)."""
+        return compilar_html(texto)
 
     def _update_save_button_state(self):
         # Validacao completa para habilitar o botao de salvar
@@ -600,6 +328,38 @@ class QuestionEditorPage(QWidget):
             return False, "\n".join(errors)
         return True, ""
 
+    def _confirmar_latex(self, objetiva: bool) -> bool:
+        """
+        Verifica a marcação do enunciado e das alternativas antes de salvar.
+
+        Returns:
+            True para salvar; com problemas, a decisão fica com o usuário
+        """
+        campos = [('enunciado', self.editor_tab.statement_input.toPlainText())]
+        if objetiva:
+            for alt_widget in self.editor_tab.alternatives_widgets:
+                campos.append((
+                    f"alternativa {alt_widget.radio_button.text()}",
+                    alt_widget.text_input.toPlainText()
+                ))
+        problemas = verificar_campos(campos, str(self.editing_question_id or ''))
+        if not problemas:
+            return True
+
+        if erros(problemas):
+            titulo = "Erros de LaTeX"
+            pergunta = "A questão não compilará na exportação. Salvar mesmo assim?"
+            padrao = QMessageBox.StandardButton.No
+        else:
+            titulo = "Avisos de LaTeX"
+            pergunta = "Salvar mesmo assim?"
+            padrao = QMessageBox.StandardButton.Yes
+        resposta = QMessageBox.question(
+            self, titulo, f"{formatar_problemas(problemas)}\n\n{pergunta}",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, padrao
+        )
+        return resposta == QMessageBox.StandardButton.Yes
+
     def _on_save_clicked(self):
         # Atualizar dados antes de validar
         self._update_question_data()
@@ -614,6 +374,8 @@ class QuestionEditorPage(QWidget):
         if not valido:
             QMessageBox.warning(self, "Validacao", erro)
             return
+        if not self._confirmar_latex(self.editor_tab.current_question_type == "objective"):
+            return
 
         # Gerar titulo automaticamente: FONTE - TAG PRINCIPAL - ANO
         tags_with_names = self.tags_tab.get_selected_content_tags_with_names()
@@ -691,6 +453,9 @@ class QuestionEditorPage(QWidget):
                 QMessageBox.warning(self, "Validacao", f"As alternativas {', '.join(empty_alts)} estao vazias.")
                 return
 
+        if not self._confirmar_latex(tipo == 'OBJETIVA'):
+            return
+
         # Coletar dados editáveis
         enunciado = self.editor_tab.statement_input.toPlainText()
 
@@ -758,14 +523,12 @@ class QuestionEditorPage(QWidget):
     def _setup_origin_autocomplete(self):
         """Configura auto-complete para o campo de origem/fonte."""
         try:
-            from src.controllers.adapters import listar_fontes_questao
-            fontes = listar_fontes_questao()
-            # Usar siglas para o autocomplete (ENEM, FUVEST, etc)
-            siglas = [f['sigla'] for f in fontes]
-            completer = QCompleter(siglas, self)
-            completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-            completer.setFilterMode(Qt.MatchFlag.MatchContains)
-            self.editor_tab.origin_input.setCompleter(completer)
+            from src.services.autocomplete_index import CATEGORIA_FONTE
+            from src.views.components.common.completer import IndexCompleter
+            # Sigla ou nome completo (ENEM, FUVEST, "universidade de sao...") inserem a sigla
+            self._origin_completer = IndexCompleter(
+                self.editor_tab.origin_input, categorias=[CATEGORIA_FONTE], parent=self
+            )
         except Exception as e:
             print(f"Erro ao configurar auto-complete de origem: {e}")
 
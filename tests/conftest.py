@@ -0,0 +1,112 @@
+"""
+Fixtures compartilhadas: banco SQLite em memória com o schema ORM e
+auxiliares para criar cadastros e questões.
+"""
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.models.orm import (
+    Base, TipoQuestao, FonteQuestao, AnoReferencia, Dificuldade, Tag, Questao
+)
+
+
+@pytest.fixture
+def engine():
+    # StaticPool: todas as sessões compartilham a mesma conexão (e o mesmo banco em memória)
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def fabrica_sessao(engine):
+    return sessionmaker(bind=engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def session(fabrica_sessao):
+    session = fabrica_sessao()
+    yield session
+    session.close()
+
+
+class Cadastros:
+    """Cria tipos, fontes, anos, dificuldades, tags e questões numa sessão"""
+
+    def __init__(self, session):
+        self.session = session
+        self.tipos = {}
+        self.fontes = {}
+        self.anos = {}
+        self.dificuldades = {}
+        self.tags = {}
+        self._proximo_codigo = 1
+
+    def tipo(self, codigo: str) -> TipoQuestao:
+        if codigo not in self.tipos:
+            self.tipos[codigo] = TipoQuestao(codigo=codigo, nome=codigo)
+            self.session.add(self.tipos[codigo])
+        return self.tipos[codigo]
+
+    def fonte(self, sigla: str) -> FonteQuestao:
+        if sigla not in self.fontes:
+            self.fontes[sigla] = FonteQuestao(sigla=sigla, nome_completo=sigla, tipo_instituicao='VESTIBULAR')
+            self.session.add(self.fontes[sigla])
+        return self.fontes[sigla]
+
+    def ano(self, ano: int) -> AnoReferencia:
+        if ano not in self.anos:
+            self.anos[ano] = AnoReferencia(ano=ano, descricao=str(ano))
+            self.session.add(self.anos[ano])
+        return self.anos[ano]
+
+    def dificuldade(self, codigo: str) -> Dificuldade:
+        if codigo not in self.dificuldades:
+            self.dificuldades[codigo] = Dificuldade(codigo=codigo)
+            self.session.add(self.dificuldades[codigo])
+        return self.dificuldades[codigo]
+
+    def tag(self, nome: str) -> Tag:
+        if nome not in self.tags:
+            self.tags[nome] = Tag(nome=nome, numeracao=str(len(self.tags) + 1), nivel=1)
+            self.session.add(self.tags[nome])
+        return self.tags[nome]
+
+    def questao(self, enunciado: str = 'Enunciado', titulo: str = None, tipo: str = 'OBJETIVA',
+                fonte: str = None, ano: int = None, dificuldade: str = None, tags=()) -> Questao:
+        questao = Questao(
+            codigo=f'Q-{self._proximo_codigo:05d}',
+            titulo=titulo,
+            enunciado=enunciado,
+            tipo=self.tipo(tipo),
+            fonte=self.fonte(fonte) if fonte else None,
+            ano=self.ano(ano) if ano else None,
+            dificuldade=self.dificuldade(dificuldade) if dificuldade else None,
+            tags=[self.tag(nome) for nome in tags],
+        )
+        self._proximo_codigo += 1
+        self.session.add(questao)
+        self.session.flush()
+        return questao
+
+
+@pytest.fixture
+def cadastros(session):
+    return Cadastros(session)
+
+
+@pytest.fixture
+def detector(tmp_path, monkeypatch):
+    """Detector de duplicatas vazio no lugar do global (que sincronizaria com o banco real)"""
+    pytest.importorskip('numpy')
+    from src.services import duplicate_detector
+    detector = duplicate_detector.DuplicateDetector(str(tmp_path / 'indice.minhash.npz'))
+    detector._carregado = True
+    monkeypatch.setattr(duplicate_detector, '_duplicate_detector', detector)
+    return detector
@@ -0,0 +1,515 @@
+"""
+Cadeia de passes de regex que o ExportController usava antes do compilador
+de marcação (markup_compiler), congelada como referência para
+test_markup_paridade.
+"""
+import re
+
+from src.application.services.export_service import escape_latex
+
+
+# =============================================================================
+# Cadeia anterior (referência, não alterar)
+# =============================================================================
+
+def _processar_imagens_inline(texto: str, centralizar: bool = True) -> str:
+    """
+    Processa placeholders de imagem [IMG:caminho:escala] e converte para LaTeX.
+
+    Args:
+        texto: Texto com placeholders de imagem
+        centralizar: Se True, centraliza a imagem. Se False, usa minipage (para alternativas)
+
+    Returns:
+        Texto com comandos LaTeX includegraphics
+    """
+    # Padrão: [IMG:caminho:escala]
+    # O caminho pode conter : (Windows drive), então usamos um padrão mais específico
+    # Formato esperado: [IMG:C:/path/to/image.png:0.7] ou [IMG:C:\path\to\image.png:0.7]
+    pattern = r'\[IMG:(.+?):([0-9.]+)\]'
+
+    def replace_image(match):
+        caminho = match.group(1)
+        escala = match.group(2)
+        # Normalizar caminho para LaTeX (usar /)
+        caminho_latex = caminho.replace('\\', '/')
+        if centralizar:
+            return f"\n\n\\begin{{center}}\n\\includegraphics[scale={escala}]{{{caminho_latex}}}\n\\end{{center}}\n\n"
+        else:
+            # Usar minipage para alternativas (não centraliza)
+            return f"\n\n\\begin{{minipage}}{{\\linewidth}}\n\\includegraphics[scale={escala}]{{{caminho_latex}}}\n\\end{{minipage}}\n\n"
+
+    return re.sub(pattern, replace_image, texto)
+
+
+def _processar_formatacoes_html(texto: str) -> str:
+    """
+    Converte tags HTML de formatação para comandos LaTeX equivalentes.
+
+    Deve ser chamado ANTES de _escape_preservando_comandos no pipeline.
+
+    Conversões:
+    - <b>texto</b> -> \\textbf{texto}
+    - <i>texto</i> -> \\textit{texto}
+    - <u>texto</u> -> \\underline{texto}
+    - <sup>texto</sup> -> \\textsuperscript{texto}
+    - <sub>texto</sub> -> \\textsubscript{texto}
+    """
+    # Processar de dentro para fora (tags mais internas primeiro)
+    texto = re.sub(r'<sup>(.*?)</sup>', r'\\textsuperscript{\1}', texto)
+    texto = re.sub(r'<sub>(.*?)</sub>', r'\\textsubscript{\1}', texto)
+    texto = re.sub(r'<b>(.*?)</b>', r'\\textbf{\1}', texto)
+    texto = re.sub(r'<i>(.*?)</i>', r'\\textit{\1}', texto)
+    texto = re.sub(r'<u>(.*?)</u>', r'\\underline{\1}', texto)
+    return texto
+
+
+def _escape_preservando_comandos(texto: str) -> str:
+    """
+    Escapa caracteres especiais do LaTeX, mas preserva comandos LaTeX já gerados.
+
+    Usa abordagem de placeholders para preservar comandos LaTeX de listas e tabelas.
+
+    Args:
+        texto: Texto com possíveis comandos LaTeX
+
+    Returns:
+        Texto com caracteres escapados, mas comandos LaTeX preservados
+    """
+    # Padrões de comandos LaTeX a preservar (listas, tabelas e alinhamento)
+    # IMPORTANTE: Math blocks PRIMEIRO, pois podem conter {} que confundem
+    # os padrões de comandos como \textsuperscript{[^}]*}
+    patterns = [
+        # Blocos de modo matemático - preservar ANTES dos comandos
+        # Display math ($$...$$)
+        r'\$\$[^$]+\$\$',
+        # Inline math ($...$) - não capturar $ seguido de espaço/dígito (moeda)
+        r'\$(?!\s|\d)[^$]+\$',
+        # Comandos de lista
+        r'\\begin\{itemize\}',
+        r'\\end\{itemize\}',
+        r'\\begin\{enumerate\}(?:\[label=\\[a-zA-Z]+\*[\.\)]\])?',
+        r'\\end\{enumerate\}',
+        r'\\item\s',
+        # Comandos de tabela
+        r'\\begin\{tabular\}\{[^}]+\}',
+        r'\\end\{tabular\}',
+        r'\\hline',
+        r'\\textbf\{[^}]*\}',
+        r'\\textit\{[^}]*\}',
+        r'\\underline\{[^}]*\}',
+        r'\\textsuperscript\{[^}]*\}',
+        r'\\textsubscript\{[^}]*\}',
+        r'\s*&\s*',  # Separador de células
+        r'\s*\\\\\s*',  # Quebra de linha em tabela
+        # Comandos de alinhamento
+        r'\\begin\{center\}',
+        r'\\end\{center\}',
+        r'\\begin\{flushright\}',
+        r'\\end\{flushright\}',
+        r'\\footnotesize\s',
+    ]
+
+    # Salvar comandos com placeholders
+    preserved = {}
+    counter = [0]
+
+    def save_command(match):
+        key = f"__LATEX_CMD_{counter[0]}__"
+        preserved[key] = match.group(0)
+        counter[0] += 1
+        return key
+
+    # Substituir cada padrão por placeholder
+    texto_temp = texto
+    for pattern in patterns:
+        texto_temp = re.sub(pattern, save_command, texto_temp)
+
+    # Escapar o texto (sem os comandos LaTeX)
+    texto_escaped = escape_latex(texto_temp)
+
+    # Restaurar os comandos LaTeX
+    for key, value in preserved.items():
+        texto_escaped = texto_escaped.replace(key, value)
+
+    return texto_escaped
+
+
+def _processar_formatacao_celula(cell_text: str) -> str:
+    r"""
+    Processa formatações de uma célula de tabela e converte para LaTeX.
+
+    Formatos suportados:
+    - <b>texto</b> -> \textbf{texto}
+    - <i>texto</i> -> \textit{texto}
+    - <u>texto</u> -> \underline{texto}
+    - <sup>texto</sup> -> \textsuperscript{texto}
+    - <sub>texto</sub> -> \textsubscript{texto}
+    - [COR:#hexcolor]texto[/COR] -> \cellcolor[HTML]{hexcolor}texto
+
+    Args:
+        cell_text: Texto da célula com possíveis formatações
+
+    Returns:
+        Texto convertido para LaTeX
+    """
+    result = cell_text
+
+    # Processar cor de fundo primeiro
+    color_pattern = re.compile(r'\[COR:#([a-fA-F0-9]{6})\](.*?)\[/COR\]', re.DOTALL)
+    color_match = color_pattern.search(result)
+    cell_color = None
+    if color_match:
+        cell_color = color_match.group(1).upper()
+        result = color_pattern.sub(r'\2', result)
+
+    # Extrair formatações ANTES do escape
+    # Usar placeholders para preservar as formatações
+    format_placeholders = {}
+    placeholder_counter = [0]
+
+    def extract_format(pattern, latex_cmd):
+        nonlocal result
+        def replacer(match):
+            inner_text = match.group(1)
+            # Escapar o texto interno
+            escaped_inner = escape_latex(inner_text)
+            key = f"__FMT_{placeholder_counter[0]}__"
+            # Usar concatenação para evitar problema com \u sendo interpretado como unicode
+            format_placeholders[key] = '\\' + latex_cmd + '{' + escaped_inner + '}'
+            placeholder_counter[0] += 1
+            return key
+        result = re.sub(pattern, replacer, result)
+
+    # Processar formatações (ordem: mais interno primeiro)
+    extract_format(r'<sup>(.*?)</sup>', 'textsuperscript')
+    extract_format(r'<sub>(.*?)</sub>', 'textsubscript')
+    extract_format(r'<b>(.*?)</b>', 'textbf')
+    extract_format(r'<i>(.*?)</i>', 'textit')
+    extract_format(r'<u>(.*?)</u>', 'underline')
+
+    # Escapar o texto restante (que não está em tags)
+    result = escape_latex(result)
+
+    # Restaurar as formatações
+    for key, value in format_placeholders.items():
+        result = result.replace(key, value)
+
+    # Adicionar cor de fundo se definida
+    if cell_color:
+        result = '\\cellcolor[HTML]{' + cell_color + '}' + result
+
+    return result
+
+
+def _processar_tabelas_visuais(texto: str) -> str:
+    """
+    Processa tabelas no formato visual e converte para LaTeX.
+
+    Formato de entrada:
+    [TABELA]
+    [CABECALHO]Col1 | Col2 | Col3[/CABECALHO]
+    Cell1 | Cell2 | Cell3
+    Cell4 | Cell5 | Cell6
+    [/TABELA]
+
+    Args:
+        texto: Texto com tabelas em formato visual
+
+    Returns:
+        Texto com tabelas convertidas para LaTeX
+    """
+    # Padrão para encontrar tabelas
+    table_pattern = re.compile(
+        r'\[TABELA\]\s*\n(.*?)\[/TABELA\]',
+        re.DOTALL
+    )
+
+    def convert_table(match):
+        table_content = match.group(1).strip()
+        lines = table_content.split('\n')
+
+        if not lines:
+            return ''
+
+        # Detectar número de colunas pela primeira linha
+        first_line = lines[0]
+        # Remover marcadores de cabeçalho e formatação para contar colunas
+        clean_first = re.sub(r'\[CABECALHO\]|\[/CABECALHO\]|\[COR:[^\]]+\]|\[/COR\]', '', first_line)
+        num_cols = len(clean_first.split('|'))
+
+        # Criar especificação de colunas (centralizado)
+        col_spec = '|' + '|'.join(['c'] * num_cols) + '|'
+
+        latex_lines = []
+        # Centralizar e ajustar largura para 0.8 da página com fonte menor
+        latex_lines.append('\\begin{center}')
+        latex_lines.append('\\small')
+        latex_lines.append('\\resizebox{0.8\\linewidth}{!}{%')
+        latex_lines.append('\\begin{tabular}{' + col_spec + '}')
+        latex_lines.append('\\hline')
+
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+
+            # Verificar se é cabeçalho
+            is_header = '[CABECALHO]' in line
+            if is_header:
+                line = line.replace('[CABECALHO]', '').replace('[/CABECALHO]', '')
+
+            # Separar células
+            cells = [cell.strip() for cell in line.split('|')]
+
+            # Processar formatação de cada célula
+            processed_cells = []
+            for cell in cells:
+                processed = _processar_formatacao_celula(cell)
+                if is_header and not processed.startswith('\\textbf') and not processed.startswith('\\cellcolor'):
+                    # Adicionar negrito ao cabeçalho se não tiver
+                    processed = '\\textbf{' + processed + '}'
+                processed_cells.append(processed)
+
+            latex_lines.append(' & '.join(processed_cells) + ' \\\\')
+            latex_lines.append('\\hline')
+
+        latex_lines.append('\\end{tabular}')
+        latex_lines.append('}')  # Fecha resizebox
+        latex_lines.append('\\end{center}')
+
+        return '\n'.join(latex_lines)
+
+    return table_pattern.sub(convert_table, texto)
+
+
+def _processar_blocos_alinhamento(texto: str) -> str:
+    """
+    Processa blocos [CENTRO] e [FONTE] e converte para LaTeX.
+
+    [CENTRO]texto[/CENTRO] -> \\begin{center}texto\\end{center}
+    [FONTE]texto[/FONTE] -> \\begin{flushright}\\footnotesize texto\\end{flushright}
+    """
+    # [CENTRO]texto[/CENTRO]
+    texto = re.sub(
+        r'\[CENTRO\](.*?)\[/CENTRO\]',
+        r'\\begin{center}\1\\end{center}',
+        texto,
+        flags=re.DOTALL
+    )
+    # [FONTE]texto[/FONTE]
+    texto = re.sub(
+        r'\[FONTE\](.*?)\[/FONTE\]',
+        r'\\begin{flushright}\\footnotesize \1\\end{flushright}',
+        texto,
+        flags=re.DOTALL
+    )
+    return texto
+
+
+def _processar_listas(texto: str) -> str:
+    """
+    Processa listas visuais (itemizadas e enumeradas) e converte para LaTeX.
+
+    IMPORTANTE: Para evitar falsos positivos, os padrões exigem que a linha
+    comece com 2-4 espaços seguidos pelo marcador (como gerado pelo diálogo de listas).
+
+    Formatos suportados:
+    - Itemizadas: •, ○, ■, □, ▸, –, ✓, ★
+    - Enumeradas: 1., a), A), i., I.
+
+    Args:
+        texto: Texto com listas em formato visual
+
+    Returns:
+        Texto com listas convertidas para LaTeX
+    """
+    lines = texto.split('\n')
+    result = []
+    in_itemize = False
+    in_enumerate = False
+    enumerate_type = None
+
+    # Padrões para detectar itens de lista
+    # IMPORTANTE: Exigem 2-4 espaços no início para evitar falsos positivos
+    # O diálogo de listas gera: "   • Item" (3 espaços)
+    itemize_symbols = r'[•○■□▸✓★]'
+    itemize_pattern = re.compile(rf'^[ ]{{2,4}}({itemize_symbols})\s+(.+)$')
+
+    # Enumerate patterns - também exigem 2-4 espaços no início
+    arabic_pattern = re.compile(r'^[ ]{2,4}(\d+)\.\s+(.+)$')  # 1. 2. 3.
+    alpha_lower_pattern = re.compile(r'^[ ]{2,4}([a-z])\)\s+(.+)$')  # a) b) c)
+    alpha_upper_pattern = re.compile(r'^[ ]{2,4}([A-Z])\)\s+(.+)$')  # A) B) C)
+    roman_lower_pattern = re.compile(r'^[ ]{2,4}(i{1,3}|iv|vi{0,3}|ix|xi{0,3})\.\s+(.+)$')  # i. ii. iii.
+    roman_upper_pattern = re.compile(r'^[ ]{2,4}(I{1,3}|IV|VI{0,3}|IX|XI{0,3})\.\s+(.+)$')  # I. II. III.
+
+    def close_list():
+        nonlocal in_itemize, in_enumerate, enumerate_type
+        if in_itemize:
+            result.append('\\end{itemize}')
+            in_itemize = False
+        if in_enumerate:
+            result.append('\\end{enumerate}')
+            in_enumerate = False
+            enumerate_type = None
+
+    for line in lines:
+        # Verificar lista itemizada
+        itemize_match = itemize_pattern.match(line)
+        if itemize_match:
+            if not in_itemize:
+                if in_enumerate:
+                    close_list()
+                result.append('\\begin{itemize}')
+                in_itemize = True
+            item_text = itemize_match.group(2)
+            result.append(f'    \\item {item_text}')
+            continue
+
+        # Verificar lista enumerada - arábico (1. 2. 3.)
+        arabic_match = arabic_pattern.match(line)
+        if arabic_match:
+            if not in_enumerate or enumerate_type != 'arabic':
+                close_list()
+                result.append('\\begin{enumerate}')
+                in_enumerate = True
+                enumerate_type = 'arabic'
+            item_text = arabic_match.group(2)
+            result.append(f'    \\item {item_text}')
+            continue
+
+        # Verificar lista enumerada - alfabético minúsculo (a) b) c))
+        alpha_lower_match = alpha_lower_pattern.match(line)
+        if alpha_lower_match:
+            if not in_enumerate or enumerate_type != 'alpha_lower':
+                close_list()
+                result.append('\\begin{enumerate}[label=\\alph*)]')
+                in_enumerate = True
+                enumerate_type = 'alpha_lower'
+            item_text = alpha_lower_match.group(2)
+            result.append(f'    \\item {item_text}')
+            continue
+
+        # Verificar lista enumerada - alfabético maiúsculo (A) B) C))
+        alpha_upper_match = alpha_upper_pattern.match(line)
+        if alpha_upper_match:
+            if not in_enumerate or enumerate_type != 'alpha_upper':
+                close_list()
+                result.append('\\begin{enumerate}[label=\\Alph*)]')
+                in_enumerate = True
+                enumerate_type = 'alpha_upper'
+            item_text = alpha_upper_match.group(2)
+            result.append(f'    \\item {item_text}')
+            continue
+
+        # Verificar lista enumerada - romano minúsculo (i. ii. iii.)
+        roman_lower_match = roman_lower_pattern.match(line)
+        if roman_lower_match and roman_lower_match.group(1).islower():
+            if not in_enumerate or enumerate_type != 'roman_lower':
+                close_list()
+                result.append('\\begin{enumerate}[label=\\roman*.]')
+                in_enumerate = True
+                enumerate_type = 'roman_lower'
+            item_text = roman_lower_match.group(2)
+            result.append(f'    \\item {item_text}')
+            continue
+
+        # Verificar lista enumerada - romano maiúsculo (I. II. III.)
+        if roman_upper_pattern.match(line):
+            roman_upper_match = roman_upper_pattern.match(line)
+            if not in_enumerate or enumerate_type != 'roman_upper':
+                close_list()
+                result.append('\\begin{enumerate}[label=\\Roman*.]')
+                in_enumerate = True
+                enumerate_type = 'roman_upper'
+            item_text = roman_upper_match.group(2)
+            result.append(f'    \\item {item_text}')
+            continue
+
+        # Linha não é item de lista
+        # Fechar listas abertas se linha não vazia (parágrafo normal)
+        if line.strip() and (in_itemize or in_enumerate):
+            close_list()
+
+        result.append(line)
+
+    # Fechar qualquer lista aberta no final
+    close_list()
+
+    return '\n'.join(result)
+
+
+def _processar_tabelas(texto: str) -> str:
+    """
+    Processa tabelas LaTeX e envolve com resizebox se necessário.
+
+    Tabelas que não estão envolvidas em resizebox são automaticamente
+    envolvidas para garantir que não ultrapassem os limites da página/coluna.
+
+    Args:
+        texto: Texto com possíveis tabelas LaTeX
+
+    Returns:
+        Texto com tabelas envolvidas em resizebox
+    """
+    # Padrão para encontrar tabelas que NÃO estão já em resizebox
+    # Procura por \begin{tabular} que não seja precedido por resizebox
+
+    def wrap_table(match):
+        tabular_content = match.group(0)
+        # Verifica se já está envolvido em resizebox (olhando o contexto antes)
+        return f"\\resizebox{{\\columnwidth}}{{!}}{{\n{tabular_content}\n}}"
+
+    # Primeiro, encontra todas as tabelas
+    # Padrão: \begin{tabular}...\end{tabular}
+    tabular_pattern = r'\\begin\{tabular\}.*?\\end\{tabular\}'
+
+    # Encontra tabelas que NÃO estão precedidas por resizebox
+    # Usa negative lookbehind para verificar se não há resizebox antes
+    # Nota: lookbehind tem limitações, então usamos abordagem diferente
+
+    # Abordagem: marca tabelas já em resizebox, processa as outras
+    # Padrão para resizebox existente
+    resizebox_pattern = r'\\resizebox\{[^}]*\}\{[^}]*\}\{[^}]*\\begin\{tabular\}.*?\\end\{tabular\}[^}]*\}'
+
+    # Salva os resizeboxes existentes com placeholders
+    preserved = {}
+    counter = [0]
+
+    def save_resizebox(match):
+        key = f"__RESIZEBOX_{counter[0]}__"
+        preserved[key] = match.group(0)
+        counter[0] += 1
+        return key
+
+    # Preserva resizeboxes existentes
+    texto = re.sub(resizebox_pattern, save_resizebox, texto, flags=re.DOTALL)
+
+    # Agora processa tabelas que não estão em resizebox
+    texto = re.sub(tabular_pattern, wrap_table, texto, flags=re.DOTALL)
+
+    # Restaura os resizeboxes preservados
+    for key, value in preserved.items():
+        texto = texto.replace(key, value)
+
+    return texto
+
+
+def processar_texto_legado(texto: str, centralizar: bool = True) -> str:
+    """
+    Aplica a cadeia de passes anterior ao compilador.
+
+    Args:
+        texto: Texto com a marcação do editor
+        centralizar: Se True, centraliza imagens; se False, usa minipage
+
+    Returns:
+        Fragmento LaTeX
+    """
+    texto = _processar_tabelas_visuais(texto)
+    texto = _processar_listas(texto)
+    texto = _processar_blocos_alinhamento(texto)
+    texto = _processar_formatacoes_html(texto)
+    texto = _escape_preservando_comandos(texto)
+    texto = _processar_imagens_inline(texto, centralizar=centralizar)
+    return _processar_tabelas(texto)
@@ -0,0 +1,57 @@
+"""
+Ações agendadas com executar_apos_commit: rodam no commit e são descartadas
+no rollback (índices em memória só recebem dados confirmados).
+"""
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.database import executar_apos_commit
+
+
+@pytest.fixture
+def session():
+    session = Session(create_engine('sqlite://'))
+    yield session
+    session.close()
+
+
+def test_executa_apos_commit(session):
+    chamadas = []
+    session.execute(text('SELECT 1'))
+    executar_apos_commit(session, lambda: chamadas.append('a'))
+    executar_apos_commit(session, lambda: chamadas.append('b'))
+    assert chamadas == []
+
+    session.commit()
+
+    assert chamadas == ['a', 'b']
+    session.commit()
+    assert chamadas == ['a', 'b']
+
+
+def test_descarta_no_rollback(session):
+    chamadas = []
+    session.execute(text('SELECT 1'))
+    executar_apos_commit(session, lambda: chamadas.append('desfeita'))
+    session.rollback()
+
+    session.execute(text('SELECT 1'))
+    executar_apos_commit(session, lambda: chamadas.append('confirmada'))
+    session.commit()
+
+    assert chamadas == ['confirmada']
+
+
+def test_erro_na_acao_nao_interrompe_as_demais(session):
+    chamadas = []
+    session.execute(text('SELECT 1'))
+    executar_apos_commit(session, lambda: 1 / 0)
+    executar_apos_commit(session, lambda: chamadas.append('ok'))
+
+    session.commit()
+
+    assert chamadas == ['ok']
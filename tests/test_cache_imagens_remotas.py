@@ -0,0 +1,152 @@
+"""
+Cache de imagens remotas contra um servidor HTTP local (http.server em thread):
+download, revalidação condicional (304), troca de ETag, uso offline e
+remoção LRU, e a chave do cache de artefatos seguindo o conteúdo remoto.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from src.application.services.cache_imagens_remotas import CacheImagensRemotas
+
+
+class _Servidor:
+    """Servidor local com recursos {caminho: (conteúdo, etag)} e registro das requisições"""
+
+    def __init__(self):
+        self.recursos = {}
+        self.requisicoes = []  # (caminho, If-None-Match, status)
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                condicional = self.headers.get('If-None-Match')
+                if self.path not in servidor.recursos:
+                    status, conteudo, etag = 404, b'', None
+                else:
+                    conteudo, etag = servidor.recursos[self.path]
+                    status = 304 if condicional is not None and condicional == etag else 200
+                servidor.requisicoes.append((self.path, condicional, status))
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'image/png')
+                self.send_header('Content-Length', '0' if status == 304 else str(len(conteudo)))
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(conteudo)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self, caminho: str) -> str:
+        return f"http://127.0.0.1:{self._http.server_address[1]}{caminho}"
+
+    def parar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+
+@pytest.fixture
+def servidor():
+    servidor = _Servidor()
+    yield servidor
+    servidor.parar()
+
+
+def test_primeiro_download(servidor, tmp_path):
+    servidor.recursos['/a.png'] = (b'imagem-a', '"v1"')
+    cache = CacheImagensRemotas(str(tmp_path))
+
+    arquivo = cache.obter(servidor.url('/a.png'))
+
+    assert arquivo.read_bytes() == b'imagem-a'
+    assert arquivo.parent == tmp_path / 'objetos'
+    # Dentro da validade não há nova requisição
+    assert cache.obter(servidor.url('/a.png')) == arquivo
+    assert servidor.requisicoes == [('/a.png', None, 200)]
+
+
+def test_revalidacao_com_304(servidor, tmp_path):
+    servidor.recursos['/a.png'] = (b'imagem-a', '"v1"')
+    cache = CacheImagensRemotas(str(tmp_path), validade=0)
+    arquivo = cache.obter(servidor.url('/a.png'))
+
+    assert cache.obter(servidor.url('/a.png')) == arquivo
+
+    assert servidor.requisicoes[-1] == ('/a.png', '"v1"', 304)
+    assert arquivo.read_bytes() == b'imagem-a'
+
+
+def test_etag_alterado_baixa_novo_conteudo(servidor, tmp_path):
+    servidor.recursos['/a.png'] = (b'imagem-a', '"v1"')
+    cache = CacheImagensRemotas(str(tmp_path), validade=0)
+    antigo = cache.obter(servidor.url('/a.png'))
+
+    servidor.recursos['/a.png'] = (b'imagem-a-editada', '"v2"')
+    novo = cache.obter(servidor.url('/a.png'))
+
+    assert servidor.requisicoes[-1] == ('/a.png', '"v1"', 200)
+    assert novo != antigo
+    assert novo.read_bytes() == b'imagem-a-editada'
+    # A revalidação seguinte usa o novo validador
+    cache.obter(servidor.url('/a.png'))
+    assert servidor.requisicoes[-1] == ('/a.png', '"v2"', 304)
+
+
+def test_usa_copia_em_cache_sem_rede(servidor, tmp_path):
+    servidor.recursos['/a.png'] = (b'imagem-a', '"v1"')
+    url = servidor.url('/a.png')
+    arquivo = CacheImagensRemotas(str(tmp_path)).obter(url)
+    servidor.parar()
+
+    offline = CacheImagensRemotas(str(tmp_path), validade=0)
+
+    assert offline.obter(url) == arquivo
+    assert offline.obter(servidor.url('/outra.png')) is None
+
+
+def test_remocao_lru_acima_do_limite(servidor, tmp_path):
+    for nome in ('a', 'b', 'c'):
+        servidor.recursos[f'/{nome}.png'] = (nome.encode() * 100, f'"{nome}"')
+    cache = CacheImagensRemotas(str(tmp_path), limite_bytes=250)
+    arquivo_a = cache.obter(servidor.url('/a.png'))
+    arquivo_b = cache.obter(servidor.url('/b.png'))
+    cache.obter(servidor.url('/a.png'))  # 'a' passa a ser o mais recente
+
+    arquivo_c = cache.obter(servidor.url('/c.png'))
+
+    assert arquivo_a.exists() and arquivo_c.exists()
+    assert not arquivo_b.exists()
+    assert cache._registro(servidor.url('/b.png')) is None
+    assert sorted(caminho.name for caminho in (tmp_path / 'objetos').iterdir()) == sorted(
+        [arquivo_a.name, arquivo_c.name]
+    )
+
+
+def test_chave_do_artefato_acompanha_o_conteudo_remoto(servidor, tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from src.application.services import cache_artefatos
+
+    cache = CacheImagensRemotas(str(tmp_path), validade=0)
+    monkeypatch.setattr(cache_artefatos, 'get_cache_imagens_remotas', lambda: cache)
+    servidor.recursos['/a.png'] = (b'imagem-a', '"v1"')
+    snapshot = SimpleNamespace(
+        codigo='L-1', titulo='Lista', tipo='LISTA', formulas=None, questoes=(), variantes={},
+        imagens=(servidor.url('/a.png'), 'local.png'), metadados_imagens={}
+    )
+    original = cache_artefatos.chave_snapshot(snapshot)
+    assert cache_artefatos.chave_snapshot(snapshot) == original
+
+    servidor.recursos['/a.png'] = (b'imagem-a-editada', '"v2"')
+
+    assert cache_artefatos.chave_snapshot(snapshot) != original
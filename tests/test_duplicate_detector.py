@@ -0,0 +1,60 @@
+"""
+Detector de duplicatas: encontrar_clusters agrupa enunciados quase iguais e
+o subcomando `duplicatas` do CLI imprime o relatório.
+"""
+import json
+from contextlib import nullcontext
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from src import cli
+
+BASE_A = 'Um trem parte da estacao as oito horas com velocidade constante de sessenta quilometros por hora rumo a capital'
+BASE_B = 'Determine as raizes reais da equacao do segundo grau x ao quadrado menos cinco x mais seis igual a zero'
+AVULSA = 'Quantos anagramas possui a palavra banana considerando as letras repetidas'
+
+
+def test_encontrar_clusters(detector):
+    detector.registrar('a1', BASE_A)
+    detector.registrar('a2', BASE_A + ' e chega ao destino')
+    detector.registrar('a3', BASE_A.upper())
+    detector.registrar('b1', BASE_B)
+    detector.registrar('b2', '$' + BASE_B + '$')
+    detector.registrar('avulsa', AVULSA)
+
+    clusters = detector.encontrar_clusters(0.7)
+
+    assert [sorted(uuid for uuid, _ in cluster) for cluster in clusters] == [['a1', 'a2', 'a3'], ['b1', 'b2']]
+    assert all(0.7 <= similaridade <= 1.0 for cluster in clusters for _, similaridade in cluster)
+    # Maiúsculas e LaTeX somem na normalização: assinaturas idênticas
+    assert [sorted(cluster) for cluster in detector.encontrar_clusters(1.0)] == [
+        [('a1', 1.0), ('a3', 1.0)], [('b1', 1.0), ('b2', 1.0)]
+    ]
+
+
+def test_encontrar_clusters_sem_duplicatas(detector):
+    detector.registrar('a1', BASE_A)
+    detector.registrar('b1', BASE_B)
+
+    assert detector.encontrar_clusters() == []
+
+
+def test_cli_duplicatas(session, cadastros, detector, monkeypatch, capsys):
+    from src.database import session_manager
+
+    primeira = cadastros.questao(enunciado=BASE_A, titulo='Trem')
+    segunda = cadastros.questao(enunciado=BASE_A + ' e chega ao destino', titulo='Trem de novo')
+    cadastros.questao(enunciado=AVULSA, titulo='Anagramas')
+    session.commit()
+    for questao in session.query(type(primeira)):
+        detector.registrar(questao.uuid, questao.enunciado)
+    monkeypatch.setattr(session_manager, 'session_scope', lambda: nullcontext(session))
+
+    assert cli.main(['duplicatas', '--limiar', '0.7', '--json']) == 0
+
+    relatorio = json.loads(capsys.readouterr().out)
+    assert len(relatorio) == 1
+    assert relatorio[0]['total'] == 2
+    assert {q['codigo'] for q in relatorio[0]['questoes']} == {primeira.codigo, segunda.codigo}
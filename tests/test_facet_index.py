@@ -0,0 +1,147 @@
+"""
+Índice de facetas: listar_questoes_principais pelos bitmaps deve devolver
+exatamente as mesmas questões que a consulta SQL com joins, inclusive depois
+de atualizações incrementais e de renomear uma fonte.
+"""
+import random
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('numpy')
+
+from src.models.orm import QuestaoVersao
+from src.repositories import QuestaoRepository
+from src.services import facet_index
+from src.services.facet_index import FacetIndex
+from src.services.questao_service import QuestaoService
+
+FONTES = ('ENEM', 'FUVEST', 'UNICAMP')
+DIFICULDADES = ('FACIL', 'MEDIO', 'DIFICIL')
+TIPOS = ('OBJETIVA', 'DISCURSIVA')
+TAGS = ('Álgebra', 'Geometria', 'Funções', 'Probabilidade')
+PALAVRAS = ('triângulo', 'parábola', 'dado', 'juros', 'círculo')
+
+FILTROS = [
+    {},
+    {'fonte': 'ENEM'},
+    {'fonte': ['ENEM', 'UNICAMP']},
+    {'fonte': 'INEXISTENTE'},
+    {'dificuldade': 'DIFICIL'},
+    {'tipo': 'DISCURSIVA'},
+    {'ano_inicio': 2018},
+    {'ano_fim': 2016},
+    {'ano_inicio': 2016, 'ano_fim': 2020},
+    {'fonte': 'FUVEST', 'dificuldade': 'MEDIO', 'tipo': 'OBJETIVA'},
+    {'fonte': 'ENEM', 'ano_inicio': 2017, 'ano_fim': 2022},
+    {'filter_mode': 'OR', 'fonte': 'ENEM', 'dificuldade': 'FACIL'},
+    {'filter_mode': 'OR', 'tipo': 'DISCURSIVA', 'ano_inicio': 2020, 'ano_fim': 2024},
+    {'titulo': 'parábola'},
+    {'titulo': 'juros', 'fonte': ['ENEM', 'FUVEST']},
+    {'titulo': 'círculo', 'filter_mode': 'OR', 'dificuldade': 'DIFICIL', 'tipo': 'OBJETIVA'},
+]
+
+
+def _filtros_com_tags(cadastros):
+    uuid = {nome: tag.uuid for nome, tag in cadastros.tags.items()}
+    return FILTROS + [
+        {'tags': [uuid['Geometria']]},
+        {'tags': [uuid['Álgebra'], uuid['Probabilidade']]},
+        {'tags': [uuid['Funções'], uuid['Geometria']], 'dificuldade': 'MEDIO'},
+        {'filter_mode': 'OR', 'tags': [uuid['Álgebra'], uuid['Funções']], 'fonte': 'UNICAMP'},
+        {'titulo': 'dado', 'tags': [uuid['Probabilidade']]},
+    ]
+
+
+@pytest.fixture
+def indice(monkeypatch):
+    indice = FacetIndex()
+    monkeypatch.setattr(facet_index, '_facet_index', indice)
+    return indice
+
+
+@pytest.fixture
+def banco(session, cadastros):
+    sorteio = random.Random(7)
+    for tag in TAGS:
+        cadastros.tag(tag)
+    questoes = []
+    for i in range(60):
+        palavra = sorteio.choice(PALAVRAS)
+        questoes.append(cadastros.questao(
+            enunciado=f'Questão {i} sobre {palavra}',
+            titulo=f'{palavra.capitalize()} {i}' if i % 3 else None,
+            tipo=sorteio.choice(TIPOS),
+            fonte=sorteio.choice(FONTES + (None,)),
+            ano=sorteio.choice([None] + list(range(2014, 2025))),
+            dificuldade=sorteio.choice(DIFICULDADES + (None,)),
+            tags=sorteio.sample(TAGS, sorteio.randint(0, 3)),
+        ))
+    questoes[0].ativo = False
+    session.add(QuestaoVersao(uuid_questao_original=questoes[1].uuid, uuid_questao_versao=questoes[2].uuid))
+    session.commit()
+    return questoes
+
+
+def _assert_paridade(session, cadastros):
+    repo = QuestaoRepository(session)
+    for filtros in _filtros_com_tags(cadastros):
+        por_indice = {q.uuid for q in repo.listar_questoes_principais(dict(filtros))}
+        por_sql = {q.uuid for q in repo._listar_questoes_principais_sql(dict(filtros))}
+        assert por_indice == por_sql, filtros
+
+
+def _sem_zeros(contagens):
+    return {faceta: {v: c for v, c in valores.items() if c} for faceta, valores in contagens.items()}
+
+
+def test_paridade_com_sql(session, cadastros, banco, indice):
+    indice.construir(session)
+
+    _assert_paridade(session, cadastros)
+    assert banco[0].uuid not in indice.filtrar()
+    assert banco[2].uuid not in indice.filtrar()
+
+
+def test_paridade_apos_atualizacoes_incrementais(session, cadastros, banco, indice, detector):
+    indice.construir(session)
+    service = QuestaoService(session)
+
+    nova = service.criar_questao(
+        tipo='DISCURSIVA', enunciado='Nova questão sobre parábola', titulo='Parábola nova',
+        fonte='FUVEST', ano=2019, dificuldade='DIFICIL', tags=['Geometria', 'Funções']
+    )
+    service.atualizar_questao(
+        banco[3].codigo, fonte='UNICAMP', ano=2015, dificuldade='FACIL',
+        tags=[cadastros.tags['Probabilidade'].uuid]
+    )
+    service.deletar_questao(banco[4].codigo)
+    service.reativar_questao(banco[0].codigo)
+    service.adicionar_tag(banco[5].codigo, 'Álgebra')
+    service.remover_tag(banco[6].codigo, banco[6].tags[0].nome if banco[6].tags else 'Álgebra')
+    session.commit()
+
+    assert nova['uuid'] in indice.filtrar()
+    _assert_paridade(session, cadastros)
+
+    reconstruido = FacetIndex()
+    reconstruido.construir(session)
+    assert sorted(reconstruido.filtrar()) == sorted(indice.filtrar())
+    assert _sem_zeros(reconstruido.contar_facetas()) == _sem_zeros(indice.contar_facetas())
+
+
+def test_renomear_fonte_mantem_filtros_e_contagens(session, cadastros, banco, indice):
+    indice.construir(session)
+    antes = QuestaoService(session).contar_facetas()['fonte']['ENEM']
+
+    cadastros.fontes['ENEM'].sigla = 'ENEM-INEP'
+    session.commit()
+
+    repo = QuestaoRepository(session)
+    por_indice = {q.uuid for q in repo.listar_questoes_principais({'fonte': 'ENEM-INEP'})}
+    por_sql = {q.uuid for q in repo._listar_questoes_principais_sql({'fonte': 'ENEM-INEP'})}
+    assert por_indice == por_sql and por_indice
+    assert repo.listar_questoes_principais({'fonte': 'ENEM'}) == []
+    contagens = QuestaoService(session).contar_facetas()['fonte']
+    assert contagens['ENEM-INEP'] == antes
+    assert 'ENEM' not in contagens
@@ -0,0 +1,63 @@
+"""
+Índices em memória alimentados pelo QuestaoService: só recebem a questão
+depois do commit, e um rollback não deixa rastro neles.
+"""
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('numpy')
+
+from src.services import facet_index
+from src.services.facet_index import FacetIndex
+from src.services.questao_service import QuestaoService
+
+ENUNCIADO = 'Calcule a area de um triangulo de base 4 e altura 3 em centimetros quadrados'
+
+
+@pytest.fixture
+def indice(session, monkeypatch):
+    indice = FacetIndex()
+    indice.construir(session)
+    monkeypatch.setattr(facet_index, '_facet_index', indice)
+    return indice
+
+
+def _criar(cadastros):
+    cadastros.tipo('OBJETIVA')
+    session = cadastros.session
+    session.commit()
+    return QuestaoService(session).criar_questao(tipo='OBJETIVA', enunciado=ENUNCIADO, titulo='Triângulo')
+
+
+def test_detector_recebe_questao_so_apos_commit(session, cadastros, detector):
+    questao = _criar(cadastros)
+    assert len(detector) == 0
+
+    session.commit()
+
+    assert questao['uuid'] in detector._assinaturas
+
+
+def test_detector_ignora_criacao_desfeita(session, cadastros, detector):
+    _criar(cadastros)
+    session.rollback()
+
+    assert len(detector) == 0
+    assert detector.buscar_similares(ENUNCIADO) == []
+
+
+def test_facetas_recebem_questao_so_apos_commit(session, cadastros, detector, indice):
+    questao = _criar(cadastros)
+    assert indice.filtrar() == []
+
+    session.commit()
+
+    assert indice.filtrar(('tipo', 'OBJETIVA')) == [questao['uuid']]
+
+
+def test_facetas_ignoram_criacao_desfeita(session, cadastros, detector, indice):
+    _criar(cadastros)
+    session.rollback()
+
+    assert indice.filtrar() == []
+    assert indice.filtrar(('tipo', 'OBJETIVA')) == []
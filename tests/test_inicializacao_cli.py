@@ -0,0 +1,43 @@
+"""
+Inicialização sem Qt: o CLI, o banco (ORM) e a camada de exportação devem
+carregar sem PyQt6 e dentro do orçamento de inicialização do CLI.
+"""
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from src.cli import ORCAMENTO_INICIALIZACAO_MS
+
+RAIZ = Path(__file__).resolve().parent.parent
+REPETICOES = 3
+MODULOS = ('src.cli', 'src.database', 'src.controllers.export_controller')
+
+_CODIGO = (
+    "import sys, time; inicio = time.perf_counter(); "
+    f"import {', '.join(MODULOS)}; "
+    "print((time.perf_counter() - inicio) * 1000, 'PyQt6' in sys.modules)"
+)
+
+
+def _importar_em_processo_novo():
+    resultado = subprocess.run(
+        [sys.executable, '-c', _CODIGO], cwd=RAIZ, capture_output=True, text=True
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    tempo, carregou_qt = resultado.stdout.split()
+    return float(tempo), carregou_qt == 'True'
+
+
+def test_camadas_sem_qt_dentro_do_orcamento():
+    medicoes = [_importar_em_processo_novo() for _ in range(REPETICOES)]
+
+    assert not any(carregou_qt for _, carregou_qt in medicoes), "PyQt6 carregado fora da interface"
+    configurado = os.getenv('CLI_ORCAMENTO_INICIALIZACAO_MS', '')
+    orcamento = float(configurado) if configurado.isdigit() else ORCAMENTO_INICIALIZACAO_MS
+    assert statistics.median(tempo for tempo, _ in medicoes) <= orcamento
@@ -0,0 +1,139 @@
+"""
+Verificação diferencial do compilador de marcação (markup_compiler).
+
+Compara a saída do compilador com a cadeia de passes anterior (markup_legado)
+sobre um corpus de enunciados e alternativas representativos. Os casos em que
+a cadeia antiga gerava LaTeX inválido ficam em DIVERGENCIAS, com a saída
+esperada do compilador.
+"""
+import pytest
+
+from src.application.services.markup_compiler import compilar_latex
+from tests.markup_legado import processar_texto_legado
+
+_TABELA_SIMPLES = (
+    "Observe a tabela:\n"
+    "[TABELA]\n"
+    "[CABECALHO]Substância | Massa (g) | Volume (mL)[/CABECALHO]\n"
+    "Água | 100 | 100\n"
+    "Álcool | 79 | 100\n"
+    "[/TABELA]\n"
+    "Qual a densidade do álcool?"
+)
+
+_TABELA_FORMATADA = (
+    "[TABELA]\n"
+    "[CABECALHO]<b>x</b> | y[/CABECALHO]\n"
+    "<i>1</i> | 10<sup>2</sup>\n"
+    "\n"
+    "3 | 50% & 7#\n"
+    "[COR:#ffcc00]2[/COR] | x ≤ 4\n"
+    "[/TABELA]"
+)
+
+# (descrição, texto, centralizar imagens)
+CORPUS = [
+    ("texto simples", "Um corpo parte do repouso e percorre 20 m em 4 s.", True),
+    ("acentos e pontuação", "Qual é a razão entre as áreas? (Considere π ≈ 3)", True),
+    ("vazio", "", True),
+    ("caracteres especiais", "Aumento de 20% no item #3 do edital.", True),
+    ("moeda", "Custa R$ 5,00 e o outro US$ 3,50.", True),
+    ("moeda colada", "Paguei R$5,00 à vista.", True),
+    ("matemática em linha", "Resolva $x^2 - 5x + 6 = 0$ em $\\mathbb{R}$.", True),
+    ("matemática destacada", "Calcule:\n$$\\int_0^1 x^2\\,dx$$\nJustifique.", True),
+    ("matemática e moeda", "Se $x = 2$, o preço é R$ 10,00.", True),
+    ("tag dentro de matemática", "$\\frac{1}{2<sup>101</sup>}$", False),
+    ("matemática entre colchetes", "Temos \\[ a^2 + b^2 = c^2 \\] e \\(a > 0\\).", True),
+    ("símbolos unicode", "x ≤ 3, y ≥ 2, z ≠ 0, 30°, ½ de 4, √2 e ∞ → ∅ · 1 ± 2 × 3 ÷ 4", True),
+    ("estrelas e marcas", "★ destaque ✓ certo ✗ errado ☆", True),
+    ("ordinal", "O 1º colocado.", True),
+    ("negrito e itálico", "Assinale a <b>incorreta</b> e a <i>mais provável</i>.", True),
+    ("sublinhado, sobrescrito e subscrito", "<u>Atenção</u>: 10<sup>3</sup> moléculas de H<sub>2</sub>O.", True),
+    ("formatação aninhada", "<b>Texto <i>muito</i> importante</b>", True),
+    ("tag sem fechamento", "Use <b> para negrito", True),
+    ("tag atravessando linha", "<b>início\nfim</b>", True),
+    ("comandos latex", "A razão é \\frac{1}{2} e \\textbf{destaque}.", True),
+    ("quebra de linha latex", "Primeira linha\\\\Segunda linha", True),
+    ("ambiente latex", "\\begin{align}\nx &= 1 \\\\\ny &= 2\n\\end{align}", True),
+    ("tabular digitado", "\\begin{tabular}{cc}\na & b \\\\\n\\hline\n10 & 20\n\\end{tabular}", True),
+    ("lista com marcadores", "Considere:\n   • primeira afirmação\n   • segunda afirmação\nEstá correto:", True),
+    ("lista numerada", "  1. um\n  2. dois\n  3. três", True),
+    ("lista alfabética minúscula", "   a) alfa\n   b) beta", True),
+    ("lista alfabética maiúscula", "   A) alfa\n   B) beta", True),
+    ("lista romana minúscula", "   i. primeiro\n   ii. segundo\n   iv. quarto", True),
+    ("lista romana maiúscula", "   I. primeiro\n   II. segundo\n   III. terceiro", True),
+    ("lista com linha em branco", "   • um\n\n   • dois\n\nDepois da lista.", True),
+    ("troca de tipo de lista", "   • item\n  1. número\n   a) letra", True),
+    ("lista com formatação", "   • <b>negrito</b> com $x^2$ e 10%", True),
+    ("lista no fim com linha vazia", "Itens:\n   • a\n   • b\n", True),
+    ("recuo insuficiente", " • não é lista\n1. também não", True),
+    ("centro", "[CENTRO]Texto centralizado[/CENTRO]", True),
+    ("fonte", "Texto citado.\n[FONTE]Disponível em: www.exemplo.com. Acesso em: 10 jan. 2024.[/FONTE]", True),
+    ("centro em várias linhas", "[CENTRO]\nlinha 1\nlinha 2\n[/CENTRO]", True),
+    ("centro com lista", "[CENTRO]\n   • a\n   • b\n[/CENTRO]", True),
+    ("centro sem fechamento", "[CENTRO]texto", True),
+    ("tabela simples", _TABELA_SIMPLES, True),
+    ("tabela formatada", _TABELA_FORMATADA, True),
+    ("tabela após lista", "   • item\n[TABELA]\nA | B\n1 | 2\n[/TABELA]\nFim", True),
+    ("tabela centralizada", "[CENTRO]\n[TABELA]\nA | B\n[/TABELA]\n[/CENTRO]", True),
+    ("duas tabelas", "[TABELA]\nA\n[/TABELA] meio [TABELA]\nB | C\n[/TABELA]", True),
+    ("imagem centralizada", "Observe a figura:\n[IMG:imagens/questoes/questao_1.png:0.7]\nResponda.", True),
+    ("imagem em alternativa", "[IMG:imagens/questoes/questao_1.png:0.5]", False),
+    ("imagem com caminho windows", "[IMG:C:\\Users\\prof\\figura.png:0.8]", True),
+    ("imagem remota", "[IMG:https://i.ibb.co/abc123/grafico.png:1.0]", True),
+    ("grega em modo matemático", "Seja $\\alpha + \\beta = \\pi$.", True),
+    ("cifrão com espaço", "Valor $ x$ e $ 5", True),
+    ("sublinhado e chaves literais", "arquivo_final {a} ~ ^", True),
+    ("imagem em item de lista", "   • [IMG:img.png:0.3]\n   • texto", True),
+    ("fonte em várias linhas", "[FONTE]\nAutor, 2020.\n[/FONTE]", True),
+    ("centro e fonte", "[CENTRO]<b>Título</b>[/CENTRO]\nTexto\n[FONTE]Fonte[/FONTE]", True),
+    ("vários parágrafos", "Primeiro parágrafo.\n\nSegundo parágrafo.\n", True),
+]
+
+# Casos em que a cadeia anterior gerava LaTeX incorreto:
+# (descrição, texto, centralizar imagens, saída esperada do compilador)
+DIVERGENCIAS = [
+    # Conteúdo das tags não era escapado
+    ("especial dentro de tag", "<b>50%</b> de R$ 3", True, "\\textbf{50\\%} de R\\$ 3"),
+    ("unicode dentro de tag", "<i>x ≤ y</i>", True, "\\textit{x $\\leq$ y}"),
+    # Matemática dentro de tag ficava como placeholder na saída
+    ("matemática dentro de tag", "<b>$x$</b> e <sup>$n$</sup>", True, "\\textbf{$x$} e \\textsuperscript{$n$}"),
+    # & fora de tabular era preservado
+    ("e comercial no texto", "Procter & Gamble", True, "Procter \\& Gamble"),
+    # Letras gregas viravam \$\alpha\$
+    ("letra grega isolada", "O ângulo \\alpha mede 30°.", True, "O ângulo $\\alpha$ mede 30$^\\circ$."),
+    # Caracteres já escapados eram escapados de novo
+    ("escape digitado", "Desconto de 10\\%", True, "Desconto de 10\\%"),
+    # \cellcolor interrompia a proteção da tabela e o restante era escapado duas vezes
+    (
+        "cor seguida de especial",
+        "[TABELA]\n[COR:#FF0000]a[/COR] | 50%\n[/TABELA]",
+        True,
+        "\\begin{center}\n\\small\n\\resizebox{0.8\\linewidth}{!}{%\n\\begin{tabular}{|c|c|}\n\\hline\n"
+        "\\cellcolor[HTML]{FF0000}a & 50\\% \\\\\n\\hline\n\\end{tabular}\n}\n\\end{center}",
+    ),
+    # Formatação aninhada em célula deixava um placeholder na saída
+    (
+        "formatação aninhada em célula",
+        "[TABELA]\n<b>x<sup>2</sup></b>\n[/TABELA]",
+        True,
+        "\\begin{center}\n\\small\n\\resizebox{0.8\\linewidth}{!}{%\n\\begin{tabular}{|c|}\n\\hline\n"
+        "\\textbf{x\\textsuperscript{2}} \\\\\n\\hline\n\\end{tabular}\n}\n\\end{center}",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "texto, centralizar", [(texto, centralizar) for _, texto, centralizar in CORPUS],
+    ids=[descricao for descricao, _, _ in CORPUS]
+)
+def test_paridade_com_cadeia_anterior(texto, centralizar):
+    assert compilar_latex(texto, centralizar) == processar_texto_legado(texto, centralizar)
+
+
+@pytest.mark.parametrize(
+    "texto, centralizar, esperado", [caso[1:] for caso in DIVERGENCIAS],
+    ids=[caso[0] for caso in DIVERGENCIAS]
+)
+def test_divergencias_corrigidas(texto, centralizar, esperado):
+    assert compilar_latex(texto, centralizar) == esperado
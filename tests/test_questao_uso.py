@@ -0,0 +1,44 @@
+"""
+Índice questao_uso: remoção definitiva de lista recalcula o uso das suas
+questões e falhas no recálculo são propagadas (a transação é desfeita).
+"""
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from src.models.orm import QuestaoUso
+from src.repositories import ListaRepository, QuestaoUsoRepository, RecalculoUsoError
+
+
+def _uso(session, questao):
+    return session.query(QuestaoUso).filter_by(uuid_questao=questao.uuid).first()
+
+
+def test_remover_lista_recalcula_uso(session, cadastros):
+    repo = ListaRepository(session)
+    questao = cadastros.questao()
+    antiga = repo.criar_lista('Antiga')
+    recente = repo.criar_lista('Recente')
+    assert repo.adicionar_questao(antiga.codigo, questao.codigo)
+    assert repo.adicionar_questao(recente.codigo, questao.codigo)
+    assert _uso(session, questao).total_usos == 2
+
+    assert repo.remover(recente.uuid)
+
+    uso = _uso(session, questao)
+    assert uso.total_usos == 1
+    assert uso.uuid_ultima_lista == antiga.uuid
+
+
+def test_falha_no_recalculo_e_propagada(session, cadastros, monkeypatch):
+    repo = ListaRepository(session)
+    questao = cadastros.questao()
+    lista = repo.criar_lista('Lista')
+
+    def falhar(*args, **kwargs):
+        raise RuntimeError('banco indisponível')
+
+    monkeypatch.setattr(QuestaoUsoRepository, '_consulta_agregada', falhar)
+
+    with pytest.raises(RecalculoUsoError):
+        repo.adicionar_questao(lista.codigo, questao.codigo)